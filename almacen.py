@@ -0,0 +1,394 @@
+import argparse
+import hmac
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# memoria:// (un proceso), sqlite:////ruta/almacen.db (procesos de un mismo host) o redis://host:puerto/db
+ALMACEN_URL = os.getenv("ALMACEN_URL", "memoria://")
+TIMEOUT_REDIS = float(os.getenv("ALMACEN_TIMEOUT", "2"))
+
+
+class AlmacenMemoria:
+    """
+    Almacén clave-valor del proceso.
+
+    Es el de por defecto: con una sola réplica no hace falta compartir nada.
+    También guarda los datos del servidor RESP local (`python almacen.py servir`).
+    """
+
+    compartido = False
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def _vigente(self, clave):
+        entrada = self._datos.get(clave)
+        if entrada is not None and entrada[1] is not None and entrada[1] <= time.monotonic():
+            del self._datos[clave]
+            return None
+        return entrada
+
+    def get(self, clave: str):
+        with self._lock:
+            entrada = self._vigente(clave)
+            return entrada[0] if entrada else None
+
+    def set(self, clave: str, valor: bytes, ttl: float = None):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ttl if ttl else None)
+
+    def agregar(self, clave: str, valor: bytes, ttl: float = None) -> bool:
+        """Guarda el valor solo si la clave no existe; devuelve si lo guardó"""
+        with self._lock:
+            if self._vigente(clave) is not None:
+                return False
+            self._datos[clave] = (valor, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def borrar(self, clave: str):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def incrementar(self, clave: str) -> int:
+        """Suma 1 al contador de la clave (0 si no existe) y devuelve el nuevo valor"""
+        with self._lock:
+            entrada = self._vigente(clave)
+            valor = int(entrada[0]) + 1 if entrada else 1
+            self._datos[clave] = (str(valor).encode("ascii"), entrada[1] if entrada else None)
+            return valor
+
+
+class AlmacenSQLite:
+    """
+    Almacén en un archivo SQLite en modo WAL, para varias réplicas en el mismo host.
+
+    Las lecturas no bloquean a las escrituras; las entradas vencidas se
+    ignoran al leer y se borran cada tanto al escribir.
+    """
+
+    compartido = True
+    ESCRITURAS_ENTRE_PURGAS = 1000
+
+    def __init__(self, ruta: str):
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None, timeout=5)
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS almacen (clave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL)"
+        )
+        self._lock = threading.Lock()
+        self._escrituras = 0
+
+    def _escribir(self, sql: str, parametros):
+        with self._lock:
+            self._escrituras += 1
+            if self._escrituras % self.ESCRITURAS_ENTRE_PURGAS == 0:
+                self.conexion.execute("DELETE FROM almacen WHERE expira <= ?", (time.time(),))
+            return self.conexion.execute(sql, parametros).fetchone()
+
+    def get(self, clave: str):
+        with self._lock:
+            fila = self.conexion.execute(
+                "SELECT valor FROM almacen WHERE clave = ? AND (expira IS NULL OR expira > ?)",
+                (clave, time.time())
+            ).fetchone()
+        if fila is None:
+            return None
+        # Los contadores se guardan como texto, igual que en Redis
+        return fila[0].encode("ascii") if isinstance(fila[0], str) else bytes(fila[0])
+
+    def set(self, clave: str, valor: bytes, ttl: float = None):
+        self._escribir(
+            "INSERT INTO almacen (clave, valor, expira) VALUES (?, ?, ?) "
+            "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira",
+            (clave, valor, time.time() + ttl if ttl else None)
+        )
+
+    def agregar(self, clave: str, valor: bytes, ttl: float = None) -> bool:
+        ahora = time.time()
+        fila = self._escribir(
+            "INSERT INTO almacen (clave, valor, expira) VALUES (?, ?, ?) "
+            "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira "
+            "WHERE almacen.expira IS NOT NULL AND almacen.expira <= ? RETURNING 1",
+            (clave, valor, ahora + ttl if ttl else None, ahora)
+        )
+        return fila is not None
+
+    def borrar(self, clave: str):
+        self._escribir("DELETE FROM almacen WHERE clave = ?", (clave,))
+
+    def incrementar(self, clave: str) -> int:
+        fila = self._escribir(
+            "INSERT INTO almacen (clave, valor) VALUES (?, '1') "
+            "ON CONFLICT (clave) DO UPDATE SET valor = CAST(CAST(CAST(valor AS TEXT) AS INTEGER) + 1 AS TEXT) "
+            "RETURNING valor",
+            (clave,)
+        )
+        return int(fila[0])
+
+
+class ErrorRedis(Exception):
+    """Respuesta de error del servidor (-ERR ...)"""
+
+
+def _comando_resp(*partes) -> bytes:
+    salida = [f"*{len(partes)}\r\n".encode("ascii")]
+    for parte in partes:
+        if not isinstance(parte, bytes):
+            parte = str(parte).encode("utf-8")
+        salida.append(f"${len(parte)}\r\n".encode("ascii") + parte + b"\r\n")
+    return b"".join(salida)
+
+
+def _leer_resp(archivo):
+    """Lee una respuesta RESP2 de un archivo de socket"""
+    linea = archivo.readline()
+    if not linea:
+        raise ConnectionError("El servidor cerró la conexión")
+    tipo, resto = linea[:1], linea[1:-2]
+    if tipo == b"+":
+        return resto.decode("utf-8")
+    if tipo == b"-":
+        raise ErrorRedis(resto.decode("utf-8"))
+    if tipo == b":":
+        return int(resto)
+    if tipo == b"$":
+        largo = int(resto)
+        if largo < 0:
+            return None
+        datos = archivo.read(largo + 2)
+        return datos[:-2]
+    if tipo == b"*":
+        largo = int(resto)
+        return None if largo < 0 else [_leer_resp(archivo) for _ in range(largo)]
+    raise ErrorRedis(f"Respuesta RESP no válida: {linea!r}")
+
+
+class AlmacenRedis:
+    """
+    Almacén en un servidor que hable el protocolo de Redis (RESP2).
+
+    Solo usa GET, SET (PX y NX), DEL e INCR, así que sirve Redis, Valkey,
+    KeyDB o el servidor local de este módulo. Mantiene una conexión por
+    proceso y la reabre una vez si se cae.
+    """
+
+    compartido = True
+
+    def __init__(self, url: str):
+        partes = urlparse(url)
+        self.host = partes.hostname or "localhost"
+        self.puerto = partes.port or 6379
+        self.base = int(partes.path.lstrip("/") or 0)
+        self.clave_acceso = partes.password
+        self._socket = None
+        self._archivo = None
+        self._lock = threading.Lock()
+
+    def _conectar(self):
+        self._socket = socket.create_connection((self.host, self.puerto), timeout=TIMEOUT_REDIS)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._archivo = self._socket.makefile("rb")
+        if self.clave_acceso:
+            self._enviar("AUTH", self.clave_acceso)
+        if self.base:
+            self._enviar("SELECT", self.base)
+
+    def _cerrar(self):
+        if self._socket is not None:
+            try:
+                self._archivo.close()
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = self._archivo = None
+
+    def _enviar(self, *partes):
+        self._socket.sendall(_comando_resp(*partes))
+        return _leer_resp(self._archivo)
+
+    def ejecutar(self, *partes):
+        with self._lock:
+            for intento in range(2):
+                try:
+                    if self._socket is None:
+                        self._conectar()
+                    return self._enviar(*partes)
+                except (OSError, ConnectionError):
+                    self._cerrar()
+                    if intento:
+                        raise
+
+    def get(self, clave: str):
+        return self.ejecutar("GET", clave)
+
+    def set(self, clave: str, valor: bytes, ttl: float = None):
+        if ttl:
+            self.ejecutar("SET", clave, valor, "PX", max(1, int(ttl * 1000)))
+        else:
+            self.ejecutar("SET", clave, valor)
+
+    def agregar(self, clave: str, valor: bytes, ttl: float = None) -> bool:
+        extra = ("PX", max(1, int(ttl * 1000))) if ttl else ()
+        return self.ejecutar("SET", clave, valor, "NX", *extra) is not None
+
+    def borrar(self, clave: str):
+        self.ejecutar("DEL", clave)
+
+    def incrementar(self, clave: str) -> int:
+        return self.ejecutar("INCR", clave)
+
+
+def crear_almacen(url: str = ALMACEN_URL):
+    """Crea el almacén indicado por la URL (memoria://, sqlite:///ruta o redis://host:puerto/db)"""
+    esquema = urlparse(url).scheme
+    if esquema in ("", "memoria"):
+        return AlmacenMemoria()
+    if esquema == "sqlite":
+        # Como en SQLAlchemy: sqlite:///relativa.db o sqlite:////ruta/absoluta.db
+        return AlmacenSQLite(url[len("sqlite:///"):])
+    if esquema in ("redis", "resp"):
+        return AlmacenRedis(url)
+    raise ValueError(f"Almacén no soportado: {url}")
+
+
+_almacen = None
+_almacen_lock = threading.Lock()
+
+
+def get_almacen():
+    """Devuelve el almacén compartido del proceso, creándolo según ALMACEN_URL en el primer uso"""
+    global _almacen
+    if _almacen is None:
+        with _almacen_lock:
+            if _almacen is None:
+                _almacen = crear_almacen()
+    return _almacen
+
+
+def configurar_almacen(almacen=None):
+    """Reemplaza el almacén del proceso (p. ej. por uno de pruebas); None vuelve al de ALMACEN_URL"""
+    global _almacen
+    with _almacen_lock:
+        _almacen = almacen
+
+
+# ------------------------------------------------------------------
+# Servidor RESP local (reemplazo de Redis para desarrollo y pruebas)
+# ------------------------------------------------------------------
+
+class _ManejadorRESP(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        autenticado = self.server.clave_acceso is None
+        while True:
+            try:
+                comando = _leer_resp(self.rfile)
+            except (ConnectionError, ErrorRedis, ValueError):
+                return
+            try:
+                if comando[0].upper() == b"AUTH":
+                    autenticado = self.server.autenticar(comando[1:])
+                    respuesta = "OK" if autenticado else ErrorRedis("WRONGPASS clave de acceso incorrecta")
+                elif not autenticado:
+                    respuesta = ErrorRedis("NOAUTH se requiere AUTH")
+                else:
+                    respuesta = self.server.ejecutar(comando)
+            except Exception as e:
+                respuesta = ErrorRedis(f"ERR {e}")
+            self.wfile.write(_codificar(respuesta))
+
+
+def _codificar(valor) -> bytes:
+    if isinstance(valor, ErrorRedis):
+        return f"-{valor}\r\n".encode("utf-8")
+    if valor is None:
+        return b"$-1\r\n"
+    if isinstance(valor, bool):
+        return b"+OK\r\n" if valor else b"$-1\r\n"
+    if isinstance(valor, int):
+        return f":{valor}\r\n".encode("ascii")
+    if isinstance(valor, str):
+        return f"+{valor}\r\n".encode("utf-8")
+    return f"${len(valor)}\r\n".encode("ascii") + valor + b"\r\n"
+
+
+class ServidorRESP(socketserver.ThreadingTCPServer):
+    """
+    Servidor mínimo con el protocolo de Redis respaldado por AlmacenMemoria.
+
+    Atiende los comandos que usa AlmacenRedis (PING, GET, SET con PX/EX/NX,
+    DEL, INCR, SELECT, FLUSHDB), suficiente para correr varias réplicas de la
+    app en una máquina sin instalar Redis. Con `clave_acceso` cada conexión
+    debe enviar AUTH con esa clave antes de cualquier otro comando.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, direccion=("127.0.0.1", 6379), clave_acceso: str = None):
+        super().__init__(direccion, _ManejadorRESP)
+        self.almacen = AlmacenMemoria()
+        self.clave_acceso = clave_acceso
+
+    def autenticar(self, args) -> bool:
+        """AUTH [usuario] clave: compara la clave en tiempo constante"""
+        if self.clave_acceso is None:
+            return True
+        if not args:
+            return False
+        return hmac.compare_digest(args[-1], self.clave_acceso.encode("utf-8"))
+
+    def ejecutar(self, comando):
+        nombre = comando[0].decode("ascii").upper()
+        args = comando[1:]
+        if nombre == "PING":
+            return "PONG"
+        if nombre == "SELECT":
+            return "OK"
+        if nombre == "GET":
+            return self.almacen.get(args[0].decode("utf-8"))
+        if nombre == "SET":
+            clave, valor, opciones = args[0].decode("utf-8"), args[1], [a.decode("ascii").upper() for a in args[2:]]
+            ttl = None
+            if "PX" in opciones:
+                ttl = int(opciones[opciones.index("PX") + 1]) / 1000
+            elif "EX" in opciones:
+                ttl = int(opciones[opciones.index("EX") + 1])
+            if "NX" in opciones:
+                return self.almacen.agregar(clave, valor, ttl)
+            self.almacen.set(clave, valor, ttl)
+            return "OK"
+        if nombre == "DEL":
+            existian = sum(self.almacen.get(a.decode("utf-8")) is not None for a in args)
+            for a in args:
+                self.almacen.borrar(a.decode("utf-8"))
+            return existian
+        if nombre == "INCR":
+            return self.almacen.incrementar(args[0].decode("utf-8"))
+        if nombre == "FLUSHDB":
+            self.almacen = AlmacenMemoria()
+            return "OK"
+        return ErrorRedis(f"ERR comando no soportado '{nombre}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local con el protocolo de Redis")
+    parser.add_argument("accion", choices=["servir"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=6379)
+    args = parser.parse_args()
+
+    # La clave va en una variable de entorno y no en la línea de comandos (visible en `ps`)
+    clave_acceso = os.getenv("ALMACEN_CLAVE")
+    if clave_acceso is None and args.host not in ("127.0.0.1", "localhost", "::1"):
+        parser.error("para escuchar fuera de localhost definir ALMACEN_CLAVE")
+    with ServidorRESP((args.host, args.puerto), clave_acceso=clave_acceso) as servidor:
+        print(f"Escuchando en redis://{args.host}:{args.puerto}")
+        servidor.serve_forever()
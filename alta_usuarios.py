@@ -0,0 +1,215 @@
+import argparse
+import csv
+import getpass
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from conexion import get_supabase_client
+from autenticacion import costo_bcrypt, olvidar_correo, olvidar_rechazos
+from register import validar_email, validar_password
+
+ROLES = ("admin", "operador_reservas", "consultor", "registrador_eventos")
+ROL_POR_DEFECTO = "consultor"
+
+# Filas por cada INSERT múltiple y correos por cada consulta in_()
+TAM_LOTE_INSERT = 500
+TAM_LOTE_CONSULTA = 200
+
+
+def leer_archivo(ruta: str) -> list:
+    """Lee las filas a dar de alta de un CSV (con encabezado) o de un JSON con una lista de objetos"""
+    if ruta.lower().endswith(".json"):
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    with open(ruta, encoding="utf-8-sig", newline="") as archivo:
+        return list(csv.DictReader(archivo))
+
+
+def _validar(filas: list, rol_por_defecto: str):
+    """
+    Normaliza y valida las filas.
+
+    Returns:
+        tuple: (válidas como (número de fila, usuario, contraseña), reporte de rechazos)
+    """
+    validas, rechazos, vistos = [], [], set()
+    for numero, fila in enumerate(filas, start=1):
+        nombre = str(fila.get("nombre") or "").strip()
+        email = str(fila.get("email") or "").strip().lower()
+        password = str(fila.get("password") or "")
+        rol = str(fila.get("rol") or rol_por_defecto).strip()
+
+        if len(nombre) < 3:
+            motivo = "El nombre debe tener al menos 3 caracteres"
+        elif not validar_email(email):
+            motivo = "El formato del correo electrónico no es válido"
+        elif rol not in ROLES:
+            motivo = f"Rol inválido: {rol}"
+        elif email in vistos:
+            motivo = "Correo repetido en el archivo"
+        else:
+            es_valida, motivo = validar_password(password)
+            motivo = None if es_valida else motivo
+
+        if motivo:
+            rechazos.append({"fila": numero, "email": email, "estado": "rechazado", "motivo": motivo})
+            continue
+        vistos.add(email)
+        validas.append((numero, {"nombre": nombre, "email": email, "rol": rol}, password))
+    return validas, rechazos
+
+
+def _correos_existentes(emails: list) -> set:
+    """Correos que ya tienen usuario, con una consulta in_() por lote en lugar de una por fila"""
+    supabase = get_supabase_client()
+    existentes = set()
+    for inicio in range(0, len(emails), TAM_LOTE_CONSULTA):
+        lote = emails[inicio:inicio + TAM_LOTE_CONSULTA]
+        res = supabase.table("usuarios").select("email").in_("email", lote).execute()
+        existentes.update(f["email"] for f in res.data)
+    return existentes
+
+
+def _hashear(password: str, costo: int) -> str:
+    # Función de módulo para que el pool de procesos pueda serializarla
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(costo)).decode("utf-8")
+
+
+def _hashear_todas(passwords: list, procesos: int = None) -> list:
+    """Calcula los hashes en un proceso por núcleo"""
+    if not passwords:
+        return []
+    costo = costo_bcrypt()
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        tam = max(1, len(passwords) // (procesos * 4))
+        return list(pool.map(_hashear, passwords, [costo] * len(passwords), chunksize=tam))
+
+
+def alta_masiva(filas: list, rol_por_defecto: str = ROL_POR_DEFECTO, procesos: int = None,
+                tam_lote: int = TAM_LOTE_INSERT):
+    """
+    Da de alta muchos usuarios a la vez.
+
+    Los correos ya registrados se descartan antes de hashear. Los lotes se
+    insertan con ON CONFLICT (email) DO NOTHING, así que un alta simultánea
+    con el mismo correo no hace fallar el lote: esa fila se informa como
+    existente.
+
+    Returns:
+        dict: success, creados, rechazados y `data` con una entrada por fila
+              (fila, email, estado 'creado', 'existente' o 'rechazado')
+    """
+    validas, reporte = _validar(filas, rol_por_defecto)
+    creados = 0
+    try:
+        existentes = _correos_existentes([u["email"] for _, u, _ in validas])
+        reporte.extend(
+            {"fila": numero, "email": u["email"], "estado": "existente"}
+            for numero, u, _ in validas if u["email"] in existentes
+        )
+        nuevas = [(numero, u, p) for numero, u, p in validas if u["email"] not in existentes]
+
+        hashes = _hashear_todas([p for _, _, p in nuevas], procesos)
+        registros = [dict(u, password=h) for (_, u, _), h in zip(nuevas, hashes)]
+
+        supabase = get_supabase_client()
+        for inicio in range(0, len(registros), tam_lote):
+            lote = registros[inicio:inicio + tam_lote]
+            insertados = {
+                f["email"]: f["id"]
+                for f in supabase.table("usuarios")
+                    .upsert(lote, on_conflict="email", ignore_duplicates=True)
+                    .execute().data
+            }
+            for numero, usuario, _ in nuevas[inicio:inicio + tam_lote]:
+                email = usuario["email"]
+                if email in insertados:
+                    creados += 1
+                    olvidar_correo(email)
+                    reporte.append({"fila": numero, "email": email, "estado": "creado", "id": insertados[email]})
+                else:
+                    reporte.append({"fila": numero, "email": email, "estado": "existente"})
+    except Exception as e:
+        return {"success": False, "message": f"Error en el alta masiva: {str(e)}",
+                "creados": creados, "data": sorted(reporte, key=lambda r: r["fila"])}
+
+    reporte.sort(key=lambda r: r["fila"])
+    return {
+        "success": True,
+        "creados": creados,
+        "rechazados": sum(r["estado"] == "rechazado" for r in reporte),
+        "data": reporte
+    }
+
+
+def restablecer_admin(email: str, password: str):
+    """
+    Cambia la contraseña de un administrador existente.
+
+    Sirve para recuperar admin@club.com en las bases donde la migración 010
+    dejó su contraseña inutilizable: el alta masiva lo informa como
+    existente y no lo toca.
+
+    Returns:
+        dict: success y un mensaje
+    """
+    email = email.strip().lower()
+    es_valida, motivo = validar_password(password)
+    if not es_valida:
+        return {"success": False, "message": motivo}
+    try:
+        res = get_supabase_client().table("usuarios")\
+            .update({"password": _hashear(password, costo_bcrypt())})\
+            .eq("email", email)\
+            .eq("rol", "admin")\
+            .execute()
+    except Exception as e:
+        return {"success": False, "message": f"Error al restablecer la contraseña: {str(e)}"}
+    if not res.data:
+        return {"success": False, "message": f"No hay un administrador con el correo {email}"}
+    olvidar_rechazos()
+    return {"success": True, "message": f"Contraseña restablecida para {email}"}
+
+
+def fila_admin(email: str, nombre: str = "Administrador") -> dict:
+    """
+    Fila para dar de alta un administrador (el primero, al instalar).
+
+    La contraseña se toma de ALTA_ADMIN_PASSWORD o se pide por consola: no
+    queda en ningún archivo ni en el historial de la terminal.
+    """
+    password = os.getenv("ALTA_ADMIN_PASSWORD") or getpass.getpass(f"Contraseña para {email}: ")
+    return {"nombre": nombre, "email": email, "password": password, "rol": "admin"}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alta masiva de usuarios desde un CSV o JSON")
+    parser.add_argument("archivo", nargs="?", help="CSV o JSON con nombre, email, password y rol (opcional)")
+    parser.add_argument("--admin", metavar="CORREO", help="dar de alta un administrador en lugar de leer un archivo")
+    parser.add_argument("--restablecer", action="store_true",
+                        help="con --admin: cambiar la contraseña de un administrador existente")
+    parser.add_argument("--nombre", default="Administrador", help="nombre del administrador de --admin")
+    parser.add_argument("--rol", default=ROL_POR_DEFECTO, choices=ROLES, help="rol de las filas sin rol")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos para hashear (por defecto, uno por núcleo)")
+    parser.add_argument("--reporte", help="archivo JSON donde guardar el detalle por fila")
+    args = parser.parse_args()
+    if bool(args.archivo) == bool(args.admin):
+        parser.error("indicar un archivo o --admin CORREO")
+    if args.restablecer and not args.admin:
+        parser.error("--restablecer requiere --admin CORREO")
+
+    if args.restablecer:
+        resultado = restablecer_admin(args.admin, fila_admin(args.admin)["password"])
+        print(resultado["message"])
+        raise SystemExit(0 if resultado["success"] else 1)
+
+    filas = [fila_admin(args.admin, args.nombre)] if args.admin else leer_archivo(args.archivo)
+    resultado = alta_masiva(filas, args.rol, args.procesos)
+    if args.reporte:
+        with open(args.reporte, "w", encoding="utf-8") as salida:
+            json.dump(resultado["data"], salida, indent=2, ensure_ascii=False)
+    print(json.dumps({k: v for k, v in resultado.items() if k != "data"}, indent=2, ensure_ascii=False))
+    if args.admin and any(r["estado"] == "existente" for r in resultado["data"]):
+        print(f"{args.admin} ya existe: para cambiar su contraseña, agregar --restablecer")
@@ -1,6 +1,7 @@
 import streamlit as st
 from conexion import get_supabase_client
-import bcrypt
+from autenticacion import autenticar, hashear_contrasena, olvidar_correo
+from contexto_cliente import contexto_sesion
 from datetime import datetime
 import re
 from dashboard import mostrar_dashboard 
@@ -13,7 +14,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-from session_manager import check_authentication, login_user, logout_user
+from session_manager import check_authentication, login_user, logout_user, guardar_parametro
 
 
 
@@ -26,20 +27,16 @@ def mostrar_formulario_login():
         
         if submitted:
             if email and password:
-                supabase = get_supabase_client()
-                res = supabase.table("usuarios").select("*").eq("email", email).execute()
-                
-                if not res.data:
-                    st.error("❌ Usuario no encontrado")
-                    return
+                # Verificación limitada por cuenta e IP, con bcrypt fuera del hilo del script
+                resultado = autenticar(email, password, ip=contexto_sesion()["ip_acceso"])
                 
-                usuario = res.data[0]
-                if bcrypt.checkpw(password.encode("utf-8"), usuario["password"].encode("utf-8")):
+                if resultado["success"]:
+                    usuario = resultado["data"]
                     st.success(f"✅ Bienvenido, {usuario['nombre']}!")
                     login_user(usuario)
                     st.rerun()
                 else:
-                    st.error("❌ Contraseña incorrecta")
+                    st.error(f"❌ {resultado['message']}")
             else:
                 st.warning("Por favor, complete todos los campos")
 
@@ -94,7 +91,7 @@ def mostrar_formulario_registro():
                     return
                 
                 # Hashear la contraseña
-                hashed_pw = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+                hashed_pw = hashear_contrasena(password)
                 
                 # Preparar datos para inserción
                 data = {
@@ -108,9 +105,10 @@ def mostrar_formulario_registro():
                 resultado = supabase.table("usuarios").insert(data).execute()
                 
                 if resultado.data:
+                    olvidar_correo(email)
                     st.success("✅ Usuario registrado correctamente")
                     # Iniciar sesión automáticamente
-                    st.session_state.usuario = resultado.data[0]
+                    login_user(resultado.data[0])
                     st.rerun()  # Cambio aquí
                 else:
                     st.error("❌ Error al registrar el usuario")
@@ -139,7 +137,7 @@ def main():
                     mostrar_formulario_registro()
     else:
         # Si el usuario está logueado, mostrar dashboard
-        st.query_params["layout"] = "wide"
+        guardar_parametro("layout", "wide")
         mostrar_dashboard()
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from conexion import get_supabase_client, consultar_paginado
+from bitacora import aplicar_filtros
+
+# Meses completos que quedan en la tabla además del actual; los anteriores se archivan
+RETENCION_MESES = int(os.getenv("BITACORA_RETENCION_MESES", "6"))
+# Particiones que se crean por adelantado (migración 007)
+MESES_ADELANTE = int(os.getenv("BITACORA_MESES_ADELANTE", "3"))
+CARPETA_ARCHIVO = os.getenv("BITACORA_CARPETA_ARCHIVO", "archivo_bitacora")
+ARCHIVO_INDICE = "indice.json"
+
+COLUMNAS_ARCHIVO = (
+    "id, usuario_id, nombre_usuario, sesion_id, navegador, ip_acceso, nombre_maquina, "
+    "tipo_accion, tabla_afectada, descripcion, fecha_hora_ingreso, fecha_hora_salida"
+)
+
+# Esquema fijo: un mes sin valores en una columna no cambia su tipo en el archivo,
+# y los meses archivados antes de agregar una columna la leen como nula
+ESQUEMA = pa.schema([
+    ("id", pa.int64()),
+    ("usuario_id", pa.int64()),
+    ("nombre_usuario", pa.string()),
+    ("sesion_id", pa.string()),
+    ("navegador", pa.string()),
+    ("ip_acceso", pa.string()),
+    ("nombre_maquina", pa.string()),
+    ("tipo_accion", pa.string()),
+    ("tabla_afectada", pa.string()),
+    ("descripcion", pa.string()),
+    ("fecha_hora_ingreso", pa.timestamp("us")),
+    ("fecha_hora_salida", pa.timestamp("us"))
+])
+COLUMNAS_FECHA = ("fecha_hora_ingreso", "fecha_hora_salida")
+
+
+def _mes_siguiente(mes: date) -> date:
+    return (mes.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def corte_retencion(retencion_meses: int = RETENCION_MESES, hoy: date = None) -> date:
+    """Primer día del mes más antiguo que se conserva en la tabla"""
+    mes = (hoy or date.today()).replace(day=1)
+    for _ in range(retencion_meses):
+        mes = (mes - timedelta(days=1)).replace(day=1)
+    return mes
+
+
+def _a_fecha(valor):
+    # Sin zona: la columna es TIMESTAMP y el archivo guarda la hora tal como está en la tabla
+    return datetime.fromisoformat(valor).replace(tzinfo=None) if isinstance(valor, str) else valor
+
+
+def _a_tabla(filas: list) -> pa.Table:
+    for fila in filas:
+        for columna in COLUMNAS_FECHA:
+            fila[columna] = _a_fecha(fila.get(columna))
+    return pa.Table.from_pylist(filas, schema=ESQUEMA)
+
+
+def leer_indice(carpeta: str = CARPETA_ARCHIVO) -> dict:
+    """Índice del archivo: por cada Parquet, su mes, rango de fechas e ids y cantidad de filas"""
+    ruta = os.path.join(carpeta, ARCHIVO_INDICE)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _guardar_indice(carpeta: str, indice: dict):
+    ruta = os.path.join(carpeta, ARCHIVO_INDICE)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump(indice, archivo, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _escribir_mes(carpeta: str, mes: date, filas: list) -> dict:
+    """
+    Guarda las filas de un mes en bitacora_AAAA_MM.parquet.
+
+    Si el mes ya tenía archivo (una ejecución anterior que no llegó a
+    descartar el mes, o filas que llegaron tarde) se une con el existente.
+    El archivo se escribe aparte y se renombra recién cuando está completo.
+    """
+    nombre = f"bitacora_{mes:%Y_%m}.parquet"
+    ruta = os.path.join(carpeta, nombre)
+    tabla = _a_tabla(filas)
+    if os.path.exists(ruta):
+        anterior = pq.read_table(ruta, schema=ESQUEMA)
+        anterior = anterior.filter(pc.invert(pc.is_in(anterior["id"], value_set=tabla["id"])))
+        tabla = pa.concat_tables([anterior, tabla])
+    # Ordenado por fecha, las estadísticas de cada row group permiten saltear los que no entran en un rango
+    tabla = tabla.sort_by([("fecha_hora_ingreso", "ascending"), ("id", "ascending")])
+
+    pq.write_table(tabla, ruta + ".tmp", compression="zstd", row_group_size=65536)
+    if pq.read_metadata(ruta + ".tmp").num_rows != tabla.num_rows:
+        os.remove(ruta + ".tmp")
+        raise IOError(f"No se pudo verificar {nombre}")
+    os.replace(ruta + ".tmp", ruta)
+
+    ingresos = tabla["fecha_hora_ingreso"]
+    return {
+        "archivo": nombre,
+        "mes": mes.isoformat(),
+        "desde": pc.min(ingresos).as_py().isoformat(),
+        "hasta": pc.max(ingresos).as_py().isoformat(),
+        "id_min": pc.min(tabla["id"]).as_py(),
+        "id_max": pc.max(tabla["id"]).as_py(),
+        "filas": tabla.num_rows,
+        "archivado_en": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+
+
+def archivar(retencion_meses: int = RETENCION_MESES, carpeta: str = CARPETA_ARCHIVO, hoy: date = None):
+    """
+    Mueve los meses vencidos de la bitácora a archivos Parquet comprimidos.
+
+    Primero crea las particiones de los próximos meses. Después, por cada
+    mes anterior a la retención: descarga sus filas, las escribe en Parquet,
+    actualiza el índice y recién entonces elimina el mes de la tabla (DROP de
+    la partición). La base se niega a eliminar el mes si la cantidad de filas
+    no coincide con la archivada, así que un fallo a mitad de camino no
+    pierde registros: el mes se vuelve a archivar en la próxima ejecución.
+
+    Returns:
+        dict: success, `data` con la entrada del índice de cada mes archivado
+              y `particiones` con las particiones creadas
+    """
+    supabase = get_supabase_client()
+    corte = corte_retencion(retencion_meses, hoy)
+    archivados = []
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        creadas = supabase.rpc("bitacora_crear_particiones", {"p_meses_adelante": MESES_ADELANTE}).execute().data
+        meses = supabase.rpc("bitacora_meses", {"p_antes": corte.isoformat()}).execute().data
+
+        indice = leer_indice(carpeta)
+        for fila in meses:
+            mes = date.fromisoformat(fila["mes"][:10])
+            filas = consultar_paginado(
+                "bitacora", COLUMNAS_ARCHIVO,
+                lambda q: q.gte("fecha_hora_ingreso", mes.isoformat())
+                           .lt("fecha_hora_ingreso", _mes_siguiente(mes).isoformat())
+            )
+            if not filas:
+                continue
+            entrada = _escribir_mes(carpeta, mes, filas)
+            indice[entrada["archivo"]] = entrada
+            _guardar_indice(carpeta, indice)
+            supabase.rpc("bitacora_descartar_mes", {"p_mes": mes.isoformat(), "p_filas": len(filas)}).execute()
+            archivados.append(entrada)
+    except Exception as e:
+        return {"success": False, "message": f"Error al archivar la bitácora: {str(e)}", "data": archivados}
+
+    return {"success": True, "data": archivados, "particiones": [p["particion"] for p in creadas or []]}
+
+
+def _leer_archivo(carpeta: str, filtros: dict) -> pa.Table:
+    """Filas archivadas que cumplen los filtros; solo se abren los meses que se cruzan con desde/hasta"""
+    desde = datetime.combine(filtros["desde"], datetime.min.time()) if filtros.get("desde") else None
+    hasta = datetime.combine(filtros["hasta"] + timedelta(days=1), datetime.min.time()) if filtros.get("hasta") else None
+
+    condiciones = []
+    if desde:
+        condiciones.append(("fecha_hora_ingreso", ">=", desde))
+    if hasta:
+        condiciones.append(("fecha_hora_ingreso", "<", hasta))
+    if filtros.get("tipo_accion"):
+        condiciones.append(("tipo_accion", "=", filtros["tipo_accion"]))
+    if filtros.get("tabla_afectada"):
+        condiciones.append(("tabla_afectada", "=", filtros["tabla_afectada"]))
+
+    tablas = []
+    for entrada in leer_indice(carpeta).values():
+        if desde and datetime.fromisoformat(entrada["hasta"]) < desde:
+            continue
+        if hasta and datetime.fromisoformat(entrada["desde"]) >= hasta:
+            continue
+        tabla = pq.read_table(os.path.join(carpeta, entrada["archivo"]), schema=ESQUEMA,
+                              filters=condiciones or None)
+        if filtros.get("usuario"):
+            coincide = pc.match_substring(tabla["nombre_usuario"], filtros["usuario"], ignore_case=True)
+            tabla = tabla.filter(pc.fill_null(coincide, False))
+        tablas.append(tabla)
+    return pa.concat_tables(tablas) if tablas else ESQUEMA.empty_table()
+
+
+def consultar_historial(filtros: dict = None, limite: int = 1000, carpeta: str = CARPETA_ARCHIVO):
+    """
+    Busca en la bitácora y en su archivo con los mismos filtros que el visor.
+
+    Devuelve hasta `limite` filas de la más reciente a la más antigua, con
+    las fechas como texto ISO igual que las filas de la tabla.
+
+    Returns:
+        dict: success, `data` con las filas y `archivadas` con cuántas vienen del archivo
+    """
+    filtros = filtros or {}
+    try:
+        recientes = aplicar_filtros(
+            get_supabase_client().table("bitacora").select(COLUMNAS_ARCHIVO), filtros
+        ).order("fecha_hora_ingreso.desc,id", desc=True).limit(limite).execute().data or []
+
+        archivo = _leer_archivo(carpeta, filtros)
+        archivo = archivo.sort_by([("fecha_hora_ingreso", "descending"), ("id", "descending")]).slice(0, limite)
+        antiguas = archivo.to_pylist()
+        for fila in antiguas:
+            for columna in COLUMNAS_FECHA:
+                if fila[columna] is not None:
+                    fila[columna] = fila[columna].isoformat()
+    except Exception as e:
+        return {"success": False, "message": f"Error al consultar el historial de la bitácora: {str(e)}"}
+
+    filas = sorted(
+        recientes + antiguas,
+        key=lambda f: (_a_fecha(f["fecha_hora_ingreso"]), f["id"]),
+        reverse=True
+    )[:limite]
+    ids_recientes = {f["id"] for f in recientes}
+    return {
+        "success": True,
+        "data": filas,
+        "archivadas": sum(f["id"] not in ids_recientes for f in filas)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivo de la bitácora en Parquet")
+    subcomandos = parser.add_subparsers(dest="accion", required=True)
+
+    archivar_cmd = subcomandos.add_parser("archivar", help="archivar los meses fuera de la retención")
+    archivar_cmd.add_argument("--retencion-meses", type=int, default=RETENCION_MESES)
+    archivar_cmd.add_argument("--carpeta", default=CARPETA_ARCHIVO)
+
+    buscar_cmd = subcomandos.add_parser("buscar", help="buscar en la tabla y en el archivo")
+    buscar_cmd.add_argument("--usuario")
+    buscar_cmd.add_argument("--tipo-accion")
+    buscar_cmd.add_argument("--tabla-afectada")
+    buscar_cmd.add_argument("--desde", type=date.fromisoformat)
+    buscar_cmd.add_argument("--hasta", type=date.fromisoformat)
+    buscar_cmd.add_argument("--limite", type=int, default=1000)
+    buscar_cmd.add_argument("--carpeta", default=CARPETA_ARCHIVO)
+    args = parser.parse_args()
+
+    if args.accion == "archivar":
+        resultado = archivar(args.retencion_meses, args.carpeta)
+    else:
+        resultado = consultar_historial({
+            "usuario": args.usuario,
+            "tipo_accion": args.tipo_accion,
+            "tabla_afectada": args.tabla_afectada,
+            "desde": args.desde,
+            "hasta": args.hasta
+        }, args.limite, args.carpeta)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
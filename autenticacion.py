@@ -0,0 +1,295 @@
+import hashlib
+import hmac
+import math
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from conexion import get_supabase_client
+from cache import get_cache
+
+# Columnas que necesita el login (nunca select("*"))
+COLUMNAS_LOGIN = "id, nombre, email, rol, password"
+
+# Tiempo objetivo de un hash de contraseña (ms) y límites del costo de bcrypt
+OBJETIVO_HASH_MS = float(os.getenv("AUTH_OBJETIVO_HASH_MS", "250"))
+COSTO_MINIMO = int(os.getenv("AUTH_COSTO_MINIMO", "10"))
+COSTO_MAXIMO = int(os.getenv("AUTH_COSTO_MAXIMO", "15"))
+
+# Hilos que calculan hashes y verificaciones que pueden esperar turno
+HILOS_HASH = int(os.getenv("AUTH_HILOS_HASH", str(min(4, os.cpu_count() or 1))))
+MAX_EN_ESPERA = int(os.getenv("AUTH_MAX_EN_ESPERA", "32"))
+
+# Cubetas de intentos: capacidad y segundos para recuperar un intento
+INTENTOS_CUENTA = int(os.getenv("AUTH_INTENTOS_CUENTA", "5"))
+RECARGA_CUENTA = float(os.getenv("AUTH_RECARGA_CUENTA", "60"))
+INTENTOS_IP = int(os.getenv("AUTH_INTENTOS_IP", "20"))
+RECARGA_IP = float(os.getenv("AUTH_RECARGA_IP", "6"))
+
+# Cuánto se recuerda que un correo no existe o que una contraseña fue rechazada
+TTL_NEGATIVO = float(os.getenv("AUTH_TTL_NEGATIVO", "30"))
+
+
+def costo_de_hash(hash_guardado: str) -> int:
+    """Costo (log2 de las rondas) con el que se generó un hash bcrypt: $2b$<costo>$..."""
+    try:
+        return int(hash_guardado.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def calibrar_costo(objetivo_ms: float = OBJETIVO_HASH_MS) -> int:
+    """
+    Busca el costo de bcrypt cuyo hash tarda cerca de `objetivo_ms` en esta máquina.
+
+    Se mide el costo 8 (varias veces, quedándose con el mínimo) y se
+    extrapola: cada punto de costo duplica el tiempo.
+    """
+    muestra = 8
+    ms = min(_medir_hash(muestra) for _ in range(3))
+    costo = muestra + round(math.log2(max(objetivo_ms, 1) / max(ms, 0.01)))
+    return max(COSTO_MINIMO, min(COSTO_MAXIMO, costo))
+
+
+def _medir_hash(costo: int) -> float:
+    inicio = time.perf_counter()
+    bcrypt.hashpw(b"calibracion", bcrypt.gensalt(costo))
+    return (time.perf_counter() - inicio) * 1000
+
+
+_costo = int(os.environ["AUTH_COSTO_BCRYPT"]) if os.getenv("AUTH_COSTO_BCRYPT") else None
+_costo_lock = threading.Lock()
+
+
+def costo_bcrypt() -> int:
+    """Costo vigente para hashes nuevos (AUTH_COSTO_BCRYPT o calibrado en el primer uso)"""
+    global _costo
+    if _costo is None:
+        with _costo_lock:
+            if _costo is None:
+                _costo = calibrar_costo()
+    return _costo
+
+
+class CubetaTokens:
+    """Cubeta de tokens: `capacidad` intentos seguidos y uno más cada `recarga` segundos"""
+
+    def __init__(self, capacidad: int, recarga: float):
+        self.capacidad = capacidad
+        self.recarga = recarga
+        self.tokens = float(capacidad)
+        self.actualizada = time.monotonic()
+
+    def _rellenar(self, ahora: float):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.actualizada) / self.recarga)
+        self.actualizada = ahora
+
+    def disponible(self) -> bool:
+        self._rellenar(time.monotonic())
+        return self.tokens >= 1
+
+    def consumir(self) -> bool:
+        self._rellenar(time.monotonic())
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def espera(self) -> float:
+        """Segundos hasta que haya un token"""
+        return max(0.0, (1 - self.tokens) * self.recarga)
+
+    def llena(self) -> bool:
+        self._rellenar(time.monotonic())
+        return self.tokens >= self.capacidad
+
+
+class LimitadorIntentos:
+    """Una cubeta por clave (cuenta o IP); las cubetas llenas se descartan al purgar"""
+
+    def __init__(self, capacidad: int, recarga: float, max_claves: int = 10000):
+        self.capacidad = capacidad
+        self.recarga = recarga
+        self.max_claves = max_claves
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def _cubeta(self, clave) -> CubetaTokens:
+        cubeta = self._cubetas.get(clave)
+        if cubeta is None:
+            if len(self._cubetas) >= self.max_claves:
+                self._purgar()
+            cubeta = self._cubetas[clave] = CubetaTokens(self.capacidad, self.recarga)
+        return cubeta
+
+    def _purgar(self):
+        for clave in [c for c, cubeta in self._cubetas.items() if cubeta.llena()]:
+            del self._cubetas[clave]
+
+    def disponible(self, clave) -> bool:
+        with self._lock:
+            return self._cubeta(clave).disponible()
+
+    def consumir(self, clave) -> bool:
+        with self._lock:
+            return self._cubeta(clave).consumir()
+
+    def espera(self, clave) -> float:
+        with self._lock:
+            return self._cubeta(clave).espera()
+
+    def reiniciar(self, clave=None):
+        with self._lock:
+            if clave is None:
+                self._cubetas.clear()
+            else:
+                self._cubetas.pop(clave, None)
+
+
+limitador_cuentas = LimitadorIntentos(INTENTOS_CUENTA, RECARGA_CUENTA)
+limitador_ips = LimitadorIntentos(INTENTOS_IP, RECARGA_IP)
+
+# Correos inexistentes y pares (correo, contraseña) rechazados hace poco
+cache_negativa = get_cache("login_negativo", ttl=TTL_NEGATIVO, max_entradas=10000)
+
+_pool = ThreadPoolExecutor(max_workers=HILOS_HASH, thread_name_prefix="bcrypt")
+_cupos = threading.BoundedSemaphore(HILOS_HASH + MAX_EN_ESPERA)
+
+
+def _en_pool(funcion, *args):
+    """
+    Ejecuta un cálculo de bcrypt en el pool y espera el resultado.
+
+    bcrypt libera el GIL, así que los hilos del pool usan núcleos propios y
+    el hilo de Streamlit solo espera. Si ya hay demasiados pedidos en cola
+    devuelve None en lugar de encolar más.
+    """
+    if not _cupos.acquire(blocking=False):
+        return None
+    try:
+        return _pool.submit(funcion, *args).result()
+    finally:
+        _cupos.release()
+
+
+# Clave del proceso para las huellas de intentos fallidos
+_CLAVE_HUELLA = secrets.token_bytes(32)
+
+
+def _huella(email: str, password: str) -> str:
+    """Identifica un intento fallido sin guardar la contraseña en memoria"""
+    return hmac.new(_CLAVE_HUELLA, f"{email}\0{password}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(costo_bcrypt())).decode("utf-8")
+
+
+def hashear_contrasena(password: str) -> str:
+    """Hash bcrypt con el costo calibrado, calculado en el pool"""
+    hash_nuevo = _en_pool(_hash, password)
+    if hash_nuevo is None:
+        raise RuntimeError("El servidor está ocupado, intente de nuevo en unos segundos")
+    return hash_nuevo
+
+
+def olvidar_correo(email: str):
+    """Quita un correo de la cache negativa (p. ej. al registrarlo)"""
+    cache_negativa.invalidar(("correo", email.strip().lower()))
+
+
+def olvidar_rechazos():
+    """
+    Vacía la cache negativa (p. ej. al restablecer una contraseña).
+
+    Las contraseñas rechazadas se guardan por huella y no se pueden buscar
+    por correo: sin esto, la contraseña nueva que alguien probó antes del
+    cambio seguiría rechazándose hasta que venza la entrada.
+    """
+    cache_negativa.invalidar()
+
+
+def _rechazo_por_limite(clave, limitador):
+    segundos = math.ceil(limitador.espera(clave))
+    return {
+        "success": False,
+        "message": f"Demasiados intentos. Intente de nuevo en {segundos} segundos."
+    }
+
+
+def _fallido(email: str, huella: str, mensaje: str):
+    limitador_cuentas.consumir(email)
+    if huella is not None:
+        cache_negativa.set(("clave", huella), True)
+    return {"success": False, "message": mensaje}
+
+
+def autenticar(email: str, password: str, ip: str = None):
+    """
+    Verifica las credenciales de un usuario.
+
+    Cada intento consume un token de la cubeta de la IP; los fallidos
+    consumen además uno de la cubeta de la cuenta. Los correos inexistentes
+    y las contraseñas ya rechazadas se responden desde la cache negativa,
+    sin consultar la base ni calcular bcrypt. Si el hash guardado tiene un
+    costo menor que el vigente, se vuelve a generar con la contraseña
+    recién verificada (nunca se baja: el costo calibrado puede variar entre
+    réplicas o si se midió con la CPU ocupada).
+
+    Returns:
+        dict: {"success": True, "data": usuario sin el hash} o un mensaje de error
+    """
+    email = email.strip().lower()
+    if ip is not None and not limitador_ips.consumir(ip):
+        return _rechazo_por_limite(ip, limitador_ips)
+    if not limitador_cuentas.disponible(email):
+        return _rechazo_por_limite(email, limitador_cuentas)
+
+    huella = _huella(email, password)
+    # Con un correo inexistente no se recuerda la contraseña: al registrarlo
+    # (olvidar_correo) tiene que poder ingresar con ella enseguida
+    if cache_negativa.get(("correo", email)):
+        return _fallido(email, None, "Usuario no encontrado")
+    if cache_negativa.get(("clave", huella)):
+        return _fallido(email, huella, "Contraseña incorrecta")
+
+    try:
+        res = get_supabase_client().table("usuarios").select(COLUMNAS_LOGIN).eq("email", email).execute()
+    except Exception as e:
+        return {"success": False, "message": f"Error al iniciar sesión: {str(e)}"}
+
+    if not res.data:
+        cache_negativa.set(("correo", email), True)
+        return _fallido(email, None, "Usuario no encontrado")
+
+    usuario = res.data[0]
+    hash_guardado = usuario.pop("password") or ""
+    try:
+        correcta = _en_pool(bcrypt.checkpw, password.encode("utf-8"), hash_guardado.encode("utf-8"))
+    except ValueError:
+        # Hash vacío o mal formado ("Invalid salt"): ninguna contraseña coincide
+        correcta = False
+    if correcta is None:
+        return {"success": False, "message": "El servidor está ocupado, intente de nuevo en unos segundos"}
+    if not correcta:
+        return _fallido(email, huella, "Contraseña incorrecta")
+
+    if costo_de_hash(hash_guardado) < costo_bcrypt() and _cupos.acquire(blocking=False):
+        # En segundo plano y con cupo: el usuario no espera un segundo hash, y si
+        # el pool está saturado se deja para un próximo login
+        tarea = _pool.submit(_actualizar_hash, usuario["id"], password)
+        tarea.add_done_callback(lambda _: _cupos.release())
+    return {"success": True, "data": usuario}
+
+
+def _actualizar_hash(usuario_id, password: str):
+    """Guarda la contraseña con el costo vigente; si falla, el login sigue siendo válido"""
+    try:
+        get_supabase_client().table("usuarios")\
+            .update({"password": _hash(password)})\
+            .eq("id", usuario_id)\
+            .execute()
+    except Exception as e:
+        print(f"Error al actualizar el hash de la contraseña: {e}")
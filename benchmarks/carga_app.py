@@ -0,0 +1,378 @@
+"""
+Prueba de carga de la aplicación Streamlit con varias sesiones a la vez.
+
+Cada usuario simulado es un AppTest que corre app.py en este mismo proceso,
+igual que las sesiones de un servidor de Streamlit: inicia sesión, busca,
+ordena, edita una cancha y cierra sesión. El backend es el cliente SQLite
+con datos sintéticos y una demora por petición que simula la red.
+
+Uso:
+    python benchmarks/carga_app.py --usuarios 20 --latencia-ms 30 --salida carga_base.json
+    python benchmarks/carga_app.py --usuarios 20 --latencia-ms 30 --comparar carga_base.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone, time as dtime
+from unittest.mock import MagicMock
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Igual que en conftest: hashes de costo 4 y sin límite de intentos (todas las sesiones comparten IP)
+os.environ.setdefault("AUTH_COSTO_BCRYPT", "4")
+os.environ.setdefault("AUTH_INTENTOS_CUENTA", "1000000000")
+os.environ.setdefault("AUTH_INTENTOS_IP", "1000000000")
+
+import numpy as np
+import psutil
+import streamlit
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest, app_test
+import conexion
+from supabase_falso import ClienteFalso
+from datos_sinteticos import generar_datos, email_usuario, CONTRASENA_PRUEBA, ROLES
+
+# Los hilos que manejan cada AppTest no son hilos de script; Streamlit avisa en cada widget que tocan
+logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").setLevel(logging.ERROR)
+
+APP = os.path.join(RAIZ, "app.py")
+INTERACCIONES = ("inicio", "login", "busqueda", "ordenar", "modo_edicion", "guardar_cancha", "logout")
+BUSQUEDAS = ("cancha 1", "futbol", "tenis 2", "pad", "basquet 3")
+# Reruns encadenados (st.rerun) que se siguen dentro de una misma interacción
+MAX_RERUNS = 5
+CLAVE_RERUN = "_carga_rerun"
+
+
+def _rerun_diferido():
+    """
+    Reemplazo de st.rerun durante la carga.
+
+    El AppTest de Streamlit 1.29 vuelve a correr el script con los mismos
+    widgets al recibir st.rerun, así que un formulario que llama a st.rerun
+    después de guardarse se vuelve a enviar sin fin. Se detiene el script y
+    la sesión simulada lo vuelve a correr con los disparadores ya limpios,
+    como hace el servidor.
+    """
+    streamlit.session_state[CLAVE_RERUN] = True
+    streamlit.stop()
+
+
+@contextmanager
+def servidor_simulado():
+    """
+    Un solo Runtime simulado para todas las sesiones, como en un servidor.
+
+    AppTest crea y borra el Runtime global en cada run, así que con varias
+    sesiones en hilos una borraba el de otra a mitad de ejecución. Mientras
+    dura la carga AppTest escribe en una subclase y todas las sesiones
+    comparten el mismo Runtime (y con él la caché de st.cache_data).
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    rerun_original = streamlit.rerun
+    Runtime._instance = runtime
+    app_test.Runtime = type("RuntimePorSesion", (Runtime,), {})
+    streamlit.rerun = _rerun_diferido
+    try:
+        yield
+    finally:
+        streamlit.rerun = rerun_original
+        app_test.Runtime = Runtime
+        Runtime._instance = None
+
+
+class SesionSimulada:
+    """Un usuario de recepción: una sesión de navegador nueva por recorrido"""
+
+    def __init__(self, numero: int, timeout: float):
+        self.numero = numero
+        self.timeout = timeout
+        # Los usuarios sintéticos alternan roles; los ids 1, 5, 9... son administradores
+        self.email = email_usuario(1 + len(ROLES) * numero)
+        self.tiempos = {nombre: [] for nombre in INTERACCIONES}
+        self.errores = []
+        self.app = None
+
+    def _elemento(self, lista, etiqueta):
+        return next(e for e in lista if e.label == etiqueta)
+
+    def _fijar_selectores(self):
+        # Con format_func el AppTest no puede reenviar el valor guardado en la sesión: se envía por posición
+        for selector in self.app.selectbox:
+            if selector.options:
+                selector.select_index(selector.proto.default)
+
+    def _correr(self, nombre: str, preparar=lambda: None):
+        inicio = time.perf_counter()
+        try:
+            self._fijar_selectores()
+            preparar()
+            self.app.run()
+            for _ in range(MAX_RERUNS):
+                if not self.app.session_state[CLAVE_RERUN]:
+                    break
+                self.app.session_state[CLAVE_RERUN] = False
+                self._fijar_selectores()
+                self.app.run()
+            fallas = [e.message for e in self.app.exception] + [e.value for e in self.app.error]
+        except Exception as e:
+            fallas = [f"{type(e).__name__}: {e}"]
+        self.tiempos[nombre].append((time.perf_counter() - inicio) * 1000)
+        for falla in fallas:
+            self.errores.append({"sesion": self.numero, "interaccion": nombre, "error": str(falla)[:300]})
+        return not fallas
+
+    def recorrido(self, iteracion: int):
+        self.app = AppTest.from_file(APP, default_timeout=self.timeout)
+        self.app.session_state[CLAVE_RERUN] = False
+        pasos = [
+            ("inicio", lambda: None),
+            ("login", self._login),
+            ("busqueda", lambda: self._elemento(self.app.text_input, "🔍 Buscar cancha por nombre o tipo")
+                .input(BUSQUEDAS[(self.numero + iteracion) % len(BUSQUEDAS)])),
+            ("ordenar", lambda: self._elemento(self.app.button, "🎯" if iteracion % 2 else "⏰").click()),
+            ("modo_edicion", lambda: self._elemento(self.app.radio, "Seleccione una acción:")
+                .set_value("Editar Cancha Existente")),
+            ("guardar_cancha", lambda: self._editar(iteracion)),
+            ("logout", lambda: self._elemento(self.app.button, "Cerrar sesión").click())
+        ]
+        for nombre, preparar in pasos:
+            # Si un paso falla los siguientes no tienen la pantalla que esperan
+            if not self._correr(nombre, preparar):
+                return
+
+    def _login(self):
+        self._elemento(self.app.text_input, "Correo electrónico").input(self.email)
+        self._elemento(self.app.text_input, "Contraseña").input(CONTRASENA_PRUEBA)
+        self._elemento(self.app.button, "Iniciar Sesión").click()
+
+    def _editar(self, iteracion: int):
+        # Edita la primera cancha de su búsqueda: cambiar de cancha dentro del formulario
+        # cambia el campo del nombre y perdería lo escrito sin un rerun de por medio
+        self._elemento(self.app.text_input, "Nombre de la cancha").input(f"Cancha carga {self.numero}-{iteracion}")
+        self._elemento(self.app.time_input, "Hora de inicio").set_value(dtime(8))
+        self._elemento(self.app.time_input, "Hora de fin").set_value(dtime(9))
+        self._elemento(self.app.button, "Guardar Cambios").click()
+
+
+class MedidorMemoria:
+    """Muestrea el RSS del proceso en segundo plano y guarda el máximo"""
+
+    def __init__(self, intervalo: float = 0.05):
+        self.proceso = psutil.Process()
+        self.intervalo = intervalo
+        self.inicial = self.pico = self.proceso.memory_info().rss
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, self.proceso.memory_info().rss)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+        self.pico = max(self.pico, self.proceso.memory_info().rss)
+
+
+def _percentiles(tiempos: list) -> dict:
+    if not tiempos:
+        return {"n": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(tiempos, [50, 95, 99])
+    return {"n": len(tiempos), "p50_ms": round(p50, 1), "p95_ms": round(p95, 1),
+            "p99_ms": round(p99, 1), "max_ms": round(max(tiempos), 1)}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def preparar_backend(canchas: int = 500, reservas: int = 20000, usuarios: int = 10, semilla: int = 42) -> ClienteFalso:
+    """Cliente SQLite con datos sintéticos y usuarios administradores para cada sesión"""
+    cliente = ClienteFalso()
+    generar_datos(cliente, canchas=canchas, reservas=reservas, usuarios=max(usuarios * len(ROLES), 4),
+                  semilla=semilla)
+    conexion.configurar_cliente(cliente)
+    return cliente
+
+
+def ejecutar_carga(usuarios: int = 10, iteraciones: int = 2, latencia_ms: float = 20.0,
+                   variacion_ms: float = 10.0, timeout: float = 120.0, cliente: ClienteFalso = None,
+                   canchas: int = 500, reservas: int = 20000) -> dict:
+    """
+    Corre `usuarios` sesiones simultáneas, cada una `iteraciones` recorridos completos.
+
+    Si no se pasa `cliente` se crea uno con datos sintéticos. La latencia
+    se inyecta en el cliente solo mientras dura la carga.
+
+    Returns:
+        dict: resultado con percentiles por interacción, RSS, consultas y errores
+    """
+    if cliente is None:
+        cliente = preparar_backend(canchas, reservas, usuarios)
+    else:
+        # Los datos del cliente recibido no son los sintéticos de este módulo
+        canchas = reservas = None
+    parametros = {
+        "usuarios": usuarios, "iteraciones": iteraciones, "latencia_ms": latencia_ms,
+        "variacion_ms": variacion_ms, "canchas": canchas, "reservas": reservas
+    }
+
+    # Una pasada sin medir: importa los módulos de la app y compila app.py
+    AppTest.from_file(APP, default_timeout=timeout).run()
+
+    sesiones = [SesionSimulada(i, timeout) for i in range(usuarios)]
+    largada = threading.Barrier(usuarios)
+
+    def correr(sesion):
+        largada.wait()
+        for iteracion in range(iteraciones):
+            sesion.recorrido(iteracion)
+
+    cliente.inyectar_latencia(latencia_ms, variacion_ms)
+    conexion.reiniciar_estadisticas_latencia()
+    hilos = [threading.Thread(target=correr, args=(s,), name=f"sesion-{s.numero}") for s in sesiones]
+    try:
+        with servidor_simulado(), MedidorMemoria() as memoria:
+            inicio = time.perf_counter()
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            duracion = time.perf_counter() - inicio
+    finally:
+        cliente.inyectar_latencia(0)
+
+    consultas = conexion.estadisticas_latencia()
+    total_consultas = sum(c["llamadas"] for c in consultas)
+    tiempos = {nombre: [t for s in sesiones for t in s.tiempos[nombre]] for nombre in INTERACCIONES}
+    todas = [t for lista in tiempos.values() for t in lista]
+    errores = [e for s in sesiones for e in s.errores]
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "cpus": os.cpu_count(),
+        "parametros": parametros,
+        "duracion_s": round(duracion, 2),
+        "interacciones": {nombre: _percentiles(lista) for nombre, lista in tiempos.items()},
+        "total": _percentiles(todas),
+        "rss_inicial_mb": round(memoria.inicial / 2 ** 20, 1),
+        "rss_pico_mb": round(memoria.pico / 2 ** 20, 1),
+        "consultas": {
+            "total": total_consultas,
+            "por_interaccion": round(total_consultas / len(todas), 2) if todas else None,
+            "por_forma": {f"{c['operacion']} {c['tabla']}": c["llamadas"] for c in consultas}
+        },
+        "errores": {"total": len(errores), "muestras": errores[:20]}
+    }
+
+
+def comparar(actual: dict, base: dict, tolerancia: float = 20.0) -> list:
+    """
+    Compara un resultado contra una línea base guardada.
+
+    Es regresión un p95 (o las consultas por interacción, o el RSS pico)
+    más de `tolerancia` % por encima de la base.
+
+    Returns:
+        list: textos con las regresiones encontradas
+    """
+    regresiones = []
+
+    def revisar(nombre, ahora, antes):
+        if ahora is None or not antes:
+            return
+        cambio = (ahora - antes) / antes * 100
+        print(f"  {nombre:<32} {antes:>10.1f} -> {ahora:>10.1f}  ({cambio:+.0f}%)")
+        if cambio > tolerancia:
+            regresiones.append(f"{nombre}: {antes:.1f} -> {ahora:.1f} ({cambio:+.0f}%)")
+
+    if actual["parametros"] != base.get("parametros"):
+        print(f"Aviso: la base se midió con otros parámetros: {base.get('parametros')}")
+    print(f"Comparación contra {base.get('commit') or 'base'} del {base.get('fecha')}:")
+    for nombre, datos in actual["interacciones"].items():
+        revisar(f"{nombre} p95 ms", datos["p95_ms"], base.get("interacciones", {}).get(nombre, {}).get("p95_ms"))
+    revisar("rerun p95 ms", actual["total"]["p95_ms"], base.get("total", {}).get("p95_ms"))
+    revisar("consultas por interacción", actual["consultas"]["por_interaccion"],
+            base.get("consultas", {}).get("por_interaccion"))
+    revisar("RSS pico MB", actual["rss_pico_mb"], base.get("rss_pico_mb"))
+    return regresiones
+
+
+def mostrar(resultado: dict):
+    p = resultado["parametros"]
+    print(f"{p['usuarios']} sesiones x {p['iteraciones']} recorridos, latencia {p['latencia_ms']:g}"
+          f"+{p['variacion_ms']:g} ms, {resultado['duracion_s']} s")
+    print(f"  {'interacción':<16} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for nombre, datos in [*resultado["interacciones"].items(), ("total", resultado["total"])]:
+        if datos["n"]:
+            print(f"  {nombre:<16} {datos['n']:>5} {datos['p50_ms']:>9.1f} {datos['p95_ms']:>9.1f} "
+                  f"{datos['p99_ms']:>9.1f} {datos['max_ms']:>9.1f}")
+    print(f"RSS: {resultado['rss_inicial_mb']} MB al empezar, pico {resultado['rss_pico_mb']} MB")
+    consultas = resultado["consultas"]
+    print(f"Consultas al backend: {consultas['total']:,} ({consultas['por_interaccion']} por interacción)")
+    for forma, llamadas in sorted(consultas["por_forma"].items(), key=lambda f: -f[1])[:10]:
+        print(f"  {llamadas:>7,}  {forma}")
+    errores = resultado["errores"]
+    if errores["total"]:
+        print(f"Errores: {errores['total']}")
+        for error in errores["muestras"][:5]:
+            print(f"  sesión {error['sesion']} en {error['interaccion']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con sesiones AppTest simultáneas")
+    parser.add_argument("--usuarios", type=int, default=10, help="sesiones simultáneas")
+    parser.add_argument("--iteraciones", type=int, default=2, help="recorridos completos por sesión")
+    parser.add_argument("--latencia-ms", type=float, default=20.0, help="demora fija de cada petición al backend")
+    parser.add_argument("--variacion-ms", type=float, default=10.0, help="demora adicional al azar (0 a este valor)")
+    parser.add_argument("--canchas", type=int, default=500)
+    parser.add_argument("--reservas", type=int, default=20000)
+    parser.add_argument("--timeout", type=float, default=120.0, help="segundos máximos por rerun")
+    parser.add_argument("--salida", help="guardar el resultado como línea base (JSON)")
+    parser.add_argument("--comparar", help="línea base JSON contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="%% de empeoramiento admitido al comparar")
+    args = parser.parse_args()
+
+    resultado = ejecutar_carga(
+        usuarios=args.usuarios, iteraciones=args.iteraciones, latencia_ms=args.latencia_ms,
+        variacion_ms=args.variacion_ms, timeout=args.timeout, canchas=args.canchas, reservas=args.reservas
+    )
+    mostrar(resultado)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultado guardado en {args.salida}")
+
+    regresiones = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            regresiones = comparar(resultado, json.load(archivo), args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+
+    sys.exit(1 if regresiones or resultado["errores"]["total"] else 0)
@@ -0,0 +1,43 @@
+import os
+import sys
+import pytest
+
+# Los módulos de la aplicación están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los usuarios sintéticos tienen hashes de costo 4: sin recalibrar ni rehashear,
+# y sin límite de intentos para que el login se mida siempre completo
+os.environ.setdefault("AUTH_COSTO_BCRYPT", "4")
+os.environ.setdefault("AUTH_INTENTOS_CUENTA", "1000000000")
+os.environ.setdefault("AUTH_INTENTOS_IP", "1000000000")
+
+import conexion
+from supabase_falso import ClienteFalso
+from datos_sinteticos import generar_datos
+
+# Tamaño del conjunto de datos; para la escala completa:
+#   BENCH_CANCHAS=10000 BENCH_RESERVAS=1000000 pytest benchmarks/
+ESCALA = {
+    "canchas": int(os.getenv("BENCH_CANCHAS", "1000")),
+    "reservas": int(os.getenv("BENCH_RESERVAS", "50000")),
+    "usuarios": int(os.getenv("BENCH_USUARIOS", "200")),
+    "eventos_bitacora": int(os.getenv("BENCH_EVENTOS_BITACORA", "20000")),
+    "semilla": int(os.getenv("BENCH_SEMILLA", "42"))
+}
+
+
+@pytest.fixture(scope="session")
+def cliente_falso():
+    """Cliente SQLite con datos sintéticos, instalado como cliente de la aplicación"""
+    cliente = ClienteFalso()
+    generar_datos(cliente, **ESCALA)
+    conexion.configurar_cliente(cliente)
+    yield cliente
+    conexion.configurar_cliente(None)
+
+
+@pytest.fixture
+def cache_canchas_fria(cliente_falso):
+    from funciones import cache_canchas
+    cache_canchas.invalidar()
+    return cache_canchas
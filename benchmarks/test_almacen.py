@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from almacen import AlmacenMemoria, AlmacenRedis, ErrorRedis, ServidorRESP, crear_almacen
+
+
+@pytest.fixture
+def servidor():
+    def crear(clave_acceso=None):
+        servidor = ServidorRESP(("127.0.0.1", 0), clave_acceso=clave_acceso)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        servidores.append(servidor)
+        return servidor.server_address[1]
+
+    servidores = []
+    yield crear
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+@pytest.fixture(params=["memoria", "sqlite", "resp"])
+def almacen(request, tmp_path, servidor):
+    if request.param == "memoria":
+        return AlmacenMemoria()
+    if request.param == "sqlite":
+        return crear_almacen(f"sqlite:///{tmp_path / 'almacen.db'}")
+    return crear_almacen(f"redis://127.0.0.1:{servidor()}/0")
+
+
+def test_operaciones(almacen):
+    assert almacen.get("a") is None
+    almacen.set("a", b"\x00valor")
+    assert almacen.get("a") == b"\x00valor"
+    assert not almacen.agregar("a", b"otro")
+    assert almacen.agregar("b", b"nuevo")
+    almacen.borrar("a")
+    assert almacen.get("a") is None
+    assert [almacen.incrementar("contador") for _ in range(3)] == [1, 2, 3]
+    assert int(almacen.get("contador")) == 3
+
+
+def test_vencimiento(almacen):
+    almacen.set("corta", b"1", ttl=0.05)
+    assert almacen.get("corta") == b"1"
+    time.sleep(0.1)
+    assert almacen.get("corta") is None
+    # Una clave vencida se puede volver a agregar
+    assert almacen.agregar("corta", b"2", ttl=60)
+    assert almacen.get("corta") == b"2"
+
+
+def test_servidor_con_clave_exige_auth(servidor):
+    puerto = servidor(clave_acceso="secreta")
+    with pytest.raises(ErrorRedis, match="NOAUTH"):
+        AlmacenRedis(f"redis://127.0.0.1:{puerto}").get("a")
+    with pytest.raises(ErrorRedis, match="WRONGPASS"):
+        AlmacenRedis(f"redis://:otra@127.0.0.1:{puerto}").get("a")
+    almacen = AlmacenRedis(f"redis://:secreta@127.0.0.1:{puerto}")
+    almacen.set("a", b"1")
+    assert almacen.get("a") == b"1"
+
+
+def test_url_no_soportada():
+    with pytest.raises(ValueError):
+        crear_almacen("memcached://localhost")
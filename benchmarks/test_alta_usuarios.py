@@ -0,0 +1,58 @@
+from alta_usuarios import alta_masiva, fila_admin, leer_archivo, restablecer_admin
+from autenticacion import autenticar
+from datos_sinteticos import CONTRASENA_PRUEBA, email_usuario
+
+
+def test_restablecer_admin_sin_contrasena_valida(cliente_falso):
+    email = "admin.sembrado@club.com"
+    # Como queda admin@club.com después de la migración 010
+    cliente_falso.table("usuarios").insert(
+        {"nombre": "Administrador", "email": email, "password": "!", "rol": "admin"}
+    ).execute()
+    assert alta_masiva([{"nombre": "Administrador", "email": email,
+                         "password": "Nueva1234", "rol": "admin"}], procesos=1)["data"][0]["estado"] == "existente"
+    assert not autenticar(email, "Nueva1234")["success"]
+
+    assert restablecer_admin(email, "Nueva1234")["success"]
+    resultado = autenticar(email, "Nueva1234")
+    assert resultado["success"] and resultado["data"]["rol"] == "admin"
+
+
+def test_restablecer_solo_administradores(cliente_falso):
+    # Los usuarios sintéticos 2, 3 y 4 no son administradores
+    assert not restablecer_admin(email_usuario(2), "Nueva1234")["success"]
+    assert autenticar(email_usuario(2), CONTRASENA_PRUEBA)["success"]
+    assert not restablecer_admin("nadie@club.com", "Nueva1234")["success"]
+
+
+def test_restablecer_valida_la_contrasena(cliente_falso, monkeypatch):
+    monkeypatch.setenv("ALTA_ADMIN_PASSWORD", "corta")
+    resultado = restablecer_admin(email_usuario(1), fila_admin(email_usuario(1))["password"])
+    assert not resultado["success"]
+    assert autenticar(email_usuario(1), CONTRASENA_PRUEBA)["success"]
+
+
+def test_alta_masiva_reporta_cada_fila(cliente_falso, tmp_path):
+    archivo = tmp_path / "alta.csv"
+    archivo.write_text(
+        "nombre,email,password,rol\n"
+        "Nueva Persona,Nueva.Persona@club.com,Clave1234,\n"
+        "Otra Persona,otra.persona@club.com,Clave1234,admin\n"
+        "Repetida,nueva.persona@club.com,Clave1234,\n"
+        "Yo,corto@club.com,Clave1234,\n"
+        "Rol Raro,rol.raro@club.com,Clave1234,superusuario\n"
+        f"Existente,{email_usuario(3)},Clave1234,\n",
+        encoding="utf-8"
+    )
+    resultado = alta_masiva(leer_archivo(str(archivo)), procesos=1)
+    assert resultado["success"]
+    assert resultado["creados"] == 2 and resultado["rechazados"] == 3
+    assert [r["estado"] for r in resultado["data"]] == [
+        "creado", "creado", "rechazado", "rechazado", "rechazado", "existente"
+    ]
+
+    nuevo = autenticar("nueva.persona@club.com", "Clave1234")
+    assert nuevo["success"] and nuevo["data"]["rol"] == "consultor"
+    assert autenticar("otra.persona@club.com", "Clave1234")["data"]["rol"] == "admin"
+    # El existente conserva su contraseña
+    assert autenticar(email_usuario(3), CONTRASENA_PRUEBA)["success"]
@@ -0,0 +1,70 @@
+from datetime import date
+import pyarrow.parquet as pq
+import pytest
+import conexion
+from archivo_bitacora import archivar, consultar_historial, corte_retencion, leer_indice
+from supabase_falso import ClienteFalso
+
+# Con retención de 6 meses, el corte es el 1 de marzo: enero y febrero se archivan
+HOY = date(2025, 9, 10)
+
+
+@pytest.fixture
+def cliente(cliente_falso):
+    """Base propia: archivar borra filas de la bitácora"""
+    cliente = ClienteFalso()
+    conexion.configurar_cliente(cliente)
+    yield cliente
+    conexion.configurar_cliente(cliente_falso)
+
+
+def _evento(cliente, nombre, fecha_hora, tipo="INSERT"):
+    cliente.table("bitacora").insert({
+        "nombre_usuario": nombre, "tipo_accion": tipo, "tabla_afectada": "canchas",
+        "descripcion": f"{nombre} {fecha_hora}", "fecha_hora_ingreso": fecha_hora
+    }).execute()
+
+
+def test_corte_retencion():
+    assert corte_retencion(6, HOY) == date(2025, 3, 1)
+    assert corte_retencion(0, HOY) == date(2025, 9, 1)
+
+
+def test_archivar_y_consultar(cliente, tmp_path):
+    _evento(cliente, "Ana", "2025-01-05T10:00:00")
+    _evento(cliente, "Beto", "2025-01-20T11:30:00", tipo="DELETE")
+    _evento(cliente, "Ana", "2025-02-14T09:15:00")
+    _evento(cliente, "Ana", "2025-05-02T08:00:00")
+
+    resultado = archivar(6, str(tmp_path), HOY)
+    assert resultado["success"], resultado
+    assert [e["archivo"] for e in resultado["data"]] == ["bitacora_2025_01.parquet", "bitacora_2025_02.parquet"]
+    indice = leer_indice(str(tmp_path))
+    assert indice["bitacora_2025_01.parquet"]["filas"] == 2
+    assert pq.read_metadata(tmp_path / "bitacora_2025_01.parquet").num_rows == 2
+    # En la tabla queda solo lo que está dentro de la retención
+    assert [f["nombre_usuario"] for f in cliente.table("bitacora").select("nombre_usuario").execute().data] == ["Ana"]
+
+    historial = consultar_historial({"desde": date(2025, 1, 1)}, carpeta=str(tmp_path))
+    assert historial["success"]
+    assert [f["fecha_hora_ingreso"][:10] for f in historial["data"]] == [
+        "2025-05-02", "2025-02-14", "2025-01-20", "2025-01-05"
+    ]
+    assert historial["archivadas"] == 3
+
+    filtrado = consultar_historial({"usuario": "ana", "hasta": date(2025, 1, 31)}, carpeta=str(tmp_path))
+    assert [f["descripcion"] for f in filtrado["data"]] == ["Ana 2025-01-05T10:00:00"]
+    assert [f["tipo_accion"] for f in consultar_historial(
+        {"tipo_accion": "DELETE"}, carpeta=str(tmp_path))["data"]] == ["DELETE"]
+
+
+def test_filas_tardias_se_agregan_al_mes_archivado(cliente, tmp_path):
+    _evento(cliente, "Ana", "2025-01-05T10:00:00")
+    assert archivar(6, str(tmp_path), HOY)["success"]
+    _evento(cliente, "Beto", "2025-01-25T10:00:00")
+    resultado = archivar(6, str(tmp_path), HOY)
+    assert resultado["data"][0]["filas"] == 2
+    tabla = pq.read_table(tmp_path / "bitacora_2025_01.parquet")
+    assert tabla["nombre_usuario"].to_pylist() == ["Ana", "Beto"]
+    # Sin meses vencidos no hay nada que archivar
+    assert archivar(6, str(tmp_path), HOY)["data"] == []
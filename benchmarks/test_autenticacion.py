@@ -0,0 +1,62 @@
+import pytest
+
+import autenticacion
+from autenticacion import LimitadorIntentos, autenticar
+from datos_sinteticos import CONTRASENA_PRUEBA, email_usuario
+
+
+@pytest.fixture
+def limites(monkeypatch, cliente_falso):
+    """Límites bajos (conftest los desactiva para los benchmarks) y cache negativa vacía"""
+    monkeypatch.setattr(autenticacion, "limitador_cuentas", LimitadorIntentos(3, 60))
+    monkeypatch.setattr(autenticacion, "limitador_ips", LimitadorIntentos(5, 60))
+    autenticacion.cache_negativa.invalidar()
+    yield
+    autenticacion.cache_negativa.invalidar()
+
+
+def test_limite_por_cuenta(limites):
+    email = email_usuario(2)
+    for _ in range(3):
+        assert autenticar(email, "Incorrecta123")["message"] == "Contraseña incorrecta"
+    # Agotada la cubeta, ni la contraseña correcta se verifica
+    resultado = autenticar(email, CONTRASENA_PRUEBA)
+    assert not resultado["success"]
+    assert resultado["message"].startswith("Demasiados intentos")
+    # Las demás cuentas no se ven afectadas
+    assert autenticar(email_usuario(3), CONTRASENA_PRUEBA)["success"]
+
+
+def test_limite_por_ip(limites):
+    for i in range(5):
+        assert autenticar(email_usuario(10 + i), CONTRASENA_PRUEBA, ip="10.0.0.1")["success"]
+    assert autenticar(email_usuario(20), CONTRASENA_PRUEBA, ip="10.0.0.1")["message"].startswith("Demasiados intentos")
+    assert autenticar(email_usuario(20), CONTRASENA_PRUEBA, ip="10.0.0.2")["success"]
+
+
+def test_cache_negativa_sin_consultar_la_base(limites, monkeypatch):
+    assert autenticar("nadie@club.test", "Prueba123")["message"] == "Usuario no encontrado"
+    assert autenticar(email_usuario(4), "Incorrecta123")["message"] == "Contraseña incorrecta"
+
+    def sin_base():
+        raise AssertionError("no debería consultar la base")
+    monkeypatch.setattr(autenticacion, "get_supabase_client", sin_base)
+    assert autenticar("nadie@club.test", "Prueba123")["message"] == "Usuario no encontrado"
+    assert autenticar(email_usuario(4), "Incorrecta123")["message"] == "Contraseña incorrecta"
+
+
+def test_alta_olvida_el_correo_inexistente(limites, cliente_falso):
+    email = "nuevo.usuario@club.test"
+    assert autenticar(email, CONTRASENA_PRUEBA)["message"] == "Usuario no encontrado"
+    cliente_falso.table("usuarios").insert({
+        "nombre": "Nuevo", "email": email, "password": autenticacion.hashear_contrasena(CONTRASENA_PRUEBA),
+        "rol": "consultor"
+    }).execute()
+    autenticacion.olvidar_correo(email)
+    assert autenticar(email, CONTRASENA_PRUEBA)["success"]
+
+
+def test_hash_mal_formado(limites, cliente_falso):
+    email = "hash.roto@club.test"
+    cliente_falso.table("usuarios").insert({"nombre": "Roto", "email": email, "password": "!", "rol": "consultor"}).execute()
+    assert autenticar(email, "!")["message"] == "Contraseña incorrecta"
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from datetime import date, timedelta
+from bitacora import Bitacora, consultar_bitacora
+from escritor_bitacora import get_escritor_bitacora
+
+
+@pytest.fixture
+def bitacora(cliente_falso):
+    escritor = get_escritor_bitacora()
+    registro = Bitacora(usuario_id=1, nombre_usuario="Usuario 1")
+    yield registro
+    escritor.vaciar()
+
+
+def test_registrar_accion(benchmark, bitacora):
+    """Costo para la sesión de registrar una acción (solo encola)"""
+    benchmark(bitacora.registrar_accion, "canchas", "UPDATE", "Cancha 1 actualizada")
+
+
+def test_vaciar_lote(benchmark, bitacora):
+    """Escritura de 500 eventos encolados en inserciones por lotes"""
+    escritor = get_escritor_bitacora()
+
+    def encolar():
+        for i in range(500):
+            bitacora.registrar_accion("reservas", "INSERT", f"Reserva {i}")
+
+    benchmark.pedantic(escritor.vaciar, setup=encolar, rounds=10)
+    assert escritor.estadisticas()["descartados_error"] == 0
+
+
+def test_cierre_sesion(benchmark, bitacora):
+    benchmark(bitacora.cierre_sesion)
+
+
+@pytest.mark.parametrize("filtros", [
+    {},
+    {"tipo_accion": "LOGIN"},
+    {"usuario": "usuario 1", "desde": date.today() - timedelta(days=7)},
+], ids=["sin_filtros", "tipo_accion", "usuario_y_fecha"])
+def test_consultar_pagina(benchmark, cliente_falso, filtros):
+    resultado = benchmark(consultar_bitacora, filtros, None, 50, False)
+    assert resultado["success"]
+
+
+def test_recorrer_paginas(benchmark, cliente_falso):
+    """Diez páginas seguidas con el cursor de la anterior"""
+    def recorrer():
+        cursor = None
+        for _ in range(10):
+            resultado = consultar_bitacora({}, cursor, 50)
+            cursor = resultado["siguiente"]
+            if cursor is None:
+                break
+        return resultado
+
+    assert benchmark(recorrer)["success"]
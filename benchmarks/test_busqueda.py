@@ -0,0 +1,41 @@
+from busqueda import IndiceBusqueda, normalizar, tokenizar
+
+CATALOGO = [
+    {"id": 1, "nombre": "Cancha Central", "tipos_cancha": {"nombre": "Fútbol"},
+     "horarios_disponibles": [{"dia_semana": "lunes", "hora_inicio": "08:00:00", "hora_fin": "12:00:00"}]},
+    {"id": 2, "nombre": "Anexo norte", "tipos_cancha": {"nombre": "Tenis"},
+     "horarios_disponibles": [{"dia_semana": "miércoles", "hora_inicio": "18:00:00", "hora_fin": "22:00:00"},
+                              {"dia_semana": "lunes", "hora_inicio": "07:00:00", "hora_fin": "09:00:00"}]},
+    {"id": 3, "nombre": "Cancha 3", "tipos_cancha": None, "horarios_disponibles": None}
+]
+
+
+def test_normalizar_y_tokenizar():
+    assert normalizar("Fútbol ÑANDÚ") == "futbol nandu"
+    assert tokenizar("Cancha-1, Fútbol") == ["cancha", "1", "futbol"]
+    assert normalizar(None) == ""
+
+
+def test_texto_por_prefijo_sin_tildes():
+    indice = IndiceBusqueda(CATALOGO)
+    assert indice.buscar("FUTB").tolist() == [1]
+    assert indice.buscar("canc").tolist() == [1, 3]
+    # Todas las palabras deben coincidir
+    assert indice.buscar("cancha tenis").tolist() == []
+    assert indice.buscar("").tolist() == [1, 2, 3]
+
+
+def test_dia_y_rango_horario():
+    indice = IndiceBusqueda(CATALOGO)
+    assert indice.buscar(dia="Miércoles").tolist() == [2]
+    assert indice.buscar(dia="lunes").tolist() == [1, 2]
+    # El mismo horario debe cubrir todo el rango
+    assert indice.buscar(dia="lunes", desde=8 * 60, hasta=9 * 60).tolist() == [1, 2]
+    assert indice.buscar(dia="lunes", desde=7 * 60, hasta=10 * 60).tolist() == []
+    assert indice.buscar("anexo", desde=19 * 60, hasta=21 * 60).tolist() == [2]
+
+
+def test_primera_hora():
+    indice = IndiceBusqueda(CATALOGO)
+    assert indice.primera_hora[2] == 7 * 60
+    assert indice.primera_hora[1] < indice.primera_hora[3]
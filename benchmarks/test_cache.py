@@ -0,0 +1,128 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import tokens_sesion
+from almacen import AlmacenMemoria, configurar_almacen
+from cache import CacheTTL
+
+
+class AlmacenCompartido(AlmacenMemoria):
+    """Almacén en memoria que se presenta como compartido, como el de varias réplicas"""
+
+    compartido = True
+
+    def __init__(self):
+        super().__init__()
+        self.publicando = threading.Event()
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def incrementar(self, clave: str) -> int:
+        self.publicando.set()
+        assert self.liberar.wait(5)
+        return super().incrementar(clave)
+
+
+@pytest.fixture
+def almacen(monkeypatch):
+    # Con un almacén compartido las réplicas firman con SESION_SECRETO
+    monkeypatch.setattr(tokens_sesion, "_secreto", b"secreto de prueba")
+    almacen = AlmacenCompartido()
+    configurar_almacen(almacen)
+    yield almacen
+    configurar_almacen(None)
+
+
+@pytest.mark.parametrize("operacion", ["invalidar", "actualizar"])
+def test_publicar_no_retiene_el_lock(almacen, operacion):
+    cache = CacheTTL("prueba_publicar")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    almacen.liberar.clear()
+    if operacion == "invalidar":
+        hilo = threading.Thread(target=cache.invalidar, args=("a",))
+    else:
+        hilo = threading.Thread(target=cache.actualizar, args=("a", lambda v: v + 1))
+    hilo.start()
+    try:
+        assert almacen.publicando.wait(5)
+        # Mientras el almacén responde, las demás claves siguen disponibles
+        resultado = []
+        lector = threading.Thread(target=lambda: resultado.append(cache.get("b")))
+        lector.start()
+        lector.join(1)
+        assert resultado == [2]
+    finally:
+        almacen.liberar.set()
+        hilo.join(5)
+    assert cache.get("a") == (None if operacion == "invalidar" else 2)
+
+
+def test_vencimiento_y_lru():
+    cache = CacheTTL("prueba_lru", ttl=0.05, max_entradas=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    # "b" es la usada hace más tiempo
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    time.sleep(0.1)
+    assert cache.get("a", "vencida") == "vencida"
+
+
+def test_una_sola_carga_por_clave():
+    cache = CacheTTL("prueba_carga")
+    liberar = threading.Event()
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        assert liberar.wait(5)
+        return "valor"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futuros = [pool.submit(cache.obtener, "clave", cargar) for _ in range(8)]
+        time.sleep(0.1)
+        liberar.set()
+        assert [f.result() for f in futuros] == ["valor"] * 8
+    assert len(cargas) == 1
+
+
+def test_invalidar_durante_la_carga_no_guarda_el_resultado():
+    cache = CacheTTL("prueba_epoca")
+
+    def cargar():
+        cache.invalidar()
+        return "viejo"
+
+    assert cache.obtener("clave", cargar) == "viejo"
+    assert cache.get("clave") is None
+    assert cache.obtener("clave", lambda: "nuevo") == "nuevo"
+    assert cache.get("clave") == "nuevo"
+
+
+def test_entradas_compartidas_entre_replicas(almacen, monkeypatch):
+    # Cada lectura mira la versión compartida, sin esperar el intervalo
+    monkeypatch.setattr("cache.INTERVALO_VERSIONES", 0)
+    replica_a = CacheTTL("prueba_compartida", compartida=True)
+    replica_b = CacheTTL("prueba_compartida", compartida=True)
+    assert replica_a.obtener("clave", lambda: {"filas": 3}) == {"filas": 3}
+    assert replica_b.obtener("clave", lambda: pytest.fail("debía leerse del almacén")) == {"filas": 3}
+    assert replica_b.estadisticas()["hits_compartidos"] == 1
+
+    # Una invalidación en una réplica deja la entrada compartida fuera de alcance
+    replica_a.invalidar()
+    assert replica_b.obtener("otra", lambda: 1) == 1
+    assert replica_b.get("clave", "invalidada") == "invalidada"
+
+
+def test_entrada_con_firma_invalida_se_ignora(almacen):
+    replica_a = CacheTTL("prueba_firma", compartida=True)
+    replica_b = CacheTTL("prueba_firma", compartida=True)
+    replica_a.set("clave", "original")
+    (clave_compartida,) = [c for c in almacen._datos if c.startswith("cache:prueba_firma:") and not c.endswith(":version")]
+    valor, expira = almacen._datos[clave_compartida]
+    almacen._datos[clave_compartida] = (valor[:-1] + b"x", expira)
+    assert replica_b.get("clave", "ignorada") == "ignorada"
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from funciones import obtener_canchas_disponibles, obtener_indice_busqueda
+from dashboard import filtrar_canchas
+from modelo import formatear_canchas
+
+
+def test_canchas_sin_cache(benchmark, cache_canchas_fria):
+    """Consulta del catálogo con sus relaciones y armado de la tabla"""
+    resultado = benchmark.pedantic(
+        obtener_canchas_disponibles, setup=cache_canchas_fria.invalidar, rounds=10
+    )
+    assert resultado["success"]
+
+
+def test_canchas_con_cache(benchmark, cache_canchas_fria):
+    obtener_canchas_disponibles()
+    resultado = benchmark(obtener_canchas_disponibles)
+    assert resultado["success"]
+
+
+def test_indice_busqueda(benchmark, cache_canchas_fria):
+    from busqueda import IndiceBusqueda
+    from funciones import _consultar_canchas
+    catalogo = _consultar_canchas()
+    indice = benchmark(IndiceBusqueda, catalogo)
+    assert len(indice.ids) == len(catalogo)
+
+
+@pytest.mark.parametrize("search, dia, desde, hasta", [
+    ("", "Todos", 0, 24),
+    ("futbol", "Todos", 0, 24),
+    ("can 1", "Lunes", 0, 24),
+    ("", "Sábado", 10, 20),
+])
+def test_preparar_tabla_dashboard(benchmark, cache_canchas_fria, search, dia, desde, hasta):
+    """Lo que hace el dashboard en cada rerun para dibujar la tabla"""
+    obtener_canchas_disponibles()
+
+    def preparar():
+        df = obtener_canchas_disponibles()["data"]
+        indice = obtener_indice_busqueda()
+        df = df.sort_values('id', key=lambda ids: ids.map(indice.primera_hora), kind='stable')
+        return formatear_canchas(filtrar_canchas(df, indice, search, dia, desde, hasta))
+
+    df = benchmark(preparar)
+    assert set(df.columns) >= {"id", "nombre", "tipos_cancha", "disponible"}
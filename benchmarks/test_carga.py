@@ -0,0 +1,62 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import carga
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def crear(hilos):
+        pool = ThreadPoolExecutor(max_workers=hilos)
+        monkeypatch.setattr(carga, "_pool", pool)
+        pools.append(pool)
+        return pool
+
+    pools = []
+    yield crear
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def test_consultas_en_paralelo(pool):
+    pool(2)
+
+    def consulta():
+        time.sleep(0.2)
+        return {"success": True, "data": 1}
+
+    inicio = time.monotonic()
+    resultados = carga.cargar({"a": consulta, "b": consulta})
+    assert time.monotonic() - inicio < 0.35
+    assert resultados == {"a": {"success": True, "data": 1}, "b": {"success": True, "data": 1}}
+
+
+def test_error_de_una_consulta():
+    def falla():
+        raise RuntimeError("sin conexión")
+
+    resultados = carga.cargar({"ok": lambda: {"success": True, "data": []}, "falla": falla})
+    assert resultados["ok"]["success"]
+    assert resultados["falla"] == {"success": False, "message": "sin conexión"}
+
+
+def test_plazo_cancela_las_que_no_empezaron(pool):
+    pool(1)
+    liberar = threading.Event()
+    ejecutadas = []
+
+    def lenta():
+        liberar.wait(5)
+        return {"success": True, "data": "tarde"}
+
+    def encolada():
+        ejecutadas.append(1)
+        return {"success": True, "data": "encolada"}
+
+    resultados = carga.cargar({"lenta": lenta, "encolada": encolada}, plazo=0.1)
+    liberar.set()
+    assert resultados["lenta"] == {"success": False, "message": "La consulta 'lenta' no respondió en 0.1 s"}
+    assert not resultados["encolada"]["success"]
+    carga._pool.shutdown(wait=True)
+    assert ejecutadas == []
@@ -0,0 +1,8 @@
+from carga_app import INTERACCIONES, ejecutar_carga
+
+
+def test_carga_dos_sesiones(cliente_falso):
+    resultado = ejecutar_carga(usuarios=2, iteraciones=1, latencia_ms=1, variacion_ms=0, cliente=cliente_falso)
+    assert resultado["errores"]["total"] == 0, resultado["errores"]["muestras"]
+    assert all(resultado["interacciones"][nombre]["n"] == 2 for nombre in INTERACCIONES)
+    assert resultado["consultas"]["total"] > 0
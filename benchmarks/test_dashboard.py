@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+import streamlit as st
+
+import dashboard
+
+
+class _Estado(dict):
+    """st.session_state de una pestaña (acceso por clave y por atributo)"""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+@pytest.fixture
+def estado(monkeypatch):
+    estado = _Estado()
+    monkeypatch.setattr(st, "session_state", estado)
+    return estado
+
+
+def _tabla(nombres, ids=(1, 2, 3)):
+    return pd.DataFrame({"id": list(ids), "nombre": nombres})
+
+
+def test_ediciones_sobreviven_a_datos_nuevos(estado):
+    base, clave = dashboard.base_editor(_tabla(["A", "B", "C"]))
+    # El usuario edita una fila y otra réplica cambia un nombre antes del próximo rerun
+    estado[clave] = {"edited_rows": {0: {"nombre": "A editada"}}, "added_rows": [], "deleted_rows": []}
+    tabla, misma_clave = dashboard.base_editor(_tabla(["A", "B nueva", "C"]))
+    assert misma_clave == clave
+    assert tabla is base
+
+    # Sin ediciones pendientes se muestran los datos nuevos con la misma key
+    estado[clave] = {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+    tabla, misma_clave = dashboard.base_editor(_tabla(["A", "B nueva", "C"]))
+    assert misma_clave == clave
+    assert tabla["nombre"].tolist() == ["A", "B nueva", "C"]
+
+
+def test_key_depende_de_los_ids_y_su_orden(estado):
+    _, clave = dashboard.base_editor(_tabla(["A", "B", "C"]))
+    assert dashboard.base_editor(_tabla(["X", "Y", "Z"]))[1] == clave
+    assert dashboard.base_editor(_tabla(["C", "B", "A"], ids=(3, 2, 1)))[1] != clave
+
+
+def test_orden_por_tipo_es_estable():
+    df = pd.DataFrame({"id": [1, 2, 3, 4], "tipos_cancha": ["Tenis", "Fútbol", "Tenis", "Fútbol"]})
+    assert dashboard.ordenar_canchas(df, None, "tipo")["id"].tolist() == [2, 4, 1, 3]
+    assert dashboard.ordenar_canchas(df, None)["id"].tolist() == [1, 2, 3, 4]
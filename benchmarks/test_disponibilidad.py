@@ -0,0 +1,77 @@
+from datetime import date, time
+
+from disponibilidad import DIAS_SEMANA, IndiceDisponibilidad, franja_a_hora, hora_a_franja
+
+FECHA = date(2032, 3, 1)
+DIA = DIAS_SEMANA[FECHA.weekday()]
+
+
+def _indice(reservas=()):
+    canchas = [
+        {"id": 10, "tipo": "Fútbol", "disponible": True},
+        {"id": 20, "tipo": "Tenis", "disponible": True},
+        {"id": 30, "tipo": "Tenis", "disponible": False}
+    ]
+    horarios = [
+        {"id_cancha": 10, "dia_semana": DIA, "hora_inicio": "08:10:00", "hora_fin": "12:00:00"},
+        {"id_cancha": 20, "dia_semana": DIA, "hora_inicio": "08:00:00", "hora_fin": "10:00:00"},
+        {"id_cancha": 30, "dia_semana": DIA, "hora_inicio": "08:00:00", "hora_fin": "22:00:00"},
+        # Cancha inexistente o día mal escrito: se ignoran
+        {"id_cancha": 99, "dia_semana": DIA, "hora_inicio": "08:00:00", "hora_fin": "22:00:00"},
+        {"id_cancha": 10, "dia_semana": "feriado", "hora_inicio": "08:00:00", "hora_fin": "22:00:00"}
+    ]
+    return IndiceDisponibilidad(canchas, horarios, reservas)
+
+
+def test_franjas():
+    assert hora_a_franja("08:10") == 32
+    assert hora_a_franja("08:10", redondear_arriba=True) == 33
+    assert hora_a_franja(time(23, 59)) == 96
+    assert franja_a_hora(33) == time(8, 15)
+    assert franja_a_hora(96) == time(23, 59)
+
+
+def test_horario_de_apertura_se_redondea_hacia_adentro():
+    slots = _indice().buscar_slots(FECHA, tipo="fútbol", duracion=60)
+    assert slots[0] == {"id_cancha": 10, "hora_inicio": time(8, 15), "hora_fin": time(9, 15)}
+    assert slots[-1]["hora_fin"] == time(12, 0)
+
+
+def test_reservas_ocupan_y_se_liberan():
+    reserva = {"id": 1, "id_cancha": 20, "fecha": FECHA.isoformat(), "hora_inicio": "08:00:00", "hora_fin": "09:10:00"}
+    indice = _indice([reserva])
+    # Lo ocupado se redondea hacia afuera: 09:10 bloquea hasta 09:15
+    assert indice.buscar_slots(FECHA, tipo="tenis", duracion=30) == [
+        {"id_cancha": 20, "hora_inicio": time(9, 15), "hora_fin": time(9, 45)},
+        {"id_cancha": 20, "hora_inicio": time(9, 30), "hora_fin": time(10, 0)}
+    ]
+    assert indice.canchas_libres(FECHA, time(8, 0), time(9, 0)) == []
+
+    indice.agregar_reserva(20, FECHA, "09:30", "10:00")
+    indice.quitar_reserva(20, FECHA, reserva["hora_inicio"], reserva["hora_fin"])
+    assert indice.canchas_libres(FECHA, time(8, 0), time(9, 30)) == [20]
+    assert indice.canchas_libres(FECHA, time(9, 0), time(10, 0)) == [10]
+
+
+def test_reservas_superpuestas_se_cuentan():
+    indice = _indice()
+    indice.agregar_reserva(10, FECHA, "09:00", "10:00")
+    indice.agregar_reserva(10, FECHA, "09:30", "10:30")
+    indice.quitar_reserva(10, FECHA, "09:00", "10:00")
+    assert indice.canchas_libres(FECHA, time(9, 0), time(9, 30)) == [10, 20]
+    assert 10 not in indice.canchas_libres(FECHA, time(9, 30), time(10, 0))
+
+
+def test_rango_de_fechas_coincide_con_cada_dia():
+    indice = _indice([{"id": 1, "id_cancha": 10, "fecha": FECHA.isoformat(),
+                       "hora_inicio": "09:00:00", "hora_fin": "11:00:00"}])
+    rango = indice.buscar_slots_rango(FECHA, date(2032, 3, 14), duracion=60, desde=time(8, 0), hasta=time(12, 0))
+    por_dia = {}
+    for slot in rango:
+        por_dia.setdefault(slot["fecha"], []).append({k: v for k, v in slot.items() if k != "fecha"})
+    # La plantilla solo abre ese día de la semana: una vez por semana
+    assert sorted(por_dia) == [FECHA, date(2032, 3, 8)]
+    for fecha, slots in por_dia.items():
+        assert slots == indice.buscar_slots(fecha, duracion=60, desde=time(8, 0), hasta=time(12, 0))
+    # La cancha inactiva nunca aparece
+    assert all(s["id_cancha"] != 30 for s in rango)
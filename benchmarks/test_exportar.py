@@ -0,0 +1,53 @@
+import csv
+from datetime import date, time
+from decimal import Decimal
+import pyarrow.parquet as pq
+from exportar import EXPORTACIONES, _escribir_parquet, exportar_tabla
+
+
+def _paginas(*paginas):
+    return ((pagina, None) for pagina in paginas)
+
+
+def test_columna_nula_en_la_primera_pagina_conserva_su_tipo(tmp_path):
+    ruta = str(tmp_path / "canchas.parquet")
+    filas = _escribir_parquet(_paginas(
+        [{"id": 1, "nombre": "A", "id_tipo": None, "ubicacion": None, "disponible": True, "precio_hora": None}],
+        [{"id": 2, "nombre": "B", "id_tipo": 3, "ubicacion": "Norte", "disponible": False, "precio_hora": 12000}]
+    ), ruta, lambda filas, total: None, EXPORTACIONES["canchas"])
+    tabla = pq.read_table(ruta)
+    assert filas == 2
+    assert tabla.schema == EXPORTACIONES["canchas"]
+    assert tabla.column("id_tipo").to_pylist() == [None, 3]
+
+
+def test_precio_con_decimales_despues_de_enteros(tmp_path):
+    ruta = str(tmp_path / "reservas.parquet")
+    reserva = {"id_cliente": 1, "id_cancha": 1, "fecha": "2032-03-01",
+               "hora_inicio": "10:00:00", "hora_fin": "11:30:00", "observacion": None}
+    _escribir_parquet(_paginas(
+        [{**reserva, "id": 1, "precio_hora": 12000}],
+        [{**reserva, "id": 2, "precio_hora": 12500.5}]
+    ), ruta, lambda filas, total: None, EXPORTACIONES["reservas"])
+    tabla = pq.read_table(ruta)
+    assert tabla.column("precio_hora").to_pylist() == [Decimal("12000.00"), Decimal("12500.50")]
+    assert tabla.column("fecha").to_pylist() == [date(2032, 3, 1)] * 2
+    assert tabla.column("hora_fin").to_pylist() == [time(11, 30)] * 2
+
+
+def test_exportar_tabla_completa(cliente_falso, tmp_path):
+    total = cliente_falso.table("reservas").select("id", count="exact").limit(1).execute().count
+    parquet = exportar_tabla("reservas", "Parquet", directorio=str(tmp_path))
+    assert parquet["success"]
+    assert parquet["data"]["filas"] == total == pq.read_metadata(parquet["data"]["ruta"]).num_rows
+
+    texto = exportar_tabla("usuarios", "CSV", directorio=str(tmp_path))
+    with open(texto["data"]["ruta"], encoding="utf-8") as archivo:
+        encabezado = next(csv.reader(archivo))
+    # Nunca se exporta el hash de contraseña
+    assert encabezado == EXPORTACIONES["usuarios"].names
+
+
+def test_exportacion_no_valida():
+    assert not exportar_tabla("bitacora", "CSV")["success"]
+    assert not exportar_tabla("reservas", "Excel")["success"]
@@ -0,0 +1,66 @@
+import os
+from datetime import date
+import pytest
+import conexion
+import instantanea
+from datos_sinteticos import generar_datos
+from supabase_falso import ClienteFalso
+
+DESDE, HASTA = date(2000, 1, 1), date(2100, 12, 31)
+
+
+@pytest.fixture
+def cliente(cliente_falso):
+    """Base chica propia: cada prueba copia la base completa"""
+    cliente = ClienteFalso()
+    generar_datos(cliente, canchas=20, reservas=300, usuarios=8, clientes=30, eventos_bitacora=50)
+    conexion.configurar_cliente(cliente)
+    yield cliente
+    conexion.configurar_cliente(cliente_falso)
+
+
+def _sqlite(cliente, sql):
+    return cliente.conexion.execute(sql).fetchall()
+
+
+def test_instantanea_coincide_con_la_base(cliente, tmp_path):
+    carpeta = str(tmp_path)
+    resultado = instantanea.actualizar_instantanea(carpeta)
+    assert resultado["success"], resultado
+    for tabla in instantanea.TABLAS:
+        assert resultado["data"]["filas"][tabla] == _sqlite(cliente, f"SELECT count(*) FROM {tabla}")[0][0]
+    assert instantanea.leer_actual(carpeta) == resultado["data"]
+
+    por_mes = instantanea.reservas_por_mes(DESDE, HASTA, carpeta=carpeta)
+    assert por_mes["success"]
+    ((reservas, ingresos),) = _sqlite(cliente, """
+        SELECT count(*), sum(COALESCE(precio_hora, 0) *
+               (strftime('%s', hora_fin) - strftime('%s', hora_inicio)) / 3600.0)
+        FROM reservas
+    """)
+    assert por_mes["data"]["reservas"].sum() == reservas
+    assert float(por_mes["data"]["ingresos"].sum()) == pytest.approx(ingresos)
+
+    tipos = instantanea.tipos_instantanea(carpeta)["data"]["nombre"].tolist()
+    assert tipos == sorted(n for (n,) in _sqlite(cliente, "SELECT nombre FROM tipos_cancha"))
+    ranking = instantanea.ranking_canchas(DESDE, HASTA, tipos[0], carpeta=carpeta)["data"]
+    assert set(ranking["tipo"]) <= {tipos[0]}
+    assert ranking["parte_del_tipo"].sum() == pytest.approx(1.0)
+
+
+def test_conserva_las_ultimas_instantaneas(cliente, tmp_path, monkeypatch):
+    monkeypatch.setattr(instantanea, "INSTANTANEAS_CONSERVADAS", 2)
+    carpeta = str(tmp_path)
+    vigentes = [instantanea.actualizar_instantanea(carpeta)["data"]["carpeta"] for _ in range(3)]
+    assert sorted(d for d in os.listdir(carpeta) if os.path.isdir(os.path.join(carpeta, d))) == vigentes[1:]
+
+    # Las consultas pasan a la instantánea nueva
+    cliente.table("tipos_cancha").insert({"nombre": "Vóley"}).execute()
+    assert "Vóley" not in instantanea.tipos_instantanea(carpeta)["data"]["nombre"].tolist()
+    assert instantanea.actualizar_instantanea(carpeta)["success"]
+    assert "Vóley" in instantanea.tipos_instantanea(carpeta)["data"]["nombre"].tolist()
+
+
+def test_sin_instantanea(tmp_path):
+    resultado = instantanea.consultar("SELECT 1", carpeta=str(tmp_path))
+    assert not resultado["success"]
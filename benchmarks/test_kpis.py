@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+import pytest
+from funciones import actualizar_cancha, eliminar_cancha
+from kpis import cache_kpis, obtener_kpis
+from reservas import cancelar_reserva, crear_reserva
+
+# Un mes sin reservas sintéticas: los resúmenes solo reflejan las de cada prueba
+FECHA = "2032-03-01"
+MES = "2032-03-01"
+
+
+def _mensual(cliente, id_tipo):
+    filas = cliente.table("kpi_mensual_tipo").select("reservas, minutos, ingresos")\
+        .eq("mes", MES).eq("id_tipo", id_tipo).execute().data
+    return (filas[0]["reservas"], filas[0]["minutos"], float(filas[0]["ingresos"])) if filas else (0, 0, 0.0)
+
+
+def _cancha(cliente, id_tipo, nombre):
+    return cliente.table("canchas").insert({
+        "nombre": nombre, "id_tipo": id_tipo, "disponible": True, "precio_hora": 12000
+    }).execute().data[0]["id"]
+
+
+def test_reserva_suma_en_su_tipo(cliente_falso):
+    antes = _mensual(cliente_falso, 1)
+    cancha = _cancha(cliente_falso, 1, "KPI suma")
+    reserva = crear_reserva(1, cancha, FECHA, "10:00", "11:30")["data"]
+    assert _mensual(cliente_falso, 1) == (antes[0] + 1, antes[1] + 90, antes[2] + 18000.0)
+    assert cancelar_reserva(reserva["id"])["success"]
+    assert _mensual(cliente_falso, 1) == antes
+
+
+def test_eliminar_cancha_no_deja_resumen_negativo(cliente_falso):
+    antes, sin_tipo = _mensual(cliente_falso, 2), _mensual(cliente_falso, 0)
+    cancha = _cancha(cliente_falso, 2, "KPI eliminada")
+    assert crear_reserva(1, cancha, FECHA, "12:00", "13:00")["success"]
+    # Las reservas se borran en cascada cuando la cancha ya no existe
+    assert eliminar_cancha(cancha)["success"]
+    assert _mensual(cliente_falso, 2) == antes
+    assert _mensual(cliente_falso, 0) == sin_tipo
+
+
+def test_cambio_de_tipo_resta_del_tipo_original(cliente_falso):
+    tipo_a, tipo_b = _mensual(cliente_falso, 3), _mensual(cliente_falso, 4)
+    cancha = _cancha(cliente_falso, 3, "KPI retipada")
+    reserva = crear_reserva(1, cancha, FECHA, "14:00", "15:00")["data"]
+    assert actualizar_cancha(cancha, {"id_tipo": 4})["success"]
+    assert cancelar_reserva(reserva["id"])["success"]
+    assert _mensual(cliente_falso, 3) == tipo_a
+    assert _mensual(cliente_falso, 4) == tipo_b
+
+
+def test_obtener_kpis_coincide_con_las_reservas(cliente_falso):
+    cache_kpis.invalidar()
+    resultado = obtener_kpis(30)
+    assert resultado["success"], resultado
+    kpis = resultado["data"]
+    hoy = date.today()
+    mes = hoy.replace(day=1).isoformat()
+    siguiente = (hoy.replace(day=1) + timedelta(days=32)).replace(day=1).isoformat()
+    consulta = cliente_falso.conexion.execute
+    assert kpis["reservas_totales"] == consulta("SELECT count(*) FROM reservas").fetchone()[0]
+    (reservas_mes, ingresos_mes), = consulta("""
+        SELECT count(*), COALESCE(sum(COALESCE(precio_hora, 0) *
+               (strftime('%s', hora_fin) - strftime('%s', hora_inicio)) / 3600.0), 0)
+        FROM reservas WHERE fecha >= ? AND fecha < ?
+    """, (mes, siguiente)).fetchall()
+    assert kpis["reservas_mes"] == reservas_mes
+    assert kpis["ingresos_mes"] == pytest.approx(ingresos_mes)
+    assert 0 <= kpis["ocupacion_mes"] <= 1
+    assert set(kpis["por_hora"]["fecha"]) <= {(hoy - timedelta(days=d)).isoformat() for d in range(30)}
+    # Se repite desde la cache hasta que se invalida
+    assert obtener_kpis(30)["data"] is kpis
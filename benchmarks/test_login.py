@@ -0,0 +1,37 @@
+import itertools
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import login
+import autenticacion
+from datos_sinteticos import CONTRASENA_PRUEBA, email_usuario
+
+
+@pytest.fixture
+def entrada(monkeypatch, cliente_falso):
+    """Reemplaza la entrada por consola y el navegador del login de línea de comandos"""
+    emails = itertools.cycle([email_usuario(i) for i in range(1, 51)])
+    monkeypatch.setattr("builtins.input", lambda _: next(emails))
+    monkeypatch.setattr(login, "getpass", lambda _: CONTRASENA_PRUEBA)
+    monkeypatch.setattr(login.webbrowser, "open", lambda url: True)
+    monkeypatch.setattr("builtins.print", lambda *a, **k: None)
+    autenticacion.cache_negativa.invalidar()
+
+
+def test_login_correcto(benchmark, entrada):
+    resultado = benchmark(login.login_usuario)
+    assert resultado["success"], resultado
+
+
+def test_login_usuario_inexistente(benchmark, monkeypatch, entrada):
+    monkeypatch.setattr("builtins.input", lambda _: "nadie@club.test")
+    resultado = benchmark(login.login_usuario)
+    assert not resultado["success"]
+
+
+def test_login_contrasena_rechazada(benchmark, monkeypatch, entrada):
+    """Una contraseña ya rechazada se responde desde la cache negativa, sin bcrypt"""
+    monkeypatch.setattr(login, "getpass", lambda _: "Incorrecta123")
+    resultado = benchmark(login.login_usuario)
+    assert not resultado["success"]
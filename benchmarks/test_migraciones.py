@@ -0,0 +1,47 @@
+import sqlite3
+import pytest
+
+from migrar import ErrorMigracion, MotorSQLite, aplicar_migraciones, estado
+
+
+@pytest.fixture
+def motor(tmp_path):
+    """Base SQLite vacía con una carpeta de migraciones propia"""
+    carpeta = tmp_path / "migraciones"
+    carpeta.mkdir()
+    (carpeta / "001_notas.sql").write_text("CREATE TABLE notas (id INTEGER PRIMARY KEY, texto TEXT);\n", encoding="utf-8")
+    motor = MotorSQLite(sqlite3.connect(str(tmp_path / "base.db"), isolation_level=None))
+    motor.carpeta = str(carpeta)
+    return motor
+
+
+def test_aplica_pendientes_una_vez(motor):
+    assert aplicar_migraciones(motor) == ["001_notas"]
+    assert aplicar_migraciones(motor) == []
+    assert estado(motor)["version"] == 1
+
+
+def test_migracion_modificada_aborta(motor):
+    aplicar_migraciones(motor)
+    carpeta = motor.carpeta
+    with open(f"{carpeta}/001_notas.sql", "a", encoding="utf-8") as archivo:
+        archivo.write("ALTER TABLE notas ADD COLUMN autor TEXT;\n")
+    with open(f"{carpeta}/002_etiquetas.sql", "w", encoding="utf-8") as archivo:
+        archivo.write("CREATE TABLE etiquetas (id INTEGER PRIMARY KEY);\n")
+
+    assert estado(motor)["modificadas"] == ["001_notas"]
+    with pytest.raises(ErrorMigracion, match="001_notas"):
+        aplicar_migraciones(motor)
+    # No se aplicó nada: ni el cambio ni la migración nueva
+    assert not motor.existe_tabla("etiquetas")
+    assert estado(motor)["pendientes"] == ["002_etiquetas"]
+
+
+def test_fin_de_linea_no_cambia_el_checksum(motor):
+    aplicar_migraciones(motor)
+    ruta = f"{motor.carpeta}/001_notas.sql"
+    with open(ruta, encoding="utf-8") as archivo:
+        texto = archivo.read()
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write(texto.replace("\n", "\r\n"))
+    assert estado(motor)["modificadas"] == []
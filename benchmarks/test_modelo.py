@@ -0,0 +1,41 @@
+from datetime import date, time
+
+import pandas as pd
+
+from modelo import Cancha, Horario, formatear_canchas, minutos, tabla_canchas, tabla_reservas
+
+CATALOGO = [
+    {"id": 1, "nombre": "Central", "disponible": True, "tipos_cancha": {"nombre": "Fútbol"},
+     "horarios_disponibles": [{"dia_semana": "lunes", "hora_inicio": "08:00:00", "hora_fin": "12:30:00"}]},
+    {"id": 2, "nombre": "Anexo", "disponible": False, "tipos_cancha": None, "horarios_disponibles": []}
+]
+
+
+def test_tabla_canchas_y_cancha():
+    tabla = tabla_canchas(CATALOGO)
+    assert tabla["id"].tolist() == [1, 2]
+    assert pd.isna(tabla["tipos_cancha"][1])
+    assert Cancha.de_tabla(tabla, 1) == Cancha(
+        id=1, nombre="Central", disponible=True, tipo="Fútbol",
+        horarios=(Horario("lunes", time(8, 0), time(12, 30)),)
+    )
+    assert Cancha.de_tabla(tabla, 2).tipo is None
+    assert Cancha.de_tabla(tabla, 2).horarios == ()
+
+
+def test_formatear_canchas():
+    tabla = formatear_canchas(tabla_canchas(CATALOGO))
+    assert tabla["disponible"].tolist() == ["✅", "❌"]
+    assert tabla["tipos_cancha"].tolist() == ["Fútbol", "Sin tipo"]
+    assert tabla["horarios_disponibles"].tolist() == ["lunes: 08:00:00-12:30:00", "Sin horarios"]
+
+
+def test_tabla_reservas():
+    tabla = tabla_reservas([
+        {"id": 7, "id_cancha": 1, "fecha": "2032-03-01", "hora_inicio": "10:00:00", "hora_fin": "11:45:00"},
+        {"id": 8, "id_cancha": 2, "fecha": date(2032, 3, 2), "hora_inicio": time(9, 0), "hora_fin": time(9, 30)}
+    ])
+    assert tabla["fecha"].tolist() == [date(2032, 3, 1), date(2032, 3, 2)]
+    assert minutos(tabla["hora_inicio"]).tolist() == [600, 540]
+    assert minutos(tabla["hora_fin"]).tolist() == [705, 570]
+    assert tabla_reservas([]).empty
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from reservas import crear_reserva, indice_reservas
+from reservas_masivas import COLUMNAS_CSV, importar_reservas
+
+# Lunes lejanos: ninguna reserva sintética cae en esas fechas
+LUNES = "2031-01-06"
+OTRO_LUNES = "2031-01-13"
+
+
+@pytest.fixture
+def cancha(cliente_falso):
+    """Cancha nueva abierta los lunes de 08:00 a 22:00"""
+    fila = cliente_falso.table("canchas").insert({"nombre": "Cancha de prueba", "disponible": True}).execute().data[0]
+    cliente_falso.table("horarios_disponibles").insert({
+        "id_cancha": fila["id"], "dia_semana": "lunes", "hora_inicio": "08:00:00", "hora_fin": "22:00:00"
+    }).execute()
+    return fila["id"]
+
+
+def test_reserva_solapada_rechazada(cancha):
+    assert crear_reserva(1, cancha, LUNES, "10:00", "11:00")["success"]
+    resultado = crear_reserva(1, cancha, LUNES, "10:30", "11:30")
+    assert not resultado["success"]
+    assert "solapa" in resultado["message"]
+    # Contiguas no se solapan
+    assert crear_reserva(1, cancha, LUNES, "11:00", "12:00")["success"]
+
+
+def test_solape_rechazado_por_la_base(cliente_falso, cancha):
+    """Una reserva que el índice en memoria todavía no conoce la rechaza la restricción de la base"""
+    assert crear_reserva(1, cancha, LUNES, "08:00", "09:00")["success"]
+    cliente_falso.table("reservas").insert({
+        "id_cliente": 1, "id_cancha": cancha, "fecha": LUNES, "hora_inicio": "15:00", "hora_fin": "16:00"
+    }).execute()
+    assert indice_reservas.solape(cancha, LUNES, "15:30", "16:30") is None
+
+    resultado = crear_reserva(1, cancha, LUNES, "15:30", "16:30")
+    assert not resultado["success"]
+    assert "solapa" in resultado["message"]
+
+
+def test_importacion_rechaza_solapes(cancha):
+    assert crear_reserva(1, cancha, LUNES, "18:00", "19:00")["success"]
+    filas = pd.DataFrame([
+        [1, cancha, LUNES, "18:30", "19:30", None],      # choca con la existente
+        [1, cancha, OTRO_LUNES, "09:00", "10:00", None],
+        [1, cancha, OTRO_LUNES, "09:30", "10:30", None],  # choca con la fila anterior
+    ], columns=COLUMNAS_CSV)
+    # Un segundo bloque que choca con lo importado en el primero
+    siguiente = pd.DataFrame([[1, cancha, OTRO_LUNES, "09:45", "10:15", None]], columns=COLUMNAS_CSV)
+
+    resultado = importar_reservas([filas, siguiente])
+    assert resultado["success"]
+    assert resultado["creadas"] == 1
+    estados = {r["fila"]: r.get("motivo", r["estado"]) for r in resultado["data"]}
+    assert estados == {
+        1: "Se solapa con una reserva existente",
+        2: "creada",
+        3: "Se solapa con otra fila de la importación",
+        4: "Se solapa con una reserva existente"
+    }
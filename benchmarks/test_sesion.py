@@ -0,0 +1,99 @@
+import pytest
+
+import session_manager
+import tokens_sesion
+from tokens_sesion import (
+    ListaRevocados, emitir_token, leer_token, restaurar_usuario, revocar_token, verificar_token
+)
+
+
+def test_token_valido(cliente_falso):
+    token = emitir_token({"id": 1})
+    datos = verificar_token(token)
+    assert datos["uid"] == 1
+    # Nombre, email y rol no viajan en el token
+    assert set(datos) == {"uid", "iat", "exp", "jti", "sid", "ini"}
+
+
+def test_token_alterado_o_vencido(cliente_falso):
+    contenido, firma = emitir_token({"id": 1}).split(".")
+    otro = emitir_token({"id": 2}).split(".")[0]
+    assert verificar_token(f"{otro}.{firma}") is None
+    alterada = ("B" if firma[0] == "A" else "A") + firma[1:]
+    assert verificar_token(f"{contenido}.{alterada}") is None
+    assert verificar_token("no-es-un-token") is None
+    assert verificar_token(emitir_token({"id": 1}, duracion=-1)) is None
+
+
+def test_token_revocado(cliente_falso):
+    token = emitir_token({"id": 1})
+    assert revocar_token(token)["success"]
+    assert verificar_token(token) is None
+    # Otro proceso lo ve al leer la tabla tokens_revocados
+    assert ListaRevocados(ttl=0).contiene(leer_token(token)["jti"])
+    # Los demás tokens del usuario siguen valiendo
+    assert verificar_token(emitir_token({"id": 1})) is not None
+
+
+def test_restaurar_toma_el_rol_de_la_base(cliente_falso):
+    token = emitir_token({"id": 1, "rol": "admin"})
+    cliente_falso.table("usuarios").update({"rol": "consultor"}).eq("id", 1).execute()
+    tokens_sesion.cache_usuarios.invalidar()
+    try:
+        assert restaurar_usuario(token)["rol"] == "consultor"
+    finally:
+        cliente_falso.table("usuarios").update({"rol": "admin"}).eq("id", 1).execute()
+        tokens_sesion.cache_usuarios.invalidar()
+    assert restaurar_usuario(emitir_token({"id": 10 ** 9})) is None
+
+
+class _Estado(dict):
+    """st.session_state de una pestaña (acceso por clave y por atributo)"""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+
+@pytest.fixture
+def navegador(monkeypatch, cliente_falso):
+    """URL compartida entre recargas; cada recarga empieza con session_state vacío"""
+    url = {}
+    bitacoras = []
+    monkeypatch.setattr(session_manager, "leer_parametro", url.get)
+    monkeypatch.setattr(session_manager, "guardar_parametro", url.__setitem__)
+    monkeypatch.setattr(session_manager, "contexto_sesion", lambda: {})
+    monkeypatch.setattr(session_manager, "Bitacora", lambda **datos: bitacoras.append(datos))
+
+    def recargar():
+        monkeypatch.setattr(session_manager.st, "session_state", _Estado())
+        return session_manager.check_authentication()
+
+    recargar.url = url
+    recargar.bitacoras = bitacoras
+    return recargar
+
+
+def test_sesion_sobrevive_a_varias_recargas(navegador):
+    navegador()
+    session_manager.login_user({"id": 1, "nombre": "Usuario 1", "email": "u@club.test", "rol": "admin"})
+    primero = navegador.url[tokens_sesion.PARAMETRO_SESION]
+
+    assert navegador()
+    segundo = navegador.url[tokens_sesion.PARAMETRO_SESION]
+    assert navegador()
+    tercero = navegador.url[tokens_sesion.PARAMETRO_SESION]
+
+    assert len({primero, segundo, tercero}) == 3
+    assert session_manager.st.session_state.token_sesion == tercero
+    # Cada token usado queda revocado; la sesión de la bitácora es siempre la misma
+    assert verificar_token(primero) is None and verificar_token(segundo) is None
+    assert len({b["sesion_id"] for b in navegador.bitacoras}) == 1
+    assert len({b["inicio"] for b in navegador.bitacoras}) == 1
+
+
+def test_recarga_con_token_revocado(navegador):
+    token = emitir_token({"id": 1})
+    revocar_token(token)
+    navegador.url[tokens_sesion.PARAMETRO_SESION] = token
+    assert not navegador()
+    assert navegador.url[tokens_sesion.PARAMETRO_SESION] is None
@@ -0,0 +1,47 @@
+import sincronizacion
+from sincronizacion import Replica
+
+
+def _replica():
+    return Replica("canchas", "id, nombre, id_tipo, ubicacion, disponible", intervalo=0)
+
+
+def test_borrado_por_lapida(cliente_falso):
+    replica = _replica()
+    replica.sincronizar()
+    nueva = cliente_falso.table("canchas").insert({"nombre": "Cancha efímera", "disponible": True}).execute().data[0]
+    assert replica.sincronizar()
+    assert nueva["id"] in replica.por_id()
+
+    version = replica.version
+    cliente_falso.table("canchas").delete().eq("id", nueva["id"]).execute()
+    assert replica.sincronizar()
+    assert nueva["id"] not in replica.por_id()
+    assert replica.version == version + 1
+
+
+def test_cambio_y_sin_cambios(cliente_falso):
+    replica = _replica()
+    replica.sincronizar()
+    assert not replica.sincronizar()
+    cancha = cliente_falso.table("canchas").insert({"nombre": "Antes", "disponible": True}).execute().data[0]
+    replica.sincronizar()
+    cliente_falso.table("canchas").update({"nombre": "Después"}).eq("id", cancha["id"]).execute()
+    assert replica.sincronizar()
+    assert replica.por_id()[cancha["id"]]["nombre"] == "Después"
+    cliente_falso.table("canchas").delete().eq("id", cancha["id"]).execute()
+
+
+def test_recarga_completa_sin_lapidas(cliente_falso, monkeypatch):
+    """Una réplica que no sincronizó durante la retención se descarga completa"""
+    replica = _replica()
+    replica.sincronizar()
+    cancha = cliente_falso.table("canchas").insert({"nombre": "Vieja", "disponible": True}).execute().data[0]
+    replica.sincronizar()
+    cliente_falso.table("canchas").delete().eq("id", cancha["id"]).execute()
+    # Simula que la lápida ya se purgó y que la última sincronización es anterior a la retención
+    cliente_falso.table("eliminaciones").delete().eq("tabla", "canchas").eq("id_fila", cancha["id"]).execute()
+    monkeypatch.setattr(sincronizacion, "RETENCION_LAPIDAS", 0)
+
+    assert replica.sincronizar()
+    assert cancha["id"] not in replica.por_id()
@@ -1,49 +1,58 @@
-import platform
-import socket
-import httpagentparser
-from datetime import datetime
+import secrets
+from datetime import datetime, timedelta
 from conexion import get_supabase_client
+from escritor_bitacora import get_escritor_bitacora
 
 class Bitacora:
-    def __init__(self, usuario_id, nombre_usuario):
+    """
+    Registro de una sesión en la bitácora.
+
+    Args:
+        sesion_id: identificador de la sesión (el jti del token); se genera si no se indica
+        inicio (str): fecha y hora del login, que junto con sesion_id ubica su fila
+        contexto (dict): navegador, ip_acceso y nombre_maquina del cliente
+    """
+
+    def __init__(self, usuario_id, nombre_usuario, registrar_inicio=True, sesion_id=None, inicio=None,
+                 contexto=None):
         self.supabase = get_supabase_client()
+        self.escritor = get_escritor_bitacora()
         self.usuario_id = usuario_id
         self.nombre_usuario = nombre_usuario
-        self.inicio_sesion()
-    
-    def get_info_sistema(self, user_agent=None):
-        """Obtiene información del sistema y navegador"""
-        return {
-            "navegador": httpagentparser.detect(user_agent)["browser"]["name"] if user_agent else "Desconocido",
-            "ip_acceso": socket.gethostbyname(socket.gethostname()),
-            "nombre_maquina": platform.node()
-        }
+        self.sesion_id = sesion_id or secrets.token_urlsafe(12)
+        self.inicio = inicio or datetime.now().isoformat()
+        self.contexto = contexto or {}
+        if registrar_inicio:
+            self.inicio_sesion()
     
     def inicio_sesion(self):
         """Registra el inicio de sesión"""
         try:
-            info_sistema = self.get_info_sistema()
             data = {
                 "usuario_id": self.usuario_id,
                 "nombre_usuario": self.nombre_usuario,
-                "navegador": info_sistema["navegador"],
-                "ip_acceso": info_sistema["ip_acceso"],
-                "nombre_maquina": info_sistema["nombre_maquina"],
+                "sesion_id": self.sesion_id,
+                "navegador": self.contexto.get("navegador") or "Desconocido",
+                "ip_acceso": self.contexto.get("ip_acceso"),
+                "nombre_maquina": self.contexto.get("nombre_maquina"),
                 "tipo_accion": "LOGIN",
-                "descripcion": f"Inicio de sesión del usuario {self.nombre_usuario}"
+                "descripcion": f"Inicio de sesión del usuario {self.nombre_usuario}",
+                "fecha_hora_ingreso": self.inicio
             }
-            self.supabase.table("bitacora").insert(data).execute()
+            self.escritor.encolar(data)
         except Exception as e:
             print(f"Error al registrar inicio de sesión: {e}")
     
     def cierre_sesion(self):
-        """Registra el cierre de sesión"""
+        """Registra el cierre de sesión en la fila LOGIN de esta sesión"""
         try:
-            # Actualizar último registro de login con hora de salida
+            # Escribir antes los eventos en cola para que el login ya esté guardado
+            self.escritor.vaciar()
             self.supabase.table("bitacora")\
                 .update({"fecha_hora_salida": datetime.now().isoformat()})\
-                .eq("usuario_id", self.usuario_id)\
-                .is_("fecha_hora_salida", None)\
+                .eq("sesion_id", self.sesion_id)\
+                .eq("fecha_hora_ingreso", self.inicio)\
+                .eq("tipo_accion", "LOGIN")\
                 .execute()
         except Exception as e:
             print(f"Error al registrar cierre de sesión: {e}")
@@ -54,10 +63,104 @@ class Bitacora:
             data = {
                 "usuario_id": self.usuario_id,
                 "nombre_usuario": self.nombre_usuario,
+                "sesion_id": self.sesion_id,
                 "tabla_afectada": tabla,
                 "tipo_accion": accion,
                 "descripcion": descripcion
             }
-            self.supabase.table("bitacora").insert(data).execute()
+            self.escritor.encolar(data)
         except Exception as e:
-            print(f"Error al registrar acción: {e}")
\ No newline at end of file
+            print(f"Error al registrar acción: {e}")
+
+# Columnas que muestra el visor de bitácora (se evita traer filas completas)
+COLUMNAS_BITACORA = "id, nombre_usuario, tipo_accion, tabla_afectada, descripcion, fecha_hora_ingreso, fecha_hora_salida"
+
+def _filtro_or(query, condiciones: str):
+    """Agrega un filtro `or=(...)` de PostgREST (postgrest 0.13 no trae `or_`)"""
+    if hasattr(query, "or_"):
+        return query.or_(condiciones)
+    query.params = query.params.add("or", f"({condiciones})")
+    return query
+
+def aplicar_filtros(query, filtros: dict):
+    """Filtros del visor (usuario, tipo_accion, tabla_afectada, desde y hasta) sobre una consulta a la bitácora"""
+    if filtros.get("usuario"):
+        query = query.ilike("nombre_usuario", f"%{filtros['usuario']}%")
+    if filtros.get("tipo_accion"):
+        query = query.eq("tipo_accion", filtros["tipo_accion"])
+    if filtros.get("tabla_afectada"):
+        query = query.eq("tabla_afectada", filtros["tabla_afectada"])
+    if filtros.get("desde"):
+        query = query.gte("fecha_hora_ingreso", filtros["desde"].isoformat())
+    if filtros.get("hasta"):
+        # `hasta` es inclusivo: se compara contra el inicio del día siguiente
+        query = query.lt("fecha_hora_ingreso", (filtros["hasta"] + timedelta(days=1)).isoformat())
+    return query
+
+def consultar_bitacora(filtros: dict = None, cursor: tuple = None, tam_pagina: int = 50, contar: bool = False):
+    """
+    Obtiene una página de la bitácora ordenada de la más reciente a la más antigua.
+
+    Usa paginación por clave (keyset) sobre (fecha_hora_ingreso, id): `cursor`
+    es la pareja de la última fila de la página anterior, así que cada página
+    cuesta lo mismo sin importar cuántas filas tenga la tabla.
+
+    Args:
+        filtros (dict): usuario, tipo_accion, tabla_afectada, desde y hasta (date)
+        cursor (tuple): (fecha_hora_ingreso, id) de la última fila ya mostrada
+        tam_pagina (int): filas por página
+        contar (bool): si se pide el total estimado de filas que cumplen los filtros
+    """
+    filtros = filtros or {}
+    try:
+        supabase = get_supabase_client()
+        query = supabase.table("bitacora").select(
+            COLUMNAS_BITACORA, count="estimated" if contar else None
+        )
+
+        query = aplicar_filtros(query, filtros)
+
+        if cursor:
+            fecha, ultimo_id = cursor
+            query = _filtro_or(
+                query,
+                f'fecha_hora_ingreso.lt."{fecha}",'
+                f'and(fecha_hora_ingreso.eq."{fecha}",id.lt.{ultimo_id})'
+            )
+
+        # Se pide una fila extra para saber si hay página siguiente.
+        # Ambas columnas van en un solo parámetro `order` (postgrest 0.13
+        # repetiría el parámetro si se llama dos veces a order()).
+        response = query\
+            .order("fecha_hora_ingreso.desc,id", desc=True)\
+            .limit(tam_pagina + 1)\
+            .execute()
+
+        filas = response.data or []
+        hay_mas = len(filas) > tam_pagina
+        filas = filas[:tam_pagina]
+        siguiente = (filas[-1]["fecha_hora_ingreso"], filas[-1]["id"]) if hay_mas else None
+
+        return {
+            "success": True,
+            "data": filas,
+            "siguiente": siguiente,
+            "total": response.count if contar else None
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error al consultar la bitácora: {str(e)}"}
+
+
+def acciones_recientes(usuario_id: int, limite: int = 5):
+    """Últimas acciones registradas por un usuario, de la más reciente a la más antigua"""
+    try:
+        response = get_supabase_client().table("bitacora")\
+            .select(COLUMNAS_BITACORA)\
+            .eq("usuario_id", usuario_id)\
+            .neq("tipo_accion", "LOGIN")\
+            .order("fecha_hora_ingreso.desc,id", desc=True)\
+            .limit(limite)\
+            .execute()
+        return {"success": True, "data": response.data or []}
+    except Exception as e:
+        return {"success": False, "message": f"Error al consultar las acciones recientes: {str(e)}"}
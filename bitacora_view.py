@@ -1,38 +1,124 @@
 import streamlit as st
 import pandas as pd
-from conexion import get_supabase_client
+from bitacora import consultar_bitacora
+from archivo_bitacora import consultar_historial
+from trazas import trazar
 
+TAM_PAGINA = 50
+# Filas que se muestran al buscar también en el archivo (sin paginación)
+LIMITE_HISTORIAL = 1000
+
+@trazar
 def mostrar_bitacora():
     """Muestra la vista de bitácora (solo para administradores)"""
     st.title("📝 Bitácora del Sistema")
-    
+
     if st.session_state.usuario['rol'] != 'admin':
         st.error("⛔ No tienes permisos para ver esta sección")
         st.stop()
-        
-    supabase = get_supabase_client()
-    
-    try:
-        response = supabase.table("bitacora")\
-            .select("*")\
-            .order("fecha_hora_ingreso", desc=True)\
-            .execute()
-            
-        if response.data:
-            df = pd.DataFrame(response.data)
-            st.dataframe(
-                df,
-                column_config={
-                    "nombre_usuario": st.column_config.TextColumn("Usuario"),
-                    "fecha_hora_ingreso": st.column_config.DatetimeColumn("Ingreso"),
-                    "fecha_hora_salida": st.column_config.DatetimeColumn("Salida"),
-                    "tipo_accion": st.column_config.TextColumn("Acción"),
-                    "descripcion": st.column_config.TextColumn("Descripción")
-                },
-                hide_index=True
-            )
-        else:
-            st.info("No hay registros en la bitácora")
-            
-    except Exception as e:
-        st.error(f"Error al cargar la bitácora: {str(e)}")
\ No newline at end of file
+
+    # Filtros (se aplican en la consulta, no sobre el DataFrame)
+    with st.form("filtros_bitacora"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            usuario = st.text_input("Usuario")
+            tipo_accion = st.text_input("Tipo de acción", placeholder="Ejemplo: LOGIN")
+        with col2:
+            tabla_afectada = st.text_input("Tabla afectada")
+            incluir_archivo = st.checkbox("Incluir registros archivados")
+        with col3:
+            desde = st.date_input("Desde", value=None)
+            hasta = st.date_input("Hasta", value=None)
+        st.form_submit_button("🔍 Filtrar")
+
+    filtros = {
+        "usuario": usuario.strip(),
+        "tipo_accion": tipo_accion.strip().upper(),
+        "tabla_afectada": tabla_afectada.strip(),
+        "desde": desde,
+        "hasta": hasta
+    }
+
+    if incluir_archivo:
+        mostrar_historial(filtros)
+        return
+
+    # Pila de cursores: el último es el de la página actual. Si cambian los
+    # filtros se vuelve a la primera página y se recalcula el total.
+    if st.session_state.get("bitacora_filtros") != filtros:
+        st.session_state.bitacora_filtros = filtros
+        st.session_state.bitacora_cursores = [None]
+        st.session_state.bitacora_total = None
+
+    cursores = st.session_state.bitacora_cursores
+    response = consultar_bitacora(
+        filtros,
+        cursor=cursores[-1],
+        tam_pagina=TAM_PAGINA,
+        contar=st.session_state.bitacora_total is None
+    )
+
+    if not response["success"]:
+        st.error(f"Error al cargar la bitácora: {response['message']}")
+        return
+
+    if response["total"] is not None:
+        st.session_state.bitacora_total = response["total"]
+
+    if response["data"]:
+        mostrar_tabla(response["data"])
+    else:
+        st.info("No hay registros en la bitácora")
+
+    # Navegación entre páginas
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Anterior", disabled=len(cursores) == 1):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        total = st.session_state.bitacora_total
+        texto_total = f" de ~{total:,}" if total else ""
+        st.caption(f"Página {len(cursores)} · {TAM_PAGINA} registros por página{texto_total}")
+    with col3:
+        if st.button("Siguiente ➡️", disabled=response["siguiente"] is None):
+            cursores.append(response["siguiente"])
+            st.rerun()
+
+
+def mostrar_tabla(filas):
+    st.dataframe(
+        pd.DataFrame(filas),
+        column_config={
+            "id": None,
+            "usuario_id": None,
+            "sesion_id": st.column_config.TextColumn("Sesión"),
+            "nombre_usuario": st.column_config.TextColumn("Usuario"),
+            "fecha_hora_ingreso": st.column_config.DatetimeColumn("Ingreso"),
+            "fecha_hora_salida": st.column_config.DatetimeColumn("Salida"),
+            "tipo_accion": st.column_config.TextColumn("Acción"),
+            "tabla_afectada": st.column_config.TextColumn("Tabla"),
+            "descripcion": st.column_config.TextColumn("Descripción"),
+            "navegador": st.column_config.TextColumn("Navegador"),
+            "ip_acceso": st.column_config.TextColumn("IP"),
+            "nombre_maquina": st.column_config.TextColumn("Máquina")
+        },
+        hide_index=True
+    )
+
+
+def mostrar_historial(filtros):
+    """Búsqueda en la tabla y en el archivo de meses anteriores (para investigaciones)"""
+    with st.spinner("Buscando en el archivo..."):
+        response = consultar_historial(filtros, limite=LIMITE_HISTORIAL)
+    if not response["success"]:
+        st.error(response["message"])
+        return
+    if not response["data"]:
+        st.info("No hay registros que cumplan los filtros")
+        return
+    mostrar_tabla(response["data"])
+    st.caption(
+        f"{len(response['data'])} registros ({response['archivadas']} del archivo)"
+        + (f" · se muestran los {LIMITE_HISTORIAL} más recientes" if len(response["data"]) == LIMITE_HISTORIAL else "")
+    )
@@ -1,21 +1,66 @@
 import streamlit as st
 import pandas as pd
-from conexion import get_supabase_client
+import plotly.express as px
+from kpis import obtener_kpis
+from trazas import trazar
 
+@trazar
 def mostrar_business():
     """Muestra la vista de reportes de negocio"""
     st.title("📊 Business Analytics")
-    
+
+    dias = st.selectbox("Período de análisis", [7, 30, 90], index=1, format_func=lambda d: f"Últimos {d} días")
+    response = obtener_kpis(dias)
+
+    if not response["success"]:
+        st.error(response["message"])
+        return
+
+    kpis = response["data"]
+
     # Métricas principales
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric(label="Reservas Totales", value="0")
+        st.metric(label="Reservas Totales", value=f"{kpis['reservas_totales']:,}",
+                  help=f"{kpis['reservas_mes']:,} en el mes actual")
     with col2:
-        st.metric(label="Ingresos del Mes", value="$0")
+        st.metric(label="Ingresos del Mes", value=f"${kpis['ingresos_mes']:,.2f}")
     with col3:
-        st.metric(label="Tasa de Ocupación", value="0%")
+        st.metric(label="Tasa de Ocupación", value=f"{kpis['ocupacion_mes']:.0%}",
+                  help="Minutos reservados sobre minutos habilitados en el mes actual")
     
     # Gráficos y análisis
     st.subheader("Análisis de Tendencias")
-    # Aquí va la lógica para mostrar gráficos y análisis
\ No newline at end of file
+
+    por_hora = kpis["por_hora"]
+    if por_hora.empty:
+        st.info("No hay reservas en el período seleccionado")
+        return
+
+    diario = por_hora.groupby(["fecha", "tipo"], as_index=False)[["reservas", "ingresos"]].sum()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(
+            px.bar(diario, x="fecha", y="reservas", color="tipo", title="Reservas por día"),
+            use_container_width=True
+        )
+    with col2:
+        st.plotly_chart(
+            px.line(diario, x="fecha", y="ingresos", color="tipo", title="Ingresos por día"),
+            use_container_width=True
+        )
+
+    horas = por_hora.groupby(["hora", "tipo"], as_index=False)["minutos"].sum()
+    horas["horas_reservadas"] = horas["minutos"] / 60
+    st.plotly_chart(
+        px.bar(horas, x="hora", y="horas_reservadas", color="tipo", title="Horas reservadas por hora del día"),
+        use_container_width=True
+    )
+
+    mensual = kpis["mensual"].sort_values("mes")
+    if not mensual.empty:
+        st.plotly_chart(
+            px.bar(mensual, x="mes", y="ingresos", color="tipo", title="Ingresos por mes"),
+            use_container_width=True
+        )
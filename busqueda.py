@@ -0,0 +1,106 @@
+import bisect
+import re
+import unicodedata
+import numpy as np
+from disponibilidad import DIAS_SEMANA
+
+
+def normalizar(texto) -> str:
+    """Pasa a minúsculas y quita tildes: 'Fútbol' -> 'futbol'"""
+    descompuesto = unicodedata.normalize("NFKD", str(texto or "").casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto) -> list:
+    """Separa un texto normalizado en palabras"""
+    return re.findall(r"\w+", normalizar(texto))
+
+
+def _minutos(hora: str) -> int:
+    h, m = hora.split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+_DIAS_NORMALIZADOS = {normalizar(d): i for i, d in enumerate(DIAS_SEMANA)}
+
+
+class IndiceBusqueda:
+    """
+    Índice de búsqueda del catálogo de canchas.
+
+    Se arma una vez por versión del catálogo. Las palabras del nombre y del
+    tipo se guardan normalizadas (sin tildes) en un vocabulario ordenado, de
+    modo que cada palabra buscada se resuelve como prefijo con dos búsquedas
+    binarias. Los horarios quedan en columnas numéricas (día, minuto de
+    inicio, minuto de fin) para filtrar por día y hora sin parsear texto.
+    """
+
+    def __init__(self, catalogo):
+        self.ids = np.array([c["id"] for c in catalogo], dtype=np.int64)
+
+        postings = {}
+        dias, inicios, fines, filas = [], [], [], []
+        for fila, cancha in enumerate(catalogo):
+            tipo = cancha["tipos_cancha"]["nombre"] if cancha.get("tipos_cancha") else ""
+            for token in set(tokenizar(cancha["nombre"]) + tokenizar(tipo)):
+                postings.setdefault(token, []).append(fila)
+            for h in cancha.get("horarios_disponibles") or []:
+                dia = _DIAS_NORMALIZADOS.get(normalizar(h["dia_semana"]))
+                if dia is None:
+                    continue
+                filas.append(fila)
+                dias.append(dia)
+                inicios.append(_minutos(h["hora_inicio"]))
+                fines.append(_minutos(h["hora_fin"]))
+
+        self.vocabulario = sorted(postings)
+        self._postings = [np.array(postings[t], dtype=np.int64) for t in self.vocabulario]
+
+        self.horario_fila = np.array(filas, dtype=np.int64)
+        self.horario_dia = np.array(dias, dtype=np.int8)
+        self.horario_inicio = np.array(inicios, dtype=np.int16)
+        self.horario_fin = np.array(fines, dtype=np.int16)
+
+        # Primer horario de cada cancha (minutos desde medianoche), para ordenar
+        primera = np.full(len(self.ids), np.iinfo(np.int16).max, dtype=np.int16)
+        np.minimum.at(primera, self.horario_fila, self.horario_inicio)
+        self.primera_hora = dict(zip(self.ids.tolist(), primera.tolist()))
+
+    def _filas_prefijo(self, prefijo: str) -> np.ndarray:
+        """Filas con alguna palabra que empieza con `prefijo`"""
+        desde = bisect.bisect_left(self.vocabulario, prefijo)
+        hasta = bisect.bisect_left(self.vocabulario, prefijo + "\uffff")
+        if desde == hasta:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(self._postings[desde:hasta]))
+
+    def buscar(self, texto: str = "", dia: str = None, desde: int = None, hasta: int = None) -> np.ndarray:
+        """
+        Devuelve los ids de las canchas que coinciden con la búsqueda.
+
+        Args:
+            texto (str): palabras (o comienzos de palabra) del nombre o del tipo;
+                         deben coincidir todas. Se ignoran tildes y mayúsculas.
+            dia (str): día de la semana en que la cancha debe tener horario
+            desde, hasta (int): minutos desde medianoche que el horario debe cubrir
+        """
+        seleccion = np.ones(len(self.ids), dtype=bool)
+
+        for palabra in tokenizar(texto):
+            mascara = np.zeros(len(self.ids), dtype=bool)
+            mascara[self._filas_prefijo(palabra)] = True
+            seleccion &= mascara
+
+        if dia is not None or desde is not None or hasta is not None:
+            coincide = np.ones(len(self.horario_fila), dtype=bool)
+            if dia is not None:
+                coincide &= self.horario_dia == _DIAS_NORMALIZADOS[normalizar(dia)]
+            if desde is not None:
+                coincide &= self.horario_inicio <= desde
+            if hasta is not None:
+                coincide &= self.horario_fin >= hasta
+            con_horario = np.zeros(len(self.ids), dtype=bool)
+            con_horario[self.horario_fila[coincide]] = True
+            seleccion &= con_horario
+
+        return self.ids[seleccion]
@@ -0,0 +1,328 @@
+import hashlib
+import hmac
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from almacen import get_almacen
+
+# Cada cuánto (segundos) una cache mira si otro proceso la invalidó
+INTERVALO_VERSIONES = float(os.getenv("CACHE_INTERVALO_VERSIONES", "1"))
+
+# Registro de todas las caches del proceso (para estadísticas e invalidación global)
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class CacheTTL:
+    """
+    Cache en memoria compartida por todas las sesiones del proceso.
+
+    Cada entrada expira a los `ttl` segundos y, al superar `max_entradas`,
+    se descarta la usada hace más tiempo (LRU).
+
+    Con un almacén compartido (ALMACEN_URL) cada invalidación incrementa el
+    contador `cache:<nombre>:version` del almacén, y las copias de los demás
+    procesos se vacían cuando ven que cambió. Las caches con
+    `compartida=True` guardan además sus entradas en el almacén, bajo una
+    clave que incluye ese contador: un proceso que no tiene el valor lo
+    toma de ahí en lugar de recalcularlo, y una invalidación deja las
+    entradas viejas fuera de alcance sin tener que borrarlas. Esas entradas
+    van firmadas con HMAC (clave derivada de SESION_SECRETO) y una con
+    firma inválida se ignora: nunca se deserializa algo que no escribió
+    una réplica.
+    """
+
+    def __init__(self, nombre: str, ttl: float = 300, max_entradas: int = 128, compartida: bool = False):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.compartida = compartida
+        self._datos = OrderedDict()
+        self._derivados = {}
+        # Cargas en curso por clave: quien llega mientras tanto espera el mismo resultado
+        self._cargando = {}
+        # Cambia con cada invalidación: una carga que empezó antes no guarda su resultado
+        self._epoca = 0
+        self._lock = threading.RLock()
+        self._version_remota = None
+        self._revisada = float("-inf")
+        self.version = 0
+        self.hits = 0
+        self.hits_compartidos = 0
+        self.misses = 0
+        self.invalidaciones = 0
+        self.invalidaciones_remotas = 0
+
+    # --- almacén compartido ---
+
+    def _vaciar_local(self):
+        self._datos.clear()
+        self._derivados.clear()
+        self.version += 1
+        self._epoca += 1
+
+    def _revisar_remota(self, forzar: bool = False):
+        """Vacía la copia local si otro proceso invalidó la cache (como mucho una consulta por intervalo)"""
+        almacen = get_almacen()
+        if not almacen.compartido or (not forzar and time.monotonic() - self._revisada < INTERVALO_VERSIONES):
+            return
+        self._revisada = time.monotonic()
+        try:
+            remota = int(almacen.get(f"cache:{self.nombre}:version") or 0)
+        except Exception as e:
+            print(f"Cache {self.nombre}: no se pudo leer la versión compartida: {e}")
+            return
+        if self._version_remota is not None and remota != self._version_remota:
+            self._vaciar_local()
+            self.invalidaciones_remotas += 1
+        self._version_remota = remota
+
+    def _publicar(self):
+        """Avisa a los demás procesos que la cache cambió (se llama sin el lock tomado)"""
+        almacen = get_almacen()
+        if not almacen.compartido:
+            return
+        try:
+            nueva = almacen.incrementar(f"cache:{self.nombre}:version")
+        except Exception as e:
+            print(f"Cache {self.nombre}: no se pudo publicar la invalidación: {e}")
+            return
+        with self._lock:
+            if self._version_remota is not None and nueva <= self._version_remota:
+                # Otra publicación de este proceso, posterior, ya llegó
+                return
+            if self._version_remota is not None and nueva != self._version_remota + 1:
+                # Otro proceso también la invalidó desde la última revisión
+                self._vaciar_local()
+            self._version_remota = nueva
+            self._revisada = time.monotonic()
+
+    def _clave_compartida(self, clave) -> str:
+        huella = hashlib.sha1(repr(clave).encode("utf-8")).hexdigest()
+        return f"cache:{self.nombre}:{self._version_remota}:{huella}"
+
+    def _firmar(self, datos: bytes) -> bytes:
+        return hmac.new(_clave_firma(), datos, hashlib.sha256).digest() + datos
+
+    def _verificar(self, firmado: bytes) -> bytes:
+        """Datos de una entrada del almacén, o ValueError si la firma no corresponde"""
+        firma, datos = firmado[:_LARGO_FIRMA], firmado[_LARGO_FIRMA:]
+        if not hmac.compare_digest(firma, hmac.new(_clave_firma(), datos, hashlib.sha256).digest()):
+            raise ValueError("entrada con firma inválida")
+        return datos
+
+    def _leer_compartida(self, clave):
+        if not self.compartida or not get_almacen().compartido:
+            return _FALTA
+        with self._lock:
+            self._revisar_remota(forzar=self._version_remota is None)
+            clave_compartida = self._clave_compartida(clave)
+        try:
+            valor = get_almacen().get(clave_compartida)
+            return _FALTA if valor is None else pickle.loads(self._verificar(valor))
+        except Exception as e:
+            print(f"Cache {self.nombre}: no se pudo leer del almacén compartido: {e}")
+            return _FALTA
+
+    def _guardar_compartida(self, clave, valor):
+        if not self.compartida or not get_almacen().compartido:
+            return
+        with self._lock:
+            self._revisar_remota(forzar=self._version_remota is None)
+            clave_compartida = self._clave_compartida(clave)
+        try:
+            get_almacen().set(clave_compartida, self._firmar(pickle.dumps(valor)), ttl=self.ttl)
+        except Exception as e:
+            print(f"Cache {self.nombre}: no se pudo guardar en el almacén compartido: {e}")
+
+    # --- operaciones ---
+
+    def _guardar_local(self, clave, valor):
+        self._datos[clave] = (time.monotonic() + self.ttl, valor)
+        self._datos.move_to_end(clave)
+        self.version += 1
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+    def _local(self, clave):
+        """Valor vigente en la copia local o _FALTA (con el lock tomado)"""
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return _FALTA
+        if entrada[0] < time.monotonic():
+            del self._datos[clave]
+            return _FALTA
+        self._datos.move_to_end(clave)
+        return entrada[1]
+
+    def get(self, clave, defecto=None):
+        """Devuelve el valor guardado o `defecto` si no existe o expiró"""
+        with self._lock:
+            self._revisar_remota()
+            valor = self._local(clave)
+            if valor is not _FALTA:
+                self.hits += 1
+                return valor
+            epoca = self._epoca
+        # El almacén compartido se consulta sin el lock: las demás claves siguen respondiendo
+        valor = self._leer_compartida(clave)
+        with self._lock:
+            if valor is _FALTA:
+                self.misses += 1
+                return defecto
+            if epoca == self._epoca:
+                self._guardar_local(clave, valor)
+            self.hits_compartidos += 1
+            return valor
+
+    def set(self, clave, valor):
+        """Guarda un valor renovando su tiempo de expiración"""
+        with self._lock:
+            self._guardar_local(clave, valor)
+        self._guardar_compartida(clave, valor)
+
+    def obtener(self, clave, cargar):
+        """
+        Devuelve el valor de `clave` o lo calcula con `cargar()` si no está.
+
+        Varias sesiones que piden la misma clave a la vez esperan una sola
+        carga. La carga corre sin el lock de la cache, así que una consulta
+        lenta no frena las demás claves ni las estadísticas. Si la cache se
+        invalida mientras tanto, el resultado se devuelve pero no se guarda.
+        """
+        valor = self.get(clave, _FALTA)
+        if valor is not _FALTA:
+            return valor
+        with self._lock:
+            valor = self._local(clave)
+            if valor is not _FALTA:
+                return valor
+            en_curso = self._cargando.get(clave)
+            propia = en_curso is None
+            if propia:
+                en_curso = self._cargando[clave] = Future()
+                epoca = self._epoca
+        if not propia:
+            return en_curso.result()
+
+        try:
+            valor = cargar()
+        except BaseException as e:
+            with self._lock:
+                del self._cargando[clave]
+            en_curso.set_exception(e)
+            raise
+        with self._lock:
+            del self._cargando[clave]
+            vigente = epoca == self._epoca
+            if vigente:
+                self._guardar_local(clave, valor)
+        if vigente:
+            self._guardar_compartida(clave, valor)
+        en_curso.set_result(valor)
+        return valor
+
+    def derivado(self, clave, nombre: str, cargar, calcular):
+        """
+        Devuelve un valor calculado a partir de la entrada `clave`.
+
+        `calcular(valor)` se ejecuta una sola vez por versión de la cache: el
+        resultado se reutiliza hasta que la entrada se recarga, se corrige o
+        se invalida. Si la entrada no está se obtiene con `cargar()`.
+        """
+        valor = self.obtener(clave, cargar)
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[1] is not valor:
+                # La entrada cambió (o no se guardó) desde la carga: se calcula sin memorizar
+                return calcular(valor)
+            memo = self._derivados.get((clave, nombre))
+            if memo is None or memo[0] != self.version:
+                memo = (self.version, calcular(valor))
+                self._derivados[(clave, nombre)] = memo
+            return memo[1]
+
+    def actualizar(self, clave, funcion):
+        """
+        Aplica `funcion(valor)` a una entrada existente sin recargarla.
+
+        Devuelve False si la entrada no estaba en cache.
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                return False
+            valor = funcion(entrada[1])
+            self._datos[clave] = (entrada[0], valor)
+            self.version += 1
+            epoca = self._epoca
+        # El almacén se usa sin el lock, como en obtener: las demás claves siguen respondiendo.
+        # Los demás procesos descartan su copia; la corregida queda como la nueva compartida
+        self._publicar()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            vigente = epoca == self._epoca and entrada is not None and entrada[1] is valor
+        if vigente:
+            self._guardar_compartida(clave, valor)
+        return True
+
+    def invalidar(self, clave=None):
+        """Elimina una entrada, o toda la cache si no se indica clave"""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+                self._derivados.clear()
+            else:
+                self._datos.pop(clave, None)
+                for nombre in [d for d in self._derivados if d[0] == clave]:
+                    del self._derivados[nombre]
+            self.version += 1
+            self._epoca += 1
+            self.invalidaciones += 1
+        self._publicar()
+
+    def estadisticas(self):
+        """Devuelve los contadores de uso de la cache"""
+        with self._lock:
+            total = self.hits + self.hits_compartidos + self.misses
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self._datos),
+                "hits": self.hits,
+                "hits_compartidos": self.hits_compartidos,
+                "misses": self.misses,
+                "ratio_hits": (self.hits + self.hits_compartidos) / total if total else 0.0,
+                "invalidaciones": self.invalidaciones,
+                "invalidaciones_remotas": self.invalidaciones_remotas,
+                "version": self.version
+            }
+
+
+_FALTA = object()
+
+_LARGO_FIRMA = hashlib.sha256().digest_size
+
+
+def _clave_firma() -> bytes:
+    """Clave HMAC de las entradas compartidas, derivada de SESION_SECRETO"""
+    # Import diferido: tokens_sesion usa get_cache al importarse
+    from tokens_sesion import secreto
+    return hmac.new(secreto(), b"cache", hashlib.sha256).digest()
+
+
+def get_cache(nombre: str, ttl: float = 300, max_entradas: int = 128, compartida: bool = False) -> CacheTTL:
+    """Devuelve la cache registrada con ese nombre, creándola si no existe"""
+    with _caches_lock:
+        if nombre not in _caches:
+            _caches[nombre] = CacheTTL(nombre, ttl=ttl, max_entradas=max_entradas, compartida=compartida)
+        return _caches[nombre]
+
+
+def estadisticas_caches():
+    """Estadísticas de todas las caches del proceso"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [c.estadisticas() for c in caches]
@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from trazas import en_traza
+
+# Hilos compartidos por todas las sesiones para las consultas de las páginas
+HILOS_CARGA = int(os.getenv("CARGA_HILOS", "8"))
+# Plazo total (segundos) para las consultas de una página
+PLAZO_CARGA = float(os.getenv("CARGA_PLAZO", "5"))
+
+_pool = ThreadPoolExecutor(max_workers=HILOS_CARGA, thread_name_prefix="carga")
+
+
+def _ejecutar(funcion):
+    try:
+        return funcion()
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+
+def cargar(consultas: dict, plazo: float = PLAZO_CARGA) -> dict:
+    """
+    Ejecuta a la vez las consultas independientes de una página.
+
+    Cada consulta es una función sin argumentos que devuelve el dict
+    success/data habitual. Todas comparten un único plazo, así que la
+    página espera lo que tarde la más lenta y no la suma de todas. Las
+    que no terminan a tiempo devuelven success False: las que todavía no
+    empezaron se cancelan para no ocupar el pool, y las que ya corren
+    terminan y lo que carguen en las caches queda para el próximo rerun.
+
+    Hay clientes asíncronos (AsyncPostgrestClient), pero las consultas de
+    la aplicación pasan por el cliente instrumentado de conexion (latencias,
+    reintentos, trazas) y las pruebas usan el cliente SQLite de
+    supabase_falso, ambos síncronos: por eso el reparto es con hilos.
+
+    Args:
+        consultas (dict): {nombre: función}
+        plazo (float): segundos que se espera el conjunto
+
+    Returns:
+        dict: {nombre: respuesta de la función}
+    """
+    futuros = {nombre: _pool.submit(en_traza(_ejecutar), funcion) for nombre, funcion in consultas.items()}
+    wait(futuros.values(), timeout=plazo)
+
+    resultados = {}
+    for nombre, futuro in futuros.items():
+        if futuro.done():
+            resultados[nombre] = futuro.result()
+        else:
+            futuro.cancel()
+            resultados[nombre] = {"success": False, "message": f"La consulta '{nombre}' no respondió en {plazo:g} s"}
+    return resultados
@@ -1,6 +1,14 @@
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
 from dotenv import load_dotenv
+import bisect
 import os
+import random
+import threading
+import time
+import httpx
 
 # Cargar variables desde .env
 load_dotenv()
@@ -9,8 +17,305 @@ load_dotenv()
 SUPABASE_URL = f"https://{os.getenv('SUPABASE_HOST')}"
 SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
 
-# Crear cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Ajustes de red (segundos y cantidad de conexiones)
+TIMEOUT_CONEXION = float(os.getenv("SUPABASE_TIMEOUT_CONEXION", "5"))
+TIMEOUT_LECTURA = float(os.getenv("SUPABASE_TIMEOUT_LECTURA", "15"))
+MAX_CONEXIONES = int(os.getenv("SUPABASE_MAX_CONEXIONES", "20"))
+MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+DURACION_KEEPALIVE = float(os.getenv("SUPABASE_DURACION_KEEPALIVE", "30"))
+
+# Reintentos de lecturas ante fallas de red
+REINTENTOS_LECTURA = int(os.getenv("SUPABASE_REINTENTOS_LECTURA", "3"))
+ESPERA_BASE = float(os.getenv("SUPABASE_ESPERA_BASE", "0.2"))
+ESPERA_MAXIMA = float(os.getenv("SUPABASE_ESPERA_MAXIMA", "2"))
+
+# Límites superiores (ms) de los intervalos del histograma de latencia
+LIMITES_LATENCIA_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Métodos del constructor de consultas que definen la operación
+OPERACIONES = ("select", "insert", "upsert", "update", "delete")
+
+
+class HistogramaLatencia:
+    """Histograma de latencias con intervalos fijos, al estilo Prometheus"""
+
+    def __init__(self):
+        self.cuentas = [0] * (len(LIMITES_LATENCIA_MS) + 1)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.errores = 0
+        self.reintentos = 0
+
+    def registrar(self, ms: float):
+        self.cuentas[bisect.bisect_left(LIMITES_LATENCIA_MS, ms)] += 1
+        self.total += 1
+        self.suma_ms += ms
+
+    def percentil(self, p: float) -> float:
+        """Estima el percentil `p` (0-100) interpolando dentro del intervalo"""
+        if not self.total:
+            return 0.0
+        objetivo = self.total * p / 100
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            if cuenta and acumulado + cuenta >= objetivo:
+                inferior = LIMITES_LATENCIA_MS[i - 1] if i > 0 else 0.0
+                if i == len(LIMITES_LATENCIA_MS):
+                    return float(inferior)
+                return inferior + (LIMITES_LATENCIA_MS[i] - inferior) * (objetivo - acumulado) / cuenta
+            acumulado += cuenta
+        return float(LIMITES_LATENCIA_MS[-1])
+
+
+_histogramas = {}
+_histogramas_lock = threading.Lock()
+
+
+def _registrar_latencia(operacion: str, tabla: str, ms: float, error: bool, reintentos: int):
+    with _histogramas_lock:
+        histograma = _histogramas.setdefault((operacion, tabla), HistogramaLatencia())
+        histograma.registrar(ms)
+        histograma.errores += int(error)
+        histograma.reintentos += reintentos
+
+
+def estadisticas_latencia():
+    """Latencia de las consultas agrupadas por operación y tabla"""
+    with _histogramas_lock:
+        return [
+            {
+                "operacion": operacion,
+                "tabla": tabla,
+                "llamadas": h.total,
+                "errores": h.errores,
+                "reintentos": h.reintentos,
+                "promedio_ms": h.suma_ms / h.total if h.total else 0.0,
+                "p50_ms": h.percentil(50),
+                "p95_ms": h.percentil(95),
+                "p99_ms": h.percentil(99),
+                "intervalos": dict(zip([*LIMITES_LATENCIA_MS, "+Inf"], h.cuentas))
+            }
+            for (operacion, tabla), h in sorted(_histogramas.items())
+        ]
+
+
+def reiniciar_estadisticas_latencia():
+    with _histogramas_lock:
+        _histogramas.clear()
+
+
+# Funciones que se llaman después de cada consulta (p. ej. el módulo trazas)
+_observadores = []
+
+# Bytes de la última respuesta HTTP recibida en este hilo
+_respuesta_local = threading.local()
+
+
+def agregar_observador(funcion):
+    """
+    Registra `funcion(consulta, ms, respuesta, error, bytes_respuesta)`,
+    llamada al terminar cada `execute()`.
+    """
+    if funcion not in _observadores:
+        _observadores.append(funcion)
+
+
+def _notificar(consulta, ms, respuesta, error):
+    bytes_respuesta = getattr(_respuesta_local, "bytes", None)
+    for observador in _observadores:
+        try:
+            observador(consulta, ms, respuesta, error, bytes_respuesta)
+        except Exception as e:
+            print(f"Error en observador de consultas: {e}")
+
+
+def medir_respuesta(response):
+    """Hook de httpx: guarda el tamaño de la respuesta para las trazas"""
+    response.read()
+    _respuesta_local.bytes = len(response.content)
+
+
+def _espera(intento: int) -> float:
+    """Backoff exponencial con jitter completo"""
+    return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** intento))
+
+
+class Consulta:
+    """
+    Envuelve un constructor de consultas de postgrest.
+
+    Los filtros y modificadores se delegan tal cual; `execute()` mide la
+    latencia y, si la operación es una lectura, la reintenta ante errores
+    de red (conexión rechazada, timeout, conexión cortada).
+    """
+
+    def __init__(self, constructor, operacion: str, tabla: str):
+        object.__setattr__(self, "_constructor", constructor)
+        object.__setattr__(self, "operacion", operacion)
+        object.__setattr__(self, "tabla", tabla)
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._constructor, nombre)
+        if not callable(atributo):
+            # `.not_` es una propiedad que devuelve otro constructor
+            return self._envolver(atributo, nombre)
+
+        def metodo(*args, **kwargs):
+            return self._envolver(atributo(*args, **kwargs), nombre)
+        return metodo
+
+    def _envolver(self, resultado, nombre):
+        if hasattr(resultado, "execute") and not isinstance(resultado, Consulta):
+            operacion = nombre if nombre in OPERACIONES else self.operacion
+            return Consulta(resultado, operacion, self.tabla)
+        return resultado
+
+    def __setattr__(self, nombre, valor):
+        # p. ej. `query.params = query.params.add(...)`
+        setattr(self._constructor, nombre, valor)
+
+    @property
+    def forma(self) -> str:
+        """
+        Forma de la consulta sin valores: operación, tabla y filtros usados.
+        Ej: 'select canchas ?disponible=eq&order'
+        """
+        partes = []
+        params = getattr(self._constructor, "params", None)
+        for clave, valor in (params.multi_items() if hasattr(params, "multi_items") else []):
+            if clave in ("select", "order", "limit", "offset", "on_conflict", "columns", "or", "and"):
+                partes.append(clave)
+            else:
+                partes.append(f"{clave}={valor.split('.')[0]}")
+        return f"{self.operacion} {self.tabla}" + (" ?" + "&".join(sorted(partes)) if partes else "")
+
+    def execute(self):
+        reintentos = REINTENTOS_LECTURA if self.operacion == "select" else 0
+        intento = 0
+        inicio = time.perf_counter()
+        _respuesta_local.bytes = None
+        while True:
+            try:
+                respuesta = self._constructor.execute()
+                self._terminar(inicio, respuesta, None, intento)
+                return respuesta
+            except httpx.TransportError as e:
+                if intento >= reintentos:
+                    self._terminar(inicio, None, e, intento)
+                    raise
+                time.sleep(_espera(intento))
+                intento += 1
+            except Exception as e:
+                self._terminar(inicio, None, e, intento)
+                raise
+
+    def _terminar(self, inicio, respuesta, error, reintentos):
+        ms = (time.perf_counter() - inicio) * 1000
+        _registrar_latencia(self.operacion, self.tabla, ms, error is not None, reintentos)
+        _notificar(self, ms, respuesta, error)
+
+
+class ClienteInstrumentado:
+    """Cliente Supabase cuyas consultas pasan por `Consulta`"""
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    def table(self, tabla: str):
+        return Consulta(self._cliente.table(tabla), "select", tabla)
+
+    def from_(self, tabla: str):
+        return self.table(tabla)
+
+    def rpc(self, funcion: str, parametros: dict = None):
+        return Consulta(self._cliente.rpc(funcion, parametros or {}), "rpc", funcion)
+
+    def __getattr__(self, nombre):
+        # auth, storage, postgrest, etc.
+        return getattr(self._cliente, nombre)
+
+
+class _PostgrestConPool(SyncPostgrestClient):
+    """Cliente postgrest que reutiliza conexiones keep-alive con límites propios"""
+
+    def create_session(self, base_url, headers, timeout):
+        # SyncClient y no httpx.Client: SyncPostgrestClient.aclose()/__exit__ llaman a session.aclose()
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=MAX_CONEXIONES,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=DURACION_KEEPALIVE
+            ),
+            event_hooks={"response": [medir_respuesta]}
+        )
+
+
+def _crear_postgrest(rest_url, headers, schema, timeout):
+    return _PostgrestConPool(rest_url, headers=headers, schema=schema, timeout=timeout)
+
+
+def _crear_cliente() -> Client:
+    timeout = httpx.Timeout(TIMEOUT_LECTURA, connect=TIMEOUT_CONEXION)
+    cliente = create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(postgrest_client_timeout=timeout))
+    # Supabase vuelve a crear el cliente postgrest cuando cambia la sesión de
+    # auth; reemplazando la fábrica la instancia nueva también usa el pool
+    cliente._init_postgrest_client = _crear_postgrest
+    return cliente
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
 
 def get_supabase_client():
-    return supabase
+    """Devuelve el cliente compartido, creándolo en el primer uso"""
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = ClienteInstrumentado(_crear_cliente())
+    return _cliente
+
+
+def configurar_cliente(cliente=None):
+    """
+    Reemplaza el cliente compartido (p. ej. por uno de pruebas).
+
+    Con `cliente=None` se vuelve a crear el cliente de Supabase en el
+    próximo uso.
+    """
+    global _cliente
+    with _cliente_lock:
+        _cliente = ClienteInstrumentado(cliente) if cliente is not None else None
+
+# Filas por página al descargar tablas grandes (límite habitual de PostgREST)
+TAM_PAGINA = 1000
+
+def consultar_paginado(tabla: str, columnas: str, filtros=lambda q: q, clave: str = "id"):
+    """
+    Descarga una tabla completa en páginas.
+
+    Por defecto pagina por clave (`clave` > último valor visto). Las tablas
+    sin columna id (clave=None) se paginan por posición con limit/offset;
+    en ese caso `filtros` debe fijar un orden.
+    """
+    supabase = get_supabase_client()
+    filas, ultimo = [], None
+    while True:
+        query = filtros(supabase.table(tabla).select(columnas))
+        if clave is None:
+            # range() de postgrest 0.13 pide un elemento menos del indicado
+            query = query.limit(TAM_PAGINA).offset(len(filas))
+        else:
+            if ultimo is not None:
+                query = query.gt(clave, ultimo)
+            query = query.order(clave).limit(TAM_PAGINA)
+        pagina = query.execute().data or []
+        filas.extend(pagina)
+        if len(pagina) < TAM_PAGINA:
+            return filas
+        if clave is not None:
+            ultimo = pagina[-1][clave]
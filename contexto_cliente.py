@@ -0,0 +1,83 @@
+import os
+from functools import lru_cache
+import httpagentparser
+import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from tornado.httputil import HTTPServerRequest
+
+# Cantidad de proxies propios delante de la app (cada uno agrega una IP a X-Forwarded-For)
+PROXIES_CONFIABLES = int(os.getenv("PROXIES_CONFIABLES", "0"))
+# Agentes de usuario distintos cuya descripción se recuerda
+MAX_AGENTES = int(os.getenv("CONTEXTO_MAX_AGENTES", "1024"))
+
+
+def _request_sesion():
+    """Request HTTP del websocket de la sesión actual, o None fuera de Streamlit (o en AppTest)"""
+    ctx = get_script_run_ctx()
+    if ctx is None or not runtime.exists():
+        return None
+    cliente = runtime.get_instance().get_client(ctx.session_id)
+    request = getattr(cliente, "request", None)
+    return request if isinstance(request, HTTPServerRequest) else None
+
+
+def encabezados_cliente() -> dict:
+    """Encabezados HTTP con los que se conectó el navegador de la sesión actual"""
+    request = _request_sesion()
+    return dict(request.headers) if request is not None else {}
+
+
+def _ip(request):
+    reenviada = request.headers.get("X-Forwarded-For")
+    if PROXIES_CONFIABLES and reenviada:
+        ips = [ip.strip() for ip in reenviada.split(",") if ip.strip()]
+        if ips:
+            return ips[max(0, len(ips) - PROXIES_CONFIABLES)]
+    return request.remote_ip
+
+
+def ip_cliente():
+    """
+    IP del navegador de la sesión actual, o None si no se puede saber.
+
+    Detrás de proxies se toma de X-Forwarded-For, contando desde la derecha
+    la cantidad de PROXIES_CONFIABLES (las entradas anteriores las puede
+    falsificar el cliente).
+    """
+    request = _request_sesion()
+    return _ip(request) if request is not None else None
+
+
+@lru_cache(maxsize=MAX_AGENTES)
+def describir_agente(user_agent: str) -> tuple:
+    """(navegador, sistema operativo) de un User-Agent; los navegadores de una instalación se repiten mucho"""
+    if not user_agent:
+        return None, None
+    detectado = httpagentparser.detect(user_agent)
+    navegador = detectado.get("browser", {})
+    sistema = detectado.get("os", {})
+    return (
+        " ".join(filter(None, [navegador.get("name"), navegador.get("version")])) or None,
+        " ".join(filter(None, [sistema.get("name"), sistema.get("version")])) or None
+    )
+
+
+def contexto_sesion() -> dict:
+    """
+    IP, navegador y sistema del cliente para la bitácora.
+
+    Se leen de los encabezados la primera vez y quedan en la sesión de
+    Streamlit, así que cada login o logout posterior no vuelve a calcularlos.
+    """
+    contexto = st.session_state.get("contexto_cliente")
+    if contexto is None:
+        request = _request_sesion()
+        navegador, sistema = describir_agente(request.headers.get("User-Agent", "") if request else "")
+        contexto = {
+            "ip_acceso": _ip(request) if request is not None else None,
+            "navegador": navegador,
+            "nombre_maquina": sistema
+        }
+        st.session_state.contexto_cliente = contexto
+    return contexto
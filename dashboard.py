@@ -1,11 +1,23 @@
+import hashlib
 import streamlit as st
 import pandas as pd
 from funciones import obtener_canchas_disponibles
 from bitacora_view import mostrar_bitacora
 from reportes_view import mostrar_reportes
 from business_view import mostrar_business
-from funciones import crear_cancha, actualizar_cancha, eliminar_cancha, actualizar_disponibilidad
+from funciones import crear_cancha, actualizar_cancha, eliminar_cancha
+from funciones import actualizar_canchas_lote
+from funciones import obtener_indice_busqueda, obtener_tipos_cancha
+from reservas import obtener_reservas_del_dia
+from bitacora import acciones_recientes
+from carga import cargar
+from disponibilidad import DIAS_SEMANA
+from modelo import Cancha, formatear_canchas
+import sincronizacion
+from trazas import trazar
+from rendimiento_view import mostrar_panel_rendimiento
 
+@trazar
 def mostrar_dashboard():
     """Muestra el dashboard principal con la lista de canchas disponibles"""
     # Verificar si hay sesión activa
@@ -35,6 +47,7 @@ def mostrar_dashboard():
     if usuario['rol'] == 'admin':
         if st.sidebar.button("📝 Bitácora"):
             st.session_state.page = 'bitacora'
+        mostrar_panel_rendimiento()
     
     # Mostrar la página correspondiente
     if st.session_state.page == 'dashboard':
@@ -46,6 +59,7 @@ def mostrar_dashboard():
     elif st.session_state.page == 'bitacora' and usuario['rol'] == 'admin':
         mostrar_bitacora()
 
+@trazar
 def mostrar_contenido_dashboard(usuario):
     """Muestra el contenido principal del dashboard"""
     st.write(f"👤 Bienvenido **{usuario['nombre']}**")
@@ -53,11 +67,19 @@ def mostrar_contenido_dashboard(usuario):
     
     st.divider()
     
-    # Obtener canchas
-    response = obtener_canchas_disponibles()
+    # Consultas independientes de la página, en paralelo y con un solo plazo
+    datos = cargar({
+        "canchas": obtener_canchas_disponibles,
+        "tipos": obtener_tipos_cancha,
+        "reservas_hoy": obtener_reservas_del_dia,
+        "acciones": lambda: acciones_recientes(usuario["id"])
+    })
+    response = datos["canchas"]
+    tipos_cancha = datos["tipos"]["data"] if datos["tipos"]["success"] else {}
     
     if response["success"]:
-        df = pd.DataFrame(response["data"])
+        df = response["data"]
+        indice = obtener_indice_busqueda()
         
         # Crear una fila con búsqueda y botones de ordenar
         col1, col2, col3 = st.columns([3, 1, 1])
@@ -68,29 +90,36 @@ def mostrar_contenido_dashboard(usuario):
                                  placeholder="Ejemplo: Fútbol, Cancha 1...")
         
         with col2:
-            # Botón de ordenar por horarios
+            # Botón de ordenar por horarios (primer horario de cada cancha)
             if st.button("⏰", help="Ordenar por horarios"):
-                df['hora_num'] = df['horarios_disponibles'].str.extract('(\d{2}):(\d{2})').astype(float).iloc[:, 0]
-                df = df.sort_values('hora_num')
-                df = df.drop('hora_num', axis=1)
+                st.session_state.orden_canchas = 'horarios'
         
         with col3:
             # Botón de ordenar por tipo
             if st.button("🎯", help="Ordenar por tipo de cancha"):
-                df = df.sort_values('tipos_cancha')
+                st.session_state.orden_canchas = 'tipo'
         
-        # Filtrar el DataFrame si hay texto en la búsqueda
-        if search:
-            mask = (df['nombre'].str.contains(search, case=False, na=False)) | \
-                  (df['tipos_cancha'].str.contains(search, case=False, na=False))
-            df = df[mask]
-            
-            if df.empty:
-                st.info("No se encontraron canchas que coincidan con la búsqueda.")
+        # El orden elegido se mantiene en los reruns siguientes
+        df = ordenar_canchas(df, indice, st.session_state.get('orden_canchas'))
+        
+        # Filtros por día y rango horario
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            dia = st.selectbox("📅 Día", ["Todos"] + [d.capitalize() for d in DIAS_SEMANA])
+        with col2:
+            desde, hasta = st.slider("🕒 Horario", min_value=0, max_value=24, value=(0, 24), format="%d:00")
         
-        # Mostrar tabla filtrada
-        st.dataframe(
-            df,
+        # Filtrar el DataFrame con el índice de búsqueda
+        df = filtrar_canchas(df, indice, search, dia, desde, hasta)
+        if df.empty:
+            st.info("No se encontraron canchas que coincidan con la búsqueda.")
+        
+        # Mostrar tabla filtrada (el formato se aplica solo a las filas que se dibujan).
+        # Cada rol edita sus columnas en la tabla y los cambios se guardan juntos
+        tabla, clave_tabla = base_editor(formatear_canchas(df))
+        editables = COLUMNAS_EDITABLES.get(usuario['rol'], [])
+        tabla_editada = st.data_editor(
+            tabla,
             column_config={
                 "id": st.column_config.NumberColumn(
                     "Cancha #",
@@ -100,28 +129,39 @@ def mostrar_contenido_dashboard(usuario):
                 "nombre": st.column_config.TextColumn(
                     "Nombre",
                     help="Nombre de la cancha",
-                    disabled=usuario['rol'] not in ['admin']
+                    disabled='nombre' not in editables
                 ),
-                "tipos_cancha": st.column_config.TextColumn(
+                "tipos_cancha": st.column_config.SelectboxColumn(
                     "Tipo de Cancha",
                     help="Tipo de cancha",
-                    disabled=usuario['rol'] not in ['admin']
+                    options=list(tipos_cancha.values()) + ["Sin tipo"],
+                    disabled='tipos_cancha' not in editables
                 ),
-                "disponible": st.column_config.TextColumn(
+                "disponible": st.column_config.SelectboxColumn(
                     "Disponible",
                     help="Estado de la cancha",
-                    disabled=usuario['rol'] not in ['admin', 'consultor']
+                    options=["✅", "❌"],
+                    disabled='disponible' not in editables
+                ),
+                "horarios_disponibles": st.column_config.TextColumn(
+                    "Horarios",
+                    disabled=True
                 )
             },
             hide_index=True,
-            use_container_width=True
+            use_container_width=True,
+            key=clave_tabla
         )
+        if editables and st.button("💾 Guardar cambios de la tabla"):
+            handle_table_change(tabla, tabla_editada, usuario['rol'])
+
+        mostrar_actividad(datos["reservas_hoy"], datos["acciones"], df)
     else:
         st.warning(response["message"])
 
         # Modal de edición
         if 'editing_cancha' in st.session_state:
-            show_edit_modal(st.session_state.editing_cancha, df)
+            show_edit_modal(st.session_state.editing_cancha, df, tipos_cancha)
 
     # Formulario para agregar/editar cancha (solo admin y registrador)
     if usuario['rol'] in ['admin', 'registrador']:
@@ -135,13 +175,14 @@ def mostrar_contenido_dashboard(usuario):
             
             if modo == "Editar Cancha Existente":
                 # Selector de cancha a editar
+                nombres = dict(zip(df['id'].tolist(), df['nombre'].tolist()))
                 cancha_id = st.selectbox(
                     "Seleccione la cancha a editar",
                     options=df['id'].tolist(),
-                    format_func=lambda x: f"Cancha #{x} - {df[df['id']==x]['nombre'].iloc[0]}"
+                    format_func=lambda x: f"Cancha #{x} - {nombres[x]}"
                 )
                 # Obtener datos de la cancha seleccionada
-                cancha_actual = df[df['id'] == cancha_id].iloc[0]
+                cancha_actual = Cancha.de_tabla(df, cancha_id)
             else:
                 cancha_actual = None
 
@@ -150,18 +191,15 @@ def mostrar_contenido_dashboard(usuario):
             with col1:
                 nombre = st.text_input(
                     "Nombre de la cancha", 
-                    value=cancha_actual['nombre'] if cancha_actual is not None else "",
+                    value=cancha_actual.nombre if cancha_actual is not None else "",
                     placeholder="Ejemplo: Cancha Principal"
                 )
-                # Obtener tipos de cancha desde la base de datos
-                tipos_cancha = {
-                    1: "Fútbol",
-                    2: "Tenis",
-                    3: "Pádel"
-                }
+                if not tipos_cancha:
+                    st.warning(datos["tipos"].get("message", "No hay tipos de cancha registrados"))
                 tipo_id = st.selectbox(
                     "Tipo de Cancha",
                     options=list(tipos_cancha.keys()),
+                    index=_indice_tipo(tipos_cancha, cancha_actual),
                     format_func=lambda x: tipos_cancha[x],
                     help="Selecciona el tipo de cancha"
                 )
@@ -215,6 +253,85 @@ def mostrar_contenido_dashboard(usuario):
         from session_manager import logout_user
         logout_user()
 
+def mostrar_actividad(reservas_hoy, acciones, df):
+    """Reservas del día y últimas acciones del usuario"""
+    with st.expander("📅 Actividad de hoy"):
+        col1, col2 = st.columns(2)
+        with col1:
+            if not reservas_hoy["success"]:
+                st.warning(reservas_hoy["message"])
+            else:
+                reservas = reservas_hoy["data"]
+                st.metric("Reservas de hoy", f"{len(reservas):,}")
+                if not reservas.empty:
+                    nombres = dict(zip(df['id'].tolist(), df['nombre'].tolist()))
+                    st.dataframe(
+                        {
+                            "Cancha": [nombres.get(i, f"#{i}") for i in reservas["id_cancha"].tolist()],
+                            "Desde": [h.strftime("%H:%M") for h in reservas["hora_inicio"]],
+                            "Hasta": [h.strftime("%H:%M") for h in reservas["hora_fin"]]
+                        },
+                        hide_index=True,
+                        use_container_width=True
+                    )
+        with col2:
+            st.write("🕘 Tus últimas acciones")
+            if not acciones["success"]:
+                st.warning(acciones["message"])
+            elif not acciones["data"]:
+                st.caption("Sin acciones registradas")
+            else:
+                for accion in acciones["data"]:
+                    st.caption(f"{accion['fecha_hora_ingreso'][:16].replace('T', ' ')} · "
+                               f"{accion['tipo_accion']} · {accion['descripcion'] or ''}")
+
+def _indice_tipo(tipos_cancha, cancha):
+    """Posición del tipo de la cancha en el selector (el primero si no tiene)"""
+    nombres = list(tipos_cancha.values())
+    if cancha is None or cancha.tipo not in nombres:
+        return 0
+    return nombres.index(cancha.tipo)
+
+def ordenar_canchas(df, indice, orden=None):
+    """Ordena la tabla de canchas por primer horario ('horarios') o por tipo ('tipo')"""
+    if orden == 'horarios':
+        return df.sort_values('id', key=lambda ids: ids.map(indice.primera_hora), kind='stable')
+    if orden == 'tipo':
+        return df.sort_values('tipos_cancha', kind='stable')
+    return df
+
+def base_editor(tabla):
+    """
+    Tabla que se pasa a st.data_editor y la key del editor.
+
+    La key sale de los ids de las filas en orden, no de su contenido.
+    st.data_editor descarta las ediciones cuando cambian los datos, así que
+    mientras haya ediciones sin guardar se le sigue pasando la misma tabla
+    aunque una sincronización traiga valores nuevos; al guardar, los
+    cambios se calculan contra esa misma tabla.
+    """
+    ids = ",".join(str(i) for i in tabla['id'])
+    clave = "tabla_canchas_" + hashlib.sha1(ids.encode("ascii")).hexdigest()[:16]
+    base = st.session_state.get('tabla_canchas_base')
+    pendientes = (st.session_state.get(clave) or {}).get('edited_rows')
+    if base is not None and base[0] == clave and pendientes:
+        return base[1], clave
+    st.session_state.tabla_canchas_base = (clave, tabla)
+    return tabla, clave
+
+def filtrar_canchas(df, indice, search="", dia="Todos", desde=0, hasta=24):
+    """Filtra la tabla de canchas por texto, día y rango horario (horas enteras)"""
+    filtra_horario = (desde, hasta) != (0, 24)
+    if not (search or dia != "Todos" or filtra_horario):
+        return df
+    ids = indice.buscar(
+        search,
+        dia=None if dia == "Todos" else dia,
+        desde=desde * 60 if filtra_horario else None,
+        hasta=hasta * 60 if filtra_horario else None
+    )
+    return df[df['id'].isin(ids)]
+
 def set_editing_cancha(cancha_id):
     """Helper function para establecer la cancha en edición"""
     st.session_state.editing_cancha = cancha_id
@@ -226,26 +343,27 @@ def delete_cancha(cancha_id):
         st.success("Cancha eliminada correctamente")
         st.rerun()
 
-def show_edit_modal(cancha_id, df):
+def show_edit_modal(cancha_id, df, tipos_cancha):
     """Helper function para mostrar el modal de edición"""
-    cancha = df[df['id'] == cancha_id].iloc[0]
+    cancha = Cancha.de_tabla(df, cancha_id)
     
     with st.form(key=f"edit_form_{cancha_id}"):
         st.subheader(f"Editar Cancha {cancha_id}")
-        nuevo_nombre = st.text_input("Nombre", value=cancha['nombre'])
+        nuevo_nombre = st.text_input("Nombre", value=cancha.nombre)
         nuevo_tipo = st.selectbox(
             "Tipo de Cancha",
-            options=[1, 2, 3],
-            format_func=lambda x: "Fútbol" if x == 1 else "Tenis" if x == 2 else "Pádel"
+            options=list(tipos_cancha.keys()),
+            index=_indice_tipo(tipos_cancha, cancha),
+            format_func=lambda x: tipos_cancha[x]
         )
-        nueva_disponibilidad = st.checkbox("Disponible", value=cancha['disponible'] == "✅")
+        nueva_disponibilidad = st.checkbox("Disponible", value=cancha.disponible)
         
         col1, col2 = st.columns(2)
         with col1:
             if st.form_submit_button("Guardar"):
                 actualizar_cancha(cancha_id, {
                     "nombre": nuevo_nombre,
-                    "tipo_id": nuevo_tipo,
+                    "id_tipo": nuevo_tipo,
                     "disponible": nueva_disponibilidad
                 })
                 del st.session_state.editing_cancha
@@ -263,29 +381,69 @@ def show_edit_modal(cancha_id, df):
         from session_manager import logout_user
         logout_user()
 
+# Columnas de la tabla de canchas que puede editar cada rol
+COLUMNAS_EDITABLES = {
+    'admin': ['nombre', 'tipos_cancha', 'disponible'],
+    'consultor': ['disponible']
+}
+
+def diferencias_canchas(original_df, edited_df, columnas):
+    """
+    Cambios de la tabla editada como [{"id": ..., "datos": {...}}].
+
+    Compara columna por columna (vectorizado) solo las columnas editables,
+    emparejando las filas por id.
+    """
+    columnas = [c for c in columnas if c in edited_df.columns]
+    if not columnas or edited_df.empty:
+        return []
+    antes = original_df.set_index('id')[columnas]
+    despues = edited_df.set_index('id')[columnas].reindex(antes.index)
+    distinto = despues.ne(antes) & ~(despues.isna() & antes.isna())
+    distinto = distinto[distinto.any(axis=1)]
+    return [
+        {"id": int(cancha_id), "datos": {col: despues.at[cancha_id, col] for col in columnas if marcas[col]}}
+        for cancha_id, marcas in distinto.iterrows()
+    ]
+
+def _a_columnas_bd(datos, tipos):
+    """Pasa los valores editados en la tabla a las columnas de `canchas`"""
+    columnas = {}
+    for col, valor in datos.items():
+        if col == 'disponible':
+            # La tabla muestra la disponibilidad como "✅" / "❌" (ambos textos son verdaderos con bool)
+            columnas['disponible'] = valor == "✅"
+        elif col == 'tipos_cancha':
+            nombre = str(valor).strip().lower()
+            if nombre == "sin tipo":
+                # Quitar el tipo: id_tipo admite NULL
+                columnas['id_tipo'] = None
+            else:
+                # Un tipo desconocido va como -1 y la base rechaza la fila
+                columnas['id_tipo'] = tipos.get(nombre, -1)
+        else:
+            columnas[col] = str(valor)
+    return columnas
+
 def handle_table_change(original_df, edited_df, rol):
-    """Maneja los cambios en la tabla según el rol del usuario"""
-    changes = edited_df.compare(original_df)
-    if changes.empty:
+    """Guarda en una sola transacción los cambios de la tabla según el rol del usuario"""
+    cambios = diferencias_canchas(original_df, edited_df, COLUMNAS_EDITABLES.get(rol, []))
+    if not cambios:
         return
 
-    for idx in changes.index:
-        cancha_id = original_df.loc[idx, 'id']
-        
-        if rol == 'admin':
-            # Administradores pueden editar todo
-            datos_actualizados = {
-                col: edited_df.loc[idx, col] 
-                for col in changes.columns.levels[0] 
-                if col not in ['id', 'acciones']
-            }
-            actualizar_cancha(cancha_id, datos_actualizados)
-            
-        elif rol == 'consultor':
-            # Consultores solo pueden cambiar disponibilidad
-            if 'disponible' in changes.columns.levels[0]:
-                nuevo_estado = edited_df.loc[idx, 'disponible']
-                actualizar_disponibilidad(cancha_id, nuevo_estado == "✅")
+    tipos = {t["nombre"].lower(): t["id"] for t in sincronizacion.tipos_cancha.datos()}
+    cambios = [{"id": c["id"], "datos": _a_columnas_bd(c["datos"], tipos)} for c in cambios]
+    # La base no conoce el rol del usuario: el límite de columnas lo pone la aplicación
+    response = actualizar_canchas_lote(cambios, solo_disponibilidad=rol != 'admin')
+
+    if not response["success"]:
+        st.error(response["message"])
+        rechazadas = [r for r in response.get("data", []) if r["estado"] == "rechazada"]
+        if rechazadas:
+            st.dataframe(pd.DataFrame(rechazadas)[["id_cancha", "motivo"]], hide_index=True)
+        return
 
-    st.success("✅ Cambios guardados correctamente")
+    st.success(f"✅ {len(response['data'])} cancha(s) actualizada(s)")
+    # La tabla guardada ya no es la base: el próximo rerun muestra los datos nuevos
+    st.session_state.pop('tabla_canchas_base', None)
     st.rerun()
\ No newline at end of file
@@ -0,0 +1,154 @@
+from datetime import date, datetime, timedelta, timezone
+import bcrypt
+import numpy as np
+from disponibilidad import DIAS_SEMANA
+
+TIPOS_CANCHA = ["fútbol", "pádel", "tenis", "básquet", "vóley"]
+SECTORES = ["Sector A", "Sector B", "Sector C", "Sector D"]
+ROLES = ["admin", "operador_reservas", "consultor", "registrador_eventos"]
+ACCIONES = ["LOGIN", "INSERT", "UPDATE", "DELETE"]
+
+# Todos los usuarios generados comparten esta contraseña
+CONTRASENA_PRUEBA = "Prueba123"
+
+# Las reservas son de una hora y caen entre estas horas, dentro del horario
+# de apertura de cualquier cancha generada
+PRIMERA_HORA_RESERVA = 9
+ULTIMA_HORA_RESERVA = 20
+
+
+# Mismo cálculo que hacen los triggers de 002_kpi_reservas.sql, para toda la tabla
+SQL_KPI_RESERVAS = """
+INSERT INTO kpi_eventos
+SELECT r.id_cancha, r.fecha, COALESCE(r.id_tipo, 0),
+       CAST(substr(r.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(r.hora_inicio, 4, 2) AS INT) * 60,
+       CAST(substr(r.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(r.hora_fin, 4, 2) AS INT) * 60,
+       COALESCE(r.precio_hora, 0), 1
+FROM reservas r
+WHERE r.id_cancha IS NOT NULL
+"""
+
+
+def email_usuario(i: int) -> str:
+    return f"usuario{i}@club.test"
+
+
+def generar_datos(cliente, canchas: int = 100, reservas: int = 1000, usuarios: int = 20,
+                  clientes: int = 500, eventos_bitacora: int = 0, dias: int = 90,
+                  semilla: int = 42, rondas_bcrypt: int = 4):
+    """
+    Llena la base de un ClienteFalso con datos reproducibles.
+
+    Con la misma semilla se generan siempre los mismos datos. Escala a
+    10.000 canchas y 1.000.000 de reservas: las filas se insertan por lotes
+    directamente en SQLite y las reservas se eligen sin repetir
+    (cancha, día, hora), así que nunca se solapan.
+
+    Args:
+        cliente: ClienteFalso
+        dias (int): días que abarcan las reservas, centrados en hoy
+        rondas_bcrypt (int): costo del hash de la contraseña de prueba
+
+    Returns:
+        dict: cantidad de filas generadas por tabla
+    """
+    rng = np.random.default_rng(semilla)
+    conexion = cliente.conexion
+    horas_por_dia = ULTIMA_HORA_RESERVA - PRIMERA_HORA_RESERVA + 1
+    if reservas > canchas * dias * horas_por_dia:
+        raise ValueError("No entran tantas reservas sin solapes: aumentar canchas o días")
+
+    with conexion:
+        conexion.executemany(
+            "INSERT INTO tipos_cancha (id, nombre) VALUES (?, ?)",
+            list(enumerate(TIPOS_CANCHA, start=1))
+        )
+
+        tipos = rng.integers(1, len(TIPOS_CANCHA) + 1, canchas)
+        precios = rng.choice([8000, 10000, 12000, 15000, 20000], canchas)
+        conexion.executemany(
+            "INSERT INTO canchas (id, nombre, id_tipo, ubicacion, disponible, precio_hora) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (i + 1, f"Cancha {i + 1} {TIPOS_CANCHA[t - 1].capitalize()}", int(t),
+                 SECTORES[i % len(SECTORES)], int(rng.random() > 0.1), int(p))
+                for i, (t, p) in enumerate(zip(tipos, precios))
+            ]
+        )
+
+        # Cada cancha abre entre 4 y 7 días, entre las 7-9 y las 21-23
+        horarios = []
+        for id_cancha in range(1, canchas + 1):
+            apertura, cierre = int(rng.integers(7, 10)), int(rng.integers(21, 24))
+            for dia in sorted(rng.choice(7, int(rng.integers(4, 8)), replace=False)):
+                horarios.append((id_cancha, DIAS_SEMANA[dia], f"{apertura:02d}:00:00", f"{cierre:02d}:00:00"))
+        conexion.executemany(
+            "INSERT INTO horarios_disponibles (id_cancha, dia_semana, hora_inicio, hora_fin) VALUES (?, ?, ?, ?)",
+            horarios
+        )
+
+        conexion.executemany(
+            "INSERT INTO clientes (id, nombre, telefono, email) VALUES (?, ?, ?, ?)",
+            [(i, f"Cliente {i}", f"{10000000 + i}", f"cliente{i}@correo.test") for i in range(1, clientes + 1)]
+        )
+
+        hash_prueba = bcrypt.hashpw(CONTRASENA_PRUEBA.encode("utf-8"), bcrypt.gensalt(rondas_bcrypt)).decode("utf-8")
+        conexion.executemany(
+            "INSERT INTO usuarios (id, nombre, email, password, rol) VALUES (?, ?, ?, ?, ?)",
+            [(i, f"Usuario {i}", email_usuario(i), hash_prueba, ROLES[(i - 1) % len(ROLES)]) for i in range(1, usuarios + 1)]
+        )
+
+        # Reservas: posiciones distintas de la grilla cancha x día x hora
+        primer_dia = date.today() - timedelta(days=dias // 2)
+        posiciones = np.sort(rng.choice(canchas * dias * horas_por_dia, reservas, replace=False))
+        id_cancha = posiciones // (dias * horas_por_dia) + 1
+        dia = (posiciones // horas_por_dia) % dias
+        hora = posiciones % horas_por_dia + PRIMERA_HORA_RESERVA
+        id_cliente = rng.integers(1, clientes + 1, reservas)
+        fechas = [(primer_dia + timedelta(days=d)).isoformat() for d in range(dias)]
+
+        # Sin los triggers por fila la carga tarda la mitad: las reservas ya
+        # vienen sin solapes y los resúmenes se calculan después en bloque
+        triggers = conexion.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'reservas'"
+        ).fetchall()
+        for nombre, _ in triggers:
+            conexion.execute(f'DROP TRIGGER "{nombre}"')
+        # Sin triggers tampoco se marca actualizado_en (migración 004)
+        marca = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        conexion.executemany(
+            "INSERT INTO reservas (id_cliente, id_cancha, fecha, hora_inicio, hora_fin, precio_hora, id_tipo, "
+            "actualizado_en) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (int(cl), int(c), fechas[d], f"{h:02d}:00:00", f"{h + 1:02d}:00:00", int(precios[c - 1]),
+                 int(tipos[c - 1]), marca)
+                for cl, c, d, h in zip(id_cliente, id_cancha, dia, hora)
+            )
+        )
+        for _, sql in triggers:
+            conexion.execute(sql)
+        conexion.execute(SQL_KPI_RESERVAS)
+
+        ahora = datetime.now()
+        conexion.executemany(
+            "INSERT INTO bitacora (usuario_id, nombre_usuario, navegador, tipo_accion, tabla_afectada, "
+            "descripcion, fecha_hora_ingreso) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (int(u), f"Usuario {u}", "Chrome", ACCIONES[a], None if a == 0 else "canchas",
+                 f"Evento {i}", (ahora - timedelta(minutes=int(m))).isoformat())
+                for i, (u, a, m) in enumerate(zip(
+                    rng.integers(1, usuarios + 1, eventos_bitacora),
+                    rng.integers(0, len(ACCIONES), eventos_bitacora),
+                    rng.integers(0, dias * 24 * 60, eventos_bitacora)
+                ))
+            )
+        )
+
+    return {
+        "tipos_cancha": len(TIPOS_CANCHA),
+        "canchas": canchas,
+        "horarios_disponibles": len(horarios),
+        "clientes": clientes,
+        "usuarios": usuarios,
+        "reservas": reservas,
+        "bitacora": eventos_bitacora
+    }
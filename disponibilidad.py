@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from datetime import date, time as dtime, timedelta
+import numpy as np
+import sincronizacion
+from modelo import tabla_reservas, minutos
+
+# Tamaño de cada franja del día en minutos (96 franjas de 15 minutos)
+GRANULARIDAD_MIN = 15
+FRANJAS_DIA = 24 * 60 // GRANULARIDAD_MIN
+
+# Mismo orden que date.weekday() y mismos valores que el CHECK de horarios_disponibles
+DIAS_SEMANA = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+
+
+def hora_a_franja(hora, redondear_arriba: bool = False) -> int:
+    """
+    Convierte una hora ('HH:MM[:SS]' o datetime.time) en índice de franja.
+
+    Lo ocupado (reservas, rangos que deben estar libres) se redondea hacia
+    afuera; lo habilitado (horarios de apertura, ventana de búsqueda) hacia
+    adentro, para no ofrecer minutos fuera de lo pedido. 23:59 es el fin del
+    día, igual que en franja_a_hora.
+    """
+    if isinstance(hora, str):
+        partes = hora.split(":")
+        minutos = int(partes[0]) * 60 + int(partes[1])
+    else:
+        minutos = hora.hour * 60 + hora.minute
+    if minutos >= 24 * 60 - 1:
+        return FRANJAS_DIA
+    franja, resto = divmod(minutos, GRANULARIDAD_MIN)
+    if redondear_arriba and resto:
+        franja += 1
+    return franja
+
+
+def franja_a_hora(franja: int) -> dtime:
+    """Convierte un índice de franja en datetime.time (la franja final es 23:59)"""
+    if franja >= FRANJAS_DIA:
+        return dtime(23, 59)
+    return dtime(*divmod(franja * GRANULARIDAD_MIN, 60))
+
+
+class IndiceDisponibilidad:
+    """
+    Índice de ocupación de canchas basado en mapas de bits.
+
+    Los horarios semanales se expanden a una matriz (cancha, día de semana,
+    franja) y cada fecha con reservas guarda un contador de reservas por
+    (cancha, franja). Una franja está libre si la plantilla la habilita, la
+    cancha está disponible y el contador es cero, de modo que las búsquedas
+    son operaciones de NumPy sobre todas las canchas a la vez.
+    """
+
+    def __init__(self, canchas, horarios, reservas=()):
+        self._lock = threading.RLock()
+        self.ids = np.array([c["id"] for c in canchas], dtype=np.int64)
+        self._fila = {int(cancha_id): i for i, cancha_id in enumerate(self.ids)}
+        self.tipos = np.array([(c.get("tipo") or "").lower() for c in canchas], dtype=object)
+        self.activas = np.array([bool(c.get("disponible", True)) for c in canchas], dtype=bool)
+
+        self.plantilla = np.zeros((len(self.ids), 7, FRANJAS_DIA), dtype=bool)
+        for h in horarios:
+            fila = self._fila.get(h["id_cancha"])
+            dia = h["dia_semana"].lower()
+            if fila is None or dia not in DIAS_SEMANA:
+                continue
+            # Hacia adentro: una cancha abierta 08:10-10:00 recién ofrece desde las 08:15
+            self.plantilla[fila, DIAS_SEMANA.index(dia),
+                           hora_a_franja(h["hora_inicio"], True):hora_a_franja(h["hora_fin"])] = True
+
+        self._ocupacion = {}
+        self.agregar_reservas(tabla_reservas(list(reservas)))
+
+    def _rango(self, id_cancha, fecha, hora_inicio, hora_fin):
+        fila = self._fila.get(id_cancha)
+        if isinstance(fecha, str):
+            fecha = date.fromisoformat(fecha)
+        return fila, fecha, hora_a_franja(hora_inicio), hora_a_franja(hora_fin, True)
+
+    def agregar_reserva(self, id_cancha, fecha, hora_inicio, hora_fin):
+        """Marca como ocupadas las franjas de una reserva nueva"""
+        fila, fecha, inicio, fin = self._rango(id_cancha, fecha, hora_inicio, hora_fin)
+        if fila is None:
+            return
+        with self._lock:
+            ocupacion = self._ocupacion.get(fecha)
+            if ocupacion is None:
+                ocupacion = self._ocupacion[fecha] = np.zeros((len(self.ids), FRANJAS_DIA), dtype=np.uint16)
+            ocupacion[fila, inicio:fin] += 1
+
+    def agregar_reservas(self, tabla):
+        """
+        Marca las franjas de muchas reservas a la vez (tabla de modelo.tabla_reservas).
+
+        Por cada fecha se suma +1 en la franja de inicio y -1 en la de fin de
+        cada reserva, y la suma acumulada por fila da el contador de cada franja.
+        """
+        filas = tabla["id_cancha"].map(self._fila)
+        validas = filas.notna().to_numpy()
+        if not validas.any():
+            return
+        filas = filas.to_numpy()[validas].astype(np.int64)
+        inicios = minutos(tabla["hora_inicio"])[validas] // GRANULARIDAD_MIN
+        fines = -(-minutos(tabla["hora_fin"])[validas] // GRANULARIDAD_MIN)
+        fechas, posicion = np.unique(
+            tabla["fecha"].astype("datetime64[s]").to_numpy().astype("datetime64[D]")[validas],
+            return_inverse=True
+        )
+
+        with self._lock:
+            for i, fecha in enumerate(fechas.astype(object)):
+                grupo = posicion == i
+                saltos = np.zeros((len(self.ids), FRANJAS_DIA + 1), dtype=np.int32)
+                np.add.at(saltos, (filas[grupo], inicios[grupo]), 1)
+                np.add.at(saltos, (filas[grupo], fines[grupo]), -1)
+                ocupacion = self._ocupacion.get(fecha)
+                if ocupacion is None:
+                    ocupacion = self._ocupacion[fecha] = np.zeros((len(self.ids), FRANJAS_DIA), dtype=np.uint16)
+                ocupacion += np.cumsum(saltos, axis=1)[:, :-1].astype(np.uint16)
+
+    def quitar_reserva(self, id_cancha, fecha, hora_inicio, hora_fin):
+        """Libera las franjas de una reserva cancelada o eliminada"""
+        fila, fecha, inicio, fin = self._rango(id_cancha, fecha, hora_inicio, hora_fin)
+        if fila is None:
+            return
+        with self._lock:
+            ocupacion = self._ocupacion.get(fecha)
+            if ocupacion is None:
+                return
+            tramo = ocupacion[fila, inicio:fin]
+            tramo[tramo > 0] -= 1
+            if not ocupacion.any():
+                del self._ocupacion[fecha]
+
+    def _mascara_canchas(self, tipo=None):
+        """Filas de las canchas activas del tipo pedido"""
+        mascara = self.activas.copy()
+        if tipo:
+            mascara &= self.tipos == tipo.lower()
+        return mascara
+
+    def libres(self, fecha: date, tipo: str = None):
+        """Devuelve (ids, matriz booleana canchas x franjas) de lo libre en la fecha"""
+        mascara = self._mascara_canchas(tipo)
+        with self._lock:
+            libres = self.plantilla[mascara, fecha.weekday()]
+            ocupacion = self._ocupacion.get(fecha)
+            if ocupacion is not None:
+                libres = libres & (ocupacion[mascara] == 0)
+        return self.ids[mascara], libres
+
+    def _ventanas(self, libres, k, desde, hasta):
+        """
+        Busca inicios de `k` franjas libres seguidas dentro de [desde, hasta).
+
+        Devuelve los índices de np.nonzero con la última coordenada ya
+        expresada como franja del día.
+        """
+        tramo = libres[..., desde:hasta]
+        if tramo.shape[-1] < k:
+            return tuple(np.empty(0, dtype=np.int64) for _ in range(libres.ndim))
+        # Suma acumulada por fila: la ventana [s, s+k) está libre si suma k
+        acumulado = np.zeros(tramo.shape[:-1] + (tramo.shape[-1] + 1,), dtype=np.int16)
+        np.cumsum(tramo, axis=-1, out=acumulado[..., 1:])
+        indices = np.nonzero((acumulado[..., k:] - acumulado[..., :-k]) == k)
+        return indices[:-1] + (indices[-1] + desde,)
+
+    def buscar_slots(self, fecha: date, tipo: str = None, duracion: int = 60,
+                     desde: dtime = None, hasta: dtime = None):
+        """
+        Busca turnos libres de `duracion` minutos en una fecha.
+
+        Args:
+            fecha (date): día a consultar
+            tipo (str): tipo de cancha (por ejemplo 'fútbol'); None para todos
+            duracion (int): minutos del turno buscado
+            desde, hasta (time): rango horario en el que debe caer el turno
+
+        Returns:
+            list: dicts con id_cancha, hora_inicio y hora_fin por cada turno posible
+        """
+        k = max(1, -(-duracion // GRANULARIDAD_MIN))
+        franja_desde = hora_a_franja(desde, True) if desde else 0
+        franja_hasta = hora_a_franja(hasta) if hasta else FRANJAS_DIA
+
+        ids, libres = self.libres(fecha, tipo)
+        if not len(ids):
+            return []
+        filas, inicios = self._ventanas(libres, k, franja_desde, franja_hasta)
+        return [
+            {
+                "id_cancha": int(ids[f]),
+                "hora_inicio": franja_a_hora(int(s)),
+                "hora_fin": franja_a_hora(int(s) + k)
+            }
+            for f, s in zip(filas, inicios)
+        ]
+
+    def canchas_libres(self, fecha: date, desde: dtime, hasta: dtime, tipo: str = None):
+        """Ids de las canchas libres durante todo el rango [desde, hasta) de la fecha"""
+        ids, libres = self.libres(fecha, tipo)
+        tramo = libres[:, hora_a_franja(desde):hora_a_franja(hasta, True)]
+        return [int(i) for i in ids[tramo.all(axis=1)]]
+
+    def buscar_slots_rango(self, fecha_inicio: date, fecha_fin: date, tipo: str = None,
+                           duracion: int = 60, desde: dtime = None, hasta: dtime = None):
+        """
+        Igual que buscar_slots pero para todas las fechas entre fecha_inicio y fecha_fin.
+
+        Las fechas se apilan en una sola matriz (fecha, cancha, franja) para
+        resolver la búsqueda con una única pasada de NumPy.
+        """
+        k = max(1, -(-duracion // GRANULARIDAD_MIN))
+        franja_desde = hora_a_franja(desde, True) if desde else 0
+        franja_hasta = hora_a_franja(hasta) if hasta else FRANJAS_DIA
+
+        fechas = [fecha_inicio + timedelta(days=i) for i in range((fecha_fin - fecha_inicio).days + 1)]
+        if not fechas:
+            return []
+
+        mascara = self._mascara_canchas(tipo)
+        ids = self.ids[mascara]
+        if not len(ids):
+            return []
+
+        dias = np.array([f.weekday() for f in fechas])
+        with self._lock:
+            # plantilla[mascara][:, dias] -> (cancha, fecha, franja); se pasa a (fecha, cancha, franja)
+            libres = self.plantilla[mascara][:, dias].transpose(1, 0, 2).copy()
+            for i, f in enumerate(fechas):
+                ocupacion = self._ocupacion.get(f)
+                if ocupacion is not None:
+                    libres[i] &= ocupacion[mascara] == 0
+
+        posiciones, filas, inicios = self._ventanas(libres, k, franja_desde, franja_hasta)
+        return [
+            {
+                "fecha": fechas[p],
+                "id_cancha": int(ids[f]),
+                "hora_inicio": franja_a_hora(int(s)),
+                "hora_fin": franja_a_hora(int(s) + k)
+            }
+            for p, f, s in zip(posiciones, filas, inicios)
+        ]
+
+
+def construir_indice() -> IndiceDisponibilidad:
+    """Construye el índice con las canchas, sus horarios y las reservas desde hoy (copias locales)"""
+    sincronizacion.sincronizar_catalogo(forzar=True)
+    tipos = {t["id"]: t["nombre"] for t in sincronizacion.tipos_cancha.datos()}
+    canchas = [
+        {"id": c["id"], "disponible": c["disponible"], "tipo": tipos.get(c["id_tipo"])}
+        for c in sorted(sincronizacion.canchas.datos(), key=lambda c: c["id"])
+    ]
+    return IndiceDisponibilidad(
+        canchas, sincronizacion.horarios.datos(), sincronizacion.reservas_futuras.datos(forzar=True)
+    )
+
+
+# Índice compartido por todas las sesiones del proceso
+_indice = None
+_indice_creado = 0.0
+_indice_version = None
+_indice_lock = threading.Lock()
+TTL_INDICE = float(os.getenv("INDICE_DISPONIBILIDAD_TTL", "600"))
+
+
+def get_indice_disponibilidad() -> IndiceDisponibilidad:
+    """
+    Devuelve el índice de disponibilidad del proceso.
+
+    Se reconstruye al vencer su TTL o cuando cambia el catálogo de canchas;
+    entre tanto se mantiene con agregar_reserva / quitar_reserva.
+    """
+    global _indice, _indice_creado, _indice_version
+    from funciones import cache_canchas
+
+    with _indice_lock:
+        vencido = time.monotonic() - _indice_creado > TTL_INDICE
+        if _indice is None or vencido or _indice_version != cache_canchas.version:
+            _indice_version = cache_canchas.version
+            _indice = construir_indice()
+            _indice_creado = time.monotonic()
+        return _indice
+
+
+def indice_cargado():
+    """Devuelve el índice si ya fue construido, sin forzar su carga"""
+    return _indice
@@ -0,0 +1,154 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from conexion import get_supabase_client
+
+
+class EscritorBitacora:
+    """
+    Escribe los eventos de la bitácora en segundo plano.
+
+    Los eventos se encolan sin bloquear la sesión y un hilo los agrupa en
+    inserciones de varias filas, enviando cuando se junta un lote completo
+    o cuando pasa `intervalo` segundos desde el último envío.
+    """
+
+    def __init__(self, tabla: str = "bitacora", max_cola: int = 10000,
+                 tam_lote: int = 100, intervalo: float = 2.0, max_reintentos: int = 3):
+        self.tabla = tabla
+        self.tam_lote = tam_lote
+        self.intervalo = intervalo
+        self.max_reintentos = max_reintentos
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._detenido = threading.Event()
+        self._hilo = None
+        self._ultimo_envio = time.monotonic()
+        self.encolados = 0
+        self.escritos = 0
+        self.lotes = 0
+        self.reintentos = 0
+        self.descartados_cola_llena = 0
+        self.descartados_error = 0
+
+    def iniciar(self):
+        """Arranca el hilo escritor si todavía no está corriendo"""
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detenido.clear()
+            self._hilo = threading.Thread(target=self._ejecutar, name="escritor-bitacora", daemon=True)
+            self._hilo.start()
+
+    def encolar(self, evento: dict) -> bool:
+        """Agrega un evento a la cola; devuelve False si se descartó por cola llena"""
+        evento.setdefault("fecha_hora_ingreso", datetime.now().isoformat())
+        try:
+            self._cola.put_nowait(evento)
+            self.encolados += 1
+            return True
+        except queue.Full:
+            self.descartados_cola_llena += 1
+            print("Bitácora: cola llena, evento descartado")
+            return False
+
+    def vaciar(self):
+        """Envía de forma síncrona todo lo que esté en cola o pendiente"""
+        with self._lock:
+            self._tomar_de_cola()
+            self._enviar()
+
+    def detener(self):
+        """Detiene el hilo escritor enviando antes los eventos pendientes"""
+        self._detenido.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=self.intervalo + 1)
+        self.vaciar()
+
+    def estadisticas(self):
+        """Contadores de eventos encolados, escritos, reintentados y descartados"""
+        return {
+            "en_cola": self._cola.qsize(),
+            "pendientes": len(self._pendientes),
+            "encolados": self.encolados,
+            "escritos": self.escritos,
+            "lotes": self.lotes,
+            "reintentos": self.reintentos,
+            "descartados_cola_llena": self.descartados_cola_llena,
+            "descartados_error": self.descartados_error
+        }
+
+    def _ejecutar(self):
+        """Bucle del hilo escritor"""
+        while not self._detenido.is_set():
+            try:
+                evento = self._cola.get(timeout=self.intervalo)
+            except queue.Empty:
+                evento = None
+
+            with self._lock:
+                if evento is not None:
+                    self._pendientes.append(evento)
+                self._tomar_de_cola(self.tam_lote)
+                lote_lleno = len(self._pendientes) >= self.tam_lote
+                vencido = time.monotonic() - self._ultimo_envio >= self.intervalo
+                if self._pendientes and (lote_lleno or vencido):
+                    self._enviar()
+
+    def _tomar_de_cola(self, limite: int = None):
+        """Pasa eventos de la cola a la lista de pendientes sin bloquear"""
+        while limite is None or len(self._pendientes) < limite:
+            try:
+                self._pendientes.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+
+    def _enviar(self):
+        """Inserta los pendientes en lotes de `tam_lote` filas (requiere el lock)"""
+        while self._pendientes:
+            lote = self._pendientes[:self.tam_lote]
+            del self._pendientes[:self.tam_lote]
+            self._insertar_lote(lote)
+        self._ultimo_envio = time.monotonic()
+
+    def _insertar_lote(self, lote):
+        """Inserta un lote reintentando con espera creciente si falla"""
+        # PostgREST toma las columnas de la primera fila: todas deben tener las mismas claves
+        columnas = set().union(*lote)
+        filas = [{col: evento.get(col) for col in columnas} for evento in lote]
+
+        for intento in range(self.max_reintentos + 1):
+            try:
+                get_supabase_client().table(self.tabla).insert(filas).execute()
+                self.escritos += len(filas)
+                self.lotes += 1
+                return
+            except Exception as e:
+                if intento == self.max_reintentos:
+                    self.descartados_error += len(filas)
+                    print(f"Bitácora: se descartaron {len(filas)} eventos tras {intento + 1} intentos: {e}")
+                    return
+                self.reintentos += 1
+                time.sleep(min(0.2 * 2 ** intento, 2.0))
+
+
+_escritor = None
+_escritor_lock = threading.Lock()
+
+
+def get_escritor_bitacora() -> EscritorBitacora:
+    """Devuelve el escritor de bitácora del proceso, arrancándolo la primera vez"""
+    global _escritor
+    with _escritor_lock:
+        if _escritor is None:
+            _escritor = EscritorBitacora(
+                max_cola=int(os.getenv("BITACORA_MAX_COLA", "10000")),
+                tam_lote=int(os.getenv("BITACORA_TAM_LOTE", "100")),
+                intervalo=float(os.getenv("BITACORA_INTERVALO", "2.0"))
+            )
+            _escritor.iniciar()
+            # Enviar lo pendiente al terminar el proceso
+            atexit.register(_escritor.detener)
+        return _escritor
@@ -0,0 +1,202 @@
+import csv
+import gzip
+import io
+import os
+import tempfile
+import time
+from datetime import date, time as dtime
+from decimal import Decimal
+import pyarrow as pa
+import pyarrow.parquet as pq
+from conexion import get_supabase_client
+
+TAM_PAGINA = 1000
+
+# Los archivos exportados se borran al cerrar sesión o, si la sesión se abandona, pasado este tiempo
+PREFIJO = "exportacion_"
+VIGENCIA_EXPORTACION = float(os.getenv("EXPORTACION_VIGENCIA", "3600"))
+
+# Columnas que se exportan de cada tabla (nunca se exporta el hash de contraseña).
+# Esquema fijo: una página sin valores en una columna, o con enteros en una columna
+# decimal, no cambia el tipo que tendrá en el archivo
+EXPORTACIONES = {
+    "reservas": pa.schema([
+        ("id", pa.int64()),
+        ("id_cliente", pa.int64()),
+        ("id_cancha", pa.int64()),
+        ("fecha", pa.date32()),
+        ("hora_inicio", pa.time64("us")),
+        ("hora_fin", pa.time64("us")),
+        ("observacion", pa.string()),
+        ("precio_hora", pa.decimal128(10, 2))
+    ]),
+    "canchas": pa.schema([
+        ("id", pa.int64()),
+        ("nombre", pa.string()),
+        ("id_tipo", pa.int64()),
+        ("ubicacion", pa.string()),
+        ("disponible", pa.bool_()),
+        ("precio_hora", pa.decimal128(10, 2))
+    ]),
+    "usuarios": pa.schema([
+        ("id", pa.int64()),
+        ("nombre", pa.string()),
+        ("email", pa.string()),
+        ("rol", pa.string())
+    ])
+}
+
+# PostgREST manda fechas y horas como texto y los NUMERIC como número JSON
+CONVERSIONES = (
+    (pa.types.is_date, date.fromisoformat),
+    (pa.types.is_time, dtime.fromisoformat),
+    (pa.types.is_decimal, lambda valor: Decimal(str(valor)))
+)
+
+FORMATOS = {
+    "CSV": ".csv",
+    "CSV comprimido (gzip)": ".csv.gz",
+    "Parquet": ".parquet"
+}
+
+
+def iterar_paginas(tabla: str, columnas: str, tam_pagina: int = TAM_PAGINA, filtros=lambda q: q):
+    """
+    Recorre una tabla página por página sin acumular filas.
+
+    Pagina por id (id > último id visto) en lugar de usar offset, así la
+    última página cuesta lo mismo que la primera. La primera página pide
+    además el total estimado de filas.
+
+    Yields:
+        tuple: (filas de la página, total estimado de la tabla)
+    """
+    supabase = get_supabase_client()
+    ultimo_id, total = None, None
+    while True:
+        query = filtros(supabase.table(tabla).select(columnas, count="estimated" if total is None else None))
+        if ultimo_id is not None:
+            query = query.gt("id", ultimo_id)
+        response = query.order("id").limit(tam_pagina).execute()
+        if total is None:
+            total = response.count
+        pagina = response.data or []
+        if pagina:
+            yield pagina, total
+        if len(pagina) < tam_pagina:
+            return
+        ultimo_id = pagina[-1]["id"]
+
+
+def _escribir_csv(paginas, archivo, progreso):
+    escritor = None
+    filas = 0
+    for pagina, total in paginas:
+        if escritor is None:
+            escritor = csv.DictWriter(archivo, fieldnames=list(pagina[0].keys()))
+            escritor.writeheader()
+        escritor.writerows(pagina)
+        filas += len(pagina)
+        progreso(filas, total)
+    return filas
+
+
+def _a_tabla(pagina, esquema: pa.Schema) -> pa.Table:
+    conversiones = {
+        campo.name: convertir
+        for campo in esquema
+        for es_tipo, convertir in CONVERSIONES
+        if es_tipo(campo.type)
+    }
+    for fila in pagina:
+        for columna, convertir in conversiones.items():
+            if fila.get(columna) is not None:
+                fila[columna] = convertir(fila[columna])
+    return pa.Table.from_pylist(pagina, schema=esquema)
+
+
+def _escribir_parquet(paginas, ruta, progreso, esquema):
+    escritor = None
+    filas = 0
+    try:
+        for pagina, total in paginas:
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, esquema, compression="zstd")
+            # Cada página es un row group: la memoria no crece con la tabla
+            escritor.write_table(_a_tabla(pagina, esquema))
+            filas += len(pagina)
+            progreso(filas, total)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
+
+
+def borrar_exportacion(exportacion: dict):
+    """Borra el archivo de una exportación (si todavía existe)"""
+    try:
+        os.remove(exportacion["ruta"])
+    except FileNotFoundError:
+        pass
+
+
+def borrar_vencidas(directorio: str = None, vigencia: float = VIGENCIA_EXPORTACION) -> int:
+    """Borra las exportaciones de la carpeta con más de `vigencia` segundos; devuelve cuántas"""
+    directorio = directorio or tempfile.gettempdir()
+    limite = time.time() - vigencia
+    borradas = 0
+    for entrada in os.scandir(directorio):
+        if not entrada.name.startswith(PREFIJO) or not entrada.name.endswith(tuple(FORMATOS.values())):
+            continue
+        try:
+            if entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+                borradas += 1
+        except FileNotFoundError:
+            pass
+    return borradas
+
+
+def exportar_tabla(tabla: str, formato: str, progreso=lambda filas, total: None, directorio: str = None):
+    """
+    Exporta una tabla completa a un archivo temporal.
+
+    Args:
+        tabla (str): una de las claves de EXPORTACIONES
+        formato (str): una de las claves de FORMATOS
+        progreso: función (filas exportadas, total estimado) llamada en cada página
+        directorio (str): carpeta destino; por defecto la temporal del sistema
+
+    Returns:
+        dict: success, y en `data` la ruta del archivo y la cantidad de filas
+    """
+    if tabla not in EXPORTACIONES or formato not in FORMATOS:
+        return {"success": False, "message": "Exportación no válida"}
+
+    try:
+        borrar_vencidas(directorio)
+    except OSError as e:
+        print(f"No se pudieron borrar las exportaciones vencidas: {e}")
+
+    descriptor, ruta = tempfile.mkstemp(prefix=f"{PREFIJO}{tabla}_", suffix=FORMATOS[formato], dir=directorio)
+    os.close(descriptor)
+    esquema = EXPORTACIONES[tabla]
+    paginas = iterar_paginas(tabla, ", ".join(esquema.names))
+
+    try:
+        if formato == "Parquet":
+            filas = _escribir_parquet(paginas, ruta, progreso, esquema)
+        elif formato == "CSV comprimido (gzip)":
+            with gzip.open(ruta, "wt", encoding="utf-8", newline="") as archivo:
+                filas = _escribir_csv(paginas, archivo, progreso)
+        else:
+            with io.open(ruta, "w", encoding="utf-8", newline="") as archivo:
+                filas = _escribir_csv(paginas, archivo, progreso)
+        if not filas:
+            os.remove(ruta)
+            return {"success": False, "message": f"No hay registros en {tabla}"}
+        return {"success": True, "data": {"ruta": ruta, "filas": filas}}
+    except Exception as e:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        return {"success": False, "message": f"Error al exportar {tabla}: {str(e)}"}
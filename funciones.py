@@ -1,56 +1,83 @@
+import os
 from conexion import get_supabase_client
+from sincronizacion import sincronizar_catalogo, catalogo_anidado, tipos_cancha
+from cache import get_cache
+from busqueda import IndiceBusqueda
+from modelo import tabla_canchas
+
+# Cache del catálogo de canchas compartida por todas las sesiones del proceso.
+# El catálogo cambia pocas veces al día, así que se guarda unos minutos y se
+# invalida o corrige en cada escritura exitosa.
+cache_canchas = get_cache(
+    "canchas",
+    ttl=float(os.getenv("CACHE_CANCHAS_TTL", "300")),
+    max_entradas=int(os.getenv("CACHE_CANCHAS_MAX", "16"))
+)
+CLAVE_CATALOGO = "catalogo"
 
 
 # Función para obtener todas las canchas con sus tipos y horarios
 def obtener_canchas_disponibles():
     """
     Obtiene todas las canchas de la base de datos con sus tipos y horarios
+
+    Returns:
+        dict: success y `data` con la tabla tipada de modelo.tabla_canchas
     """
-    supabase = get_supabase_client()
-    
     try:
-        # Consulta SQL para obtener todas las canchas con sus relaciones
-        query = supabase.table("canchas").select(
-            "id, nombre, disponible, tipos_cancha(nombre), horarios_disponibles(dia_semana, hora_inicio, hora_fin)"
-        ).execute()
+        _sincronizar()
+        # La tabla tipada se arma una vez por versión del catálogo y la comparten todas las sesiones
+        canchas = cache_canchas.derivado(CLAVE_CATALOGO, "tabla", _consultar_canchas, tabla_canchas)
         
-        if not query.data:
+        if canchas.empty:
             return {"success": False, "message": "No hay canchas registradas en el sistema."}
         
-        # Procesar los datos para limpiar el formato
-        canchas_procesadas = []
-        for cancha in query.data:
-            # Extraer el nombre del tipo de cancha del objeto anidado
-            tipo_cancha = cancha['tipos_cancha']['nombre'] if cancha['tipos_cancha'] else "Sin tipo"
-            
-            # Transformar el booleano en emoji
-            disponible = "✅" if cancha['disponible'] else "❌"
-            
-            # Crear nuevo diccionario con datos procesados
-            cancha_limpia = {
-                'id': cancha['id'],
-                'nombre': cancha['nombre'],
-                'disponible': disponible,
-                'tipos_cancha': tipo_cancha,
-                'horarios_disponibles': procesar_horarios(cancha['horarios_disponibles'])
-
-            }
-            canchas_procesadas.append(cancha_limpia)
-            
-        # Devolver los datos procesados
-        return {"success": True, "data": canchas_procesadas}
+        # Copia superficial: comparte las columnas, pero agregar o reemplazar una no toca la compartida
+        return {"success": True, "data": canchas.copy(deep=False)}
     
     except Exception as e:
         return {"success": False, "message": f"Error al obtener las canchas: {str(e)}"}
 
-def procesar_horarios(horarios):
-    """Helper function to process schedule data"""
-    if not horarios:
-        return "Sin horarios"
-    
-    # Procesar los horarios según tu necesidad
-    # Por ejemplo, convertirlos a un formato más legible
-    return ", ".join([f"{h['dia_semana']}: {h['hora_inicio']}-{h['hora_fin']}" for h in horarios])
+def obtener_tipos_cancha():
+    """Tipos de cancha como {id: nombre}, desde la copia local del catálogo"""
+    try:
+        tipos = sorted(tipos_cancha.datos(), key=lambda t: t["id"])
+        return {"success": True, "data": {t["id"]: t["nombre"] for t in tipos}}
+    except Exception as e:
+        return {"success": False, "message": f"Error al obtener los tipos de cancha: {str(e)}"}
+
+def obtener_indice_busqueda():
+    """Devuelve el índice de búsqueda del catálogo actual (se arma una vez por versión)"""
+    _sincronizar()
+    return cache_canchas.derivado(CLAVE_CATALOGO, "busqueda", _consultar_canchas, IndiceBusqueda)
+
+def _sincronizar():
+    """Trae los cambios del catálogo (como mucho cada SYNC_INTERVALO segundos) y descarta la cache si cambió"""
+    if sincronizar_catalogo():
+        cache_canchas.invalidar(CLAVE_CATALOGO)
+
+def _consultar_canchas():
+    """Arma el catálogo de canchas con sus relaciones desde la copia local"""
+    # Se llama al invalidar la cache (p. ej. tras una escritura): se piden los cambios ya
+    sincronizar_catalogo(forzar=True)
+    return catalogo_anidado()
+
+def _parchear_cancha(cancha_id: int, cambios: dict):
+    """Aplica `cambios` a la cancha en cache sin volver a consultar el catálogo"""
+    return _parchear_canchas({cancha_id: cambios})
+
+def _parchear_canchas(cambios_por_id: dict):
+    """Aplica los cambios de varias canchas ({id: cambios}) a la cache en una pasada"""
+    def aplicar(canchas):
+        return [{**c, **cambios_por_id[c['id']]} if c['id'] in cambios_por_id else c for c in canchas]
+    return cache_canchas.actualizar(CLAVE_CATALOGO, aplicar)
+
+def _quitar_cancha(cancha_id: int):
+    """Quita la cancha eliminada del catálogo en cache"""
+    return cache_canchas.actualizar(
+        CLAVE_CATALOGO,
+        lambda canchas: [c for c in canchas if c['id'] != cancha_id]
+    )
 
 def crear_cancha(nombre: str, tipo_id: int):
     """Crea una nueva cancha"""
@@ -62,7 +89,11 @@ def crear_cancha(nombre: str, tipo_id: int):
             "disponible": True
         }
         result = supabase.table("canchas").insert(data).execute()
-        return {"success": True, "data": result.data[0]} if result.data else {"success": False, "message": "Error al crear"}
+        if not result.data:
+            return {"success": False, "message": "Error al crear"}
+        # La cancha nueva necesita el nombre del tipo: se recarga el catálogo
+        cache_canchas.invalidar(CLAVE_CATALOGO)
+        return {"success": True, "data": result.data[0]}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
@@ -76,7 +107,9 @@ def actualizar_disponibilidad(cancha_id: int, disponible: bool):
             .update({"disponible": disponible})\
             .eq("id", cancha_id)\
             .execute()
-        return {"success": True, "data": result.data[0]}
+        cancha = result.data[0]
+        _parchear_cancha(cancha_id, {"disponible": disponible})
+        return {"success": True, "data": cancha}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
@@ -97,11 +130,62 @@ def actualizar_cancha(cancha_id: int, datos: dict):
             
         if not result.data:
             return {"success": False, "message": "Error al actualizar la cancha"}
+        
+        # Si solo cambian nombre o disponibilidad se corrige la entrada en cache;
+        # cualquier otro campo (p. ej. el tipo) obliga a recargar el catálogo
+        if set(datos) <= {"nombre", "disponible"}:
+            if not _parchear_cancha(cancha_id, datos):
+                cache_canchas.invalidar(CLAVE_CATALOGO)
+        else:
+            cache_canchas.invalidar(CLAVE_CATALOGO)
             
         return {"success": True, "data": result.data[0]}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
+def actualizar_canchas_lote(cambios: list, solo_disponibilidad: bool = False):
+    """
+    Actualiza varias canchas en una sola transacción (RPC actualizar_canchas_lote).
+
+    Si alguna fila es inválida no se guarda ninguna.
+
+    Args:
+        cambios (list): [{"id": cancha_id, "datos": {columna: valor}}]
+        solo_disponibilidad (bool): rechaza cambios en columnas que no sean `disponible`.
+            La base no conoce el rol del usuario (PostgREST corre con la
+            API key): quien llama debe pasarlo según el rol de la sesión
+
+    Returns:
+        dict: success y `data` con el resultado de cada fila
+              (id_cancha, estado 'actualizada', 'rechazada' o 'sin_aplicar', motivo)
+    """
+    if not cambios:
+        return {"success": True, "data": []}
+    try:
+        supabase = get_supabase_client()
+        resultados = supabase.rpc("actualizar_canchas_lote", {
+            "p_cambios": cambios,
+            "p_solo_disponibilidad": solo_disponibilidad
+        }).execute().data
+    except Exception as e:
+        return {"success": False, "message": f"Error al actualizar las canchas: {str(e)}"}
+
+    rechazadas = [r for r in resultados if r["estado"] == "rechazada"]
+    if rechazadas:
+        return {
+            "success": False,
+            "message": f"No se guardó ningún cambio: {len(rechazadas)} fila(s) con errores",
+            "data": resultados
+        }
+
+    # Igual que actualizar_cancha: nombre y disponibilidad se corrigen en cache
+    if all(set(c["datos"]) <= {"nombre", "disponible"} for c in cambios):
+        if not _parchear_canchas({c["id"]: c["datos"] for c in cambios}):
+            cache_canchas.invalidar(CLAVE_CATALOGO)
+    else:
+        cache_canchas.invalidar(CLAVE_CATALOGO)
+    return {"success": True, "data": resultados}
+
 def eliminar_cancha(cancha_id: int):
     """
     DELETE FROM canchas WHERE id = :cancha_id
@@ -112,6 +196,7 @@ def eliminar_cancha(cancha_id: int):
             .delete()\
             .eq("id", cancha_id)\
             .execute()
+        _quitar_cancha(cancha_id)
         return {"success": True, "message": "Cancha eliminada correctamente"}
     except Exception as e:
         return {"success": False, "message": str(e)}
\ No newline at end of file
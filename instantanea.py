@@ -0,0 +1,271 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+from datetime import date, datetime, timezone
+import duckdb
+from exportar import iterar_paginas
+
+CARPETA_INSTANTANEA = os.getenv("INSTANTANEA_CARPETA", "instantanea")
+# Instantáneas que quedan en disco; la anterior se conserva para las consultas que ya la tenían abierta
+INSTANTANEAS_CONSERVADAS = int(os.getenv("INSTANTANEA_CONSERVADAS", "2"))
+ARCHIVO_ACTUAL = "actual.json"
+ARCHIVO_CATALOGO = "catalogo.duckdb"
+
+# Tablas que se copian, con el tipo de DuckDB de cada columna. No se copian
+# contraseñas ni datos de contacto: los reportes no los necesitan
+TABLAS = {
+    "tipos_cancha": {"id": "BIGINT", "nombre": "VARCHAR"},
+    "canchas": {
+        "id": "BIGINT", "nombre": "VARCHAR", "id_tipo": "BIGINT", "ubicacion": "VARCHAR",
+        "disponible": "BOOLEAN", "precio_hora": "DECIMAL(10,2)"
+    },
+    "clientes": {"id": "BIGINT", "nombre": "VARCHAR"},
+    "reservas": {
+        "id": "BIGINT", "id_cliente": "BIGINT", "id_cancha": "BIGINT", "fecha": "DATE",
+        "hora_inicio": "TIME", "hora_fin": "TIME", "precio_hora": "DECIMAL(10,2)"
+    },
+    "usuarios": {"id": "BIGINT", "nombre": "VARCHAR", "rol": "VARCHAR"},
+    "bitacora": {
+        "id": "BIGINT", "usuario_id": "BIGINT", "nombre_usuario": "VARCHAR", "sesion_id": "VARCHAR",
+        "tipo_accion": "VARCHAR", "tabla_afectada": "VARCHAR", "descripcion": "VARCHAR",
+        "fecha_hora_ingreso": "TIMESTAMP", "fecha_hora_salida": "TIMESTAMP"
+    }
+}
+
+_actualizando = threading.Lock()
+_conexion = None
+_conexion_lock = threading.Lock()
+
+
+def _literal(texto: str) -> str:
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def leer_actual(carpeta: str = CARPETA_INSTANTANEA) -> dict:
+    """Datos de la instantánea vigente (carpeta, fecha y filas por tabla) o None si no hay"""
+    ruta = os.path.join(carpeta, ARCHIVO_ACTUAL)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _guardar_actual(carpeta: str, actual: dict):
+    ruta = os.path.join(carpeta, ARCHIVO_ACTUAL)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump(actual, archivo, indent=2, ensure_ascii=False)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _copiar_tabla(conexion, destino: str, tabla: str, columnas: dict) -> int:
+    """
+    Descarga una tabla a un Parquet de la instantánea y la registra como vista.
+
+    Las páginas se vuelcan a un JSON por líneas a medida que llegan y DuckDB
+    lo convierte a Parquet con los tipos de TABLAS, sin juntar la tabla en memoria.
+    """
+    crudo = os.path.abspath(os.path.join(destino, f"{tabla}.jsonl"))
+    parquet = os.path.abspath(os.path.join(destino, f"{tabla}.parquet"))
+    filas = 0
+    with open(crudo, "w", encoding="utf-8") as archivo:
+        for pagina, _ in iterar_paginas(tabla, ", ".join(columnas)):
+            for fila in pagina:
+                archivo.write(json.dumps(fila, ensure_ascii=False, default=str) + "\n")
+            filas += len(pagina)
+
+    tipos = ", ".join(f"{_literal(c)}: {_literal(t)}" for c, t in columnas.items())
+    conexion.execute(
+        f"COPY (SELECT {', '.join(columnas)} FROM read_json({_literal(crudo)}, "
+        f"format = 'newline_delimited', columns = {{{tipos}}})) "
+        f"TO {_literal(parquet)} (FORMAT parquet, COMPRESSION zstd)"
+    )
+    os.remove(crudo)
+    conexion.execute(f"CREATE VIEW {tabla} AS SELECT * FROM read_parquet({_literal(parquet)})")
+    return filas
+
+
+def _podar(carpeta: str, vigente: str):
+    """Borra las instantáneas más viejas que las INSTANTANEAS_CONSERVADAS más recientes"""
+    anteriores = sorted(
+        (d for d in os.listdir(carpeta) if os.path.isdir(os.path.join(carpeta, d)) and d != vigente),
+        reverse=True
+    )
+    for nombre in anteriores[max(INSTANTANEAS_CONSERVADAS - 1, 0):]:
+        shutil.rmtree(os.path.join(carpeta, nombre), ignore_errors=True)
+
+
+def actualizar_instantanea(carpeta: str = CARPETA_INSTANTANEA, progreso=lambda tabla, filas: None):
+    """
+    Copia las tablas de TABLAS a una instantánea local nueva.
+
+    Cada instantánea es una carpeta con un Parquet por tabla y un catálogo
+    DuckDB con una vista por tabla. Se arma completa aparte y recién al
+    final pasa a ser la vigente (actual.json), así los reportes nunca leen
+    una copia a medias. Solo corre una actualización a la vez por proceso.
+
+    Args:
+        progreso: función (tabla, filas) llamada al terminar cada tabla
+
+    Returns:
+        dict: success y `data` con la carpeta, la fecha y las filas por tabla
+    """
+    if not _actualizando.acquire(blocking=False):
+        return {"success": False, "message": "Ya hay una actualización de la instantánea en curso"}
+
+    marca = datetime.now(timezone.utc)
+    nombre = marca.strftime("%Y%m%dT%H%M%S%fZ")
+    destino = os.path.join(carpeta, nombre)
+    try:
+        os.makedirs(destino)
+        filas = {}
+        conexion = duckdb.connect(os.path.join(destino, ARCHIVO_CATALOGO))
+        try:
+            for tabla, columnas in TABLAS.items():
+                filas[tabla] = _copiar_tabla(conexion, destino, tabla, columnas)
+                progreso(tabla, filas[tabla])
+        finally:
+            conexion.close()
+
+        actual = {"carpeta": nombre, "fecha": marca.isoformat(timespec="seconds"), "filas": filas}
+        _guardar_actual(carpeta, actual)
+        _podar(carpeta, nombre)
+        return {"success": True, "data": actual}
+    except Exception as e:
+        shutil.rmtree(destino, ignore_errors=True)
+        return {"success": False, "message": f"Error al actualizar la instantánea: {str(e)}"}
+    finally:
+        _actualizando.release()
+
+
+def _cursor(carpeta: str):
+    """Cursor sobre el catálogo vigente; la conexión se reabre cuando cambia la instantánea"""
+    global _conexion
+    actual = leer_actual(carpeta)
+    if actual is None:
+        raise LookupError("Todavía no hay una instantánea de los datos")
+    ruta = os.path.join(carpeta, actual["carpeta"], ARCHIVO_CATALOGO)
+    with _conexion_lock:
+        if _conexion is None or _conexion[0] != ruta:
+            if _conexion is not None:
+                _conexion[1].close()
+            _conexion = (ruta, duckdb.connect(ruta, read_only=True))
+        # Cada consulta usa su propio cursor: una conexión de DuckDB no se comparte entre hilos
+        return _conexion[1].cursor(), actual
+
+
+def consultar(sql: str, parametros: list = None, carpeta: str = CARPETA_INSTANTANEA):
+    """
+    Ejecuta una consulta sobre la instantánea vigente.
+
+    Returns:
+        dict: success, `data` con un DataFrame y `fecha` de la instantánea
+    """
+    try:
+        cursor, actual = _cursor(carpeta)
+        try:
+            datos = cursor.execute(sql, parametros or []).df()
+        finally:
+            cursor.close()
+        return {"success": True, "data": datos, "fecha": actual["fecha"]}
+    except Exception as e:
+        return {"success": False, "message": f"Error al consultar la instantánea: {str(e)}"}
+
+
+# Reservas con su tipo de cancha, horas e ingreso (precio por hora vigente al reservar)
+_RESERVAS = """
+    SELECT r.id, r.id_cliente, r.id_cancha, r.fecha, c.nombre AS cancha,
+           COALESCE(t.nombre, 'Sin tipo') AS tipo,
+           date_diff('second', r.hora_inicio, r.hora_fin) / 3600 AS horas,
+           COALESCE(r.precio_hora, 0) * date_diff('second', r.hora_inicio, r.hora_fin) / 3600 AS ingreso
+    FROM reservas r
+    LEFT JOIN canchas c ON c.id = r.id_cancha
+    LEFT JOIN tipos_cancha t ON t.id = c.id_tipo
+    WHERE r.fecha BETWEEN ? AND ? AND (CAST(? AS VARCHAR) IS NULL OR t.nombre = ?)
+"""
+
+
+def reservas_por_mes(desde: date, hasta: date, tipo: str = None, carpeta: str = CARPETA_INSTANTANEA):
+    """Reservas, horas e ingresos por mes y tipo, con el ingreso acumulado de cada tipo"""
+    return consultar(f"""
+        WITH r AS ({_RESERVAS})
+        SELECT date_trunc('month', fecha) AS mes, tipo, count(*) AS reservas,
+               sum(horas) AS horas, sum(ingreso) AS ingresos,
+               sum(sum(ingreso)) OVER (PARTITION BY tipo ORDER BY date_trunc('month', fecha)) AS ingresos_acumulados
+        FROM r
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """, [desde, hasta, tipo, tipo], carpeta)
+
+
+def ranking_canchas(desde: date, hasta: date, tipo: str = None, carpeta: str = CARPETA_INSTANTANEA):
+    """Canchas ordenadas por ingresos, con su puesto y su parte dentro del tipo"""
+    return consultar(f"""
+        WITH r AS ({_RESERVAS})
+        SELECT rank() OVER (PARTITION BY tipo ORDER BY sum(ingreso) DESC) AS puesto,
+               tipo, cancha, count(*) AS reservas, sum(horas) AS horas, sum(ingreso) AS ingresos,
+               sum(ingreso) / NULLIF(sum(sum(ingreso)) OVER (PARTITION BY tipo), 0) AS parte_del_tipo
+        FROM r
+        GROUP BY id_cancha, cancha, tipo
+        ORDER BY tipo, puesto, cancha
+    """, [desde, hasta, tipo, tipo], carpeta)
+
+
+def clientes_frecuentes(desde: date, hasta: date, tipo: str = None, limite: int = 20,
+                        carpeta: str = CARPETA_INSTANTANEA):
+    """Clientes con más reservas y los días promedio entre una reserva y la siguiente"""
+    return consultar(f"""
+        WITH r AS ({_RESERVAS}),
+        espaciadas AS (
+            SELECT id_cliente, fecha, ingreso,
+                   fecha - lag(fecha) OVER (PARTITION BY id_cliente ORDER BY fecha, id) AS dias
+            FROM r
+        )
+        SELECT COALESCE(cl.nombre, 'Cliente #' || e.id_cliente) AS cliente, count(*) AS reservas,
+               sum(e.ingreso) AS ingresos, min(e.fecha) AS primera, max(e.fecha) AS ultima,
+               avg(e.dias) AS dias_entre_reservas
+        FROM espaciadas e
+        LEFT JOIN clientes cl ON cl.id = e.id_cliente
+        GROUP BY e.id_cliente, cl.nombre
+        ORDER BY reservas DESC, ingresos DESC
+        LIMIT ?
+    """, [desde, hasta, tipo, tipo, limite], carpeta)
+
+
+def actividad_usuarios(desde: date, hasta: date, carpeta: str = CARPETA_INSTANTANEA):
+    """Sesiones y acciones de cada usuario en la bitácora del período"""
+    return consultar("""
+        SELECT COALESCE(u.nombre, b.nombre_usuario) AS usuario, u.rol,
+               count(*) FILTER (WHERE b.tipo_accion = 'LOGIN') AS sesiones,
+               count(*) FILTER (WHERE b.tipo_accion <> 'LOGIN') AS acciones,
+               mode(b.tabla_afectada) AS tabla_mas_usada,
+               max(b.fecha_hora_ingreso) AS ultima_actividad
+        FROM bitacora b
+        LEFT JOIN usuarios u ON u.id = b.usuario_id
+        WHERE b.fecha_hora_ingreso >= ? AND b.fecha_hora_ingreso < ? + INTERVAL 1 DAY
+        GROUP BY b.usuario_id, u.nombre, b.nombre_usuario, u.rol
+        ORDER BY acciones DESC, sesiones DESC
+    """, [desde, hasta], carpeta)
+
+
+def tipos_instantanea(carpeta: str = CARPETA_INSTANTANEA):
+    """Nombres de los tipos de cancha de la instantánea"""
+    return consultar("SELECT nombre FROM tipos_cancha ORDER BY nombre", carpeta=carpeta)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instantánea local de los datos para los reportes")
+    subcomandos = parser.add_subparsers(dest="accion", required=True)
+    actualizar_cmd = subcomandos.add_parser("actualizar", help="copiar las tablas a una instantánea nueva")
+    actualizar_cmd.add_argument("--carpeta", default=CARPETA_INSTANTANEA)
+    estado_cmd = subcomandos.add_parser("estado", help="mostrar la instantánea vigente")
+    estado_cmd.add_argument("--carpeta", default=CARPETA_INSTANTANEA)
+    args = parser.parse_args()
+
+    if args.accion == "actualizar":
+        resultado = actualizar_instantanea(args.carpeta, lambda tabla, filas: print(f"{tabla}: {filas:,} filas"))
+    else:
+        actual = leer_actual(args.carpeta)
+        resultado = {"success": actual is not None, "data": actual}
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
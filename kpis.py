@@ -0,0 +1,87 @@
+import calendar
+from datetime import date, timedelta
+import pandas as pd
+from conexion import get_supabase_client, consultar_paginado
+from cache import get_cache
+from disponibilidad import DIAS_SEMANA
+import sincronizacion
+
+# Los resúmenes se actualizan con cada reserva; un minuto de cache basta
+# para que varias sesiones mirando Business no repitan las consultas. Es
+# compartida: con varias réplicas se calculan en una y las demás los leen
+cache_kpis = get_cache("kpis", ttl=60, max_entradas=32, compartida=True)
+
+
+def _minutos_entre(hora_inicio: str, hora_fin: str) -> int:
+    h1, m1 = hora_inicio.split(":")[:2]
+    h2, m2 = hora_fin.split(":")[:2]
+    return (int(h2) * 60 + int(m2)) - (int(h1) * 60 + int(m1))
+
+
+def _minutos_habilitados_mes(mes: date) -> int:
+    """Minutos en que las canchas disponibles están abiertas durante el mes"""
+    disponibles = {c["id"] for c in sincronizacion.canchas.datos() if c["disponible"]}
+    horarios = [h for h in sincronizacion.horarios.datos() if h["id_cancha"] in disponibles]
+    por_dia = [0] * 7
+    for h in horarios:
+        dia = h["dia_semana"].lower()
+        if dia in DIAS_SEMANA:
+            por_dia[DIAS_SEMANA.index(dia)] += _minutos_entre(h["hora_inicio"], h["hora_fin"])
+
+    # Cuántas veces aparece cada día de la semana en el mes
+    dias_mes = calendar.monthrange(mes.year, mes.month)[1]
+    return sum(por_dia[(mes + timedelta(days=i)).weekday()] for i in range(dias_mes))
+
+
+def _cargar_kpis(dias: int):
+    supabase = get_supabase_client()
+    hoy = date.today()
+    mes_actual = hoy.replace(day=1)
+    desde = hoy - timedelta(days=dias - 1)
+
+    tipos = {t["id"]: t["nombre"] for t in sincronizacion.tipos_cancha.datos()}
+    tipos[0] = "Sin tipo"
+
+    # Totales: un registro por tipo y mes, pocas filas aunque haya años de historia
+    mensual = pd.DataFrame(
+        supabase.table("kpi_mensual_tipo").select("mes, id_tipo, reservas, minutos, ingresos").execute().data,
+        columns=["mes", "id_tipo", "reservas", "minutos", "ingresos"]
+    )
+    mensual["ingresos"] = mensual["ingresos"].astype(float)
+    del_mes = mensual[mensual["mes"] == mes_actual.isoformat()]
+
+    # Detalle del período por día, tipo y hora
+    por_hora = pd.DataFrame(
+        consultar_paginado(
+            "kpi_diario_hora", "fecha, id_tipo, hora, reservas, minutos, ingresos",
+            lambda q: q.gte("fecha", desde.isoformat()).lte("fecha", hoy.isoformat()).order("fecha,id_tipo,hora"),
+            clave=None
+        ),
+        columns=["fecha", "id_tipo", "hora", "reservas", "minutos", "ingresos"]
+    )
+    por_hora["ingresos"] = por_hora["ingresos"].astype(float)
+    por_hora["tipo"] = por_hora["id_tipo"].map(tipos).fillna("Sin tipo")
+    mensual["tipo"] = mensual["id_tipo"].map(tipos).fillna("Sin tipo")
+
+    habilitados = _minutos_habilitados_mes(mes_actual)
+    return {
+        "reservas_totales": int(mensual["reservas"].sum()),
+        "reservas_mes": int(del_mes["reservas"].sum()),
+        "ingresos_mes": float(del_mes["ingresos"].sum()),
+        "ocupacion_mes": float(del_mes["minutos"].sum()) / habilitados if habilitados else 0.0,
+        "mensual": mensual,
+        "por_hora": por_hora
+    }
+
+
+def obtener_kpis(dias: int = 30):
+    """
+    Obtiene los KPI de Business a partir de las tablas de resumen.
+
+    Args:
+        dias (int): cantidad de días hacia atrás para los gráficos de tendencia
+    """
+    try:
+        return {"success": True, "data": cache_kpis.obtener(("kpis", dias), lambda: _cargar_kpis(dias))}
+    except Exception as e:
+        return {"success": False, "message": f"Error al obtener los indicadores: {str(e)}"}
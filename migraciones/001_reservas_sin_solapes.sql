@@ -0,0 +1,18 @@
+-- ==============================
+-- Reservas sin solapes e idempotentes
+-- ==============================
+
+-- Necesario para combinar igualdad (id_cancha) y rangos en una restricción GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- Clave enviada por el cliente para que un reintento no duplique la reserva
+ALTER TABLE reservas ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS reservas_idempotency_key_idx ON reservas (idempotency_key);
+
+-- Dos reservas de la misma cancha no pueden compartir ningún instante.
+-- El rango es [inicio, fin): una reserva puede empezar cuando termina la anterior.
+-- El índice GiST de la restricción también resuelve las búsquedas de solapes.
+ALTER TABLE reservas ADD CONSTRAINT reservas_sin_solapes EXCLUDE USING gist (
+  id_cancha WITH =,
+  tsrange(fecha + hora_inicio, fecha + hora_fin) WITH &&
+);
@@ -0,0 +1,134 @@
+-- ==============================
+-- Resúmenes de reservas para los KPI de Business
+-- ==============================
+
+-- Precio por hora de cada cancha (para calcular ingresos). Cada reserva guarda
+-- el precio vigente al crearla, así un cambio de precio no altera lo ya reservado.
+ALTER TABLE canchas ADD COLUMN IF NOT EXISTS precio_hora NUMERIC(10,2) NOT NULL DEFAULT 0;
+ALTER TABLE reservas ADD COLUMN IF NOT EXISTS precio_hora NUMERIC(10,2);
+
+UPDATE reservas r SET precio_hora = c.precio_hora
+FROM canchas c WHERE c.id = r.id_cancha AND r.precio_hora IS NULL;
+
+CREATE OR REPLACE FUNCTION reservas_precio_trigger() RETURNS trigger AS $$
+BEGIN
+  IF NEW.precio_hora IS NULL THEN
+    SELECT precio_hora INTO NEW.precio_hora FROM canchas WHERE id = NEW.id_cancha;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reservas_precio ON reservas;
+CREATE TRIGGER reservas_precio
+BEFORE INSERT ON reservas
+FOR EACH ROW EXECUTE FUNCTION reservas_precio_trigger();
+
+-- Por cancha y día. Sin clave foránea: el histórico se conserva aunque
+-- se elimine la cancha (y el borrado en cascada de sus reservas no choca
+-- con este resumen).
+CREATE TABLE IF NOT EXISTS kpi_diario_cancha (
+  fecha DATE NOT NULL,
+  id_cancha INT NOT NULL,
+  id_tipo INT,
+  reservas INT NOT NULL DEFAULT 0,
+  minutos INT NOT NULL DEFAULT 0,
+  ingresos NUMERIC(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_cancha)
+);
+
+-- Por tipo de cancha, día y hora del día (0 = sin tipo)
+CREATE TABLE IF NOT EXISTS kpi_diario_hora (
+  fecha DATE NOT NULL,
+  id_tipo INT NOT NULL,
+  hora SMALLINT NOT NULL CHECK (hora BETWEEN 0 AND 23),
+  reservas INT NOT NULL DEFAULT 0,
+  minutos INT NOT NULL DEFAULT 0,
+  ingresos NUMERIC(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_tipo, hora)
+);
+
+-- Por tipo de cancha y mes (primer día del mes)
+CREATE TABLE IF NOT EXISTS kpi_mensual_tipo (
+  mes DATE NOT NULL,
+  id_tipo INT NOT NULL,
+  reservas INT NOT NULL DEFAULT 0,
+  minutos INT NOT NULL DEFAULT 0,
+  ingresos NUMERIC(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (mes, id_tipo)
+);
+
+-- Suma (p_signo = 1) o resta (p_signo = -1) una reserva en los tres resúmenes
+CREATE OR REPLACE FUNCTION kpi_aplicar_reserva(
+  p_id_cancha INT, p_fecha DATE, p_inicio TIME, p_fin TIME, p_precio NUMERIC, p_signo INT
+) RETURNS void AS $$
+DECLARE
+  v_tipo INT;
+  v_precio NUMERIC;
+  v_ini INT := EXTRACT(EPOCH FROM p_inicio)::INT;
+  v_fin INT := EXTRACT(EPOCH FROM p_fin)::INT;
+  v_minutos INT;
+BEGIN
+  IF p_id_cancha IS NULL THEN
+    RETURN;
+  END IF;
+
+  SELECT id_tipo INTO v_tipo FROM canchas WHERE id = p_id_cancha;
+  v_tipo := COALESCE(v_tipo, 0);
+  v_precio := COALESCE(p_precio, 0);
+  v_minutos := (v_fin - v_ini) / 60;
+
+  INSERT INTO kpi_diario_cancha AS k (fecha, id_cancha, id_tipo, reservas, minutos, ingresos)
+  VALUES (p_fecha, p_id_cancha, NULLIF(v_tipo, 0), p_signo, p_signo * v_minutos, p_signo * v_minutos * v_precio / 60)
+  ON CONFLICT (fecha, id_cancha) DO UPDATE SET
+    reservas = k.reservas + EXCLUDED.reservas,
+    minutos = k.minutos + EXCLUDED.minutos,
+    ingresos = k.ingresos + EXCLUDED.ingresos;
+
+  -- Los minutos se reparten entre las horas que ocupa la reserva;
+  -- la reserva se cuenta en la hora en que empieza
+  INSERT INTO kpi_diario_hora AS k (fecha, id_tipo, hora, reservas, minutos, ingresos)
+  SELECT p_fecha, v_tipo, h,
+         CASE WHEN h = v_ini / 3600 THEN p_signo ELSE 0 END,
+         p_signo * m,
+         p_signo * m * v_precio / 60
+  FROM (
+    SELECT h, (LEAST(v_fin, (h + 1) * 3600) - GREATEST(v_ini, h * 3600)) / 60 AS m
+    FROM generate_series(v_ini / 3600, (v_fin - 1) / 3600) AS h
+  ) horas
+  ON CONFLICT (fecha, id_tipo, hora) DO UPDATE SET
+    reservas = k.reservas + EXCLUDED.reservas,
+    minutos = k.minutos + EXCLUDED.minutos,
+    ingresos = k.ingresos + EXCLUDED.ingresos;
+
+  INSERT INTO kpi_mensual_tipo AS k (mes, id_tipo, reservas, minutos, ingresos)
+  VALUES (date_trunc('month', p_fecha)::DATE, v_tipo, p_signo, p_signo * v_minutos, p_signo * v_minutos * v_precio / 60)
+  ON CONFLICT (mes, id_tipo) DO UPDATE SET
+    reservas = k.reservas + EXCLUDED.reservas,
+    minutos = k.minutos + EXCLUDED.minutos,
+    ingresos = k.ingresos + EXCLUDED.ingresos;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION kpi_reservas_trigger() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM kpi_aplicar_reserva(OLD.id_cancha, OLD.fecha, OLD.hora_inicio, OLD.hora_fin, OLD.precio_hora, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM kpi_aplicar_reserva(NEW.id_cancha, NEW.fecha, NEW.hora_inicio, NEW.hora_fin, NEW.precio_hora, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reservas_kpi ON reservas;
+CREATE TRIGGER reservas_kpi
+AFTER INSERT OR DELETE OR UPDATE OF id_cancha, fecha, hora_inicio, hora_fin, precio_hora ON reservas
+FOR EACH ROW EXECUTE FUNCTION kpi_reservas_trigger();
+
+-- Carga inicial con las reservas existentes
+TRUNCATE kpi_diario_cancha, kpi_diario_hora, kpi_mensual_tipo;
+SELECT kpi_aplicar_reserva(id_cancha, fecha, hora_inicio, hora_fin, precio_hora, 1) FROM reservas;
+
+GRANT SELECT ON kpi_diario_cancha, kpi_diario_hora, kpi_mensual_tipo TO consultor;
@@ -0,0 +1,16 @@
+-- ==============================
+-- Revocación de tokens de sesión firmados
+-- ==============================
+
+-- Los tokens se validan con su firma HMAC, sin consultar la base. Solo los
+-- revocados antes de vencer (cierre de sesión) se guardan aquí, por su
+-- identificador (jti); la aplicación mantiene la lista en memoria.
+CREATE TABLE IF NOT EXISTS tokens_revocados (
+  jti TEXT PRIMARY KEY,
+  expiracion TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS tokens_revocados_expiracion_idx ON tokens_revocados (expiracion);
+
+-- Una vez vencido el token ya no hace falta recordarlo:
+--   DELETE FROM tokens_revocados WHERE expiracion < now();
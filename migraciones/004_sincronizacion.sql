@@ -0,0 +1,62 @@
+-- ==============================
+-- Sincronización incremental del catálogo y las reservas
+-- ==============================
+
+-- Cada fila guarda cuándo cambió por última vez. Los clientes piden solo las
+-- filas con actualizado_en posterior a su última marca (menos un margen, por
+-- las transacciones que confirman fuera de orden).
+ALTER TABLE tipos_cancha ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+ALTER TABLE canchas ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+ALTER TABLE horarios_disponibles ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+ALTER TABLE reservas ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+
+CREATE INDEX IF NOT EXISTS tipos_cancha_actualizado_en_idx ON tipos_cancha (actualizado_en);
+CREATE INDEX IF NOT EXISTS canchas_actualizado_en_idx ON canchas (actualizado_en);
+CREATE INDEX IF NOT EXISTS horarios_disponibles_actualizado_en_idx ON horarios_disponibles (actualizado_en);
+CREATE INDEX IF NOT EXISTS reservas_actualizado_en_idx ON reservas (actualizado_en);
+
+CREATE OR REPLACE FUNCTION marcar_actualizacion_trigger() RETURNS trigger AS $$
+BEGIN
+  NEW.actualizado_en := clock_timestamp();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lápidas: las filas borradas no se pueden pedir por actualizado_en, así que
+-- cada borrado (también los hechos en cascada) deja su id aquí
+CREATE TABLE IF NOT EXISTS eliminaciones (
+  id BIGSERIAL PRIMARY KEY,
+  tabla TEXT NOT NULL,
+  id_fila INT NOT NULL,
+  eliminado_en TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS eliminaciones_tabla_eliminado_en_idx ON eliminaciones (tabla, eliminado_en);
+
+CREATE OR REPLACE FUNCTION registrar_eliminacion_trigger() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO eliminaciones (tabla, id_fila) VALUES (TG_TABLE_NAME, OLD.id);
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['tipos_cancha', 'canchas', 'horarios_disponibles', 'reservas'] LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %1$s_actualizado_en ON %1$s', t);
+    EXECUTE format('CREATE TRIGGER %1$s_actualizado_en BEFORE UPDATE ON %1$s
+                    FOR EACH ROW EXECUTE FUNCTION marcar_actualizacion_trigger()', t);
+    EXECUTE format('DROP TRIGGER IF EXISTS %1$s_eliminacion ON %1$s', t);
+    EXECUTE format('CREATE TRIGGER %1$s_eliminacion AFTER DELETE ON %1$s
+                    FOR EACH ROW EXECUTE FUNCTION registrar_eliminacion_trigger()', t);
+  END LOOP;
+END;
+$$;
+
+GRANT SELECT ON eliminaciones TO consultor, operador_reservas;
+
+-- Las lápidas solo sirven a clientes que sincronizaron hace poco; uno que
+-- estuvo más tiempo desconectado vuelve a descargar todo:
+--   DELETE FROM eliminaciones WHERE eliminado_en < now() - interval '7 days';
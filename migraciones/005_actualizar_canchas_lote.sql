@@ -0,0 +1,76 @@
+-- ==============================
+-- Edición de varias canchas en una sola transacción
+-- ==============================
+
+-- p_cambios: [{"id": 3, "datos": {"nombre": "...", "disponible": false}}, ...]
+-- Primero se valida todo el lote; si alguna fila es inválida no se aplica
+-- ninguna (las válidas vuelven como 'sin_aplicar'). Si todas son válidas se
+-- aplican con un único UPDATE. Devuelve una fila de resultado por cambio.
+CREATE OR REPLACE FUNCTION actualizar_canchas_lote(
+  p_cambios JSONB, p_solo_disponibilidad BOOLEAN DEFAULT FALSE
+) RETURNS TABLE (id_cancha INT, estado TEXT, motivo TEXT) AS $$
+DECLARE
+  v_permitidas TEXT[] := CASE WHEN p_solo_disponibilidad
+                              THEN ARRAY['disponible']
+                              ELSE ARRAY['nombre', 'id_tipo', 'ubicacion', 'disponible'] END;
+  v_cambio JSONB;
+  v_id INT;
+  v_datos JSONB;
+  v_columnas TEXT[];
+  v_motivo TEXT;
+  v_errores INT := 0;
+  v_ids INT[] := '{}';
+  v_motivos TEXT[] := '{}';
+BEGIN
+
+  FOR v_cambio IN SELECT value FROM jsonb_array_elements(p_cambios) LOOP
+    v_id := (v_cambio ->> 'id')::INT;
+    v_datos := COALESCE(v_cambio -> 'datos', '{}'::JSONB);
+    v_columnas := ARRAY(SELECT jsonb_object_keys(v_datos));
+    v_motivo := NULL;
+
+    IF NOT EXISTS (SELECT 1 FROM canchas c WHERE c.id = v_id) THEN
+      v_motivo := 'La cancha no existe';
+    ELSIF (SELECT count(*) FROM jsonb_array_elements(p_cambios) e WHERE (e.value ->> 'id')::INT = v_id) > 1 THEN
+      v_motivo := 'La cancha aparece más de una vez en el lote';
+    ELSIF cardinality(v_columnas) = 0 THEN
+      v_motivo := 'No hay cambios';
+    ELSIF NOT v_columnas <@ v_permitidas THEN
+      v_motivo := 'Columnas no editables: ' || array_to_string(
+        ARRAY(SELECT unnest(v_columnas) EXCEPT SELECT unnest(v_permitidas)), ', ');
+    ELSIF v_datos ? 'nombre' AND length(trim(COALESCE(v_datos ->> 'nombre', ''))) = 0 THEN
+      v_motivo := 'El nombre no puede quedar vacío';
+    ELSIF v_datos ? 'id_tipo' AND NOT EXISTS (
+      SELECT 1 FROM tipos_cancha t WHERE t.id = (v_datos ->> 'id_tipo')::INT
+    ) THEN
+      v_motivo := 'El tipo de cancha no existe';
+    ELSIF v_datos ? 'disponible' AND jsonb_typeof(v_datos -> 'disponible') <> 'boolean' THEN
+      v_motivo := 'La disponibilidad debe ser verdadero o falso';
+    END IF;
+
+    v_errores := v_errores + (v_motivo IS NOT NULL)::INT;
+    v_ids := array_append(v_ids, v_id);
+    v_motivos := array_append(v_motivos, v_motivo);
+  END LOOP;
+
+  IF v_errores = 0 THEN
+    UPDATE canchas c SET
+      nombre = CASE WHEN x.datos ? 'nombre' THEN x.datos ->> 'nombre' ELSE c.nombre END,
+      id_tipo = CASE WHEN x.datos ? 'id_tipo' THEN (x.datos ->> 'id_tipo')::INT ELSE c.id_tipo END,
+      ubicacion = CASE WHEN x.datos ? 'ubicacion' THEN x.datos ->> 'ubicacion' ELSE c.ubicacion END,
+      disponible = CASE WHEN x.datos ? 'disponible' THEN (x.datos ->> 'disponible')::BOOLEAN ELSE c.disponible END
+    FROM jsonb_to_recordset(p_cambios) AS x(id INT, datos JSONB)
+    WHERE c.id = x.id;
+  END IF;
+
+  RETURN QUERY
+    SELECT r.id_cancha,
+           CASE WHEN r.motivo IS NOT NULL THEN 'rechazada'
+                WHEN v_errores > 0 THEN 'sin_aplicar'
+                ELSE 'actualizada' END,
+           r.motivo
+    FROM unnest(v_ids, v_motivos) AS r(id_cancha, motivo);
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION actualizar_canchas_lote(JSONB, BOOLEAN) TO admin, consultor;
@@ -0,0 +1,27 @@
+-- ==============================
+-- Índices para las consultas de cada rerun
+-- ==============================
+
+-- `python migrar.py verificar` hace EXPLAIN de cada consulta caliente y
+-- avisa si alguna recorre una tabla completa.
+
+-- Reservas de una cancha en un rango de fechas (disponibilidad, importación)
+-- y reservas desde hoy (réplica de reservas futuras, KPI)
+CREATE INDEX IF NOT EXISTS reservas_cancha_fecha_idx ON reservas (id_cancha, fecha);
+CREATE INDEX IF NOT EXISTS reservas_fecha_idx ON reservas (fecha);
+-- Claves foráneas sin índice: cada DELETE en clientes o canchas recorrería la tabla hija
+CREATE INDEX IF NOT EXISTS reservas_cliente_idx ON reservas (id_cliente);
+CREATE INDEX IF NOT EXISTS horarios_disponibles_cancha_dia_idx ON horarios_disponibles (id_cancha, dia_semana);
+CREATE INDEX IF NOT EXISTS canchas_tipo_idx ON canchas (id_tipo);
+
+CREATE INDEX IF NOT EXISTS eventlogs_fecha_hora_idx ON eventlogs (fecha_hora DESC);
+
+-- Visor de bitácora: orden por (fecha_hora_ingreso, id) con o sin filtro por igualdad
+CREATE INDEX IF NOT EXISTS bitacora_ingreso_idx ON bitacora (fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_tipo_ingreso_idx ON bitacora (tipo_accion, fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_tabla_ingreso_idx ON bitacora (tabla_afectada, fecha_hora_ingreso DESC, id DESC);
+-- Cierre de sesión: solo las sesiones abiertas, que son pocas
+CREATE INDEX IF NOT EXISTS bitacora_sesion_abierta_idx ON bitacora (usuario_id) WHERE fecha_hora_salida IS NULL;
+-- Filtro por usuario con ilike '%texto%'
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS bitacora_nombre_usuario_trgm_idx ON bitacora USING gin (nombre_usuario gin_trgm_ops);
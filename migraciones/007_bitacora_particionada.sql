@@ -0,0 +1,134 @@
+-- ==============================
+-- Bitácora particionada por mes
+-- ==============================
+
+-- Cada mes queda en su propia partición (bitacora_AAAA_MM). Las consultas
+-- con rango de fechas solo leen las particiones del rango, y los meses
+-- vencidos se archivan en Parquet (archivo_bitacora.py) y se eliminan con un
+-- DROP de la partición en lugar de un DELETE fila por fila.
+
+ALTER TABLE bitacora RENAME TO bitacora_sin_particionar;
+ALTER SEQUENCE bitacora_id_seq OWNED BY NONE;
+
+-- La clave primaria de una tabla particionada debe incluir la columna de partición
+CREATE TABLE bitacora (
+  id INT NOT NULL DEFAULT nextval('bitacora_id_seq'),
+  usuario_id INT,
+  nombre_usuario VARCHAR(100),
+  navegador TEXT,
+  ip_acceso TEXT,
+  nombre_maquina TEXT,
+  tipo_accion VARCHAR(30) NOT NULL,
+  tabla_afectada VARCHAR(50),
+  descripcion TEXT,
+  fecha_hora_ingreso TIMESTAMP NOT NULL DEFAULT current_timestamp,
+  fecha_hora_salida TIMESTAMP,
+  PRIMARY KEY (id, fecha_hora_ingreso)
+) PARTITION BY RANGE (fecha_hora_ingreso);
+
+ALTER SEQUENCE bitacora_id_seq OWNED BY bitacora.id;
+
+-- Recibe las filas de meses sin partición, así una inserción nunca falla
+CREATE TABLE bitacora_default PARTITION OF bitacora DEFAULT;
+
+-- Crea las particiones desde el mes de p_desde hasta p_meses_adelante meses
+-- después del actual. Las filas de esos meses que hayan caído en la partición
+-- por defecto se mueven a la nueva. Devuelve las particiones creadas.
+CREATE OR REPLACE FUNCTION bitacora_crear_particiones(
+  p_desde DATE DEFAULT CURRENT_DATE, p_meses_adelante INT DEFAULT 3
+) RETURNS TABLE (particion TEXT) AS $$
+DECLARE
+  v_mes DATE;
+  v_siguiente DATE;
+  v_nombre TEXT;
+BEGIN
+  FOR v_mes IN
+    SELECT generate_series(
+      date_trunc('month', p_desde),
+      date_trunc('month', CURRENT_DATE) + make_interval(months => p_meses_adelante),
+      INTERVAL '1 month'
+    )::DATE
+  LOOP
+    v_nombre := format('bitacora_%s', to_char(v_mes, 'YYYY_MM'));
+    CONTINUE WHEN to_regclass(v_nombre) IS NOT NULL;
+    v_siguiente := (v_mes + INTERVAL '1 month')::DATE;
+
+    EXECUTE format('CREATE TABLE %I (LIKE bitacora INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_nombre);
+    EXECUTE format(
+      'WITH movidas AS (DELETE FROM bitacora_default
+                        WHERE fecha_hora_ingreso >= %L AND fecha_hora_ingreso < %L RETURNING *)
+       INSERT INTO %I SELECT * FROM movidas',
+      v_mes, v_siguiente, v_nombre
+    );
+    EXECUTE format(
+      'ALTER TABLE bitacora ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+      v_nombre, v_mes, v_siguiente
+    );
+    particion := v_nombre;
+    RETURN NEXT;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Meses con filas anteriores a p_antes (solo se leen las particiones de esos meses)
+CREATE OR REPLACE FUNCTION bitacora_meses(p_antes DATE)
+RETURNS TABLE (mes DATE, filas BIGINT) AS $$
+  SELECT date_trunc('month', fecha_hora_ingreso)::DATE, count(*)
+  FROM bitacora
+  WHERE fecha_hora_ingreso < p_antes
+  GROUP BY 1
+  ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Elimina un mes ya archivado: DROP de su partición y DELETE de las filas que
+-- hayan quedado en la partición por defecto. p_filas es la cantidad de filas
+-- que se archivaron; si el mes tiene otra cantidad no se elimina nada.
+CREATE OR REPLACE FUNCTION bitacora_descartar_mes(p_mes DATE, p_filas BIGINT)
+RETURNS TABLE (filas BIGINT) AS $$
+DECLARE
+  v_mes DATE := date_trunc('month', p_mes)::DATE;
+  v_siguiente DATE := (date_trunc('month', p_mes) + INTERVAL '1 month')::DATE;
+  v_nombre TEXT := format('bitacora_%s', to_char(p_mes, 'YYYY_MM'));
+  v_filas BIGINT;
+BEGIN
+  IF v_siguiente > CURRENT_DATE THEN
+    RAISE EXCEPTION 'No se puede descartar el mes en curso (%)', v_mes;
+  END IF;
+
+  SELECT count(*) INTO v_filas FROM bitacora
+  WHERE fecha_hora_ingreso >= v_mes AND fecha_hora_ingreso < v_siguiente;
+  IF v_filas <> p_filas THEN
+    RAISE EXCEPTION 'El mes % tiene % filas y se archivaron %', v_mes, v_filas, p_filas;
+  END IF;
+
+  IF to_regclass(v_nombre) IS NOT NULL THEN
+    EXECUTE format('ALTER TABLE bitacora DETACH PARTITION %I', v_nombre);
+    EXECUTE format('DROP TABLE %I', v_nombre);
+  END IF;
+  DELETE FROM bitacora_default WHERE fecha_hora_ingreso >= v_mes AND fecha_hora_ingreso < v_siguiente;
+
+  filas := v_filas;
+  RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Particiones para las filas existentes y los próximos meses, y copia de los datos
+SELECT bitacora_crear_particiones(
+  COALESCE((SELECT min(fecha_hora_ingreso)::DATE FROM bitacora_sin_particionar), CURRENT_DATE)
+);
+
+INSERT INTO bitacora (id, usuario_id, nombre_usuario, navegador, ip_acceso, nombre_maquina,
+                      tipo_accion, tabla_afectada, descripcion, fecha_hora_ingreso, fecha_hora_salida)
+SELECT id, usuario_id, nombre_usuario, navegador, ip_acceso, nombre_maquina,
+       tipo_accion, tabla_afectada, descripcion, fecha_hora_ingreso, fecha_hora_salida
+FROM bitacora_sin_particionar;
+
+DROP TABLE bitacora_sin_particionar;
+
+-- Los índices de la migración 006 se eliminaron con la tabla anterior; en la
+-- tabla particionada cada índice se crea también en todas sus particiones
+CREATE INDEX IF NOT EXISTS bitacora_ingreso_idx ON bitacora (fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_tipo_ingreso_idx ON bitacora (tipo_accion, fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_tabla_ingreso_idx ON bitacora (tabla_afectada, fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_sesion_abierta_idx ON bitacora (usuario_id) WHERE fecha_hora_salida IS NULL;
+CREATE INDEX IF NOT EXISTS bitacora_nombre_usuario_trgm_idx ON bitacora USING gin (nombre_usuario gin_trgm_ops);
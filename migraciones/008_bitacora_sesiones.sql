@@ -0,0 +1,15 @@
+-- ==============================
+-- Sesiones en la bitácora
+-- ==============================
+
+-- Cada login tiene un identificador de sesión (el jti de su token) que
+-- también llevan las acciones de esa sesión. El cierre de sesión actualiza
+-- solo la fila LOGIN de esa sesión, buscada por (sesion_id, fecha_hora_ingreso):
+-- la fecha elige la partición y el índice la fila.
+ALTER TABLE bitacora ADD COLUMN IF NOT EXISTS sesion_id TEXT;
+
+CREATE INDEX IF NOT EXISTS bitacora_sesion_login_idx ON bitacora (sesion_id, fecha_hora_ingreso)
+  WHERE tipo_accion = 'LOGIN';
+
+-- El cierre ya no busca las sesiones abiertas por usuario
+DROP INDEX IF EXISTS bitacora_sesion_abierta_idx;
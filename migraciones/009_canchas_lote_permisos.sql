@@ -0,0 +1,92 @@
+-- ==============================
+-- actualizar_canchas_lote: columnas según los permisos de quien llama
+-- ==============================
+
+-- La función de la migración 005 elegía las columnas editables con
+-- p_solo_disponibilidad, que manda el cliente, y consultor podía
+-- ejecutarla sin tener UPDATE sobre canchas. Ahora las columnas salen de
+-- los privilegios del rol que llama (has_column_privilege, la función es
+-- SECURITY INVOKER): admin edita todas, consultor solo `disponible`, y
+-- p_solo_disponibilidad solo puede restringir más, nunca ampliar. El
+-- UPDATE asigna únicamente las columnas permitidas, así que Postgres
+-- vuelve a comprobar el permiso de cada una.
+
+GRANT UPDATE (disponible) ON canchas TO consultor;
+
+CREATE OR REPLACE FUNCTION actualizar_canchas_lote(
+  p_cambios JSONB, p_solo_disponibilidad BOOLEAN DEFAULT FALSE
+) RETURNS TABLE (id_cancha INT, estado TEXT, motivo TEXT) AS $$
+DECLARE
+  v_permitidas TEXT[] := ARRAY(
+    SELECT col FROM unnest(ARRAY['nombre', 'id_tipo', 'ubicacion', 'disponible']) AS col
+    WHERE has_column_privilege('canchas', col, 'UPDATE')
+      AND (NOT p_solo_disponibilidad OR col = 'disponible')
+  );
+  v_cambio JSONB;
+  v_id INT;
+  v_datos JSONB;
+  v_columnas TEXT[];
+  v_motivo TEXT;
+  v_errores INT := 0;
+  v_ids INT[] := '{}';
+  v_motivos TEXT[] := '{}';
+  v_asignaciones TEXT;
+BEGIN
+
+  FOR v_cambio IN SELECT value FROM jsonb_array_elements(p_cambios) LOOP
+    v_id := (v_cambio ->> 'id')::INT;
+    v_datos := COALESCE(v_cambio -> 'datos', '{}'::JSONB);
+    v_columnas := ARRAY(SELECT jsonb_object_keys(v_datos));
+    v_motivo := NULL;
+
+    IF NOT EXISTS (SELECT 1 FROM canchas c WHERE c.id = v_id) THEN
+      v_motivo := 'La cancha no existe';
+    ELSIF (SELECT count(*) FROM jsonb_array_elements(p_cambios) e WHERE (e.value ->> 'id')::INT = v_id) > 1 THEN
+      v_motivo := 'La cancha aparece más de una vez en el lote';
+    ELSIF cardinality(v_columnas) = 0 THEN
+      v_motivo := 'No hay cambios';
+    ELSIF NOT v_columnas <@ v_permitidas THEN
+      v_motivo := 'Columnas no editables: ' || array_to_string(
+        ARRAY(SELECT unnest(v_columnas) EXCEPT SELECT unnest(v_permitidas)), ', ');
+    ELSIF v_datos ? 'nombre' AND length(trim(COALESCE(v_datos ->> 'nombre', ''))) = 0 THEN
+      v_motivo := 'El nombre no puede quedar vacío';
+    ELSIF v_datos ? 'id_tipo' AND jsonb_typeof(v_datos -> 'id_tipo') <> 'null' AND NOT EXISTS (
+      SELECT 1 FROM tipos_cancha t WHERE t.id = (v_datos ->> 'id_tipo')::INT
+    ) THEN
+      v_motivo := 'El tipo de cancha no existe';
+    ELSIF v_datos ? 'disponible' AND jsonb_typeof(v_datos -> 'disponible') <> 'boolean' THEN
+      v_motivo := 'La disponibilidad debe ser verdadero o falso';
+    END IF;
+
+    v_errores := v_errores + (v_motivo IS NOT NULL)::INT;
+    v_ids := array_append(v_ids, v_id);
+    v_motivos := array_append(v_motivos, v_motivo);
+  END LOOP;
+
+  IF v_errores = 0 AND cardinality(v_ids) > 0 THEN
+    SELECT string_agg(format(
+             '%1$I = CASE WHEN x.datos ? %1$L THEN (x.datos ->> %1$L)::%2$s ELSE c.%1$I END',
+             t.columna, t.tipo), ', ')
+      INTO v_asignaciones
+      FROM (VALUES ('nombre', 'TEXT'), ('id_tipo', 'INT'),
+                   ('ubicacion', 'TEXT'), ('disponible', 'BOOLEAN')) AS t(columna, tipo)
+      WHERE t.columna = ANY (v_permitidas);
+    EXECUTE format(
+      'UPDATE canchas c SET %s FROM jsonb_to_recordset($1) AS x(id INT, datos JSONB) WHERE c.id = x.id',
+      v_asignaciones
+    ) USING p_cambios;
+  END IF;
+
+  RETURN QUERY
+    SELECT r.id_cancha,
+           CASE WHEN r.motivo IS NOT NULL THEN 'rechazada'
+                WHEN v_errores > 0 THEN 'sin_aplicar'
+                ELSE 'actualizada' END,
+           r.motivo
+    FROM unnest(v_ids, v_motivos) AS r(id_cancha, motivo);
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+-- Las funciones nuevas se pueden ejecutar desde PUBLIC: solo los roles que editan canchas
+REVOKE EXECUTE ON FUNCTION actualizar_canchas_lote(JSONB, BOOLEAN) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION actualizar_canchas_lote(JSONB, BOOLEAN) TO admin, consultor;
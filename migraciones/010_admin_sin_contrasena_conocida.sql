@@ -0,0 +1,12 @@
+-- ==============================
+-- Administrador sembrado con contraseña conocida
+-- ==============================
+
+-- Las bases creadas con una versión anterior de create_db.txt tienen el
+-- usuario admin@club.com con un hash de una contraseña publicada en el
+-- repositorio. Si nunca se cambió, se reemplaza por un valor que no es un
+-- hash bcrypt: nadie puede ingresar con él. Para volver a usar la cuenta,
+-- o crear otro administrador: `python alta_usuarios.py --admin CORREO`.
+UPDATE usuarios
+SET password = '!'
+WHERE password = '$2b$12$W8LBuQ2gBi6ScaB8gBxzp.j7pSzQ.1Z2juBN7ZRva01vwykzSr/gS';
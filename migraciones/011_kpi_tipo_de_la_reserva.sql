@@ -0,0 +1,101 @@
+-- ==============================
+-- Tipo de cancha guardado en cada reserva (resúmenes de KPI)
+-- ==============================
+
+-- kpi_aplicar_reserva (migración 002) buscaba el tipo en la fila actual de
+-- la cancha. Al eliminar una cancha sus reservas se borran en cascada
+-- cuando la cancha ya no existe, y se restaban bajo "Sin tipo" (id_tipo 0)
+-- dejando un resumen negativo; al cambiar el tipo de una cancha, cancelar
+-- una reserva anterior la restaba del tipo nuevo. Como el precio, el tipo
+-- se guarda en la reserva al crearla y se resta con el de la fila borrada.
+-- Los resúmenes ya desviados no se recalculan: al truncarlos se perdería el
+-- histórico de las canchas eliminadas.
+ALTER TABLE reservas ADD COLUMN IF NOT EXISTS id_tipo INT;
+
+UPDATE reservas r SET id_tipo = c.id_tipo
+FROM canchas c WHERE c.id = r.id_cancha AND r.id_tipo IS NULL;
+
+-- El tipo sale siempre de la cancha: al crear la reserva y al moverla a otra
+CREATE OR REPLACE FUNCTION reservas_precio_trigger() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'INSERT' AND NEW.precio_hora IS NULL THEN
+    SELECT precio_hora INTO NEW.precio_hora FROM canchas WHERE id = NEW.id_cancha;
+  END IF;
+  IF TG_OP = 'INSERT' OR NEW.id_cancha IS DISTINCT FROM OLD.id_cancha THEN
+    SELECT id_tipo INTO NEW.id_tipo FROM canchas WHERE id = NEW.id_cancha;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reservas_precio ON reservas;
+CREATE TRIGGER reservas_precio
+BEFORE INSERT OR UPDATE OF id_cancha ON reservas
+FOR EACH ROW EXECUTE FUNCTION reservas_precio_trigger();
+
+-- Suma (p_signo = 1) o resta (p_signo = -1) una reserva en los tres resúmenes
+CREATE OR REPLACE FUNCTION kpi_aplicar_reserva(
+  p_id_cancha INT, p_id_tipo INT, p_fecha DATE, p_inicio TIME, p_fin TIME, p_precio NUMERIC, p_signo INT
+) RETURNS void AS $$
+DECLARE
+  v_tipo INT := COALESCE(p_id_tipo, 0);
+  v_precio NUMERIC := COALESCE(p_precio, 0);
+  v_ini INT := EXTRACT(EPOCH FROM p_inicio)::INT;
+  v_fin INT := EXTRACT(EPOCH FROM p_fin)::INT;
+  v_minutos INT;
+BEGIN
+  IF p_id_cancha IS NULL THEN
+    RETURN;
+  END IF;
+  v_minutos := (v_fin - v_ini) / 60;
+
+  INSERT INTO kpi_diario_cancha AS k (fecha, id_cancha, id_tipo, reservas, minutos, ingresos)
+  VALUES (p_fecha, p_id_cancha, NULLIF(v_tipo, 0), p_signo, p_signo * v_minutos, p_signo * v_minutos * v_precio / 60)
+  ON CONFLICT (fecha, id_cancha) DO UPDATE SET
+    reservas = k.reservas + EXCLUDED.reservas,
+    minutos = k.minutos + EXCLUDED.minutos,
+    ingresos = k.ingresos + EXCLUDED.ingresos;
+
+  -- Los minutos se reparten entre las horas que ocupa la reserva;
+  -- la reserva se cuenta en la hora en que empieza
+  INSERT INTO kpi_diario_hora AS k (fecha, id_tipo, hora, reservas, minutos, ingresos)
+  SELECT p_fecha, v_tipo, h,
+         CASE WHEN h = v_ini / 3600 THEN p_signo ELSE 0 END,
+         p_signo * m,
+         p_signo * m * v_precio / 60
+  FROM (
+    SELECT h, (LEAST(v_fin, (h + 1) * 3600) - GREATEST(v_ini, h * 3600)) / 60 AS m
+    FROM generate_series(v_ini / 3600, (v_fin - 1) / 3600) AS h
+  ) horas
+  ON CONFLICT (fecha, id_tipo, hora) DO UPDATE SET
+    reservas = k.reservas + EXCLUDED.reservas,
+    minutos = k.minutos + EXCLUDED.minutos,
+    ingresos = k.ingresos + EXCLUDED.ingresos;
+
+  INSERT INTO kpi_mensual_tipo AS k (mes, id_tipo, reservas, minutos, ingresos)
+  VALUES (date_trunc('month', p_fecha)::DATE, v_tipo, p_signo, p_signo * v_minutos, p_signo * v_minutos * v_precio / 60)
+  ON CONFLICT (mes, id_tipo) DO UPDATE SET
+    reservas = k.reservas + EXCLUDED.reservas,
+    minutos = k.minutos + EXCLUDED.minutos,
+    ingresos = k.ingresos + EXCLUDED.ingresos;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION kpi_reservas_trigger() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM kpi_aplicar_reserva(OLD.id_cancha, OLD.id_tipo, OLD.fecha, OLD.hora_inicio, OLD.hora_fin, OLD.precio_hora, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM kpi_aplicar_reserva(NEW.id_cancha, NEW.id_tipo, NEW.fecha, NEW.hora_inicio, NEW.hora_fin, NEW.precio_hora, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reservas_kpi ON reservas;
+CREATE TRIGGER reservas_kpi
+AFTER INSERT OR DELETE OR UPDATE OF id_cancha, id_tipo, fecha, hora_inicio, hora_fin, precio_hora ON reservas
+FOR EACH ROW EXECUTE FUNCTION kpi_reservas_trigger();
+
+DROP FUNCTION IF EXISTS kpi_aplicar_reserva(INT, DATE, TIME, TIME, NUMERIC, INT);
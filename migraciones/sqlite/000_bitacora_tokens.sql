@@ -0,0 +1,26 @@
+-- ==============================
+-- Tablas que existen en Supabase pero no están en create_db.txt (SQLite)
+-- ==============================
+
+CREATE TABLE IF NOT EXISTS bitacora (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  usuario_id INT,
+  nombre_usuario VARCHAR(100),
+  navegador TEXT,
+  ip_acceso TEXT,
+  nombre_maquina TEXT,
+  tipo_accion VARCHAR(30) NOT NULL,
+  tabla_afectada VARCHAR(50),
+  descripcion TEXT,
+  fecha_hora_ingreso TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+  fecha_hora_salida TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS bitacora_ingreso_idx ON bitacora (fecha_hora_ingreso DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS tokens (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  usuario_id INT REFERENCES usuarios(id) ON DELETE CASCADE,
+  token TEXT NOT NULL,
+  expiracion TIMESTAMP NOT NULL
+);
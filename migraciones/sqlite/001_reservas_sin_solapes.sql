@@ -0,0 +1,32 @@
+-- ==============================
+-- Reservas sin solapes e idempotentes (SQLite)
+-- ==============================
+
+ALTER TABLE reservas ADD COLUMN idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS reservas_idempotency_key_idx ON reservas (idempotency_key);
+CREATE INDEX IF NOT EXISTS reservas_cancha_fecha_idx ON reservas (id_cancha, fecha);
+
+-- SQLite no tiene restricciones EXCLUDE: los triggers rechazan el solape con
+-- el mismo código que Postgres (23P01). Las horas se guardan como HH:MM:SS,
+-- así que se comparan como texto. El rango es [inicio, fin).
+CREATE TRIGGER IF NOT EXISTS reservas_sin_solapes_insert
+BEFORE INSERT ON reservas
+WHEN EXISTS (
+  SELECT 1 FROM reservas r
+  WHERE r.id_cancha = NEW.id_cancha AND r.fecha = NEW.fecha
+    AND r.hora_inicio < NEW.hora_fin AND NEW.hora_inicio < r.hora_fin
+)
+BEGIN
+  SELECT RAISE(ABORT, '23P01: conflicting key value violates exclusion constraint "reservas_sin_solapes"');
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservas_sin_solapes_update
+BEFORE UPDATE OF id_cancha, fecha, hora_inicio, hora_fin ON reservas
+WHEN EXISTS (
+  SELECT 1 FROM reservas r
+  WHERE r.id <> NEW.id AND r.id_cancha = NEW.id_cancha AND r.fecha = NEW.fecha
+    AND r.hora_inicio < NEW.hora_fin AND NEW.hora_inicio < r.hora_fin
+)
+BEGIN
+  SELECT RAISE(ABORT, '23P01: conflicting key value violates exclusion constraint "reservas_sin_solapes"');
+END;
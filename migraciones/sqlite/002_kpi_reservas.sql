@@ -0,0 +1,158 @@
+-- ==============================
+-- Resúmenes de reservas para los KPI de Business (SQLite)
+-- ==============================
+
+ALTER TABLE canchas ADD COLUMN precio_hora NUMERIC(10,2) NOT NULL DEFAULT 0;
+ALTER TABLE reservas ADD COLUMN precio_hora NUMERIC(10,2);
+
+CREATE TABLE IF NOT EXISTS kpi_diario_cancha (
+  fecha DATE NOT NULL,
+  id_cancha INT NOT NULL,
+  id_tipo INT,
+  reservas INT NOT NULL DEFAULT 0,
+  minutos INT NOT NULL DEFAULT 0,
+  ingresos NUMERIC(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_cancha)
+);
+
+CREATE TABLE IF NOT EXISTS kpi_diario_hora (
+  fecha DATE NOT NULL,
+  id_tipo INT NOT NULL,
+  hora SMALLINT NOT NULL CHECK (hora BETWEEN 0 AND 23),
+  reservas INT NOT NULL DEFAULT 0,
+  minutos INT NOT NULL DEFAULT 0,
+  ingresos NUMERIC(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_tipo, hora)
+);
+
+CREATE TABLE IF NOT EXISTS kpi_mensual_tipo (
+  mes DATE NOT NULL,
+  id_tipo INT NOT NULL,
+  reservas INT NOT NULL DEFAULT 0,
+  minutos INT NOT NULL DEFAULT 0,
+  ingresos NUMERIC(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (mes, id_tipo)
+);
+
+-- Horas del día, para repartir los minutos de una reserva (SQLite no
+-- permite CTE recursivas dentro de un trigger)
+CREATE TABLE IF NOT EXISTS kpi_horas (h INT PRIMARY KEY);
+INSERT OR IGNORE INTO kpi_horas (h) VALUES
+  (0),(1),(2),(3),(4),(5),(6),(7),(8),(9),(10),(11),
+  (12),(13),(14),(15),(16),(17),(18),(19),(20),(21),(22),(23);
+
+-- Equivalente de kpi_aplicar_reserva(): cada fila insertada aquí suma
+-- (signo = 1) o resta (signo = -1) una reserva en los tres resúmenes y se
+-- borra. inicio y fin van en segundos desde medianoche.
+CREATE TABLE IF NOT EXISTS kpi_eventos (
+  id_cancha INT NOT NULL,
+  fecha DATE NOT NULL,
+  id_tipo INT NOT NULL,
+  inicio INT NOT NULL,
+  fin INT NOT NULL,
+  precio NUMERIC NOT NULL,
+  signo INT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS kpi_aplicar_reserva
+AFTER INSERT ON kpi_eventos
+BEGIN
+  INSERT INTO kpi_diario_cancha (fecha, id_cancha, id_tipo, reservas, minutos, ingresos)
+  VALUES (
+    NEW.fecha, NEW.id_cancha, NULLIF(NEW.id_tipo, 0), NEW.signo,
+    NEW.signo * ((NEW.fin - NEW.inicio) / 60),
+    NEW.signo * ((NEW.fin - NEW.inicio) / 60) * NEW.precio / 60.0
+  )
+  ON CONFLICT (fecha, id_cancha) DO UPDATE SET
+    reservas = reservas + excluded.reservas,
+    minutos = minutos + excluded.minutos,
+    ingresos = ingresos + excluded.ingresos;
+
+  INSERT INTO kpi_diario_hora (fecha, id_tipo, hora, reservas, minutos, ingresos)
+  SELECT NEW.fecha, NEW.id_tipo, h,
+         CASE WHEN h = NEW.inicio / 3600 THEN NEW.signo ELSE 0 END,
+         NEW.signo * m,
+         NEW.signo * m * NEW.precio / 60.0
+  FROM (
+    SELECT h, (MIN(NEW.fin, (h + 1) * 3600) - MAX(NEW.inicio, h * 3600)) / 60 AS m
+    FROM kpi_horas
+    WHERE h BETWEEN NEW.inicio / 3600 AND (NEW.fin - 1) / 3600
+  )
+  WHERE true
+  ON CONFLICT (fecha, id_tipo, hora) DO UPDATE SET
+    reservas = reservas + excluded.reservas,
+    minutos = minutos + excluded.minutos,
+    ingresos = ingresos + excluded.ingresos;
+
+  INSERT INTO kpi_mensual_tipo (mes, id_tipo, reservas, minutos, ingresos)
+  VALUES (
+    substr(NEW.fecha, 1, 8) || '01', NEW.id_tipo, NEW.signo,
+    NEW.signo * ((NEW.fin - NEW.inicio) / 60),
+    NEW.signo * ((NEW.fin - NEW.inicio) / 60) * NEW.precio / 60.0
+  )
+  ON CONFLICT (mes, id_tipo) DO UPDATE SET
+    reservas = reservas + excluded.reservas,
+    minutos = minutos + excluded.minutos,
+    ingresos = ingresos + excluded.ingresos;
+
+  DELETE FROM kpi_eventos WHERE rowid = NEW.rowid;
+END;
+
+-- Al insertar se guarda el precio vigente de la cancha (SQLite no deja
+-- modificar NEW en un trigger BEFORE) y se suma la reserva
+CREATE TRIGGER IF NOT EXISTS reservas_kpi_insert
+AFTER INSERT ON reservas
+WHEN NEW.id_cancha IS NOT NULL
+BEGIN
+  UPDATE reservas SET precio_hora = (SELECT precio_hora FROM canchas WHERE id = NEW.id_cancha)
+  WHERE id = NEW.id AND NEW.precio_hora IS NULL;
+
+  INSERT INTO kpi_eventos
+  SELECT NEW.id_cancha, NEW.fecha,
+         COALESCE((SELECT id_tipo FROM canchas WHERE id = NEW.id_cancha), 0),
+         CAST(substr(NEW.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(NEW.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(NEW.precio_hora, (SELECT precio_hora FROM canchas WHERE id = NEW.id_cancha), 0),
+         1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservas_kpi_delete
+AFTER DELETE ON reservas
+WHEN OLD.id_cancha IS NOT NULL
+BEGIN
+  INSERT INTO kpi_eventos
+  SELECT OLD.id_cancha, OLD.fecha,
+         COALESCE((SELECT id_tipo FROM canchas WHERE id = OLD.id_cancha), 0),
+         CAST(substr(OLD.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(OLD.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(OLD.precio_hora, 0),
+         -1;
+END;
+
+-- Se ignora la actualización que solo completa el precio recién insertado
+CREATE TRIGGER IF NOT EXISTS reservas_kpi_update
+AFTER UPDATE OF id_cancha, fecha, hora_inicio, hora_fin, precio_hora ON reservas
+WHEN NOT (
+  OLD.precio_hora IS NULL
+  AND OLD.id_cancha IS NEW.id_cancha AND OLD.fecha = NEW.fecha
+  AND OLD.hora_inicio = NEW.hora_inicio AND OLD.hora_fin = NEW.hora_fin
+)
+BEGIN
+  INSERT INTO kpi_eventos
+  SELECT OLD.id_cancha, OLD.fecha,
+         COALESCE((SELECT id_tipo FROM canchas WHERE id = OLD.id_cancha), 0),
+         CAST(substr(OLD.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(OLD.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(OLD.precio_hora, 0),
+         -1
+  WHERE OLD.id_cancha IS NOT NULL;
+
+  INSERT INTO kpi_eventos
+  SELECT NEW.id_cancha, NEW.fecha,
+         COALESCE((SELECT id_tipo FROM canchas WHERE id = NEW.id_cancha), 0),
+         CAST(substr(NEW.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(NEW.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(NEW.precio_hora, 0),
+         1
+  WHERE NEW.id_cancha IS NOT NULL;
+END;
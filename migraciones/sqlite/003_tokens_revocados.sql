@@ -0,0 +1,10 @@
+-- ==============================
+-- Revocación de tokens de sesión firmados (SQLite)
+-- ==============================
+
+CREATE TABLE IF NOT EXISTS tokens_revocados (
+  jti TEXT PRIMARY KEY,
+  expiracion TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS tokens_revocados_expiracion_idx ON tokens_revocados (expiracion);
@@ -0,0 +1,81 @@
+-- ==============================
+-- Sincronización incremental del catálogo y las reservas (SQLite)
+-- ==============================
+
+-- SQLite no admite ADD COLUMN con un DEFAULT no constante: la marca la ponen
+-- los triggers. Mismo formato ISO que devuelve PostgREST, para que las
+-- comparaciones como texto sigan el orden del tiempo.
+ALTER TABLE tipos_cancha ADD COLUMN actualizado_en TIMESTAMPTZ;
+ALTER TABLE canchas ADD COLUMN actualizado_en TIMESTAMPTZ;
+ALTER TABLE horarios_disponibles ADD COLUMN actualizado_en TIMESTAMPTZ;
+ALTER TABLE reservas ADD COLUMN actualizado_en TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS tipos_cancha_actualizado_en_idx ON tipos_cancha (actualizado_en);
+CREATE INDEX IF NOT EXISTS canchas_actualizado_en_idx ON canchas (actualizado_en);
+CREATE INDEX IF NOT EXISTS horarios_disponibles_actualizado_en_idx ON horarios_disponibles (actualizado_en);
+CREATE INDEX IF NOT EXISTS reservas_actualizado_en_idx ON reservas (actualizado_en);
+
+CREATE TABLE IF NOT EXISTS eliminaciones (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  tabla TEXT NOT NULL,
+  id_fila INT NOT NULL,
+  eliminado_en TIMESTAMPTZ NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS eliminaciones_tabla_eliminado_en_idx ON eliminaciones (tabla, eliminado_en);
+
+CREATE TRIGGER IF NOT EXISTS tipos_cancha_alta AFTER INSERT ON tipos_cancha
+BEGIN
+  UPDATE tipos_cancha SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS tipos_cancha_actualizado_en AFTER UPDATE ON tipos_cancha
+WHEN NEW.actualizado_en IS OLD.actualizado_en
+BEGIN
+  UPDATE tipos_cancha SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS tipos_cancha_eliminacion AFTER DELETE ON tipos_cancha
+BEGIN
+  INSERT INTO eliminaciones (tabla, id_fila) VALUES ('tipos_cancha', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS canchas_alta AFTER INSERT ON canchas
+BEGIN
+  UPDATE canchas SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS canchas_actualizado_en AFTER UPDATE ON canchas
+WHEN NEW.actualizado_en IS OLD.actualizado_en
+BEGIN
+  UPDATE canchas SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS canchas_eliminacion AFTER DELETE ON canchas
+BEGIN
+  INSERT INTO eliminaciones (tabla, id_fila) VALUES ('canchas', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS horarios_disponibles_alta AFTER INSERT ON horarios_disponibles
+BEGIN
+  UPDATE horarios_disponibles SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS horarios_disponibles_actualizado_en AFTER UPDATE ON horarios_disponibles
+WHEN NEW.actualizado_en IS OLD.actualizado_en
+BEGIN
+  UPDATE horarios_disponibles SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS horarios_disponibles_eliminacion AFTER DELETE ON horarios_disponibles
+BEGIN
+  INSERT INTO eliminaciones (tabla, id_fila) VALUES ('horarios_disponibles', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS reservas_alta AFTER INSERT ON reservas
+BEGIN
+  UPDATE reservas SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS reservas_actualizado_en AFTER UPDATE ON reservas
+WHEN NEW.actualizado_en IS OLD.actualizado_en
+BEGIN
+  UPDATE reservas SET actualizado_en = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS reservas_eliminacion AFTER DELETE ON reservas
+BEGIN
+  INSERT INTO eliminaciones (tabla, id_fila) VALUES ('reservas', OLD.id);
+END;
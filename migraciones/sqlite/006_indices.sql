@@ -0,0 +1,16 @@
+-- ==============================
+-- Índices para las consultas de cada rerun (SQLite)
+-- ==============================
+
+-- reservas (id_cancha, fecha) ya está en la migración 001. SQLite no tiene
+-- índices de trigramas: el filtro ilike por usuario sigue recorriendo la bitácora.
+CREATE INDEX IF NOT EXISTS reservas_fecha_idx ON reservas (fecha);
+CREATE INDEX IF NOT EXISTS reservas_cliente_idx ON reservas (id_cliente);
+CREATE INDEX IF NOT EXISTS horarios_disponibles_cancha_dia_idx ON horarios_disponibles (id_cancha, dia_semana);
+CREATE INDEX IF NOT EXISTS canchas_tipo_idx ON canchas (id_tipo);
+
+CREATE INDEX IF NOT EXISTS eventlogs_fecha_hora_idx ON eventlogs (fecha_hora DESC);
+
+CREATE INDEX IF NOT EXISTS bitacora_tipo_ingreso_idx ON bitacora (tipo_accion, fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_tabla_ingreso_idx ON bitacora (tabla_afectada, fecha_hora_ingreso DESC, id DESC);
+CREATE INDEX IF NOT EXISTS bitacora_sesion_abierta_idx ON bitacora (usuario_id) WHERE fecha_hora_salida IS NULL;
@@ -0,0 +1,10 @@
+-- ==============================
+-- Sesiones en la bitácora (SQLite)
+-- ==============================
+
+ALTER TABLE bitacora ADD COLUMN sesion_id TEXT;
+
+CREATE INDEX IF NOT EXISTS bitacora_sesion_login_idx ON bitacora (sesion_id, fecha_hora_ingreso)
+  WHERE tipo_accion = 'LOGIN';
+
+DROP INDEX IF EXISTS bitacora_sesion_abierta_idx;
@@ -0,0 +1,81 @@
+-- ==============================
+-- Tipo de cancha guardado en cada reserva (resúmenes de KPI, SQLite)
+-- ==============================
+
+-- Los triggers de la migración 002 buscaban el tipo en la fila actual de la
+-- cancha: las reservas borradas en cascada con su cancha se restaban como
+-- "Sin tipo". Como el precio, el tipo se guarda en la reserva al crearla (o
+-- al moverla a otra cancha) y se resta con el de la fila anterior.
+ALTER TABLE reservas ADD COLUMN id_tipo INT;
+
+UPDATE reservas SET id_tipo = (SELECT id_tipo FROM canchas WHERE id = reservas.id_cancha)
+WHERE id_tipo IS NULL;
+
+DROP TRIGGER IF EXISTS reservas_kpi_insert;
+DROP TRIGGER IF EXISTS reservas_kpi_delete;
+DROP TRIGGER IF EXISTS reservas_kpi_update;
+
+-- id_tipo no está en la lista de reservas_kpi_update: completarlo aquí no
+-- vuelve a sumar la reserva
+CREATE TRIGGER reservas_kpi_insert
+AFTER INSERT ON reservas
+WHEN NEW.id_cancha IS NOT NULL
+BEGIN
+  UPDATE reservas SET precio_hora = (SELECT precio_hora FROM canchas WHERE id = NEW.id_cancha)
+  WHERE id = NEW.id AND NEW.precio_hora IS NULL;
+
+  UPDATE reservas SET id_tipo = (SELECT id_tipo FROM canchas WHERE id = NEW.id_cancha)
+  WHERE id = NEW.id;
+
+  INSERT INTO kpi_eventos
+  SELECT NEW.id_cancha, NEW.fecha,
+         COALESCE((SELECT id_tipo FROM canchas WHERE id = NEW.id_cancha), 0),
+         CAST(substr(NEW.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(NEW.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(NEW.precio_hora, (SELECT precio_hora FROM canchas WHERE id = NEW.id_cancha), 0),
+         1;
+END;
+
+CREATE TRIGGER reservas_kpi_delete
+AFTER DELETE ON reservas
+WHEN OLD.id_cancha IS NOT NULL
+BEGIN
+  INSERT INTO kpi_eventos
+  SELECT OLD.id_cancha, OLD.fecha, COALESCE(OLD.id_tipo, 0),
+         CAST(substr(OLD.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(OLD.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(OLD.precio_hora, 0),
+         -1;
+END;
+
+-- Se ignora la actualización que solo completa el precio recién insertado.
+-- Una reserva que cambia de cancha toma el tipo de la nueva
+CREATE TRIGGER reservas_kpi_update
+AFTER UPDATE OF id_cancha, fecha, hora_inicio, hora_fin, precio_hora ON reservas
+WHEN NOT (
+  OLD.precio_hora IS NULL
+  AND OLD.id_cancha IS NEW.id_cancha AND OLD.fecha = NEW.fecha
+  AND OLD.hora_inicio = NEW.hora_inicio AND OLD.hora_fin = NEW.hora_fin
+)
+BEGIN
+  INSERT INTO kpi_eventos
+  SELECT OLD.id_cancha, OLD.fecha, COALESCE(OLD.id_tipo, 0),
+         CAST(substr(OLD.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(OLD.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(OLD.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(OLD.precio_hora, 0),
+         -1
+  WHERE OLD.id_cancha IS NOT NULL;
+
+  UPDATE reservas SET id_tipo = (SELECT id_tipo FROM canchas WHERE id = NEW.id_cancha)
+  WHERE id = NEW.id AND OLD.id_cancha IS NOT NEW.id_cancha;
+
+  INSERT INTO kpi_eventos
+  SELECT NEW.id_cancha, NEW.fecha,
+         COALESCE(CASE WHEN OLD.id_cancha IS NEW.id_cancha THEN NEW.id_tipo
+                       ELSE (SELECT id_tipo FROM canchas WHERE id = NEW.id_cancha) END, 0),
+         CAST(substr(NEW.hora_inicio, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_inicio, 4, 2) AS INT) * 60,
+         CAST(substr(NEW.hora_fin, 1, 2) AS INT) * 3600 + CAST(substr(NEW.hora_fin, 4, 2) AS INT) * 60,
+         COALESCE(NEW.precio_hora, 0),
+         1
+  WHERE NEW.id_cancha IS NOT NULL;
+END;
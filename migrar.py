@@ -0,0 +1,350 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timezone
+
+RUTA_BASE = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_ESQUEMA = os.path.join(RUTA_BASE, "create_db.txt")
+CARPETA_MIGRACIONES = os.path.join(RUTA_BASE, "migraciones")
+CARPETA_MIGRACIONES_SQLITE = os.path.join(CARPETA_MIGRACIONES, "sqlite")
+
+# Tabla donde cada base registra las migraciones aplicadas
+TABLA_VERSIONES = "schema_migraciones"
+
+
+class ErrorMigracion(Exception):
+    """Migración modificada después de aplicarse, o base en un estado que el runner no reconoce"""
+
+
+def esquema_sqlite() -> list:
+    """
+    Sentencias CREATE TABLE de create_db.txt traducidas a SQLite.
+
+    Solo se toma la sección de creación de tablas (los roles y los datos
+    de prueba no aplican).
+    """
+    with open(ARCHIVO_ESQUEMA, encoding="utf-8") as archivo:
+        texto = archivo.read()
+    sentencias = re.findall(r"CREATE TABLE .*?\n\);", texto, flags=re.S)
+    return [
+        s.replace("SERIAL PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+         .replace("DEFAULT current_timestamp", "DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))")
+        for s in sentencias
+    ]
+
+
+def _checksum(texto: str) -> str:
+    return hashlib.sha256(texto.replace("\r\n", "\n").encode("utf-8")).hexdigest()
+
+
+def listar_migraciones(carpeta: str) -> list:
+    """Migraciones `NNN_nombre.sql` de la carpeta, ordenadas: [(versión, nombre, sql, checksum)]"""
+    migraciones = []
+    for ruta in sorted(glob.glob(os.path.join(carpeta, "[0-9][0-9][0-9]_*.sql"))):
+        nombre = os.path.basename(ruta)[:-4]
+        with open(ruta, encoding="utf-8") as archivo:
+            sql = archivo.read()
+        migraciones.append((int(nombre[:3]), nombre, sql, _checksum(sql)))
+    return migraciones
+
+
+class MotorSQLite:
+    """Base SQLite (la del reemplazo local de Supabase)"""
+
+    dialecto = "sqlite"
+    carpeta = CARPETA_MIGRACIONES_SQLITE
+
+    def __init__(self, conexion):
+        if isinstance(conexion, str):
+            conexion = sqlite3.connect(conexion, isolation_level=None)
+        self.conexion = conexion
+
+    def existe_tabla(self, tabla: str) -> bool:
+        return self.conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+        ).fetchone() is not None
+
+    def consultar(self, sql: str, parametros=()) -> list:
+        return [tuple(f) for f in self.conexion.execute(sql, parametros).fetchall()]
+
+    def crear_esquema_base(self):
+        with self.conexion:
+            for sentencia in esquema_sqlite():
+                self.conexion.execute(sentencia)
+
+    def aplicar(self, sql: str, registro: tuple):
+        """Ejecuta la migración y la registra en la misma transacción"""
+        version, nombre, checksum = registro
+        ahora = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        try:
+            self.conexion.executescript(
+                f"BEGIN;\n{sql}\n;\n"
+                f"INSERT INTO {TABLA_VERSIONES} (version, nombre, checksum, aplicada_en) "
+                f"VALUES ({int(version)}, '{nombre}', '{checksum}', '{ahora}');\nCOMMIT;"
+            )
+        except sqlite3.Error:
+            # executescript deja abierta la transacción de la sentencia que falló
+            if self.conexion.in_transaction:
+                self.conexion.execute("ROLLBACK")
+            raise
+
+    def registrar(self, registro: tuple):
+        self.conexion.execute(
+            f"INSERT INTO {TABLA_VERSIONES} (version, nombre, checksum, aplicada_en) VALUES (?, ?, ?, ?)",
+            (*registro, datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+        )
+
+    def planes(self, sql: str, parametros) -> list:
+        """Tablas recorridas completas según EXPLAIN QUERY PLAN ('SCAN tabla' sin índice)"""
+        recorridas = []
+        for fila in self.conexion.execute("EXPLAIN QUERY PLAN " + sql, parametros):
+            detalle = fila[-1]
+            if detalle.startswith("SCAN ") and " USING " not in detalle:
+                recorridas.append(detalle.split()[1])
+        return recorridas
+
+
+class MotorPostgres:
+    """Postgres local (o cualquier base accesible con un DSN de libpq)"""
+
+    dialecto = "postgres"
+    carpeta = CARPETA_MIGRACIONES
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg2
+        except ImportError:
+            raise ErrorMigracion("Para migrar Postgres hace falta psycopg2 (pip install psycopg2-binary)")
+        self.conexion = psycopg2.connect(dsn)
+
+    def existe_tabla(self, tabla: str) -> bool:
+        return self.consultar("SELECT to_regclass(%s) IS NOT NULL", (f"public.{tabla}",))[0][0]
+
+    def consultar(self, sql: str, parametros=()) -> list:
+        with self.conexion, self.conexion.cursor() as cursor:
+            cursor.execute(sql.replace("?", "%s"), parametros)
+            return cursor.fetchall() if cursor.description else []
+
+    def crear_esquema_base(self):
+        with open(ARCHIVO_ESQUEMA, encoding="utf-8") as archivo:
+            sql = archivo.read()
+        with self.conexion, self.conexion.cursor() as cursor:
+            cursor.execute(sql)
+
+    def aplicar(self, sql: str, registro: tuple):
+        with self.conexion, self.conexion.cursor() as cursor:
+            cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {TABLA_VERSIONES} (version, nombre, checksum) VALUES (%s, %s, %s)", registro
+            )
+
+    def registrar(self, registro: tuple):
+        self.consultar(f"INSERT INTO {TABLA_VERSIONES} (version, nombre, checksum) VALUES (?, ?, ?)", registro)
+
+    def planes(self, sql: str, parametros) -> list:
+        """
+        Tablas con Seq Scan en el plan.
+
+        Con enable_seqscan desactivado el planificador solo recorre una
+        tabla completa si ningún índice sirve, así que el resultado no
+        depende de cuántas filas tenga la base local.
+        """
+        with self.conexion, self.conexion.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql.replace("?", "%s"), parametros)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        recorridas, pendientes = [], [plan[0]["Plan"]]
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo.get("Node Type") == "Seq Scan":
+                recorridas.append(nodo.get("Relation Name"))
+            pendientes.extend(nodo.get("Plans", []))
+        return recorridas
+
+
+def _crear_tabla_versiones(motor):
+    tipo_fecha = "TEXT" if motor.dialecto == "sqlite" else "TIMESTAMPTZ NOT NULL DEFAULT now()"
+    motor.consultar(
+        f"CREATE TABLE IF NOT EXISTS {TABLA_VERSIONES} ("
+        f"version INT PRIMARY KEY, nombre TEXT NOT NULL, checksum TEXT NOT NULL, aplicada_en {tipo_fecha})"
+    )
+
+
+def estado(motor) -> dict:
+    """
+    Compara las migraciones del repositorio con las registradas en la base.
+
+    Returns:
+        dict: version (última aplicada o None), aplicadas, pendientes y
+              modificadas (aplicadas cuyo archivo cambió desde entonces)
+    """
+    registradas = {}
+    if motor.existe_tabla(TABLA_VERSIONES):
+        registradas = {v: c for v, c in motor.consultar(f"SELECT version, checksum FROM {TABLA_VERSIONES}")}
+    migraciones = listar_migraciones(motor.carpeta)
+    return {
+        "version": max(registradas) if registradas else None,
+        "aplicadas": [m[1] for m in migraciones if m[0] in registradas],
+        "pendientes": [m[1] for m in migraciones if m[0] not in registradas],
+        "modificadas": [m[1] for m in migraciones if m[0] in registradas and registradas[m[0]] != m[3]]
+    }
+
+
+def aplicar_migraciones(motor, hasta: int = None) -> list:
+    """
+    Lleva la base a la última versión (o a `hasta`).
+
+    Una base vacía recibe primero el esquema de create_db.txt. Cada
+    migración se ejecuta en su propia transacción junto con su registro en
+    schema_migraciones, así que una falla no deja la versión a medias. Si una
+    migración ya aplicada cambió en el repositorio se aborta sin aplicar nada.
+
+    Returns:
+        list: nombres de las migraciones aplicadas
+    """
+    nueva = not motor.existe_tabla("usuarios")
+    if not nueva and not motor.existe_tabla(TABLA_VERSIONES):
+        raise ErrorMigracion(
+            "La base ya tiene tablas pero no registra migraciones: "
+            "indicar las ya aplicadas con --marcar-aplicadas VERSION"
+        )
+    if nueva:
+        motor.crear_esquema_base()
+    _crear_tabla_versiones(motor)
+
+    situacion = estado(motor)
+    if situacion["modificadas"]:
+        raise ErrorMigracion(f"Migraciones modificadas después de aplicarse: {', '.join(situacion['modificadas'])}")
+
+    aplicadas = []
+    for version, nombre, sql, checksum in listar_migraciones(motor.carpeta):
+        if nombre not in situacion["pendientes"] or (hasta is not None and version > hasta):
+            continue
+        motor.aplicar(sql, (version, nombre, checksum))
+        aplicadas.append(nombre)
+    return aplicadas
+
+
+def marcar_aplicadas(motor, hasta: int) -> list:
+    """Registra sin ejecutarlas las migraciones hasta `hasta` (bases creadas a mano antes del runner)"""
+    _crear_tabla_versiones(motor)
+    pendientes = estado(motor)["pendientes"]
+    marcadas = []
+    for version, nombre, _, checksum in listar_migraciones(motor.carpeta):
+        if version <= hasta and nombre in pendientes:
+            motor.registrar((version, nombre, checksum))
+            marcadas.append(nombre)
+    return marcadas
+
+
+# Consultas que la aplicación hace en cada rerun o en cada escritura, con
+# parámetros de ejemplo. Deben resolverse con índices a cualquier escala.
+CONSULTAS_CALIENTES = [
+    ("login por correo",
+     "SELECT id, nombre, email, rol, password FROM usuarios WHERE email = ?", ("admin@club.com",)),
+    ("alta masiva: correos existentes",
+     "SELECT email FROM usuarios WHERE email IN (?, ?, ?)", ("a@club.com", "b@club.com", "c@club.com")),
+    ("reservas de una cancha desde hoy",
+     "SELECT id, fecha, hora_inicio, hora_fin FROM reservas WHERE id_cancha = ? AND fecha >= ?",
+     (1, date.today().isoformat())),
+    ("reservas de las canchas de una importación",
+     "SELECT id, id_cancha, fecha, hora_inicio, hora_fin FROM reservas "
+     "WHERE id_cancha IN (?, ?) AND fecha >= ? AND fecha <= ?",
+     (1, 2, date.today().isoformat(), date.today().isoformat())),
+    ("reserva por clave de idempotencia",
+     "SELECT id FROM reservas WHERE idempotency_key = ?", ("clave",)),
+    ("horarios de las canchas de una importación",
+     "SELECT id, id_cancha, dia_semana, hora_inicio, hora_fin FROM horarios_disponibles WHERE id_cancha IN (?, ?)",
+     (1, 2)),
+    ("horario de una cancha un día",
+     "SELECT hora_inicio, hora_fin FROM horarios_disponibles WHERE id_cancha = ? AND dia_semana = ?",
+     (1, "lunes")),
+    ("sincronización: canchas cambiadas",
+     "SELECT id FROM canchas WHERE actualizado_en >= ?", ("2024-01-01T00:00:00.000+00:00",)),
+    ("sincronización: reservas cambiadas",
+     "SELECT id FROM reservas WHERE actualizado_en >= ?", ("2024-01-01T00:00:00.000+00:00",)),
+    ("sincronización: horarios cambiados",
+     "SELECT id FROM horarios_disponibles WHERE actualizado_en >= ?", ("2024-01-01T00:00:00.000+00:00",)),
+    ("sincronización: lápidas",
+     "SELECT id_fila FROM eliminaciones WHERE tabla = ? AND eliminado_en >= ?",
+     ("canchas", "2024-01-01T00:00:00.000+00:00")),
+    ("bitácora: página más reciente",
+     "SELECT id FROM bitacora ORDER BY fecha_hora_ingreso DESC, id DESC LIMIT 51", ()),
+    ("bitácora: filtro por tipo de acción",
+     "SELECT id FROM bitacora WHERE tipo_accion = ? ORDER BY fecha_hora_ingreso DESC, id DESC LIMIT 51",
+     ("LOGIN",)),
+    ("bitácora: filtro por tabla",
+     "SELECT id FROM bitacora WHERE tabla_afectada = ? ORDER BY fecha_hora_ingreso DESC, id DESC LIMIT 51",
+     ("canchas",)),
+    ("bitácora: fila LOGIN al cerrar sesión",
+     "SELECT id FROM bitacora WHERE sesion_id = ? AND fecha_hora_ingreso = ? AND tipo_accion = 'LOGIN'",
+     ("jti", "2024-01-01T00:00:00")),
+    ("eventlogs por fecha",
+     "SELECT id FROM eventlogs WHERE fecha_hora >= ? ORDER BY fecha_hora DESC LIMIT 100",
+     ("2024-01-01T00:00:00",)),
+    ("tokens revocados vigentes",
+     "SELECT jti FROM tokens_revocados WHERE expiracion > ?", ("2024-01-01T00:00:00+00:00",)),
+    ("KPI por hora del período",
+     "SELECT fecha, id_tipo, hora, reservas FROM kpi_diario_hora WHERE fecha >= ? AND fecha <= ? "
+     "ORDER BY fecha, id_tipo, hora",
+     (date.today().isoformat(), date.today().isoformat())),
+]
+
+
+def verificar_planes(motor, consultas=CONSULTAS_CALIENTES) -> list:
+    """
+    Ejecuta EXPLAIN sobre las consultas calientes y marca las que recorren tablas completas.
+
+    Returns:
+        list: {"consulta", "ok", "recorridas"} por consulta
+    """
+    resultados = []
+    for nombre, sql, parametros in consultas:
+        recorridas = motor.planes(sql, parametros)
+        resultados.append({"consulta": nombre, "ok": not recorridas, "recorridas": recorridas})
+    return resultados
+
+
+def _motor(args):
+    if args.sqlite:
+        return MotorSQLite(args.sqlite)
+    dsn = args.dsn or os.getenv("DATABASE_URL")
+    if not dsn:
+        raise ErrorMigracion("Indicar --sqlite RUTA, --dsn o la variable DATABASE_URL")
+    return MotorPostgres(dsn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migraciones del esquema (Postgres local o SQLite)")
+    parser.add_argument("accion", choices=["aplicar", "estado", "verificar"])
+    parser.add_argument("--sqlite", help="archivo SQLite (por defecto se usa Postgres)")
+    parser.add_argument("--dsn", help="DSN de Postgres (por defecto DATABASE_URL)")
+    parser.add_argument("--hasta", type=int, help="aplicar solo hasta esta versión")
+    parser.add_argument("--marcar-aplicadas", type=int, metavar="VERSION",
+                        help="registrar sin ejecutar las migraciones hasta VERSION")
+    args = parser.parse_args()
+
+    try:
+        motor = _motor(args)
+        if args.accion == "aplicar" and args.marcar_aplicadas is not None:
+            resultado = {"marcadas": marcar_aplicadas(motor, args.marcar_aplicadas)}
+        elif args.accion == "aplicar":
+            resultado = {"aplicadas": aplicar_migraciones(motor, args.hasta)}
+        elif args.accion == "estado":
+            resultado = estado(motor)
+        else:
+            resultado = verificar_planes(motor)
+            for r in resultado:
+                print(("✅ " if r["ok"] else "⚠️ ") + r["consulta"]
+                      + ("" if r["ok"] else f" (recorre {', '.join(r['recorridas'])})"))
+            raise SystemExit(0 if all(r["ok"] for r in resultado) else 1)
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    except ErrorMigracion as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from datetime import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Tipos de las columnas: las horas y fechas quedan como time32/date32 de Arrow
+# y los horarios de cada cancha como una lista anidada, sin pasar por texto
+HORA = pa.time32("s")
+DIA = pa.dictionary(pa.int8(), pa.string())
+HORARIO = pa.struct([("dia_semana", DIA), ("hora_inicio", HORA), ("hora_fin", HORA)])
+
+TIPO_TEXTO = pd.ArrowDtype(pa.string())
+TIPO_HORA = pd.ArrowDtype(HORA)
+TIPO_FECHA = pd.ArrowDtype(pa.date32())
+
+
+@dataclass(frozen=True, slots=True)
+class Horario:
+    dia_semana: str
+    hora_inicio: time
+    hora_fin: time
+
+
+@dataclass(frozen=True, slots=True)
+class Cancha:
+    """Una fila de la tabla de canchas"""
+    id: int
+    nombre: str
+    disponible: bool
+    tipo: str
+    horarios: tuple
+
+    @classmethod
+    def de_tabla(cls, tabla: pd.DataFrame, cancha_id: int) -> "Cancha":
+        fila = tabla.loc[tabla["id"] == cancha_id].iloc[0]
+        tipo = fila["tipos_cancha"]
+        return cls(
+            id=int(fila["id"]),
+            nombre=fila["nombre"],
+            disponible=bool(fila["disponible"]),
+            tipo=None if pd.isna(tipo) else tipo,
+            horarios=tuple(Horario(**h) for h in fila["horarios_disponibles"])
+        )
+
+
+def _horas(valores) -> pa.Array:
+    """'HH:MM:SS' (o datetime.time) a time32"""
+    segundos = pd.to_timedelta(pd.Series(valores, dtype=str)).dt.total_seconds()
+    return pa.array(segundos.to_numpy(dtype=np.int32)).cast(HORA)
+
+
+def minutos(columna: pd.Series) -> np.ndarray:
+    """Minutos desde medianoche de una columna de horas"""
+    return pc.cast(pa.array(columna), pa.int32()).to_numpy(zero_copy_only=False) // 60
+
+
+def tabla_canchas(catalogo: list) -> pd.DataFrame:
+    """
+    Catálogo anidado (catalogo_anidado) como tabla tipada.
+
+    Columnas: id (int64), nombre (texto), disponible (bool), tipos_cancha
+    (categórica, nula sin tipo) y horarios_disponibles (lista de
+    dia_semana/hora_inicio/hora_fin). El formato para mostrar se aplica
+    recién al dibujar, con formatear_canchas.
+    """
+    horarios = [h for c in catalogo for h in c["horarios_disponibles"] or []]
+    cantidades = np.fromiter((len(c["horarios_disponibles"] or []) for c in catalogo), dtype=np.int32,
+                             count=len(catalogo))
+    planos = pa.StructArray.from_arrays(
+        [
+            pc.dictionary_encode(pa.array([h["dia_semana"] for h in horarios], pa.string())).cast(DIA),
+            _horas([h["hora_inicio"] for h in horarios]),
+            _horas([h["hora_fin"] for h in horarios])
+        ],
+        fields=list(HORARIO)
+    )
+    desplazamientos = pa.array(np.concatenate([[0], np.cumsum(cantidades)]), pa.int32())
+
+    return pd.DataFrame({
+        "id": pd.Series([c["id"] for c in catalogo], dtype=np.int64),
+        "nombre": pd.Series([c["nombre"] for c in catalogo], dtype=TIPO_TEXTO),
+        "disponible": pd.Series([bool(c["disponible"]) for c in catalogo], dtype=bool),
+        "tipos_cancha": pd.Categorical(
+            [c["tipos_cancha"]["nombre"] if c["tipos_cancha"] else None for c in catalogo]
+        ),
+        "horarios_disponibles": pd.Series(
+            pd.arrays.ArrowExtensionArray(pa.ListArray.from_arrays(desplazamientos, planos))
+        )
+    })
+
+
+def tabla_reservas(reservas: list) -> pd.DataFrame:
+    """Reservas (filas de la tabla o de la réplica) con fecha date32 y horas time32"""
+    return pd.DataFrame({
+        "id": pd.Series([r["id"] for r in reservas], dtype=np.int64),
+        "id_cancha": pd.Series([r["id_cancha"] for r in reservas], dtype=np.int64),
+        "fecha": pd.Series(
+            pa.array([str(r["fecha"]) for r in reservas], pa.string()).cast(pa.date32()), dtype=TIPO_FECHA
+        ),
+        "hora_inicio": pd.Series(_horas([r["hora_inicio"] for r in reservas]), dtype=TIPO_HORA),
+        "hora_fin": pd.Series(_horas([r["hora_fin"] for r in reservas]), dtype=TIPO_HORA)
+    })
+
+
+def formatear_horarios(horarios) -> str:
+    """Horarios de una cancha como texto para la tabla"""
+    if not horarios:
+        return "Sin horarios"
+    return ", ".join(f"{h['dia_semana']}: {h['hora_inicio']}-{h['hora_fin']}" for h in horarios)
+
+
+def formatear_canchas(tabla: pd.DataFrame) -> pd.DataFrame:
+    """Columnas de presentación (emoji, tipo y horarios como texto) de las filas a mostrar"""
+    return pd.DataFrame({
+        "id": tabla["id"],
+        "nombre": tabla["nombre"],
+        "disponible": np.where(tabla["disponible"], "✅", "❌"),
+        "tipos_cancha": tabla["tipos_cancha"].astype(object).fillna("Sin tipo"),
+        "horarios_disponibles": [formatear_horarios(h) for h in tabla["horarios_disponibles"]]
+    }, index=tabla.index)
@@ -1,4 +1,4 @@
-import bcrypt
+from autenticacion import hashear_contrasena, olvidar_correo
 from getpass import getpass
 from conexion import get_supabase_client
 import re
@@ -68,8 +68,8 @@ def registrar_usuario(rol: str = "cliente"):
                 "message": "❌ Ya existe un usuario con ese correo."
             }
 
-        # Hashear la contraseña
-        hashed_pw = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        # Hashear la contraseña con el costo calibrado para este servidor
+        hashed_pw = hashear_contrasena(password)
 
         # Preparar datos para inserción
         data = {
@@ -84,6 +84,7 @@ def registrar_usuario(rol: str = "cliente"):
         resultado = supabase.table("usuarios").insert(data).execute()
         
         if resultado.data:
+            olvidar_correo(email)
             print(f"✅ Usuario {nombre} registrado correctamente.")
             return {
                 "success": True,
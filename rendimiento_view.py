@@ -0,0 +1,42 @@
+import streamlit as st
+import pandas as pd
+from trazas import reruns_sesion, estadisticas_formas, consultas_lentas
+
+def mostrar_panel_rendimiento():
+    """Panel lateral (solo administradores) con las trazas de los últimos reruns"""
+    with st.sidebar.expander("⏱️ Rendimiento"):
+        reruns = reruns_sesion()
+        if not reruns:
+            st.caption("Todavía no hay reruns trazados en esta sesión")
+            return
+
+        # El rerun actual sigue en curso: se muestra el anterior
+        ultimo = reruns[-1].resumen()
+        st.metric("Consultas en el último rerun", ultimo["consultas"])
+        st.caption(
+            f"{ultimo['vista']}: {ultimo['duracion_ms']:.0f} ms en total, "
+            f"{ultimo['ms_consultas']:.0f} ms en Supabase, "
+            f"{ultimo['filas']:,} filas, {ultimo['bytes'] / 1024:,.1f} KB"
+        )
+
+        st.caption("Consultas por rerun")
+        st.bar_chart(pd.DataFrame([r.resumen() for r in reruns])[["consultas"]], height=120)
+
+        st.caption("Spans del último rerun")
+        spans = pd.DataFrame(reruns[-1].spans)
+        spans["nombre"] = ["  " * p + n for p, n in zip(spans["profundidad"], spans["nombre"])]
+        st.dataframe(spans[["nombre", "ms", "filas", "bytes"]], hide_index=True, use_container_width=True)
+
+        st.caption("Latencia por forma de consulta (ms)")
+        formas = estadisticas_formas()
+        if formas:
+            st.dataframe(pd.DataFrame(formas).round(1), hide_index=True, use_container_width=True)
+
+        lentas = consultas_lentas()
+        st.caption(f"Consultas lentas ({len(lentas)})")
+        if lentas:
+            st.dataframe(
+                pd.DataFrame(lentas)[["fecha", "vista", "nombre", "ms", "filas"]].round(1),
+                hide_index=True,
+                use_container_width=True
+            )
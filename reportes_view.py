@@ -1,22 +1,154 @@
+import os
+from datetime import date, datetime, timedelta
 import streamlit as st
-import pandas as pd
-from conexion import get_supabase_client
+from exportar import FORMATOS, exportar_tabla, borrar_exportacion
+from instantanea import TABLAS, leer_actual, actualizar_instantanea, tipos_instantanea
+from instantanea import reservas_por_mes, ranking_canchas, clientes_frecuentes, actividad_usuarios
+from trazas import trazar
 
+MIME = {
+    ".csv": "text/csv",
+    ".csv.gz": "application/gzip",
+    ".parquet": "application/vnd.apache.parquet"
+}
+
+def mostrar_exportacion(tabla: str):
+    """
+    Formulario de exportación de una tabla con barra de progreso y descarga.
+
+    El archivo se lee para el botón de descarga solo en la ejecución en que
+    se generó o se pidió la descarga, no en cada rerun de la página.
+    """
+    formato = st.selectbox("Formato", list(FORMATOS), key=f"formato_{tabla}")
+    generada = False
+
+    if st.button("📤 Generar exportación", key=f"exportar_{tabla}"):
+        barra = st.progress(0.0, text="Exportando...")
+
+        def progreso(filas, total):
+            fraccion = min(filas / total, 1.0) if total else 0.0
+            barra.progress(fraccion, text=f"{filas:,} filas exportadas")
+
+        # Se borra la exportación anterior de esta tabla
+        anterior = st.session_state.pop(f"exportacion_{tabla}", None)
+        if anterior:
+            borrar_exportacion(anterior)
+
+        response = exportar_tabla(tabla, formato, progreso)
+        if response["success"]:
+            barra.progress(1.0, text=f"✅ {response['data']['filas']:,} filas exportadas")
+            st.session_state[f"exportacion_{tabla}"] = response["data"]
+            generada = True
+        else:
+            barra.empty()
+            st.error(response["message"])
+
+    exportacion = st.session_state.get(f"exportacion_{tabla}")
+    if not exportacion:
+        return
+    if not os.path.exists(exportacion["ruta"]):
+        # Venció y se borró: hay que generarla de nuevo
+        del st.session_state[f"exportacion_{tabla}"]
+        return
+    if generada or st.button("📥 Preparar descarga", key=f"preparar_{tabla}",
+                             help=f"{exportacion['filas']:,} filas ya exportadas"):
+        extension = next(ext for ext in sorted(MIME, key=len, reverse=True) if exportacion["ruta"].endswith(ext))
+        with open(exportacion["ruta"], "rb") as archivo:
+            st.download_button(
+                "⬇️ Descargar",
+                data=archivo,
+                file_name=f"{tabla}{extension}",
+                mime=MIME[extension],
+                key=f"descargar_{tabla}"
+            )
+
+def mostrar_instantanea():
+    """Fecha de la instantánea de los reportes y botón para actualizarla; devuelve la vigente"""
+    col1, col2 = st.columns([3, 1])
+    # El botón se atiende antes de escribir la fecha, así se muestra la instantánea nueva
+    with col2:
+        if st.button("🔄 Actualizar datos", help="Vuelve a copiar las tablas desde la base"):
+            barra = st.progress(0.0, text="Copiando tablas...")
+            copiadas = []
+
+            def progreso(tabla, filas):
+                copiadas.append(tabla)
+                barra.progress(len(copiadas) / len(TABLAS), text=f"{tabla}: {filas:,} filas")
+
+            response = actualizar_instantanea(progreso=progreso)
+            barra.empty()
+            if not response["success"]:
+                st.error(response["message"])
+
+    actual = leer_actual()
+    with col1:
+        if actual is None:
+            st.info("Todavía no hay una instantánea de los datos: genérela para ver los reportes.")
+        else:
+            fecha = datetime.fromisoformat(actual["fecha"]).astimezone()
+            st.caption(f"🗂️ Datos al {fecha:%d/%m/%Y %H:%M} · {actual['filas'].get('reservas', 0):,} reservas")
+    return actual
+
+def mostrar_resultado(response, **kwargs):
+    """Tabla de un reporte o el error de la consulta"""
+    if not response["success"]:
+        st.error(response["message"])
+    elif response["data"].empty:
+        st.info("No hay datos para los filtros elegidos")
+    else:
+        st.dataframe(response["data"], hide_index=True, use_container_width=True, **kwargs)
+
+@trazar
 def mostrar_reportes():
     """Muestra la vista de reportes generales"""
     st.title("📋 Reportes")
-    
+
+    # Los reportes se calculan sobre la instantánea local, no sobre la base
+    actual = mostrar_instantanea()
+    if actual is not None:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            rango = st.date_input("Período", value=(date.today() - timedelta(days=90), date.today()))
+        with col2:
+            tipos = tipos_instantanea()
+            opciones = ["Todos"] + (tipos["data"]["nombre"].tolist() if tipos["success"] else [])
+            tipo = st.selectbox("Tipo de cancha", opciones)
+        # Mientras se elige el rango el selector devuelve una sola fecha
+        desde, hasta = rango if len(rango) == 2 else (rango[0], rango[0])
+        tipo = None if tipo == "Todos" else tipo
+
     # Tabs para diferentes tipos de reportes
     tab1, tab2, tab3 = st.tabs(["Reservas", "Canchas", "Usuarios"])
-    
+
     with tab1:
         st.header("Reporte de Reservas")
-        # Aquí va la lógica para mostrar reportes de reservas
-        
+        if actual is not None:
+            st.subheader("Por mes y tipo")
+            mostrar_resultado(reservas_por_mes(desde, hasta, tipo), column_config={
+                "mes": st.column_config.DateColumn("Mes", format="MM/YYYY"),
+                "ingresos": st.column_config.NumberColumn("Ingresos", format="$%.2f"),
+                "ingresos_acumulados": st.column_config.NumberColumn("Acumulado", format="$%.2f")
+            })
+            st.subheader("Clientes frecuentes")
+            mostrar_resultado(clientes_frecuentes(desde, hasta, tipo), column_config={
+                "ingresos": st.column_config.NumberColumn("Ingresos", format="$%.2f"),
+                "dias_entre_reservas": st.column_config.NumberColumn("Días entre reservas", format="%.1f")
+            })
+        mostrar_exportacion("reservas")
+
     with tab2:
         st.header("Reporte de Canchas")
-        # Aquí va la lógica para mostrar reportes de canchas
-        
+        if actual is not None:
+            st.subheader("Ranking por ingresos")
+            mostrar_resultado(ranking_canchas(desde, hasta, tipo), column_config={
+                "ingresos": st.column_config.NumberColumn("Ingresos", format="$%.2f"),
+                "parte_del_tipo": st.column_config.ProgressColumn("Parte del tipo", min_value=0, max_value=1)
+            })
+        mostrar_exportacion("canchas")
+
     with tab3:
         st.header("Reporte de Usuarios")
-        # Aquí va la lógica para mostrar reportes de usuarios
\ No newline at end of file
+        if actual is not None:
+            st.subheader("Actividad en el período")
+            mostrar_resultado(actividad_usuarios(desde, hasta))
+        mostrar_exportacion("usuarios")
@@ -0,0 +1,280 @@
+import bisect
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date
+from conexion import get_supabase_client, consultar_paginado
+from disponibilidad import indice_cargado
+from modelo import tabla_reservas
+
+# Códigos de error de PostgreSQL que devuelve PostgREST
+ERROR_SOLAPE = "23P01"       # exclusion_violation (restricción reservas_sin_solapes)
+ERROR_DUPLICADO = "23505"    # unique_violation (idempotency_key)
+
+COLUMNAS_RESERVA = "id, id_cliente, id_cancha, fecha, hora_inicio, hora_fin, observacion, idempotency_key"
+
+
+def _minutos(hora) -> int:
+    """Convierte 'HH:MM[:SS]' o datetime.time en minutos desde medianoche"""
+    if isinstance(hora, str):
+        partes = hora.split(":")
+        return int(partes[0]) * 60 + int(partes[1])
+    return hora.hour * 60 + hora.minute
+
+
+def _texto(valor) -> str:
+    """Fecha u hora en el formato ISO que espera PostgREST"""
+    return valor if isinstance(valor, str) else valor.isoformat()
+
+
+class IndiceIntervalos:
+    """
+    Reservas futuras de cada cancha ordenadas por hora de inicio.
+
+    Como la base no permite solapes, dentro de un (cancha, fecha) los inicios
+    y los fines quedan ordenados, y saber si un horario choca es una búsqueda
+    binaria. Cada cancha se carga desde la base la primera vez que se consulta
+    y se vuelve a cargar cuando pasa `ttl` segundos. La descarga corre sin el
+    lock del índice: las demás canchas siguen respondiendo y quien consulta
+    la misma cancha mientras tanto espera esa misma descarga.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        # {id_cancha: {fecha: ([inicios], [fines], [ids])}}
+        self._canchas = {}
+        self._cargadas = {}
+        # {id_cancha: Future} de las descargas en curso
+        self._cargando = {}
+        # Cambios (agregar/quitar) por cancha, para detectar los que ocurren durante una descarga
+        self._cambios = {}
+
+    def _cargar_cancha(self, id_cancha: int) -> dict:
+        """Descarga las reservas desde hoy de una cancha (sin el lock del índice)"""
+        with self._lock:
+            cambios = self._cambios.get(id_cancha, 0)
+        reservas = consultar_paginado(
+            "reservas", "id, fecha, hora_inicio, hora_fin",
+            lambda q: q.eq("id_cancha", id_cancha).gte("fecha", date.today().isoformat())
+        )
+        fechas = {}
+        for r in sorted(reservas, key=lambda r: (r["fecha"], _minutos(r["hora_inicio"]))):
+            inicios, fines, ids = fechas.setdefault(r["fecha"], ([], [], []))
+            inicios.append(_minutos(r["hora_inicio"]))
+            fines.append(_minutos(r["hora_fin"]))
+            ids.append(r["id"])
+        with self._lock:
+            self._canchas[id_cancha] = fechas
+            # Si cambió algo durante la descarga puede no estar incluido: la próxima consulta recarga
+            vigente = self._cambios.get(id_cancha, 0) == cambios
+            self._cargadas[id_cancha] = time.monotonic() if vigente else float("-inf")
+        return fechas
+
+    def _dia(self, id_cancha: int, fecha: str):
+        with self._lock:
+            if time.monotonic() - self._cargadas.get(id_cancha, float("-inf")) <= self.ttl:
+                return self._canchas[id_cancha].get(fecha)
+            en_curso = self._cargando.get(id_cancha)
+            propia = en_curso is None
+            if propia:
+                en_curso = self._cargando[id_cancha] = Future()
+        if not propia:
+            return en_curso.result().get(fecha)
+
+        try:
+            fechas = self._cargar_cancha(id_cancha)
+        except BaseException as e:
+            en_curso.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._cargando[id_cancha]
+        en_curso.set_result(fechas)
+        return fechas.get(fecha)
+
+    def refrescar(self, id_cancha: int):
+        """Vuelve a cargar una cancha desde la base"""
+        self._cargar_cancha(id_cancha)
+
+    def solape(self, id_cancha: int, fecha: str, hora_inicio, hora_fin):
+        """Devuelve el id de una reserva que choca con el horario, o None"""
+        dia = self._dia(id_cancha, fecha)
+        if not dia:
+            return None
+        inicios, fines, ids = dia
+        inicio, fin = _minutos(hora_inicio), _minutos(hora_fin)
+        # Última reserva que empieza antes de `fin`: es la única que puede chocar
+        i = bisect.bisect_left(inicios, fin) - 1
+        if i >= 0 and fines[i] > inicio:
+            return ids[i]
+        return None
+
+    def agregar(self, id_cancha: int, fecha: str, hora_inicio, hora_fin, reserva_id: int):
+        """Agrega una reserva confirmada al índice (si la cancha ya está cargada)"""
+        with self._lock:
+            self._cambios[id_cancha] = self._cambios.get(id_cancha, 0) + 1
+            if id_cancha not in self._canchas:
+                return
+            inicios, fines, ids = self._canchas[id_cancha].setdefault(fecha, ([], [], []))
+            i = bisect.bisect_left(inicios, _minutos(hora_inicio))
+            inicios.insert(i, _minutos(hora_inicio))
+            fines.insert(i, _minutos(hora_fin))
+            ids.insert(i, reserva_id)
+
+    def quitar(self, id_cancha: int, fecha: str, reserva_id: int):
+        """Quita una reserva del índice"""
+        with self._lock:
+            self._cambios[id_cancha] = self._cambios.get(id_cancha, 0) + 1
+            dia = self._canchas.get(id_cancha, {}).get(fecha)
+            if dia and reserva_id in dia[2]:
+                i = dia[2].index(reserva_id)
+                for lista in dia:
+                    del lista[i]
+
+
+indice_reservas = IndiceIntervalos()
+
+# Reservas creadas recientemente por clave de idempotencia (evita ir a la base en reintentos)
+_por_clave = {}
+_por_clave_lock = threading.Lock()
+MAX_CLAVES_RECORDADAS = 10000
+
+
+def _recordar_clave(clave: str, reserva: dict):
+    with _por_clave_lock:
+        if len(_por_clave) >= MAX_CLAVES_RECORDADAS:
+            _por_clave.pop(next(iter(_por_clave)))
+        _por_clave[clave] = reserva
+
+
+def _misma_reserva(reserva: dict, datos: dict) -> bool:
+    """Compara una reserva guardada con los datos de una nueva solicitud"""
+    return (
+        reserva["id_cancha"] == datos["id_cancha"]
+        and reserva["fecha"] == datos["fecha"]
+        and _minutos(reserva["hora_inicio"]) == _minutos(datos["hora_inicio"])
+        and _minutos(reserva["hora_fin"]) == _minutos(datos["hora_fin"])
+    )
+
+
+def _respuesta_idempotente(clave: str, datos: dict, reserva: dict):
+    """Resultado para una clave de idempotencia que ya creó una reserva"""
+    if not _misma_reserva(reserva, datos):
+        return {"success": False, "message": "La clave de idempotencia ya se usó para otra reserva"}
+    return {"success": True, "data": reserva, "duplicada": True}
+
+
+def crear_reserva(id_cliente: int, id_cancha: int, fecha, hora_inicio, hora_fin,
+                  observacion: str = None, idempotency_key: str = None):
+    """
+    Crea una reserva rechazando horarios que se solapen con otra de la misma cancha.
+
+    La garantía la da la restricción `reservas_sin_solapes` de la base; el
+    índice en memoria solo sirve para rechazar rápido los choques evidentes.
+    Si se repite una solicitud con la misma `idempotency_key` se devuelve la
+    reserva creada la primera vez en lugar de crear otra.
+
+    Args:
+        id_cliente (int): cliente que reserva
+        id_cancha (int): cancha reservada
+        fecha (date | str): día de la reserva
+        hora_inicio, hora_fin (time | str): horario de la reserva
+        observacion (str): nota opcional
+        idempotency_key (str): identificador único de la solicitud
+    """
+    datos = {
+        "id_cliente": id_cliente,
+        "id_cancha": id_cancha,
+        "fecha": _texto(fecha),
+        "hora_inicio": _texto(hora_inicio),
+        "hora_fin": _texto(hora_fin),
+        "observacion": observacion,
+        "idempotency_key": idempotency_key
+    }
+
+    if _minutos(hora_inicio) >= _minutos(hora_fin):
+        return {"success": False, "message": "La hora de fin debe ser mayor a la hora de inicio"}
+
+    if idempotency_key and idempotency_key in _por_clave:
+        return _respuesta_idempotente(idempotency_key, datos, _por_clave[idempotency_key])
+
+    supabase = get_supabase_client()
+    try:
+        # Pre-chequeo local; si indica choque se confirma con datos frescos
+        if indice_reservas.solape(id_cancha, datos["fecha"], hora_inicio, hora_fin) is not None:
+            indice_reservas.refrescar(id_cancha)
+            choque = indice_reservas.solape(id_cancha, datos["fecha"], hora_inicio, hora_fin)
+            if choque is not None:
+                return {"success": False, "message": f"El horario se solapa con la reserva #{choque}", "conflicto": choque}
+
+        result = supabase.table("reservas").insert(datos).execute()
+        if not result.data:
+            return {"success": False, "message": "Error al crear la reserva"}
+
+    except Exception as e:
+        codigo = getattr(e, "code", None)
+        if codigo == ERROR_SOLAPE:
+            indice_reservas.refrescar(id_cancha)
+            return {"success": False, "message": "El horario se solapa con otra reserva de la cancha"}
+        if codigo == ERROR_DUPLICADO and idempotency_key:
+            # Reintento de una solicitud que ya se guardó (p. ej. tras un timeout)
+            existente = supabase.table("reservas")\
+                .select(COLUMNAS_RESERVA)\
+                .eq("idempotency_key", idempotency_key)\
+                .execute()
+            if existente.data:
+                _recordar_clave(idempotency_key, existente.data[0])
+                return _respuesta_idempotente(idempotency_key, datos, existente.data[0])
+        return {"success": False, "message": f"Error al crear la reserva: {str(e)}"}
+
+    reserva = result.data[0]
+    indice_reservas.agregar(id_cancha, reserva["fecha"], reserva["hora_inicio"], reserva["hora_fin"], reserva["id"])
+    indice = indice_cargado()
+    if indice is not None:
+        indice.agregar_reserva(id_cancha, reserva["fecha"], reserva["hora_inicio"], reserva["hora_fin"])
+    if idempotency_key:
+        _recordar_clave(idempotency_key, reserva)
+    return {"success": True, "data": reserva}
+
+
+def cancelar_reserva(reserva_id: int):
+    """
+    DELETE FROM reservas WHERE id = :reserva_id
+    """
+    try:
+        supabase = get_supabase_client()
+        result = supabase.table("reservas")\
+            .delete()\
+            .eq("id", reserva_id)\
+            .execute()
+        if not result.data:
+            return {"success": False, "message": "La reserva no existe"}
+
+        reserva = result.data[0]
+        indice_reservas.quitar(reserva["id_cancha"], reserva["fecha"], reserva_id)
+        indice = indice_cargado()
+        if indice is not None:
+            indice.quitar_reserva(reserva["id_cancha"], reserva["fecha"], reserva["hora_inicio"], reserva["hora_fin"])
+        return {"success": True, "message": "Reserva cancelada correctamente"}
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+
+def obtener_reservas_del_dia(fecha: date = None):
+    """
+    Reservas de una fecha (hoy por defecto) ordenadas por hora de inicio.
+
+    Returns:
+        dict: success y `data` con la tabla de modelo.tabla_reservas
+    """
+    fecha = fecha or date.today()
+    try:
+        reservas = consultar_paginado(
+            "reservas", "id, id_cancha, fecha, hora_inicio, hora_fin",
+            lambda q: q.eq("fecha", fecha.isoformat())
+        )
+        tabla = tabla_reservas(reservas).sort_values(["hora_inicio", "id_cancha"], ignore_index=True)
+        return {"success": True, "data": tabla}
+    except Exception as e:
+        return {"success": False, "message": f"Error al obtener las reservas del día: {str(e)}"}
@@ -0,0 +1,259 @@
+from datetime import date, timedelta
+from itertools import islice
+import pandas as pd
+from conexion import get_supabase_client, consultar_paginado
+from disponibilidad import DIAS_SEMANA, indice_cargado
+from reservas import ERROR_SOLAPE, indice_reservas
+
+# Filas que se validan juntas y filas por cada INSERT múltiple
+TAM_BLOQUE = 5000
+TAM_LOTE_INSERT = 500
+
+COLUMNAS_CSV = ["id_cliente", "id_cancha", "fecha", "hora_inicio", "hora_fin", "observacion"]
+
+
+def expandir_serie(id_cliente: int, id_cancha: int, dia_semana: str, hora_inicio, hora_fin,
+                   fecha_inicio: date, fecha_fin: date, observacion: str = None):
+    """
+    Genera una reserva por cada `dia_semana` entre fecha_inicio y fecha_fin.
+
+    Es un generador: las ocurrencias se producen a medida que se validan.
+    """
+    dia = DIAS_SEMANA.index(dia_semana.lower())
+    fecha = fecha_inicio + timedelta(days=(dia - fecha_inicio.weekday()) % 7)
+    while fecha <= fecha_fin:
+        yield {
+            "id_cliente": id_cliente,
+            "id_cancha": id_cancha,
+            "fecha": fecha.isoformat(),
+            "hora_inicio": str(hora_inicio),
+            "hora_fin": str(hora_fin),
+            "observacion": observacion
+        }
+        fecha += timedelta(days=7)
+
+
+def _minutos(serie: pd.Series) -> pd.Series:
+    """Convierte una columna de horas 'HH:MM[:SS]' en minutos desde medianoche"""
+    partes = serie.astype(str).str.extract(r"^\s*(\d{1,2}):(\d{2})")
+    return pd.to_numeric(partes[0], errors="coerce") * 60 + pd.to_numeric(partes[1], errors="coerce")
+
+
+def _preparar(bloque: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza tipos y agrega las columnas usadas por la validación"""
+    df = bloque.copy()
+    df["id_cliente"] = pd.to_numeric(df["id_cliente"], errors="coerce").astype("Int64")
+    df["id_cancha"] = pd.to_numeric(df["id_cancha"], errors="coerce").astype("Int64")
+    fechas = pd.to_datetime(df["fecha"], errors="coerce")
+    df["fecha"] = fechas.dt.strftime("%Y-%m-%d")
+    df["dia"] = fechas.dt.weekday
+    df["ini"] = _minutos(df["hora_inicio"])
+    df["fin"] = _minutos(df["hora_fin"])
+    df["motivo"] = None
+    return df
+
+
+def _vacio() -> pd.DataFrame:
+    """Tabla de intervalos sin filas con los mismos tipos que las cargadas"""
+    return pd.DataFrame({
+        "id_cancha": pd.Series(dtype="Int64"),
+        "fecha": pd.Series(dtype=object),
+        "ini": pd.Series(dtype=float),
+        "fin": pd.Series(dtype=float)
+    })
+
+
+def _marcar(df: pd.DataFrame, mascara, motivo: str):
+    """Asigna un motivo de rechazo a las filas todavía válidas que cumplen la máscara"""
+    df.loc[mascara & df["motivo"].isna(), "motivo"] = motivo
+
+
+def _solapes(nuevas: pd.DataFrame, existentes: pd.DataFrame) -> pd.Index:
+    """Índices de `nuevas` que chocan con alguna fila de `existentes` en la misma cancha y fecha"""
+    if nuevas.empty or existentes.empty:
+        return pd.Index([])
+    cruce = nuevas[["id_cancha", "fecha", "ini", "fin"]].reset_index().merge(
+        existentes[["id_cancha", "fecha", "ini", "fin"]], on=["id_cancha", "fecha"], suffixes=("", "_e")
+    )
+    choque = (cruce["ini"] < cruce["fin_e"]) & (cruce["ini_e"] < cruce["fin"])
+    return pd.Index(cruce.loc[choque, "index"].unique())
+
+
+def _validar(df: pd.DataFrame, existentes: pd.DataFrame, horarios: pd.DataFrame):
+    """Valida un bloque completo con operaciones vectorizadas de pandas"""
+    _marcar(df, df[["id_cliente", "id_cancha"]].isna().any(axis=1), "Cliente o cancha inválidos")
+    _marcar(df, df["fecha"].isna() | df["ini"].isna() | df["fin"].isna(), "Fecha u hora inválidas")
+    _marcar(df, df["ini"] >= df["fin"], "La hora de fin debe ser mayor a la hora de inicio")
+
+    # Debe caber completa dentro de algún horario habilitado de la cancha ese día
+    validas = df[df["motivo"].isna()]
+    cruce = validas[["id_cancha", "dia", "ini", "fin"]].reset_index().merge(
+        horarios, on=["id_cancha", "dia"], how="left", suffixes=("", "_h")
+    )
+    cabe = (cruce["ini"] >= cruce["ini_h"]) & (cruce["fin"] <= cruce["fin_h"])
+    dentro = pd.Index(cruce.loc[cabe, "index"].unique())
+    _marcar(df, df.index.isin(validas.index.difference(dentro)), "Fuera del horario disponible de la cancha")
+
+    # Choques con reservas ya guardadas (o aceptadas en bloques anteriores)
+    _marcar(df, df.index.isin(_solapes(df[df["motivo"].isna()], existentes)), "Se solapa con una reserva existente")
+
+    # Choques dentro del propio bloque: gana la fila que aparece primero
+    validas = df[df["motivo"].isna()][["id_cancha", "fecha", "ini", "fin"]].reset_index()
+    cruce = validas.merge(validas, on=["id_cancha", "fecha"], suffixes=("", "_o"))
+    choque = (cruce["index_o"] < cruce["index"]) & (cruce["ini"] < cruce["fin_o"]) & (cruce["ini_o"] < cruce["fin"])
+    _marcar(df, df.index.isin(cruce.loc[choque, "index"].unique()), "Se solapa con otra fila de la importación")
+
+
+def _cargar_contexto(df: pd.DataFrame):
+    """Trae en una consulta por tabla las reservas y horarios de las canchas del bloque"""
+    canchas = [int(c) for c in df["id_cancha"].dropna().unique()]
+    fechas = df["fecha"].dropna()
+    if not canchas or fechas.empty:
+        return _vacio(), _vacio().rename(columns={"fecha": "dia"})
+
+    reservas = pd.DataFrame(consultar_paginado(
+        "reservas", "id, id_cancha, fecha, hora_inicio, hora_fin",
+        lambda q: q.in_("id_cancha", canchas).gte("fecha", fechas.min()).lte("fecha", fechas.max())
+    ), columns=["id", "id_cancha", "fecha", "hora_inicio", "hora_fin"])
+    reservas["id_cancha"] = reservas["id_cancha"].astype("Int64")
+    reservas["ini"] = _minutos(reservas["hora_inicio"])
+    reservas["fin"] = _minutos(reservas["hora_fin"])
+
+    horarios = pd.DataFrame(consultar_paginado(
+        "horarios_disponibles", "id, id_cancha, dia_semana, hora_inicio, hora_fin",
+        lambda q: q.in_("id_cancha", canchas)
+    ), columns=["id", "id_cancha", "dia_semana", "hora_inicio", "hora_fin"])
+    horarios["id_cancha"] = horarios["id_cancha"].astype("Int64")
+    horarios["dia"] = horarios["dia_semana"].str.lower().map({d: i for i, d in enumerate(DIAS_SEMANA)})
+    horarios["ini"] = _minutos(horarios["hora_inicio"])
+    horarios["fin"] = _minutos(horarios["hora_fin"])
+
+    return reservas[["id_cancha", "fecha", "ini", "fin"]], horarios[["id_cancha", "dia", "ini", "fin"]]
+
+
+def _insertar(filas: list):
+    """
+    Inserta un lote en un solo INSERT.
+
+    Si otra sesión reservó algo entre la validación y la escritura, la
+    restricción de solapes rechaza el lote entero; en ese caso se reintenta
+    fila por fila para saber cuáles chocan.
+    """
+    supabase = get_supabase_client()
+    try:
+        return [(r, None) for r in supabase.table("reservas").insert(filas).execute().data]
+    except Exception as e:
+        if getattr(e, "code", None) != ERROR_SOLAPE:
+            return [(None, str(e)) for _ in filas]
+
+    resultados = []
+    for fila in filas:
+        try:
+            resultados.append((supabase.table("reservas").insert(fila).execute().data[0], None))
+        except Exception as e:
+            motivo = "Se solapa con una reserva existente" if getattr(e, "code", None) == ERROR_SOLAPE else str(e)
+            resultados.append((None, motivo))
+    return resultados
+
+
+def _bloques(filas, tam: int):
+    """Agrupa un iterable de dicts en DataFrames de `tam` filas"""
+    filas = iter(filas)
+    while True:
+        bloque = list(islice(filas, tam))
+        if not bloque:
+            return
+        yield pd.DataFrame(bloque, columns=COLUMNAS_CSV)
+
+
+def importar_reservas(bloques, tam_lote: int = TAM_LOTE_INSERT):
+    """
+    Valida e inserta reservas en lote.
+
+    Args:
+        bloques: iterable de DataFrames con las columnas de COLUMNAS_CSV
+
+    Returns:
+        dict: success, creadas, rechazadas y `data` con una entrada por fila
+              (fila, estado 'creada' o 'rechazada', id o motivo)
+    """
+    reporte = []
+    creadas = 0
+    aceptadas_antes = _vacio()
+    desplazamiento = 0
+    indice = indice_cargado()
+
+    try:
+        for bloque in bloques:
+            df = _preparar(bloque.reset_index(drop=True))
+            df.index += desplazamiento
+            desplazamiento += len(df)
+
+            existentes, horarios = _cargar_contexto(df)
+            _validar(df, pd.concat([existentes, aceptadas_antes], ignore_index=True), horarios)
+
+            aceptadas = df[df["motivo"].isna()]
+            rechazadas = df["motivo"].dropna()
+            reporte.extend(
+                {"fila": int(numero) + 1, "estado": "rechazada", "motivo": motivo}
+                for numero, motivo in rechazadas.items()
+            )
+
+            registros = aceptadas[COLUMNAS_CSV].astype(object).where(aceptadas[COLUMNAS_CSV].notna(), None)
+            registros["id_cliente"] = registros["id_cliente"].map(int)
+            registros["id_cancha"] = registros["id_cancha"].map(int)
+            registros = registros.to_dict("records")
+
+            insertadas = []
+            for inicio in range(0, len(registros), tam_lote):
+                lote = registros[inicio:inicio + tam_lote]
+                numeros = aceptadas.index[inicio:inicio + tam_lote]
+                for numero, (reserva, motivo) in zip(numeros, _insertar(lote)):
+                    if reserva is None:
+                        reporte.append({"fila": int(numero) + 1, "estado": "rechazada", "motivo": motivo})
+                        continue
+                    creadas += 1
+                    insertadas.append(numero)
+                    reporte.append({"fila": int(numero) + 1, "estado": "creada", "id": reserva["id"]})
+                    indice_reservas.agregar(reserva["id_cancha"], reserva["fecha"],
+                                            reserva["hora_inicio"], reserva["hora_fin"], reserva["id"])
+                    if indice is not None:
+                        indice.agregar_reserva(reserva["id_cancha"], reserva["fecha"],
+                                               reserva["hora_inicio"], reserva["hora_fin"])
+
+            # Solo las que se insertaron: una fila que rechazó la base no ocupa lugar para los bloques siguientes
+            aceptadas_antes = pd.concat(
+                [aceptadas_antes, aceptadas.loc[insertadas, ["id_cancha", "fecha", "ini", "fin"]]], ignore_index=True
+            )
+    except Exception as e:
+        return {"success": False, "message": f"Error al importar reservas: {str(e)}",
+                "creadas": creadas, "data": sorted(reporte, key=lambda r: r["fila"])}
+
+    reporte.sort(key=lambda r: r["fila"])
+    return {
+        "success": True,
+        "creadas": creadas,
+        "rechazadas": len(reporte) - creadas,
+        "data": reporte
+    }
+
+
+def importar_csv(archivo, tam_bloque: int = TAM_BLOQUE):
+    """Importa reservas desde un CSV con las columnas de COLUMNAS_CSV, leyéndolo por bloques"""
+    try:
+        lector = pd.read_csv(archivo, dtype=str, chunksize=tam_bloque, keep_default_na=False)
+        bloques = (b.reindex(columns=COLUMNAS_CSV).replace("", None) for b in lector)
+        return importar_reservas(bloques)
+    except Exception as e:
+        return {"success": False, "message": f"Error al leer el CSV: {str(e)}"}
+
+
+def reservar_serie(id_cliente: int, id_cancha: int, dia_semana: str, hora_inicio, hora_fin,
+                   fecha_inicio: date, fecha_fin: date, observacion: str = None,
+                   tam_bloque: int = TAM_BLOQUE):
+    """Reserva una cancha todas las semanas el mismo día y horario durante un período"""
+    if dia_semana.lower() not in DIAS_SEMANA:
+        return {"success": False, "message": f"Día de la semana inválido: {dia_semana}"}
+    serie = expandir_serie(id_cliente, id_cancha, dia_semana, hora_inicio, hora_fin,
+                           fecha_inicio, fecha_fin, observacion)
+    return importar_reservas(_bloques(serie, tam_bloque))
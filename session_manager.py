@@ -1,27 +1,97 @@
 import streamlit as st
+from datetime import datetime
 from bitacora import Bitacora
+from contexto_cliente import contexto_sesion
+from exportar import borrar_exportacion
+from tokens_sesion import (
+    PARAMETRO_SESION, emitir_token, leer_token, renovar_token, revocar_token, restaurar_usuario
+)
+
+def leer_parametro(nombre):
+    """Lee un parámetro de la URL (st.query_params o la API experimental en Streamlit < 1.30)"""
+    if hasattr(st, "query_params"):
+        return st.query_params.get(nombre)
+    valores = st.experimental_get_query_params().get(nombre)
+    return valores[0] if valores else None
+
+def guardar_parametro(nombre, valor):
+    """Escribe (o borra, con valor=None) un parámetro de la URL"""
+    if hasattr(st, "query_params"):
+        if valor is None:
+            st.query_params.pop(nombre, None)
+        else:
+            st.query_params[nombre] = valor
+        return
+    parametros = st.experimental_get_query_params()
+    if valor is None:
+        parametros.pop(nombre, None)
+    else:
+        parametros[nombre] = valor
+    st.experimental_set_query_params(**parametros)
+
+def restaurar_sesion():
+    """
+    Recupera la sesión desde el token de la URL después de recargar la página.
+
+    Firma, vencimiento y revocación se validan localmente; el usuario y su
+    rol se confirman contra la base (con cache). En cada recarga el token se
+    renueva: la URL recibe uno nuevo (para la próxima recarga, en esta u
+    otra réplica) y el anterior queda revocado, así que el que quedó en el
+    historial o en un enlace compartido ya no sirve.
+    """
+    token = leer_parametro(PARAMETRO_SESION)
+    if not token:
+        return False
+    usuario = restaurar_usuario(token)
+    nuevo = renovar_token(token) if usuario is not None else None
+    guardar_parametro(PARAMETRO_SESION, nuevo)
+    if nuevo is None:
+        return False
+    _iniciar_estado(usuario, nuevo, registrar_inicio=False)
+    return True
 
 def check_authentication():
     """Verifica si hay una sesión activa"""
-    return bool(st.session_state.get('usuario', None))
+    if st.session_state.get('usuario', None):
+        return True
+    return restaurar_sesion()
 
-def login_user(usuario):
-    """Establece la sesión del usuario"""
+def _iniciar_estado(usuario, token, registrar_inicio):
     st.session_state.authentication_status = True
     st.session_state.usuario = usuario
-    # Iniciar registro en bitácora
+    st.session_state.token_sesion = token
+    # Iniciar registro en bitácora (al restaurar la sesión no es un nuevo login).
+    # La sesión de la bitácora es la del token (sid, que se conserva al
+    # renovarlo): al restaurarla se sigue cerrando la misma fila LOGIN.
+    datos = leer_token(token)
     st.session_state.bitacora = Bitacora(
         usuario_id=usuario["id"],
-        nombre_usuario=usuario["nombre"]
+        nombre_usuario=usuario["nombre"],
+        registrar_inicio=registrar_inicio,
+        sesion_id=datos.get("sid", datos["jti"]),
+        inicio=datetime.fromtimestamp(datos.get("ini", datos["iat"])).isoformat(),
+        contexto=contexto_sesion()
     )
 
+def login_user(usuario):
+    """Establece la sesión del usuario"""
+    # El hash de la contraseña no se guarda en la sesión
+    usuario = {k: v for k, v in usuario.items() if k != "password"}
+    token = emitir_token(usuario)
+    _iniciar_estado(usuario, token, registrar_inicio=True)
+    guardar_parametro(PARAMETRO_SESION, token)
+
 def logout_user():
     """Cierra la sesión del usuario"""
     if "bitacora" in st.session_state:
         st.session_state.bitacora.cierre_sesion()
+    if st.session_state.get("token_sesion"):
+        revocar_token(st.session_state.token_sesion)
+    for clave in [c for c in st.session_state if c.startswith("exportacion_")]:
+        borrar_exportacion(st.session_state.pop(clave))
+    guardar_parametro(PARAMETRO_SESION, None)
     st.session_state.authentication_status = False
     st.session_state.usuario = None
+    st.session_state.token_sesion = None
     del st.session_state.bitacora
     st.rerun()
-
-
@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from postgrest.exceptions import APIError
+from conexion import consultar_paginado
+
+# Segundos entre dos sincronizaciones de una misma tabla (entre tanto se usa la copia local)
+INTERVALO = float(os.getenv("SYNC_INTERVALO", "5"))
+# Margen que se vuelve a pedir detrás de la marca: una transacción puede
+# confirmarse después de otra que empezó más tarde y quedar con una marca anterior.
+# Una que tarde más que esto en confirmarse (desde su clock_timestamp()) no se ve
+# en los cambios incrementales; la recarga completa periódica la recupera.
+MARGEN = float(os.getenv("SYNC_MARGEN", "5"))
+# Cada cuánto (segundos) una réplica se descarga completa aunque tenga marca
+RECARGA_COMPLETA = float(os.getenv("SYNC_RECARGA_COMPLETA", "3600"))
+# Antigüedad de las lápidas que se purgan de `eliminaciones` (migración 004): una
+# réplica que no sincronizó en ese tiempo pudo perder borrados y se descarga completa
+RETENCION_LAPIDAS = float(os.getenv("SYNC_RETENCION_LAPIDAS_DIAS", "7")) * 24 * 3600
+
+ERROR_COLUMNA_INEXISTENTE = "42703"
+
+
+def _restar_margen(marca: str) -> str:
+    return (datetime.fromisoformat(marca) - timedelta(seconds=MARGEN)).isoformat(timespec="milliseconds")
+
+
+class Replica:
+    """
+    Copia local de una tabla que se mantiene con cambios incrementales.
+
+    La primera vez se descarga completa; después solo se piden las filas con
+    `actualizado_en` posterior a la marca y las lápidas de `eliminaciones`
+    de esa tabla (migración 004). Si la base todavía no tiene esas columnas
+    la tabla se vuelve a descargar completa en cada sincronización.
+
+    También se descarga completa cada RECARGA_COMPLETA segundos (cambios
+    confirmados con más de MARGEN de atraso) y cuando la última
+    sincronización es más vieja que RETENCION_LAPIDAS (lápidas ya purgadas).
+
+    Args:
+        tabla (str): tabla de origen (con columna id)
+        columnas (str): columnas a copiar
+        filtros: acota la descarga completa (p. ej. solo reservas futuras)
+        conservar: predicado de las filas que deben quedar en la copia; se
+            aplica también a los cambios, que se piden sin `filtros`
+    """
+
+    def __init__(self, tabla: str, columnas: str, filtros=lambda q: q, conservar=None,
+                 intervalo: float = INTERVALO):
+        self.tabla = tabla
+        self.columnas = columnas
+        self.filtros = filtros
+        self.conservar = conservar
+        self.intervalo = intervalo
+        self.incremental = True
+        self.version = 0
+        self._filas = {}
+        self._marca = None
+        self._sincronizada = float("-inf")
+        # Reloj de pared: tiene que contar también el tiempo con el proceso suspendido
+        self._ultima = float("-inf")
+        self._completa = float("-inf")
+        self._lock = threading.Lock()
+
+    def _avanzar_marca(self, marcas):
+        marcas = [m for m in marcas if m]
+        if marcas:
+            self._marca = max([self._marca, *marcas] if self._marca else marcas)
+
+    def _cargar_completa(self):
+        columnas = self.columnas + (", actualizado_en" if self.incremental else "")
+        try:
+            filas = consultar_paginado(self.tabla, columnas, self.filtros)
+        except APIError as e:
+            if getattr(e, "code", None) != ERROR_COLUMNA_INEXISTENTE or not self.incremental:
+                raise
+            print(f"{self.tabla} no tiene actualizado_en (falta la migración 004): se descarga completa")
+            self.incremental = False
+            return self._cargar_completa()
+        self._filas = {f["id"]: f for f in filas}
+        self._marca = None
+        self._completa = time.time()
+        if self.incremental:
+            self._avanzar_marca(f["actualizado_en"] for f in filas)
+
+    def _aplicar_cambios(self) -> bool:
+        desde = _restar_margen(self._marca)
+        filas = consultar_paginado(
+            self.tabla, self.columnas + ", actualizado_en",
+            lambda q: q.gte("actualizado_en", desde)
+        )
+        lapidas = consultar_paginado(
+            "eliminaciones", "id, id_fila, eliminado_en",
+            lambda q: q.eq("tabla", self.tabla).gte("eliminado_en", desde)
+        )
+
+        cambio = False
+        for fila in filas:
+            anterior = self._filas.get(fila["id"])
+            if self.conservar is not None and not self.conservar(fila):
+                cambio |= self._filas.pop(fila["id"], None) is not None
+            elif anterior != fila:
+                self._filas[fila["id"]] = fila
+                cambio = True
+        for lapida in lapidas:
+            cambio |= self._filas.pop(lapida["id_fila"], None) is not None
+        self._avanzar_marca([f["actualizado_en"] for f in filas] + [l["eliminado_en"] for l in lapidas])
+        return cambio
+
+    def _podar(self) -> bool:
+        """Quita las filas que dejaron de cumplir `conservar` (p. ej. reservas ya pasadas)"""
+        if self.conservar is None:
+            return False
+        fuera = [i for i, f in self._filas.items() if not self.conservar(f)]
+        for i in fuera:
+            del self._filas[i]
+        return bool(fuera)
+
+    def sincronizar(self, forzar: bool = False) -> bool:
+        """
+        Trae los cambios desde la última sincronización.
+
+        Si pasaron menos de `intervalo` segundos no consulta la base (salvo
+        con forzar=True). Devuelve True si la copia cambió.
+        """
+        with self._lock:
+            if not forzar and time.monotonic() - self._sincronizada < self.intervalo:
+                return False
+            primera = self._sincronizada == float("-inf")
+            ahora = time.time()
+            completa = (
+                primera or not self.incremental or self._marca is None
+                or ahora - self._ultima > RETENCION_LAPIDAS
+                or ahora - self._completa > RECARGA_COMPLETA
+            )
+            if completa:
+                anteriores = self._filas
+                self._cargar_completa()
+                cambio = primera or self._filas != anteriores
+            else:
+                cambio = self._aplicar_cambios()
+            cambio |= self._podar()
+            self._sincronizada = time.monotonic()
+            self._ultima = ahora
+            if cambio:
+                self.version += 1
+            return cambio
+
+    def datos(self, forzar: bool = False) -> list:
+        """Filas de la copia local, sincronizada si venció el intervalo"""
+        self.sincronizar(forzar)
+        with self._lock:
+            return list(self._filas.values())
+
+    def por_id(self) -> dict:
+        """Filas indexadas por id (sin sincronizar)"""
+        with self._lock:
+            return dict(self._filas)
+
+    def reiniciar(self):
+        """Descarta la copia: la próxima sincronización vuelve a descargar todo"""
+        with self._lock:
+            self._filas = {}
+            self._marca = None
+            self._sincronizada = float("-inf")
+            self._ultima = self._completa = float("-inf")
+            self.version += 1
+
+
+tipos_cancha = Replica("tipos_cancha", "id, nombre")
+canchas = Replica("canchas", "id, nombre, id_tipo, ubicacion, disponible")
+horarios = Replica("horarios_disponibles", "id, id_cancha, dia_semana, hora_inicio, hora_fin")
+reservas_futuras = Replica(
+    "reservas", "id, id_cliente, id_cancha, fecha, hora_inicio, hora_fin",
+    filtros=lambda q: q.gte("fecha", date.today().isoformat()),
+    conservar=lambda r: r["fecha"] >= date.today().isoformat()
+)
+
+REPLICAS_CATALOGO = (tipos_cancha, canchas, horarios)
+
+
+def sincronizar_catalogo(forzar: bool = False) -> bool:
+    """Sincroniza tipos, canchas y horarios; devuelve True si algo cambió"""
+    cambio = False
+    for replica in REPLICAS_CATALOGO:
+        cambio |= replica.sincronizar(forzar)
+    return cambio
+
+
+def catalogo_anidado() -> list:
+    """
+    Canchas con su tipo y horarios, con la misma forma que el embed
+    'id, nombre, disponible, tipos_cancha(nombre), horarios_disponibles(...)'.
+    """
+    tipos = tipos_cancha.por_id()
+    por_cancha = {}
+    for h in sorted(horarios.por_id().values(), key=lambda h: h["id"]):
+        por_cancha.setdefault(h["id_cancha"], []).append(
+            {"dia_semana": h["dia_semana"], "hora_inicio": h["hora_inicio"], "hora_fin": h["hora_fin"]}
+        )
+    return [
+        {
+            "id": c["id"],
+            "nombre": c["nombre"],
+            "disponible": c["disponible"],
+            "tipos_cancha": {"nombre": tipos[c["id_tipo"]]["nombre"]} if c["id_tipo"] in tipos else None,
+            "horarios_disponibles": por_cancha.get(c["id"], [])
+        }
+        for c in sorted(canchas.por_id().values(), key=lambda c: c["id"])
+    ]
@@ -0,0 +1,688 @@
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+import httpx
+from postgrest import SyncPostgrestClient
+from conexion import medir_respuesta
+from migrar import MotorSQLite, aplicar_migraciones
+
+URL_FALSA = "http://supabase.falso/rest/v1"
+
+# Parámetros de PostgREST que no son filtros
+PARAMETROS_RESERVADOS = ("select", "order", "limit", "offset", "on_conflict", "columns")
+
+OPERADORES = {
+    "eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="
+}
+
+# Filas por sentencia al buscar las relaciones embebidas con IN (...)
+TAM_LOTE_IN = 5000
+
+
+class ErrorPostgrest(Exception):
+    """Error con el mismo formato (código y estado HTTP) que devuelve PostgREST"""
+
+    def __init__(self, codigo: str, mensaje: str, estado: int = 400):
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.mensaje = mensaje
+        self.estado = estado
+
+
+def _minusculas(valor):
+    return valor.lower() if isinstance(valor, str) else valor
+
+
+class BaseSQLite:
+    """Base SQLite con el esquema de la aplicación y sus metadatos (columnas y claves foráneas)"""
+
+    def __init__(self, ruta: str = ":memory:"):
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.create_function("minusculas", 1, _minusculas, deterministic=True)
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.execute("PRAGMA case_sensitive_like = ON")
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.lock = threading.RLock()
+
+        aplicar_migraciones(MotorSQLite(self.conexion))
+        self.cargar_metadatos()
+
+    def cargar_metadatos(self):
+        self.columnas, self.claves, self.foraneas = {}, {}, {}
+        tablas = [f["name"] for f in self.conexion.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        for tabla in tablas:
+            info = self.conexion.execute(f'PRAGMA table_info("{tabla}")').fetchall()
+            self.columnas[tabla] = {c["name"]: (c["type"] or "").upper() for c in info}
+            self.claves[tabla] = [c["name"] for c in sorted(info, key=lambda c: c["pk"]) if c["pk"]]
+            self.foraneas[tabla] = [
+                (f["from"], f["table"], f["to"] or "id")
+                for f in self.conexion.execute(f'PRAGMA foreign_key_list("{tabla}")')
+            ]
+
+    def tipo(self, tabla: str, columna: str) -> str:
+        try:
+            return self.columnas[tabla][columna]
+        except KeyError:
+            raise ErrorPostgrest("42703", f"column {tabla}.{columna} does not exist")
+
+    def relacion(self, padre: str, hijo: str):
+        """
+        Cómo se embebe `hijo` en `padre`:
+        ('uno', columna en padre, columna en hijo) si padre tiene la clave foránea,
+        ('muchos', columna en padre, columna en hijo) si la tiene hijo.
+        """
+        for columna, tabla, referida in self.foraneas.get(padre, []):
+            if tabla == hijo:
+                return "uno", columna, referida
+        for columna, tabla, referida in self.foraneas.get(hijo, []):
+            if tabla == padre:
+                return "muchos", referida, columna
+        raise ErrorPostgrest(
+            "PGRST200", f"Could not find a relationship between '{padre}' and '{hijo}'", 400
+        )
+
+
+# ------------------------------------------------------------------
+# Lectura de parámetros de PostgREST
+# ------------------------------------------------------------------
+
+def _dividir(texto: str, separador: str = ","):
+    """Divide por `separador` fuera de paréntesis y comillas"""
+    partes, actual, nivel, comillas = [], [], 0, False
+    for c in texto:
+        if c == '"':
+            comillas = not comillas
+        elif not comillas and c == "(":
+            nivel += 1
+        elif not comillas and c == ")":
+            nivel -= 1
+        if c == separador and nivel == 0 and not comillas:
+            partes.append("".join(actual))
+            actual = []
+        else:
+            actual.append(c)
+    if actual or partes:
+        partes.append("".join(actual))
+    return [p.strip() for p in partes if p.strip()]
+
+
+def _sin_comillas(valor: str) -> str:
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return valor[1:-1]
+    return valor
+
+
+def parsear_select(texto: str) -> list:
+    """
+    'id, tipos_cancha(nombre), canchas!inner(disponible)' ->
+    [('columna', 'id'), ('relacion', 'tipos_cancha', False, [...]), ...]
+    """
+    nodos = []
+    for parte in _dividir(texto or "*"):
+        if "(" in parte:
+            nombre, resto = parte.split("(", 1)
+            interna = False
+            if "!" in nombre:
+                nombre, pista = nombre.split("!", 1)
+                interna = pista == "inner"
+            if ":" in nombre:
+                nombre = nombre.split(":", 1)[1]
+            nodos.append(("relacion", nombre.strip(), interna, parsear_select(resto[:-1])))
+        else:
+            nodos.append(("columna", parte.split(":")[-1].split("::")[0].strip()))
+    return nodos
+
+
+class Consulta:
+    """Traduce los parámetros de una petición de PostgREST a SQL sobre una tabla"""
+
+    def __init__(self, base: BaseSQLite, tabla: str, params: httpx.QueryParams):
+        if tabla not in base.columnas:
+            raise ErrorPostgrest("42P01", f'relation "public.{tabla}" does not exist', 404)
+        self.base = base
+        self.tabla = tabla
+        self.params = params
+        self.select = parsear_select(params.get("select", "*"))
+
+    # --- valores ---
+
+    def _valor(self, tabla: str, columna: str, valor: str):
+        """Convierte el texto de un filtro al tipo con que SQLite guarda la columna"""
+        valor = _sin_comillas(valor)
+        tipo = self.base.tipo(tabla, columna)
+        if "BOOL" in tipo:
+            return {"true": 1, "false": 0}.get(valor.lower(), valor)
+        if "TIME" in tipo and "STAMP" not in tipo:
+            return normalizar_hora(valor)
+        if any(t in tipo for t in ("INT", "SERIAL")):
+            try:
+                return int(valor)
+            except ValueError:
+                return valor
+        if any(t in tipo for t in ("NUMERIC", "REAL", "FLOAT", "DOUBLE")):
+            try:
+                return float(valor)
+            except ValueError:
+                return valor
+        return valor
+
+    def condicion(self, alias: str, tabla: str, columna: str, expresion: str):
+        """'eq.5' -> ('"t"."col" = ?', [5]); admite 'not.' delante del operador"""
+        negar = expresion.startswith("not.")
+        if negar:
+            expresion = expresion[4:]
+        operador, _, valor = expresion.partition(".")
+        campo = f'"{alias}"."{columna}"'
+        self.base.tipo(tabla, columna)
+
+        if operador in OPERADORES:
+            sql, args = f"{campo} {OPERADORES[operador]} ?", [self._valor(tabla, columna, valor)]
+        elif operador == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}.get(valor.lower())
+            if literal is None:
+                raise ErrorPostgrest("PGRST100", f"valor no válido para is: {valor}")
+            sql, args = (f"{campo} IS {literal}", []) if literal == "NULL" else (f"{campo} = {literal}", [])
+        elif operador == "in":
+            valores = [self._valor(tabla, columna, v) for v in _dividir(valor.strip()[1:-1])]
+            if not valores:
+                sql, args = "0", []
+            else:
+                sql, args = f"{campo} IN ({', '.join('?' * len(valores))})", valores
+        elif operador == "like":
+            sql, args = f"{campo} LIKE ?", [_sin_comillas(valor).replace("*", "%")]
+        elif operador == "ilike":
+            sql, args = f"minusculas({campo}) LIKE minusculas(?)", [_sin_comillas(valor).replace("*", "%")]
+        else:
+            raise ErrorPostgrest("PGRST100", f"operador no soportado: {operador}")
+        return (f"NOT ({sql})", args) if negar else (sql, args)
+
+    def logica(self, alias: str, tabla: str, operador: str, texto: str):
+        """Filtros or=(...) / and=(...), con grupos anidados"""
+        partes, args = [], []
+        for item in _dividir(texto.strip()[1:-1]):
+            negar = item.startswith("not.")
+            if negar:
+                item = item[4:]
+            if item.startswith(("and(", "or(")):
+                sub_operador, _, resto = item.partition("(")
+                sql, sub_args = self.logica(alias, tabla, sub_operador, "(" + resto)
+            else:
+                columna, _, expresion = item.partition(".")
+                sql, sub_args = self.condicion(alias, tabla, columna, expresion)
+            partes.append(f"NOT ({sql})" if negar else sql)
+            args += sub_args
+        if not partes:
+            return "1", []
+        return "(" + f" {operador.upper()} ".join(partes) + ")", args
+
+    # --- WHERE ---
+
+    def filtros(self, prefijo: str = ""):
+        """Filtros de la tabla (prefijo '') o de una relación embebida (prefijo 'canchas.')"""
+        for clave, valor in self.params.multi_items():
+            if not clave.startswith(prefijo):
+                continue
+            resto = clave[len(prefijo):]
+            if ("." in resto and resto not in ("not.or", "not.and")) or resto in PARAMETROS_RESERVADOS:
+                continue
+            yield resto, valor
+
+    def where(self, alias: str, tabla: str, prefijo: str = ""):
+        partes, args = [], []
+        for clave, valor in self.filtros(prefijo):
+            if clave in ("or", "and"):
+                sql, sub_args = self.logica(alias, tabla, clave, valor)
+            elif clave in ("not.or", "not.and"):
+                sql, sub_args = self.logica(alias, tabla, clave[4:], valor)
+                sql = f"NOT {sql}"
+            else:
+                sql, sub_args = self.condicion(alias, tabla, clave, valor)
+            partes.append(sql)
+            args += sub_args
+
+        # Relaciones !inner: la fila padre solo queda si la relación tiene filas
+        if not prefijo:
+            for nodo in self.select:
+                if nodo[0] == "relacion" and nodo[2]:
+                    sql, sub_args = self._existe(alias, tabla, nodo, nodo[1] + ".")
+                    partes.append(sql)
+                    args += sub_args
+        return partes, args
+
+    def _existe(self, alias, tabla, nodo, prefijo):
+        hijo = nodo[1]
+        _, col_padre, col_hijo = self.base.relacion(tabla, hijo)
+        alias_hijo = f"{alias}_{hijo}"
+        partes, args = self.where(alias_hijo, hijo, prefijo)
+        condiciones = [f'"{alias_hijo}"."{col_hijo}" = "{alias}"."{col_padre}"'] + partes
+        return f'EXISTS (SELECT 1 FROM "{hijo}" AS "{alias_hijo}" WHERE {" AND ".join(condiciones)})', args
+
+    def order_by(self, alias: str, tabla: str, prefijo: str = ""):
+        texto = self.params.get(prefijo + "order")
+        if not texto:
+            return ""
+        columnas = []
+        for parte in _dividir(texto):
+            columna, *modificadores = parte.split(".")
+            self.base.tipo(tabla, columna)
+            desc = "desc" in modificadores
+            # Como en Postgres: los NULL van al final en ASC y al principio en DESC
+            nulos_primero = "nullsfirst" in modificadores or (desc and "nullslast" not in modificadores)
+            columnas.append(
+                f'"{alias}"."{columna}" {"DESC" if desc else "ASC"} NULLS {"FIRST" if nulos_primero else "LAST"}'
+            )
+        return " ORDER BY " + ", ".join(columnas)
+
+    # --- SELECT ---
+
+    def columnas_select(self, tabla: str, nodos: list):
+        columnas = []
+        for nodo in nodos:
+            if nodo[0] == "columna":
+                if nodo[1] == "*":
+                    columnas += list(self.base.columnas[tabla])
+                else:
+                    self.base.tipo(tabla, nodo[1])
+                    columnas.append(nodo[1])
+        return columnas
+
+    def seleccionar(self, limite=None, desplazamiento=None, contar=False):
+        partes, args = self.where("t", self.tabla)
+        where = (" WHERE " + " AND ".join(partes)) if partes else ""
+        # Se traen todas las columnas: las relaciones necesitan sus claves
+        sql = f'SELECT "t".* FROM "{self.tabla}" AS "t"{where}{self.order_by("t", self.tabla)}'
+        limite = self.params.get("limit", limite)
+        desplazamiento = self.params.get("offset", desplazamiento)
+        if limite is not None or desplazamiento is not None:
+            sql += f" LIMIT {int(limite) if limite is not None else -1} OFFSET {int(desplazamiento or 0)}"
+        filas = [dict(f) for f in self.base.conexion.execute(sql, args)]
+        filas = self.armar(self.tabla, self.select, filas, "")
+
+        total = None
+        if contar:
+            total = self.base.conexion.execute(
+                f'SELECT COUNT(*) FROM "{self.tabla}" AS "t"{where}', args
+            ).fetchone()[0]
+        return filas, total
+
+    def armar(self, tabla: str, nodos: list, filas: list, prefijo: str):
+        """Deja solo las columnas pedidas, con los tipos de JSON, y agrega las relaciones"""
+        columnas = self.columnas_select(tabla, nodos)
+        resultado = [{c: convertir_salida(self.base, tabla, c, f[c]) for c in columnas} for f in filas]
+        for nodo in nodos:
+            if nodo[0] != "relacion":
+                continue
+            _, hijo, interna, sub_nodos = nodo
+            cardinalidad, col_padre, col_hijo = self.base.relacion(tabla, hijo)
+            sub_prefijo = f"{prefijo}{hijo}."
+            hijos = self._hijos(hijo, col_hijo, {f[col_padre] for f in filas if f[col_padre] is not None}, sub_prefijo)
+            armados = self.armar(hijo, sub_nodos, hijos, sub_prefijo)
+            agrupados = {}
+            for fila_hijo, armado in zip(hijos, armados):
+                agrupados.setdefault(fila_hijo[col_hijo], []).append(armado)
+            for fila, salida in zip(filas, resultado):
+                encontrados = agrupados.get(fila[col_padre], [])
+                salida[hijo] = encontrados if cardinalidad == "muchos" else (encontrados[0] if encontrados else None)
+        return resultado
+
+    def _hijos(self, tabla: str, columna: str, claves: set, prefijo: str):
+        if not claves:
+            return []
+        partes, args = self.where("h", tabla, prefijo)
+        orden = self.order_by("h", tabla, prefijo) or ' ORDER BY "h".rowid'
+        filas, claves = [], list(claves)
+        for i in range(0, len(claves), TAM_LOTE_IN):
+            lote = claves[i:i + TAM_LOTE_IN]
+            condiciones = [f'"h"."{columna}" IN ({", ".join("?" * len(lote))})'] + partes
+            sql = f'SELECT "h".* FROM "{tabla}" AS "h" WHERE {" AND ".join(condiciones)}{orden}'
+            filas += [dict(f) for f in self.base.conexion.execute(sql, lote + args)]
+        return filas
+
+
+def normalizar_hora(valor):
+    """'18:00' -> '18:00:00' (Postgres devuelve las horas con segundos)"""
+    if isinstance(valor, str) and re.fullmatch(r"\d{1,2}:\d{2}", valor):
+        return valor.zfill(5) + ":00"
+    return valor
+
+
+def convertir_entrada(base: BaseSQLite, tabla: str, columna: str, valor):
+    tipo = base.tipo(tabla, columna)
+    if isinstance(valor, bool):
+        return int(valor)
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor)
+    if "TIME" in tipo and "STAMP" not in tipo:
+        return normalizar_hora(valor)
+    return valor
+
+
+def convertir_salida(base: BaseSQLite, tabla: str, columna: str, valor):
+    if valor is not None and "BOOL" in base.columnas[tabla][columna]:
+        return bool(valor)
+    return valor
+
+
+# ------------------------------------------------------------------
+# Transporte HTTP
+# ------------------------------------------------------------------
+
+def _error_sqlite(e: sqlite3.Error) -> ErrorPostgrest:
+    mensaje = str(e)
+    codigo = re.match(r"^([0-9A-Z]{5}): ", mensaje)
+    if codigo:
+        return ErrorPostgrest(codigo.group(1), mensaje[7:], 409)
+    if "UNIQUE constraint failed" in mensaje:
+        return ErrorPostgrest("23505", f"duplicate key value violates unique constraint ({mensaje})", 409)
+    if "FOREIGN KEY constraint failed" in mensaje:
+        return ErrorPostgrest("23503", "insert or update violates foreign key constraint", 409)
+    if "CHECK constraint failed" in mensaje:
+        return ErrorPostgrest("23514", f"new row violates check constraint ({mensaje})")
+    if "NOT NULL constraint failed" in mensaje:
+        return ErrorPostgrest("23502", f"null value violates not-null constraint ({mensaje})")
+    if "no such column" in mensaje or "has no column" in mensaje:
+        return ErrorPostgrest("42703", mensaje)
+    return ErrorPostgrest("XX000", mensaje, 500)
+
+
+class TransporteSQLite(httpx.BaseTransport):
+    """
+    Transporte de httpx que responde las peticiones de PostgREST con SQLite.
+
+    Así el cliente falso usa los mismos constructores de consultas de
+    postgrest que el cliente real (filtros, conteos, Range, Prefer, RPC).
+    `latencia_ms` (más hasta `variacion_ms` al azar) simula la red en cada petición.
+    """
+
+    def __init__(self, base: BaseSQLite, funciones: dict, latencia_ms: float = 0.0, variacion_ms: float = 0.0):
+        self.base = base
+        self.funciones = funciones
+        self.latencia_ms = latencia_ms
+        self.variacion_ms = variacion_ms
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latencia_ms or self.variacion_ms:
+            # Fuera del lock: las peticiones concurrentes esperan a la vez, como contra un servidor real
+            time.sleep((self.latencia_ms + random.uniform(0, self.variacion_ms)) / 1000)
+        ruta = request.url.path.split("/rest/v1/", 1)[-1]
+        prefer = request.headers.get("prefer", "")
+        cuerpo = json.loads(request.content) if request.content else None
+        try:
+            with self.base.lock:
+                if ruta.startswith("rpc/"):
+                    return self._rpc(ruta[4:], cuerpo or {})
+                if request.method in ("GET", "HEAD"):
+                    return self._get(ruta, request, prefer)
+                with self.base.conexion:
+                    if request.method == "POST":
+                        return self._post(ruta, request.url.params, cuerpo, prefer)
+                    if request.method == "PATCH":
+                        return self._patch(ruta, request.url.params, cuerpo, prefer)
+                    if request.method == "DELETE":
+                        return self._delete(ruta, request.url.params, prefer)
+            raise ErrorPostgrest("PGRST117", f"método no soportado: {request.method}", 405)
+        except ErrorPostgrest as e:
+            return self._error(e)
+        except sqlite3.Error as e:
+            return self._error(_error_sqlite(e))
+
+    def _error(self, e: ErrorPostgrest):
+        return httpx.Response(e.estado, json={"code": e.codigo, "message": e.mensaje, "details": None, "hint": None})
+
+    def _respuesta(self, estado: int, filas, prefer: str, total=None, desde: int = 0):
+        headers = {}
+        if total is not None or "count=" in prefer:
+            total = len(filas) if total is None else total
+            rango = f"{desde}-{desde + len(filas) - 1}" if filas else "*"
+            headers["Content-Range"] = f"{rango}/{total}"
+        if "return=minimal" in prefer:
+            return httpx.Response(estado if estado != 200 else 204, headers=headers)
+        return httpx.Response(estado, json=filas, headers=headers)
+
+    def _get(self, tabla, request, prefer):
+        consulta = Consulta(self.base, tabla, request.url.params)
+        limite = desplazamiento = None
+        rango = request.headers.get("range")
+        if rango:
+            inicio, fin = rango.split("-")
+            desplazamiento, limite = int(inicio), int(fin) - int(inicio) + 1
+        filas, total = consulta.seleccionar(limite, desplazamiento, contar="count=" in prefer)
+        desde = int(request.url.params.get("offset", desplazamiento or 0))
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"Content-Range": f"*/{total}"} if total is not None else {})
+        return self._respuesta(200, filas, prefer, total, desde)
+
+    def _devolver(self, tabla, cursor):
+        nombres = [d[0] for d in cursor.description]
+        return [
+            {c: convertir_salida(self.base, tabla, c, v) for c, v in zip(nombres, f)}
+            for f in cursor.fetchall()
+        ]
+
+    def _post(self, tabla, params, cuerpo, prefer):
+        Consulta(self.base, tabla, params)
+        filas = cuerpo if isinstance(cuerpo, list) else [cuerpo]
+        if not filas:
+            return self._respuesta(201, [], prefer)
+        # Como PostgREST: las columnas salen de `columns` o de la primera fila
+        columnas = params.get("columns", "").split(",") if params.get("columns") else list(filas[0])
+
+        conflicto = ""
+        if "resolution=" in prefer:
+            claves = params.get("on_conflict", "").split(",") if params.get("on_conflict") else self.base.claves[tabla]
+            lista = ", ".join(f'"{c.strip()}"' for c in claves)
+            if "resolution=ignore-duplicates" in prefer:
+                conflicto = f" ON CONFLICT ({lista}) DO NOTHING"
+            else:
+                cambios = [c for c in columnas if c not in claves]
+                asignaciones = ", ".join(f'"{c}" = excluded."{c}"' for c in cambios)
+                conflicto = f" ON CONFLICT ({lista}) DO " + (f"UPDATE SET {asignaciones}" if cambios else "NOTHING")
+
+        if columnas:
+            lista_columnas = ", ".join(f'"{c}"' for c in columnas)
+            sql = (
+                f'INSERT INTO "{tabla}" ({lista_columnas}) '
+                f'VALUES ({", ".join("?" * len(columnas))}){conflicto} RETURNING rowid'
+            )
+        else:
+            sql = f'INSERT INTO "{tabla}" DEFAULT VALUES RETURNING rowid'
+
+        rowids = []
+        for fila in filas:
+            valores = [convertir_entrada(self.base, tabla, c, fila.get(c)) for c in columnas]
+            rowids += [f[0] for f in self.base.conexion.execute(sql, valores)]
+        # RETURNING no ve lo que cambian los triggers AFTER (p. ej. el precio
+        # de la reserva): las filas se releen al terminar
+        return self._respuesta(201, self._releer(tabla, rowids), prefer)
+
+    def _releer(self, tabla, rowids):
+        por_rowid = {}
+        for i in range(0, len(rowids), TAM_LOTE_IN):
+            lote = rowids[i:i + TAM_LOTE_IN]
+            cursor = self.base.conexion.execute(
+                f'SELECT rowid AS "__rowid", * FROM "{tabla}" WHERE rowid IN ({", ".join("?" * len(lote))})', lote
+            )
+            nombres = [d[0] for d in cursor.description]
+            for f in cursor.fetchall():
+                fila = dict(zip(nombres, f))
+                rowid = fila.pop("__rowid")
+                por_rowid[rowid] = {
+                    c: convertir_salida(self.base, tabla, c, v) for c, v in fila.items()
+                }
+        return [por_rowid[r] for r in rowids if r in por_rowid]
+
+    def _patch(self, tabla, params, cuerpo, prefer):
+        consulta = Consulta(self.base, tabla, params)
+        partes, args = consulta.where("t", tabla)
+        asignaciones = ", ".join(f'"{c}" = ?' for c in cuerpo)
+        valores = [convertir_entrada(self.base, tabla, c, v) for c, v in cuerpo.items()]
+        where = (" WHERE " + " AND ".join(partes)) if partes else ""
+        # UPDATE no admite alias en SQLite: se usa una subconsulta por rowid
+        sql = (
+            f'UPDATE "{tabla}" SET {asignaciones} WHERE rowid IN '
+            f'(SELECT "t".rowid FROM "{tabla}" AS "t"{where}) RETURNING *'
+        )
+        return self._respuesta(200, self._devolver(tabla, self.base.conexion.execute(sql, valores + args)), prefer)
+
+    def _delete(self, tabla, params, prefer):
+        consulta = Consulta(self.base, tabla, params)
+        partes, args = consulta.where("t", tabla)
+        where = (" WHERE " + " AND ".join(partes)) if partes else ""
+        sql = (
+            f'DELETE FROM "{tabla}" WHERE rowid IN '
+            f'(SELECT "t".rowid FROM "{tabla}" AS "t"{where}) RETURNING *'
+        )
+        return self._respuesta(200, self._devolver(tabla, self.base.conexion.execute(sql, args)), prefer)
+
+    def _rpc(self, nombre, parametros):
+        funcion = self.funciones.get(nombre)
+        if funcion is None:
+            raise ErrorPostgrest("PGRST202", f"Could not find the function public.{nombre}", 404)
+        with self.base.conexion:
+            return httpx.Response(200, json=funcion(self.base.conexion, **parametros))
+
+
+def actualizar_canchas_lote(conexion: sqlite3.Connection, p_cambios: list, p_solo_disponibilidad: bool = False):
+    """
+    Equivalente de la función actualizar_canchas_lote (migraciones 005 y 012).
+
+    Las columnas permitidas son todas, o solo `disponible` con
+    p_solo_disponibilidad.
+    """
+    permitidas = {"disponible"} if p_solo_disponibilidad else {"nombre", "id_tipo", "ubicacion", "disponible"}
+    ids = [c.get("id") for c in p_cambios]
+    resultados = []
+    for cambio in p_cambios:
+        datos = cambio.get("datos") or {}
+        motivo = None
+        if conexion.execute("SELECT 1 FROM canchas WHERE id = ?", (cambio.get("id"),)).fetchone() is None:
+            motivo = "La cancha no existe"
+        elif ids.count(cambio["id"]) > 1:
+            motivo = "La cancha aparece más de una vez en el lote"
+        elif not datos:
+            motivo = "No hay cambios"
+        elif not set(datos) <= permitidas:
+            motivo = "Columnas no editables: " + ", ".join(sorted(set(datos) - permitidas))
+        elif "nombre" in datos and not str(datos["nombre"] or "").strip():
+            motivo = "El nombre no puede quedar vacío"
+        elif "id_tipo" in datos and datos["id_tipo"] is not None and conexion.execute(
+            "SELECT 1 FROM tipos_cancha WHERE id = ?", (datos["id_tipo"],)
+        ).fetchone() is None:
+            motivo = "El tipo de cancha no existe"
+        elif "disponible" in datos and not isinstance(datos["disponible"], bool):
+            motivo = "La disponibilidad debe ser verdadero o falso"
+        resultados.append({"id_cancha": cambio.get("id"), "motivo": motivo})
+
+    errores = sum(r["motivo"] is not None for r in resultados)
+    if not errores:
+        for cambio in p_cambios:
+            # Las columnas ya se validaron contra `permitidas`
+            columnas = list(cambio["datos"])
+            asignaciones = ", ".join(f'"{c}" = ?' for c in columnas)
+            conexion.execute(
+                f"UPDATE canchas SET {asignaciones} WHERE id = ?",
+                [cambio["datos"][c] for c in columnas] + [cambio["id"]]
+            )
+    for r in resultados:
+        r["estado"] = "rechazada" if r["motivo"] else ("sin_aplicar" if errores else "actualizada")
+    return resultados
+
+
+def bitacora_crear_particiones(conexion: sqlite3.Connection, p_desde: str = None, p_meses_adelante: int = 3):
+    """Equivalente de la migración 007: SQLite no particiona, la bitácora es una sola tabla"""
+    return []
+
+
+def bitacora_meses(conexion: sqlite3.Connection, p_antes: str):
+    """Equivalente de la función bitacora_meses de la migración 007"""
+    return [
+        {"mes": f["mes"], "filas": f["filas"]}
+        for f in conexion.execute(
+            "SELECT substr(fecha_hora_ingreso, 1, 7) || '-01' AS mes, count(*) AS filas FROM bitacora "
+            "WHERE fecha_hora_ingreso < ? GROUP BY 1 ORDER BY 1",
+            (p_antes,)
+        )
+    ]
+
+
+def bitacora_descartar_mes(conexion: sqlite3.Connection, p_mes: str, p_filas: int):
+    """Equivalente de la función bitacora_descartar_mes de la migración 007 (DELETE en lugar de DROP)"""
+    mes = date.fromisoformat(p_mes[:10]).replace(day=1)
+    siguiente = (mes + timedelta(days=32)).replace(day=1)
+    if siguiente > date.today():
+        raise ErrorPostgrest("P0001", f"No se puede descartar el mes en curso ({mes})")
+    rango = (mes.isoformat(), siguiente.isoformat())
+    filas = conexion.execute(
+        "SELECT count(*) FROM bitacora WHERE fecha_hora_ingreso >= ? AND fecha_hora_ingreso < ?", rango
+    ).fetchone()[0]
+    if filas != p_filas:
+        raise ErrorPostgrest("P0001", f"El mes {mes} tiene {filas} filas y se archivaron {p_filas}")
+    conexion.execute("DELETE FROM bitacora WHERE fecha_hora_ingreso >= ? AND fecha_hora_ingreso < ?", rango)
+    return [{"filas": filas}]
+
+
+# Funciones SQL de las migraciones, disponibles por RPC en todo ClienteFalso
+FUNCIONES_MIGRACIONES = {
+    "actualizar_canchas_lote": actualizar_canchas_lote,
+    "bitacora_crear_particiones": bitacora_crear_particiones,
+    "bitacora_meses": bitacora_meses,
+    "bitacora_descartar_mes": bitacora_descartar_mes
+}
+
+
+class ClienteFalso:
+    """
+    Reemplazo del cliente de Supabase respaldado por SQLite.
+
+    Uso:
+        cliente = ClienteFalso()
+        conexion.configurar_cliente(cliente)
+
+    `ruta` puede ser un archivo para conservar los datos entre procesos.
+    `latencia_ms` y `variacion_ms` agregan una demora a cada petición
+    (también se cambian después con `inyectar_latencia`).
+    Las funciones RPC se registran con `registrar_funcion(nombre, funcion)`,
+    donde `funcion(conexion_sqlite, **parametros)` devuelve datos JSON.
+    """
+
+    def __init__(self, ruta: str = ":memory:", latencia_ms: float = 0.0, variacion_ms: float = 0.0):
+        self.base = BaseSQLite(ruta)
+        self.funciones = dict(FUNCIONES_MIGRACIONES)
+        self.transporte = TransporteSQLite(self.base, self.funciones, latencia_ms, variacion_ms)
+        self.postgrest = SyncPostgrestClient(URL_FALSA)
+        headers = self.postgrest.session.headers
+        self.postgrest.session.close()
+        self.postgrest.session = httpx.Client(
+            base_url=URL_FALSA,
+            headers=headers,
+            transport=self.transporte,
+            event_hooks={"response": [medir_respuesta]}
+        )
+
+    @property
+    def conexion(self) -> sqlite3.Connection:
+        return self.base.conexion
+
+    def inyectar_latencia(self, latencia_ms: float = 0.0, variacion_ms: float = 0.0):
+        """Demora de cada petición en milisegundos (0 para quitarla)"""
+        self.transporte.latencia_ms = latencia_ms
+        self.transporte.variacion_ms = variacion_ms
+
+    def registrar_funcion(self, nombre: str, funcion):
+        self.funciones[nombre] = funcion
+
+    def table(self, tabla: str):
+        return self.postgrest.from_(tabla)
+
+    def from_(self, tabla: str):
+        return self.table(tabla)
+
+    def rpc(self, funcion: str, parametros: dict = None):
+        return self.postgrest.rpc(funcion, parametros or {})
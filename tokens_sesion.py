@@ -0,0 +1,262 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from conexion import get_supabase_client
+from almacen import get_almacen
+from cache import get_cache
+
+# Duración de una sesión (segundos): el token viaja en la URL, así que vive poco
+DURACION_TOKEN = int(os.getenv("SESION_DURACION", str(2 * 3600)))
+# Parámetro de la URL en que viaja el token (sobrevive a la recarga de la página)
+PARAMETRO_SESION = "sesion"
+# Cada cuánto se vuelve a leer la lista de tokens revocados (segundos)
+TTL_REVOCADOS = float(os.getenv("SESION_TTL_REVOCADOS", "30"))
+# Cuánto se reutiliza el rol y la existencia de un usuario al restaurar su sesión (segundos)
+TTL_USUARIO = float(os.getenv("SESION_TTL_USUARIO", "60"))
+
+# Clave en el almacén compartido
+PREFIJO_REVOCADO = "sesion:revocado:"
+
+_secreto_env = os.getenv("SESION_SECRETO")
+_secreto = _secreto_env.encode("utf-8") if _secreto_env else None
+_secreto_lock = threading.Lock()
+
+
+def _secreto_propio() -> bytes:
+    """
+    Secreto de firma cuando no se define SESION_SECRETO.
+
+    Solo sirve con un almacén local: con uno compartido las réplicas
+    necesitan el mismo secreto, y acordarlo a través del almacén lo dejaría
+    legible para cualquiera con acceso a él, así que SESION_SECRETO es
+    obligatorio.
+    """
+    if get_almacen().compartido:
+        raise RuntimeError("SESION_SECRETO es obligatorio con un almacén compartido (ALMACEN_URL)")
+    print("SESION_SECRETO no está definido: las sesiones no sobrevivirán a un reinicio del servidor")
+    return secrets.token_hex(32).encode("utf-8")
+
+
+def secreto() -> bytes:
+    """Secreto con que se firman los tokens y la cache compartida (SESION_SECRETO o uno propio del proceso)"""
+    global _secreto
+    if _secreto is None:
+        with _secreto_lock:
+            if _secreto is None:
+                _secreto = _secreto_propio()
+    return _secreto
+
+
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode("ascii")
+
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _firma(contenido: str) -> str:
+    return _b64(hmac.new(secreto(), contenido.encode("ascii"), hashlib.sha256).digest())
+
+
+def emitir_token(usuario: dict, duracion: int = DURACION_TOKEN, sesion: str = None, inicio: int = None) -> str:
+    """
+    Crea un token de sesión firmado: `<datos en base64>.<firma HMAC-SHA256>`.
+
+    Los datos son el id del usuario, la expiración y un identificador
+    aleatorio (`jti`) que se usa para revocarlo, más el identificador y
+    la hora de inicio de la sesión (`sid`, `ini`), que se mantienen cuando
+    el token se renueva. Nombre, email y rol no viajan en el token (que
+    pasa por la URL): al restaurar la sesión se leen de la base.
+    """
+    ahora = int(time.time())
+    jti = secrets.token_urlsafe(12)
+    datos = {
+        "uid": usuario["id"],
+        "iat": ahora,
+        "exp": ahora + duracion,
+        "jti": jti,
+        "sid": sesion or jti,
+        "ini": inicio or ahora
+    }
+    contenido = _b64(json.dumps(datos, separators=(",", ":")).encode("utf-8"))
+    return f"{contenido}.{_firma(contenido)}"
+
+
+def leer_token(token: str):
+    """Devuelve los datos de un token con firma válida y no vencido, o None (no consulta la base)"""
+    try:
+        contenido, firma = token.split(".")
+        if not hmac.compare_digest(firma, _firma(contenido)):
+            return None
+        datos = json.loads(_desde_b64(contenido))
+    except (ValueError, AttributeError):
+        return None
+    if datos.get("exp", 0) <= time.time():
+        return None
+    return datos
+
+
+class ListaRevocados:
+    """
+    Identificadores (jti) de los tokens revocados que aún no vencieron.
+
+    Se guarda en memoria y se relee de la tabla `tokens_revocados` como
+    mucho una vez cada `ttl` segundos; las revocaciones de este proceso se
+    agregan en el momento. Con un almacén compartido cada revocación se
+    publica también ahí, y las demás réplicas la ven sin esperar a la
+    próxima relectura de la tabla.
+    """
+
+    def __init__(self, ttl: float = TTL_REVOCADOS):
+        self.ttl = ttl
+        self._jtis = set()
+        self._cargado = 0.0
+        self._lock = threading.Lock()
+
+    def _recargar(self):
+        ahora = datetime.now(timezone.utc).isoformat()
+        filas = get_supabase_client().table("tokens_revocados")\
+            .select("jti")\
+            .gt("expiracion", ahora)\
+            .execute().data
+        self._jtis = {f["jti"] for f in filas}
+        self._cargado = time.monotonic()
+
+    def _en_almacen(self, jti: str) -> bool:
+        almacen = get_almacen()
+        if not almacen.compartido:
+            return False
+        try:
+            return almacen.get(PREFIJO_REVOCADO + jti) is not None
+        except Exception as e:
+            print(f"Error al consultar revocaciones en el almacén compartido: {e}")
+            return False
+
+    def contiene(self, jti: str) -> bool:
+        with self._lock:
+            if time.monotonic() - self._cargado > self.ttl:
+                try:
+                    self._recargar()
+                except Exception as e:
+                    # Sin conexión se sigue con la última lista conocida
+                    print(f"Error al leer tokens revocados: {e}")
+            if jti in self._jtis:
+                return True
+        if self._en_almacen(jti):
+            with self._lock:
+                self._jtis.add(jti)
+            return True
+        return False
+
+    def agregar(self, jti: str, expiracion: int):
+        get_supabase_client().table("tokens_revocados").upsert({
+            "jti": jti,
+            "expiracion": datetime.fromtimestamp(expiracion, timezone.utc).isoformat()
+        }, ignore_duplicates=True).execute()
+        with self._lock:
+            self._jtis.add(jti)
+        almacen = get_almacen()
+        if almacen.compartido:
+            try:
+                almacen.set(PREFIJO_REVOCADO + jti, b"1", ttl=max(1, expiracion - time.time()))
+            except Exception as e:
+                # La tabla ya tiene la revocación: las demás réplicas la verán al releerla
+                print(f"Error al publicar la revocación en el almacén compartido: {e}")
+
+
+revocados = ListaRevocados()
+
+
+def verificar_token(token: str):
+    """
+    Valida un token de sesión.
+
+    La firma y la expiración se comprueban localmente; solo si pasan se
+    consulta la lista de revocados (en memoria).
+
+    Returns:
+        dict: datos del token, o None si no es válido
+    """
+    datos = leer_token(token) if token else None
+    if datos is None or revocados.contiene(datos["jti"]):
+        return None
+    return datos
+
+
+def revocar_token(token: str):
+    """Invalida un token antes de su vencimiento (cierre de sesión)"""
+    datos = leer_token(token) if token else None
+    if datos is None:
+        # Token inválido o ya vencido: no hace falta guardarlo
+        return {"success": True, "message": "El token ya no era válido"}
+    try:
+        revocados.agregar(datos["jti"], datos["exp"])
+        return {"success": True, "message": "Sesión cerrada correctamente"}
+    except Exception as e:
+        return {"success": False, "message": f"Error al revocar el token: {str(e)}"}
+
+
+def renovar_token(token: str):
+    """
+    Reemplaza un token válido por uno nuevo de la misma sesión.
+
+    El nuevo tiene otro `jti` y vence DURACION_TOKEN después de ahora; el
+    anterior se revoca, así que un enlace copiado de la barra de
+    direcciones deja de valer en cuanto el usuario recarga la página.
+
+    Returns:
+        str: token nuevo, o None si el anterior no era válido
+    """
+    datos = verificar_token(token) if token else None
+    if datos is None:
+        return None
+    nuevo = emitir_token({"id": datos["uid"]}, sesion=datos.get("sid", datos["jti"]),
+                         inicio=datos.get("ini", datos["iat"]))
+    resultado = revocar_token(token)
+    if not resultado["success"]:
+        print(resultado["message"])
+    return nuevo
+
+
+cache_usuarios = get_cache("sesion_usuarios", ttl=TTL_USUARIO, max_entradas=10000)
+
+
+def usuario_vigente(usuario_id: int):
+    """Usuario actual en la base (id, nombre, email y rol), o None si ya no existe"""
+    def cargar():
+        filas = get_supabase_client().table("usuarios")\
+            .select("id, nombre, email, rol")\
+            .eq("id", usuario_id)\
+            .execute().data
+        return filas[0] if filas else None
+    return cache_usuarios.obtener(usuario_id, cargar)
+
+
+def restaurar_usuario(token: str):
+    """
+    Usuario de una sesión guardada en un token, con sus datos actuales.
+
+    Además de la firma, el vencimiento y la revocación, comprueba que el
+    usuario siga existiendo y toma el rol de la base y no del token: un
+    usuario eliminado o con otro rol no recupera la sesión anterior. La
+    consulta se reutiliza TTL_USUARIO segundos; si la base no responde la
+    sesión no se restaura.
+
+    Returns:
+        dict: datos de sesión del usuario, o None
+    """
+    datos = verificar_token(token) if token else None
+    if datos is None:
+        return None
+    try:
+        return usuario_vigente(datos["uid"])
+    except Exception as e:
+        print(f"Error al comprobar el usuario de la sesión: {e}")
+        return None
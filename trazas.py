@@ -0,0 +1,257 @@
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from conexion import HistogramaLatencia, LIMITES_LATENCIA_MS, agregar_observador
+
+# Consultas más lentas que esto (ms) quedan en el registro de consultas lentas
+UMBRAL_LENTA_MS = float(os.getenv("TRAZAS_UMBRAL_LENTA_MS", "500"))
+MAX_LENTAS = int(os.getenv("TRAZAS_MAX_LENTAS", "100"))
+# Reruns que se conservan por sesión
+MAX_RERUNS = int(os.getenv("TRAZAS_MAX_RERUNS", "30"))
+# Sesiones con reruns guardados; se descarta la que lleva más tiempo sin actividad (LRU)
+MAX_SESIONES = int(os.getenv("TRAZAS_MAX_SESIONES", "200"))
+
+# Archivo de métricas en formato de texto de Prometheus (vacío = desactivado)
+ARCHIVO_PROMETHEUS = os.getenv(
+    "TRAZAS_ARCHIVO_PROMETHEUS", os.path.join(tempfile.gettempdir(), "reservas_deportivas.prom")
+)
+INTERVALO_PROMETHEUS = float(os.getenv("TRAZAS_INTERVALO_PROMETHEUS", "15"))
+
+
+class Traza:
+    """Spans de un rerun: funciones de render y consultas, en orden de inicio"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.fecha = datetime.now()
+        self.inicio = time.perf_counter()
+        self.duracion_ms = None
+        self.spans = []
+        self.profundidad = 0
+
+    @property
+    def consultas(self):
+        return [s for s in self.spans if s["tipo"] == "consulta"]
+
+    def resumen(self):
+        consultas = self.consultas
+        return {
+            "fecha": self.fecha,
+            "vista": self.nombre,
+            "duracion_ms": self.duracion_ms,
+            "consultas": len(consultas),
+            "ms_consultas": sum(s["ms"] for s in consultas),
+            "filas": sum(s["filas"] or 0 for s in consultas),
+            "bytes": sum(s["bytes"] or 0 for s in consultas)
+        }
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_por_forma = {}
+_reruns = OrderedDict()
+_lentas = deque(maxlen=MAX_LENTAS)
+_histograma_reruns = HistogramaLatencia()
+_ultima_escritura = 0.0
+
+
+def traza_actual():
+    return getattr(_local, "traza", None)
+
+
+def _id_sesion():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else "local"
+    except Exception:
+        return "local"
+
+
+def _registrar_consulta(consulta, ms, respuesta, error, bytes_respuesta):
+    """Observador de conexion: guarda cada execute() como span del rerun actual"""
+    datos = getattr(respuesta, "data", None)
+    span = {
+        "tipo": "consulta",
+        "nombre": consulta.forma,
+        "inicio_ms": None,
+        "ms": ms,
+        "filas": len(datos) if isinstance(datos, list) else None,
+        "bytes": bytes_respuesta,
+        "error": str(error) if error else None
+    }
+    traza = traza_actual()
+    if traza is not None:
+        span["inicio_ms"] = (time.perf_counter() - traza.inicio) * 1000 - ms
+        span["profundidad"] = traza.profundidad
+        traza.spans.append(span)
+
+    with _lock:
+        _por_forma.setdefault(consulta.forma, HistogramaLatencia()).registrar(ms)
+        if error:
+            _por_forma[consulta.forma].errores += 1
+        if ms >= UMBRAL_LENTA_MS:
+            _lentas.append({"fecha": datetime.now(), "vista": traza.nombre if traza else None, **span})
+
+
+agregar_observador(_registrar_consulta)
+
+
+def trazar(funcion):
+    """
+    Mide una función de render como span del rerun.
+
+    La primera función trazada de un rerun abre la traza y la cierra al
+    terminar (también si sale con st.stop() o st.rerun()).
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        traza = traza_actual()
+        raiz = traza is None
+        if raiz:
+            traza = _local.traza = Traza(funcion.__name__)
+        span = {
+            "tipo": "render",
+            "nombre": funcion.__name__,
+            "inicio_ms": (time.perf_counter() - traza.inicio) * 1000,
+            "profundidad": traza.profundidad,
+            "ms": None,
+            "filas": None,
+            "bytes": None,
+            "error": None
+        }
+        traza.spans.append(span)
+        traza.profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            span["ms"] = (time.perf_counter() - inicio) * 1000
+            traza.profundidad -= 1
+            if raiz:
+                _local.traza = None
+                _cerrar(traza)
+    return envoltura
+
+
+def en_traza(funcion):
+    """
+    Envuelve `funcion` para correrla en otro hilo dentro de la traza actual.
+
+    Las consultas que haga se registran como spans del rerun que la lanzó.
+    """
+    traza = traza_actual()
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        _local.traza = traza
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _local.traza = None
+    return envoltura
+
+
+def _cerrar(traza):
+    traza.duracion_ms = (time.perf_counter() - traza.inicio) * 1000
+    with _lock:
+        id_sesion = _id_sesion()
+        _reruns.setdefault(id_sesion, deque(maxlen=MAX_RERUNS)).append(traza)
+        _reruns.move_to_end(id_sesion)
+        while len(_reruns) > MAX_SESIONES:
+            _reruns.popitem(last=False)
+        _histograma_reruns.registrar(traza.duracion_ms)
+    escribir_prometheus()
+
+
+def reruns_sesion(id_sesion: str = None):
+    """Trazas de los últimos reruns de una sesión (la actual por defecto)"""
+    with _lock:
+        return list(_reruns.get(id_sesion or _id_sesion(), []))
+
+
+def estadisticas_formas():
+    """Percentiles de latencia por forma de consulta, de la más lenta a la más rápida"""
+    with _lock:
+        filas = [
+            {
+                "forma": forma,
+                "llamadas": h.total,
+                "errores": h.errores,
+                "p50_ms": h.percentil(50),
+                "p95_ms": h.percentil(95),
+                "p99_ms": h.percentil(99)
+            }
+            for forma, h in _por_forma.items()
+        ]
+    return sorted(filas, key=lambda f: f["p95_ms"], reverse=True)
+
+
+def consultas_lentas():
+    with _lock:
+        return list(reversed(_lentas))
+
+
+def _etiqueta(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histograma_prometheus(nombre, h, etiquetas=""):
+    lineas, acumulado = [], 0
+    separador = "," if etiquetas else ""
+    for limite, cuenta in zip([*LIMITES_LATENCIA_MS, "+Inf"], h.cuentas):
+        acumulado += cuenta
+        lineas.append(f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}')
+    sufijo = f"{{{etiquetas}}}" if etiquetas else ""
+    lineas.append(f"{nombre}_sum{sufijo} {h.suma_ms:.3f}")
+    lineas.append(f"{nombre}_count{sufijo} {h.total}")
+    return lineas
+
+
+def texto_prometheus() -> str:
+    """Métricas en formato de exposición de texto de Prometheus"""
+    with _lock:
+        lineas = [
+            "# HELP reservas_consulta_ms Duración de las consultas a Supabase por forma.",
+            "# TYPE reservas_consulta_ms histogram"
+        ]
+        for forma, h in sorted(_por_forma.items()):
+            lineas += _histograma_prometheus("reservas_consulta_ms", h, f'forma="{_etiqueta(forma)}"')
+        lineas += [
+            "# HELP reservas_consulta_errores_total Consultas a Supabase que terminaron en error.",
+            "# TYPE reservas_consulta_errores_total counter"
+        ]
+        lineas += [
+            f'reservas_consulta_errores_total{{forma="{_etiqueta(forma)}"}} {h.errores}'
+            for forma, h in sorted(_por_forma.items())
+        ]
+        lineas += [
+            "# HELP reservas_rerun_ms Duración de los reruns trazados.",
+            "# TYPE reservas_rerun_ms histogram"
+        ]
+        lineas += _histograma_prometheus("reservas_rerun_ms", _histograma_reruns)
+    return "\n".join(lineas) + "\n"
+
+
+def escribir_prometheus(forzar: bool = False):
+    """Escribe el archivo de métricas como mucho una vez cada INTERVALO_PROMETHEUS segundos"""
+    global _ultima_escritura
+    if not ARCHIVO_PROMETHEUS:
+        return
+    ahora = time.monotonic()
+    with _lock:
+        if not forzar and ahora - _ultima_escritura < INTERVALO_PROMETHEUS:
+            return
+        _ultima_escritura = ahora
+    try:
+        # Se escribe en un temporal y se renombra para que el lector nunca vea un archivo a medias
+        temporal = f"{ARCHIVO_PROMETHEUS}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(texto_prometheus())
+        os.replace(temporal, ARCHIVO_PROMETHEUS)
+    except Exception as e:
+        print(f"Error al escribir las métricas: {e}")